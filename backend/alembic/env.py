@@ -7,7 +7,15 @@ from sqlmodel import SQLModel
 from app.core.config import settings
 
 # Import all models so SQLModel.metadata is populated
-from app.db.models import AnalysisResult, Repository, User  # noqa: F401
+from app.db.models import (  # noqa: F401
+    AnalysisResult,
+    LLMSpendEntry,
+    PortfolioCard,
+    RepoMetadataSnapshot,
+    Repository,
+    User,
+    WorkflowEvent,
+)
 
 config = context.config
 
@@ -0,0 +1,65 @@
+"""Add llm_spend_ledger table
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19
+
+Persistent per-call LLM spend ledger. Each call reserves its pre-flight
+cost estimate, then settles with actual prompt/completion/cached tokens
+and cost. Rolling per-user (token fingerprint) and per-workflow budgets
+are enforced against settled cost + live reservations. See
+``app/services/spend_ledger.py``.
+
+``token_fingerprint`` + ``created_at`` back the rolling-window query;
+``workflow_id`` backs the per-workflow budget + query API.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "llm_spend_ledger",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("token_fingerprint", sa.String(length=64), nullable=False, server_default=""),
+        sa.Column("workflow_id", sa.String(length=256), nullable=True),
+        sa.Column("model", sa.String(length=128), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="reserved"),
+        sa.Column("reserved_cost_usd", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("prompt_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("completion_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("cached_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("cost_usd", sa.Float(), nullable=False, server_default="0"),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.Column("settled_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id", name="pk_llm_spend_ledger"),
+    )
+    op.create_index(
+        "ix_llm_spend_ledger_token_fingerprint_created_at",
+        "llm_spend_ledger",
+        ["token_fingerprint", "created_at"],
+    )
+    op.create_index(
+        "ix_llm_spend_ledger_workflow_id",
+        "llm_spend_ledger",
+        ["workflow_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_llm_spend_ledger_workflow_id", table_name="llm_spend_ledger")
+    op.drop_index("ix_llm_spend_ledger_token_fingerprint_created_at", table_name="llm_spend_ledger")
+    op.drop_table("llm_spend_ledger")
@@ -0,0 +1,45 @@
+"""Add portfolio_cards table
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19
+
+Per-repo portfolio card cache for the two-stage profile README pipeline.
+A card is the LLM summary of one repo at one HEAD SHA; re-generating a
+portfolio only re-summarises repos whose HEAD moved. See
+``app/services/llm_service.py:generate_portfolio_card``.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "portfolio_cards",
+        sa.Column("repo_full_name", sa.String(length=256), nullable=False),
+        sa.Column("head_sha", sa.String(length=64), nullable=False),
+        sa.Column("card_version", sa.Integer(), nullable=False),
+        sa.Column("card", sa.JSON(), nullable=False),
+        sa.Column("model", sa.String(length=128), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.PrimaryKeyConstraint(
+            "repo_full_name", "head_sha", "card_version", name="pk_portfolio_cards",
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("portfolio_cards")
@@ -0,0 +1,46 @@
+"""Add workflow_events table
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19
+
+Append-only progress events that workflows publish (via a local activity)
+and the SSE / long-poll endpoints tail by ``id``, so watching a workflow
+costs an indexed DB read instead of a Temporal query. See
+``app/services/progress_stream.py``.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "workflow_events",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("workflow_id", sa.String(length=256), nullable=False),
+        sa.Column("kind", sa.String(length=32), nullable=False),
+        sa.Column("data", sa.JSON(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.PrimaryKeyConstraint("id", name="pk_workflow_events"),
+    )
+    op.create_index(
+        "ix_workflow_events_workflow_id_id", "workflow_events", ["workflow_id", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_workflow_events_workflow_id_id", table_name="workflow_events")
+    op.drop_table("workflow_events")
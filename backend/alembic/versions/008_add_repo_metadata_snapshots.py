@@ -0,0 +1,39 @@
+"""Add repo_metadata_snapshots table
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19
+
+Per-user snapshot of the owned-repo listing (stars, fork, language,
+pushed_at), refreshed by ``GET /api/repos``. Portfolio runs resolve the
+selected repos from it instead of paginating through GitHub again.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "repo_metadata_snapshots",
+        sa.Column("token_fingerprint", sa.String(length=64), nullable=False),
+        sa.Column("repos", sa.JSON(), nullable=False),
+        sa.Column(
+            "refreshed_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.PrimaryKeyConstraint("token_fingerprint", name="pk_repo_metadata_snapshots"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("repo_metadata_snapshots")
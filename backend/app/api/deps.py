@@ -1,12 +1,38 @@
 # Shared dependencies for API routes
 from fastapi import HTTPException, Request
-from temporalio.client import Client
+from temporalio.client import Client, WorkflowExecutionStatus
+from temporalio.service import RPCError, RPCStatusCode
 
-from app.core.config import settings
+from app.temporal.converter import connect
 
 
 async def get_temporal_client() -> Client:
-    return await Client.connect(settings.TEMPORAL_ADDRESS)
+    return await connect()
+
+
+async def request_cancellation(client: Client, workflow_id: str, prefix: str) -> dict:
+    """Ask Temporal to cancel a running workflow started with ``prefix``.
+
+    Cancellation is cooperative: the workflow stops scheduling work,
+    in-flight activities are cancelled on their next heartbeat, and the
+    workflow records what it got done before ending as cancelled.
+    """
+    if not workflow_id.startswith(prefix):
+        raise HTTPException(status_code=404, detail=f"Workflow '{workflow_id}' not found")
+    handle = client.get_workflow_handle(workflow_id)
+    try:
+        description = await handle.describe()
+    except RPCError as exc:
+        if exc.status == RPCStatusCode.NOT_FOUND:
+            raise HTTPException(status_code=404, detail=f"Workflow '{workflow_id}' not found")
+        raise
+    if description.status != WorkflowExecutionStatus.RUNNING:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Workflow '{workflow_id}' is not running ({description.status.name.lower()})",
+        )
+    await handle.cancel()
+    return {"workflow_id": workflow_id, "status": "cancelling"}
 
 
 def get_current_token(request: Request) -> str:
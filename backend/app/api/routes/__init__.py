@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.routes import health, auth, repos, garden, portfolio, logs
+from app.api.routes import health, auth, repos, garden, portfolio, logs, spend, progress
 
 # Create main router and include sub-routers
 api_router = APIRouter()
@@ -10,5 +10,7 @@ api_router.include_router(repos.router, tags=["repos"])
 api_router.include_router(garden.router, tags=["garden"])
 api_router.include_router(portfolio.router, tags=["portfolio"])
 api_router.include_router(logs.router, prefix="", tags=["logs"])
+api_router.include_router(spend.router, tags=["llm"])
+api_router.include_router(progress.router, tags=["progress"])
 
 __all__ = ["api_router"]
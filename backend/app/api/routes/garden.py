@@ -1,17 +1,24 @@
-import uuid
-
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 
+from app.core.config import settings
 from app.services import github_service
 from app.services.idempotency import (
+    DEDUP_START_POLICIES,
+    derive_workflow_id,
     get_idempotency_key,
     lookup_idempotency_key,
     record_idempotency_key,
 )
 from app.db.session import get_session
+from app.temporal.schedules import (
+    delete_regarden_schedule,
+    describe_regarden_schedule,
+    upsert_regarden_schedule,
+)
+from app.temporal.queues import WORKFLOW_QUEUE
 from app.temporal.workflows import BatchGardeningInput, BatchGardeningWorkflow
-from app.api.deps import get_current_token, get_temporal_client
+from app.api.deps import get_current_token, get_temporal_client, request_cancellation
 
 router = APIRouter()
 
@@ -20,6 +27,8 @@ _ENDPOINT = "/garden"
 
 class GardenRequest(BaseModel):
     repo_ids: list[int]
+    # Re-analyse every repo, even ones unchanged since their last report.
+    force_refresh: bool = False
 
 
 @router.post("/garden")
@@ -30,6 +39,15 @@ async def garden_repos(
 ):
     """Analyze and generate docs for multiple repos in batch.
 
+    Only repos pushed to since their last stored health report (or whose
+    report is older than ``BATCH_FRESHNESS_MAX_AGE_HOURS``) are re-analysed;
+    the rest come back with their stored report. ``force_refresh`` skips
+    the check.
+
+    The workflow ID is derived from the caller, the repo IDs and
+    ``force_refresh``, so a repeat request while the batch runs returns
+    the same workflow instead of starting another one.
+
     E5: pass an ``Idempotency-Key`` header to dedup within 24h —
     repeated calls with the same key + same Bearer token return the
     previously-issued workflow_id instead of starting a new batch.
@@ -45,12 +63,23 @@ async def garden_repos(
     repo_ids = body.repo_ids[:50]  # Cap at 50 repos per batch
 
     client = await get_temporal_client()
-    workflow_id = f"batch-gardening-{uuid.uuid4()}"
+    workflow_id = derive_workflow_id(
+        "batch-gardening", token, sorted(set(repo_ids)), body.force_refresh,
+    )
     await client.start_workflow(
         BatchGardeningWorkflow.run,
-        BatchGardeningInput(access_token=token, repo_ids=repo_ids),
+        BatchGardeningInput(
+            access_token=token,
+            repo_ids=repo_ids,
+            force_refresh=body.force_refresh,
+            max_age_hours=settings.BATCH_FRESHNESS_MAX_AGE_HOURS,
+            max_concurrent=settings.BATCH_MAX_CONCURRENT_CHILDREN,
+            children_per_run=settings.BATCH_CHILDREN_PER_RUN,
+            chunk_size=settings.BATCH_CHUNK_SIZE,
+        ),
         id=workflow_id,
-        task_queue="gardener-queue",
+        task_queue=WORKFLOW_QUEUE,
+        **DEDUP_START_POLICIES,
     )
 
     if idem_key:
@@ -65,15 +94,72 @@ async def garden_repos(
 
 
 @router.get("/garden/status/{workflow_id}")
-async def garden_status(workflow_id: str, token: str = Depends(get_current_token)):
-    """Poll the batch gardening workflow status."""
+async def garden_status(
+    workflow_id: str,
+    since: int | None = Query(None, ge=0),
+    token: str = Depends(get_current_token),
+):
+    """Poll the batch gardening workflow status.
+
+    Counters and ``average_score`` cover the whole batch. Pass ``since`` (the
+    previous response's ``next_index``) to get only the results added since,
+    so each poll costs the same however big the batch grows.
+    """
     client = await get_temporal_client()
     handle = client.get_workflow_handle(workflow_id)
+    args = [] if since is None else [since]
     try:
-        status = await handle.query(BatchGardeningWorkflow.get_status)
+        status = await handle.query(BatchGardeningWorkflow.get_status, *args)
     except Exception:
         raise HTTPException(
             status_code=404,
             detail=f"Workflow '{workflow_id}' not found or not queryable",
         )
     return status
+
+
+@router.post("/garden/cancel/{workflow_id}")
+async def cancel_garden(workflow_id: str, token: str = Depends(get_current_token)):
+    """Cancel a running batch.
+
+    Repos not yet started are skipped and in-flight analyses are cancelled.
+    Results so far stay available from ``/garden/status``, and the progress
+    feed ends with a ``cancelled`` event.
+    """
+    client = await get_temporal_client()
+    return await request_cancellation(client, workflow_id, prefix="batch-gardening-")
+
+
+@router.put("/garden/schedule")
+async def enable_garden_schedule(token: str = Depends(get_current_token)):
+    """Turn on (or refresh) background re-gardening for the current user.
+
+    A Temporal Schedule re-analyses, every ``REGARDEN_INTERVAL_HOURS``, only
+    the repos pushed to since their last health report. Calling this again
+    refreshes the stored token and settings.
+    """
+    username = await github_service.get_username(token)
+    client = await get_temporal_client()
+    schedule_id = await upsert_regarden_schedule(client, token, username)
+    return {"schedule_id": schedule_id, "interval_hours": settings.REGARDEN_INTERVAL_HOURS}
+
+
+@router.get("/garden/schedule")
+async def get_garden_schedule(token: str = Depends(get_current_token)):
+    """Next run times and recent runs of the user's re-gardening schedule."""
+    username = await github_service.get_username(token)
+    client = await get_temporal_client()
+    schedule = await describe_regarden_schedule(client, username)
+    if schedule is None:
+        raise HTTPException(status_code=404, detail="No re-gardening schedule")
+    return schedule
+
+
+@router.delete("/garden/schedule")
+async def disable_garden_schedule(token: str = Depends(get_current_token)):
+    """Turn off background re-gardening for the current user."""
+    username = await github_service.get_username(token)
+    client = await get_temporal_client()
+    if not await delete_regarden_schedule(client, username):
+        raise HTTPException(status_code=404, detail="No re-gardening schedule")
+    return {"deleted": True}
@@ -4,6 +4,7 @@ import uuid
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 
+from app.core.config import settings
 from app.services import github_service
 from app.services.idempotency import (
     get_idempotency_key,
@@ -11,9 +12,10 @@ from app.services.idempotency import (
     record_idempotency_key,
 )
 from app.db.session import get_session
+from app.temporal.queues import WORKFLOW_QUEUE
 from app.temporal.workflows import PortfolioInput, PortfolioWorkflow
 from app.temporal.activities import create_or_update_profile_repo_activity
-from app.api.deps import get_current_token, get_temporal_client
+from app.api.deps import get_current_token, get_temporal_client, request_cancellation
 
 router = APIRouter()
 
@@ -64,9 +66,11 @@ async def generate_portfolio(
             repo_ids=body.repo_ids,
             bio=body.bio,
             links_json=links_json,
+            max_concurrent_scans=settings.PORTFOLIO_MAX_CONCURRENT_SCANS,
+            snapshot_max_age_hours=settings.PORTFOLIO_SNAPSHOT_MAX_AGE_HOURS,
         ),
         id=workflow_id,
-        task_queue="gardener-queue",
+        task_queue=WORKFLOW_QUEUE,
     )
 
     if idem_key:
@@ -95,6 +99,13 @@ async def portfolio_status(workflow_id: str, token: str = Depends(get_current_to
     return status
 
 
+@router.post("/portfolio/cancel/{workflow_id}")
+async def cancel_portfolio(workflow_id: str, token: str = Depends(get_current_token)):
+    """Cancel a running Portfolio workflow; its stage becomes ``cancelled``."""
+    client = await get_temporal_client()
+    return await request_cancellation(client, workflow_id, prefix="portfolio-")
+
+
 @router.post("/portfolio/publish")
 async def publish_portfolio(
     body: PortfolioPublishRequest,
@@ -0,0 +1,72 @@
+import json
+
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import get_current_token
+from app.services.progress_stream import hub
+
+router = APIRouter()
+
+# Comment line sent when nothing happened for this long, so proxies
+# don't close an idle stream.
+KEEPALIVE_S = 15.0
+
+
+@router.get("/progress/{workflow_id}")
+async def progress_long_poll(
+    workflow_id: str,
+    after: int = Query(0, ge=0),
+    timeout: float = Query(25.0, ge=0, le=60),
+    token: str = Depends(get_current_token),
+):
+    """Long-poll progress events for a batch or portfolio workflow.
+
+    Returns as soon as there are events with ``id > after`` (or after
+    ``timeout`` seconds with none). Pass the returned ``cursor`` as
+    ``after`` on the next call; ``done`` means the workflow has finished.
+    Reads the event table, never Temporal.
+    """
+    events, done = await hub.wait(workflow_id, after, timeout)
+    cursor = events[-1]["id"] if events else after
+    return {"events": events, "cursor": cursor, "done": done}
+
+
+def _sse(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['kind']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+@router.get("/progress/{workflow_id}/stream")
+async def progress_stream(
+    workflow_id: str,
+    after: int = Query(0, ge=0),
+    last_event_id: int | None = Header(None),
+    token: str = Depends(get_current_token),
+):
+    """Server-Sent Events stream of the same progress events.
+
+    Resumes after ``Last-Event-ID`` (or ``after``) on reconnect and ends
+    after the terminal ``completed`` / ``draft_ready`` / ``failed`` /
+    ``cancelled`` event.
+    Browsers' ``EventSource`` can't send the Bearer header, so read it with
+    ``fetch`` streaming, or use the long-poll endpoint.
+    """
+    cursor = last_event_id if last_event_id is not None else after
+
+    async def events():
+        nonlocal cursor
+        while True:
+            batch, done = await hub.wait(workflow_id, cursor, KEEPALIVE_S)
+            for event in batch:
+                yield _sse(event)
+                cursor = event["id"]
+            if done:
+                return
+            if not batch:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
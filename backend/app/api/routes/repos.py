@@ -1,20 +1,25 @@
 import json
 import uuid
 
+import structlog
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 
+from app.core.config import settings
 from app.db.crud import (
     get_draft_proposal,
     get_latest_analysis_for_repos,
     save_draft_proposal,
+    save_repo_metadata_snapshot,
     set_repo_status,
 )
 from app.db.session import get_session
 from app.schemas.analysis import RepoHealth
 from app.schemas.github import Repo
 from app.services import github_service
+from app.services.llm_service import DOC_TYPE_PROMPTS
 from app.temporal.activities import create_docs_pull_request_activity
+from app.temporal.queues import WORKFLOW_QUEUE
 from app.temporal.workflows import (
     AnalysisInput,
     AnalysisWorkflow,
@@ -24,18 +29,28 @@ from app.temporal.workflows import (
     JanitorInput,
     JanitorWorkflow,
 )
-from app.api.deps import get_current_token, get_temporal_client
+from app.api.deps import get_current_token, get_temporal_client, request_cancellation
 from app.services.idempotency import (
+    DEDUP_START_POLICIES,
+    derive_workflow_id,
+    fingerprint_token,
     get_idempotency_key,
     lookup_idempotency_key,
     record_idempotency_key,
 )
 
 router = APIRouter()
+logger = structlog.get_logger(__name__)
 
 _FIX_ENDPOINT = "/fix"
 _COMMIT_ENDPOINT = "/commit"
 
+# Repo fields kept in the per-user metadata snapshot.
+SNAPSHOT_FIELDS = {
+    "id", "name", "full_name", "private", "html_url", "description",
+    "fork", "stargazers_count", "language", "pushed_at",
+}
+
 
 @router.post("/test-workflow")
 async def test_workflow(token: str = Depends(get_current_token)):
@@ -44,7 +59,7 @@ async def test_workflow(token: str = Depends(get_current_token)):
         GreetingWorkflow.run,
         "Gardener",
         id=f"greeting-{uuid.uuid4()}",
-        task_queue="gardener-queue",
+        task_queue=WORKFLOW_QUEUE,
     )
     return {"result": result}
 
@@ -56,6 +71,20 @@ async def list_repos(token: str = Depends(get_current_token)):
     except Exception:
         raise HTTPException(status_code=502, detail="Failed to fetch repos from GitHub")
 
+    # Snapshot the listing so portfolio runs can resolve repos without
+    # listing them from GitHub again. Best effort: the response doesn't
+    # depend on it.
+    try:
+        with get_session() as session:
+            save_repo_metadata_snapshot(
+                session,
+                token_fingerprint=fingerprint_token(token),
+                repos=[r.model_dump(include=SNAPSHOT_FIELDS) for r in repos],
+            )
+            session.commit()
+    except Exception as exc:
+        logger.warning("repo_snapshot_save_failed", error=str(exc))
+
     # Hydrate repos with persisted analysis data
     repo_ids = [r.id for r in repos]
     try:
@@ -87,29 +116,49 @@ async def list_repos(token: str = Depends(get_current_token)):
 
 @router.post("/analyze/{repo_id}")
 async def analyze_repo(repo_id: int, token: str = Depends(get_current_token)):
+    """Health-check one repo.
+
+    The workflow ID is derived from the caller, the repo and its last push,
+    so a repeat request while the analysis runs returns the same workflow.
+    """
     try:
-        full_name = await github_service.get_repo_full_name(token, repo_id)
+        details = await github_service.get_repo_details(token, repo_id)
     except Exception:
         raise HTTPException(status_code=404, detail=f"Repo with id {repo_id} not found")
 
     client = await get_temporal_client()
-    workflow_id = f"analysis-{repo_id}-{uuid.uuid4()}"
+    workflow_id = derive_workflow_id(f"analysis-{repo_id}", token, details["pushed_at"])
     await client.start_workflow(
         AnalysisWorkflow.run,
-        AnalysisInput(repo_full_name=full_name, access_token=token),
+        AnalysisInput(repo_full_name=details["full_name"], access_token=token),
         id=workflow_id,
-        task_queue="gardener-queue",
+        task_queue=WORKFLOW_QUEUE,
+        **DEDUP_START_POLICIES,
     )
     return {"workflow_id": workflow_id}
 
 
+class FixRequest(BaseModel):
+    # Docs to draft from one scan; defaults to JANITOR_DOC_TYPES.
+    doc_types: list[str] | None = None
+
+
 @router.post("/fix/{repo_id}")
 async def fix_repo(
     repo_id: int,
+    body: FixRequest | None = None,
     token: str = Depends(get_current_token),
     idem_key: str | None = Depends(get_idempotency_key),
 ):
-    """Trigger Janitor agent to create README PR for a repo.
+    """Trigger Janitor agent to draft docs for a repo.
+
+    One scan and one codebase analysis feed every requested doc type
+    (``README``, ``CONTRIBUTING``, ``ARCHITECTURE``, ``API``), which are
+    generated concurrently, up to ``JANITOR_MAX_CONCURRENT_DOCS`` at a time.
+
+    The workflow ID is derived from the caller, the repo, its last push and
+    the doc types, so a repeat request while the run is in flight attaches
+    to it instead of starting a second clone + LLM pass.
 
     E5: pass an ``Idempotency-Key`` header to dedup within 24h —
     repeated calls with the same key + token return the previously-issued
@@ -123,13 +172,25 @@ async def fix_repo(
             if cached:
                 return {"workflow_id": cached, "idempotent": True}
 
+    doc_types = (body and body.doc_types) or [
+        doc_type.strip() for doc_type in settings.JANITOR_DOC_TYPES.split(",") if doc_type.strip()
+    ]
+    unknown = sorted(set(doc_types) - set(DOC_TYPE_PROMPTS))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown doc types {unknown}; expected any of {sorted(DOC_TYPE_PROMPTS)}",
+        )
+
     try:
         details = await github_service.get_repo_details(token, repo_id)
     except Exception:
         raise HTTPException(status_code=404, detail=f"Repo with id {repo_id} not found")
 
     client = await get_temporal_client()
-    workflow_id = f"janitor-{repo_id}-{uuid.uuid4()}"
+    workflow_id = derive_workflow_id(
+        f"janitor-{repo_id}", token, details["pushed_at"], sorted(set(doc_types)),
+    )
     await client.start_workflow(
         JanitorWorkflow.run,
         JanitorInput(
@@ -137,9 +198,13 @@ async def fix_repo(
             access_token=token,
             description=details["description"],
             github_repo_id=repo_id,
+            doc_types=doc_types,
+            max_concurrent_docs=settings.JANITOR_MAX_CONCURRENT_DOCS,
+            local_persistence=settings.JANITOR_LOCAL_PERSISTENCE,
         ),
         id=workflow_id,
-        task_queue="gardener-queue",
+        task_queue=WORKFLOW_QUEUE,
+        **DEDUP_START_POLICIES,
     )
 
     if idem_key:
@@ -153,6 +218,17 @@ async def fix_repo(
     return {"workflow_id": workflow_id}
 
 
+@router.post("/fix/cancel/{workflow_id}")
+async def cancel_fix(workflow_id: str, token: str = Depends(get_current_token)):
+    """Cancel a running Janitor run.
+
+    The clone or LLM call in flight is stopped. Unless a draft was already
+    saved, the repo's ``status`` goes back to ``idle``.
+    """
+    client = await get_temporal_client()
+    return await request_cancellation(client, workflow_id, prefix="janitor-")
+
+
 @router.post("/sync")
 async def sync_pr_status(token: str = Depends(get_current_token)):
     """Check GitHub for merged/closed PRs and update local DB state."""
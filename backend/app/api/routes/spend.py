@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.db.session import get_session
+from app.services.idempotency import fingerprint_token
+from app.services.spend_ledger import get_spend_summary, get_workflow_spend
+from app.api.deps import get_current_token
+
+router = APIRouter()
+
+
+@router.get("/llm/spend")
+async def llm_spend_summary(
+    hours: int = Query(24, ge=1, le=24 * 30),
+    token: str = Depends(get_current_token),
+):
+    """Rolling-window LLM spend for the caller, broken down by workflow."""
+    with get_session() as session:
+        return get_spend_summary(
+            session,
+            token_fingerprint=fingerprint_token(token),
+            window=timedelta(hours=hours),
+        )
+
+
+@router.get("/llm/spend/workflows/{workflow_id}")
+async def llm_workflow_spend(
+    workflow_id: str,
+    token: str = Depends(get_current_token),
+):
+    """Per-call LLM ledger for one of the caller's workflows."""
+    with get_session() as session:
+        result = get_workflow_spend(
+            session,
+            workflow_id=workflow_id,
+            token_fingerprint=fingerprint_token(token),
+        )
+    if result is None:
+        raise HTTPException(status_code=404, detail="No LLM spend recorded for this workflow")
+    return result
@@ -18,6 +18,70 @@ class Settings(BaseSettings):
     TEMPORAL_ADDRESS: str = "localhost:7233"
     FRONTEND_URL: str = ""
 
+    # Temporal payloads (app/temporal/converter.py) — orjson-encoded, and
+    # compressed with this codec ("zstd", "zlib" or "none") from this size
+    # up. Client and worker must agree on the converter.
+    TEMPORAL_PAYLOAD_CODEC: str = "zstd"
+    TEMPORAL_COMPRESS_MIN_BYTES: int = 4096
+
+    # Worker pools (app/temporal/queues.py) — which pools this worker
+    # process runs (comma-separated: workflows, github-io, llm, scan, db;
+    # empty = all), and the activities each pool runs at once.
+    WORKER_POOLS: str = ""
+    WORKER_MAX_CONCURRENT_WORKFLOWS: int = 20
+    WORKER_MAX_CONCURRENT_GITHUB_IO: int = 20
+    WORKER_MAX_CONCURRENT_LLM: int = 8
+    WORKER_MAX_CONCURRENT_SCAN: int = 2
+    WORKER_MAX_CONCURRENT_DB: int = 50
+    # Seconds in-flight activities get to finish after SIGTERM.
+    WORKER_SHUTDOWN_GRACE_S: float = 30.0
+
+    # Worker supervisor (python -m app.temporal.supervisor) — worker
+    # processes to run (0 = one per CPU core), each serving WORKER_POOLS.
+    # WORKER_PROCESS_POOLS overrides both: one pool set per process,
+    # ";"-separated, "*N" repeats an entry (e.g. "workflows,db;llm;scan*2").
+    # Aggregated health is served on WORKER_HEALTH_PORT (0 = off).
+    WORKER_PROCESSES: int = 0
+    WORKER_PROCESS_POOLS: str = ""
+    WORKER_HEALTH_PORT: int = 8081
+
+    # Batch gardening — AnalysisWorkflow children in flight at once, and
+    # children per workflow run before continue-as-new (bounds history).
+    BATCH_MAX_CONCURRENT_CHILDREN: int = 5
+    BATCH_CHILDREN_PER_RUN: int = 200
+    # > 0: health-check repos in chunks of this size, one activity per chunk
+    # (shared GitHub client + DB session) instead of a child workflow each.
+    BATCH_CHUNK_SIZE: int = 10
+    # Targeted batches skip repos not pushed to since their last health
+    # report, unless that report is older than this.
+    BATCH_FRESHNESS_MAX_AGE_HOURS: int = 168
+
+    # Scheduled re-gardening (PUT /api/garden/schedule) — one tick per user
+    # every interval. Batches of this size trickle across half the interval,
+    # and each tick may spend at most this share of the remaining GitHub quota.
+    REGARDEN_INTERVAL_HOURS: int = 6
+    REGARDEN_BATCH_SIZE: int = 5
+    REGARDEN_RATE_LIMIT_SHARE: float = 0.5
+
+    # Janitor — docs drafted per /fix when the request names none
+    # (comma-separated DOC_TYPE_PROMPTS keys), and how many generate at once.
+    JANITOR_DOC_TYPES: str = "README"
+    JANITOR_MAX_CONCURRENT_DOCS: int = 3
+    # JanitorWorkflow runs its status / draft DB writes as local activities
+    # (in-process on the worker, no task-queue round trip).
+    JANITOR_LOCAL_PERSISTENCE: bool = True
+
+    # Progress streaming — how often the API tails workflow_events for a
+    # watched workflow (one read per workflow, shared by all subscribers).
+    PROGRESS_POLL_INTERVAL_S: float = 1.0
+
+    # Portfolio — portfolio-card scans (GitHub reads + one LLM call each)
+    # running at once in PortfolioWorkflow.
+    PORTFOLIO_MAX_CONCURRENT_SCANS: int = 4
+    # Selected repos are resolved from the snapshot GET /api/repos saves;
+    # snapshots older than this are ignored and each ID is fetched instead.
+    PORTFOLIO_SNAPSHOT_MAX_AGE_HOURS: int = 24
+
     # E5 guardrails — LLM cost cap
     # Reject a request when (prompt_tokens * input_price + max_output_tokens *
     # output_price) > this. Default $0.50 is comfortable headroom for normal
@@ -28,6 +92,41 @@ class Settings(BaseSettings):
     # pre-flight INPUT-prompt size check: a prompt larger than this would
     # leave no room for output under most context windows.
     LLM_MAX_TOKENS_PER_REQUEST: int = 4000
+    # Aggregate caps enforced by the spend ledger (reserve-then-settle).
+    # Rolling 24h spend per GitHub token; 0 disables the check.
+    LLM_DAILY_BUDGET_USD: float = 5.0
+    # Lifetime spend of a single workflow run; 0 disables the check.
+    LLM_WORKFLOW_BUDGET_USD: float = 1.0
+
+    # Prompt layout — repo-aware calls share a byte-identical repo-context
+    # prefix so provider prompt caching kicks in from the second call on.
+    # Tokens reserved AFTER that prefix for task instructions + inputs; the
+    # context is packed against (prompt budget - this) so its size doesn't
+    # depend on the task.
+    LLM_TASK_PROMPT_RESERVE_TOKENS: int = 1000
+    # Attach an ephemeral cache_control breakpoint to the repo-context block.
+    LLM_PROMPT_CACHE_HINTS: bool = True
+
+    # Model cascade for codebase analysis — comma-separated, cheapest first.
+    # Each tier's JSON is validated against the summary schema and the next
+    # model is only called on a parse/validation failure. Empty = LLM_MODEL only.
+    LLM_ANALYZE_CASCADE: str = ""
+
+    # Structured output — send the analysis JSON schema as response_format
+    # (strict json_schema) so compliant providers can't go off-schema.
+    LLM_STRUCTURED_OUTPUT: bool = True
+    # Generated docs are validated locally (required sections, Mermaid rules);
+    # only flagged sections are re-requested, at most this many rounds. 0 = off.
+    LLM_DOC_REPAIR_ATTEMPTS: int = 1
+
+    # Request hedging for generate_doc / profile README — once a call has run
+    # longer than the observed LLM_HEDGE_QUANTILE latency (and at least
+    # LLM_HEDGE_MIN_DELAY_S), a duplicate goes to LLM_HEDGE_MODEL (empty =
+    # same model); the first usable answer wins and the other is cancelled.
+    LLM_HEDGING: bool = False
+    LLM_HEDGE_MODEL: str = ""
+    LLM_HEDGE_QUANTILE: float = 0.9
+    LLM_HEDGE_MIN_DELAY_S: float = 5.0
 
 
 settings = Settings()
@@ -2,7 +2,14 @@ from datetime import datetime, timezone
 
 from sqlmodel import Session, select
 
-from app.db.models import AnalysisResult, Repository, User
+from app.db.models import (
+    AnalysisResult,
+    PortfolioCard,
+    RepoMetadataSnapshot,
+    Repository,
+    User,
+    WorkflowEvent,
+)
 
 # Valid analysis result statuses
 STATUS_IDLE = "idle"
@@ -217,3 +224,90 @@ def get_latest_analysis_for_repos(
             best[github_repo_id] = analysis
 
     return best
+
+
+def get_portfolio_card(
+    session: Session, *, repo_full_name: str, head_sha: str, card_version: int
+) -> PortfolioCard | None:
+    return session.get(PortfolioCard, (repo_full_name, head_sha, card_version))
+
+
+def save_portfolio_card(
+    session: Session,
+    *,
+    repo_full_name: str,
+    head_sha: str,
+    card_version: int,
+    card: dict,
+    model: str,
+) -> PortfolioCard:
+    """Insert or overwrite the card for (repo, HEAD SHA, version)."""
+    row = get_portfolio_card(
+        session, repo_full_name=repo_full_name, head_sha=head_sha, card_version=card_version,
+    )
+    if row is None:
+        row = PortfolioCard(
+            repo_full_name=repo_full_name,
+            head_sha=head_sha,
+            card_version=card_version,
+            card=card,
+            model=model,
+        )
+        session.add(row)
+    else:
+        row.card = card
+        row.model = model
+        row.created_at = datetime.now(timezone.utc)
+    session.flush()
+    return row
+
+
+def append_workflow_events(
+    session: Session, *, workflow_id: str, events: list[dict]
+) -> list[WorkflowEvent]:
+    """Append progress events; each dict needs a ``kind``, the rest is data."""
+    rows = [
+        WorkflowEvent(
+            workflow_id=workflow_id,
+            kind=event["kind"],
+            data={k: v for k, v in event.items() if k != "kind"},
+        )
+        for event in events
+    ]
+    session.add_all(rows)
+    session.flush()
+    return rows
+
+
+def list_workflow_events(
+    session: Session, *, workflow_id: str, after_id: int = 0, limit: int = 500
+) -> list[WorkflowEvent]:
+    """Events for ``workflow_id`` with ``id > after_id``, oldest first."""
+    stmt = (
+        select(WorkflowEvent)
+        .where(WorkflowEvent.workflow_id == workflow_id, WorkflowEvent.id > after_id)
+        .order_by(WorkflowEvent.id)
+        .limit(limit)
+    )
+    return list(session.exec(stmt).all())
+
+
+def get_repo_metadata_snapshot(
+    session: Session, *, token_fingerprint: str
+) -> RepoMetadataSnapshot | None:
+    return session.get(RepoMetadataSnapshot, token_fingerprint)
+
+
+def save_repo_metadata_snapshot(
+    session: Session, *, token_fingerprint: str, repos: list[dict]
+) -> RepoMetadataSnapshot:
+    """Replace the caller's snapshot with a fresh listing."""
+    row = get_repo_metadata_snapshot(session, token_fingerprint=token_fingerprint)
+    if row is None:
+        row = RepoMetadataSnapshot(token_fingerprint=token_fingerprint, repos=repos)
+        session.add(row)
+    else:
+        row.repos = repos
+        row.refreshed_at = datetime.now(timezone.utc)
+    session.flush()
+    return row
@@ -1,6 +1,7 @@
 import uuid
 from datetime import datetime, timezone
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel, Column, JSON
 
 
@@ -64,3 +65,88 @@ class IdempotencyKey(SQLModel, table=True):
         default_factory=lambda: datetime.now(timezone.utc),
         index=True,
     )
+
+
+class LLMSpendEntry(SQLModel, table=True):
+    """One LLM call in the spend ledger (reserve-then-settle).
+
+    A row is inserted as ``reserved`` with the pre-flight cost estimate
+    before the provider call, then ``settled`` with actual token usage
+    and cost (or ``released`` if the call never produced usage). Rolling
+    budgets sum settled cost plus live reservations — see
+    ``app/services/spend_ledger.py``. Like ``idempotency_keys``, callers
+    are identified by token fingerprint, never the raw token.
+    """
+
+    __tablename__ = "llm_spend_ledger"
+    __table_args__ = (
+        Index("ix_llm_spend_ledger_token_fingerprint_created_at", "token_fingerprint", "created_at"),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    token_fingerprint: str = Field(default="", max_length=64)
+    workflow_id: str | None = Field(default=None, max_length=256, index=True)
+    model: str = Field(max_length=128)
+    status: str = Field(default="reserved", max_length=16)  # reserved | settled | released
+    reserved_cost_usd: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost_usd: float = 0.0
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    settled_at: datetime | None = Field(default=None)
+
+
+class PortfolioCard(SQLModel, table=True):
+    """Cached per-repo "portfolio card" for profile README generation.
+
+    Keyed by (repo, HEAD SHA): the card is an LLM-written summary of the
+    repo's code at that commit, so it stays valid until the repo is pushed
+    to. ``card_version`` lets a prompt change invalidate old cards without
+    a data migration. Volatile metadata (stars, forks, topics) is NOT
+    cached — it is overlaid fresh on every run.
+    """
+
+    __tablename__ = "portfolio_cards"
+
+    repo_full_name: str = Field(primary_key=True, max_length=256)
+    head_sha: str = Field(primary_key=True, max_length=64)
+    card_version: int = Field(primary_key=True)
+    card: dict = Field(sa_column=Column(JSON, nullable=False))
+    model: str = Field(max_length=128)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class WorkflowEvent(SQLModel, table=True):
+    """One progress event published by a running workflow.
+
+    Append-only: workflows write them through ``publish_progress_activity``
+    and the progress endpoints tail them by ``id`` (which doubles as the SSE
+    ``Last-Event-ID``). ``kind`` is e.g. ``stage``, ``repo_done``,
+    ``completed`` — see ``app/services/progress_stream.py``.
+    """
+
+    __tablename__ = "workflow_events"
+    __table_args__ = (Index("ix_workflow_events_workflow_id_id", "workflow_id", "id"),)
+
+    id: int | None = Field(default=None, primary_key=True)
+    workflow_id: str = Field(max_length=256)
+    kind: str = Field(max_length=32)
+    data: dict = Field(sa_column=Column(JSON, nullable=False))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class RepoMetadataSnapshot(SQLModel, table=True):
+    """The caller's owned-repo listing as of the last ``GET /api/repos``.
+
+    One row per token fingerprint. ``repos`` holds one dict per repo in the
+    ``fetch_repos_extended_activity`` shape (id, full_name, stars, fork,
+    language, pushed_at, ...). ``PortfolioWorkflow`` resolves its selection
+    from here instead of listing every repo from GitHub again.
+    """
+
+    __tablename__ = "repo_metadata_snapshots"
+
+    token_fingerprint: str = Field(primary_key=True, max_length=64)
+    repos: list[dict] = Field(default_factory=list, sa_column=Column(JSON, nullable=False))
+    refreshed_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -11,6 +11,7 @@ from app.api.routes import api_router
 from app.core.config import settings
 from app.middleware.logging import LoggingMiddleware
 from app.services.llm_service import LLMCostExceededError
+from app.services.spend_ledger import LLMBudgetExceededError
 
 # Configure structlog
 log_format = os.getenv("LOG_FORMAT", "human" if os.getenv("ENV") == "dev" else "json")
@@ -83,5 +84,22 @@ async def llm_cost_exceeded_handler(request: Request, exc: LLMCostExceededError)
         },
     )
 
+
+# Rolling per-user / per-workflow budgets are a rate limit, not a bad
+# request: 429 tells the caller to come back once the window rolls over.
+@app.exception_handler(LLMBudgetExceededError)
+async def llm_budget_exceeded_handler(request: Request, exc: LLMBudgetExceededError) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={
+            "detail": str(exc),
+            "error": "llm_budget_exceeded",
+            "scope": exc.scope,
+            "spent_usd": round(exc.spent, 6),
+            "requested_usd": round(exc.requested, 6),
+            "budget_usd": exc.budget,
+        },
+    )
+
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -21,4 +21,13 @@ class BatchInput(BaseModel):
 class BatchStatus(BaseModel):
     total: int
     completed: int
+    failed: int = 0
+    # Repos whose stored report was still fresh (counted in completed).
+    skipped: int = 0
+    # Mean health score over every analysed repo (failures excluded).
+    average_score: float | None = None
     results: list[RepoHealth]
+    # Index of results[0] in the batch; older results are no longer retained.
+    results_offset: int = 0
+    # Pass back as ?since= to receive only newer results.
+    next_index: int = 0
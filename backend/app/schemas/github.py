@@ -12,6 +12,10 @@ class Repo(BaseModel):
     private: bool
     html_url: str
     description: str | None = None
+    fork: bool = False
+    stargazers_count: int = 0
+    language: str | None = None
+    pushed_at: str | None = None
     health: RepoHealth | None = None
     draft_proposal: dict | None = None
 
@@ -0,0 +1,349 @@
+"""Token-budget context packer for repo-aware LLM prompts.
+
+The deep-scan activities hand the LLM layer a full nested file tree plus the
+raw contents of every high-value config file. On large repos that easily
+blows past ``LLM_MAX_TOKENS_PER_REQUEST``. Instead of letting the pre-flight
+check reject the request, :func:`pack_repo_context` greedily fills a token
+budget with the most valuable context first:
+
+1. The top-level tree skeleton, with every directory collapsed into a
+   ``name/ (N files, M dirs)`` summary line.
+2. Breadth-first directory expansion (source dirs before tests/docs; vendored
+   and build-output dirs are never expanded) up to a share of the budget.
+3. ``tech_stack_files`` ranked by value (manifests > container/build files >
+   entry points), each truncated at head AND tail when it doesn't fit.
+4. Any leftover budget goes back into expanding the tree.
+
+Token counting is incremental: every fragment (tree line, file line) is
+counted exactly once and totals are kept as running sums, so packing a huge
+tree never re-encodes the whole prompt.
+"""
+
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+from typing import Callable
+
+TokenCounter = Callable[[str], int]
+
+# Fraction of the budget the tree may use before config files get a turn.
+TREE_FIRST_PASS_SHARE = 0.4
+
+# Directories with more entries than this list the first N and summarise the rest.
+MAX_DIR_ENTRIES = 40
+
+# Don't bother including a config file if fewer than this many tokens are left.
+MIN_FILE_TOKENS = 48
+
+NO_CONFIG_FILES_TEXT = "No config files found."
+
+# Never worth expanding — generated, vendored, or environment directories.
+_LOW_VALUE_DIRS = frozenset({
+    "node_modules", "vendor", "dist", "build", "out", "target", "coverage",
+    "__pycache__", "venv", "env", "site-packages", "bower_components",
+    ".next", ".venv", ".git",
+})
+
+# Expanded only after everything else at the same depth.
+_SECONDARY_DIRS = frozenset({
+    "test", "tests", "__tests__", "spec", "docs", "doc", "examples",
+    "example", "fixtures", "migrations", "assets", "static", "public",
+})
+
+# Expanded first at any given depth.
+_PRIMARY_DIRS = frozenset({
+    "src", "app", "lib", "backend", "frontend", "server", "api", "cmd",
+    "pkg", "core", "services", "packages",
+})
+
+# Config files in descending order of how much they tell the LLM about a repo.
+_TECH_FILE_PRIORITY: tuple[str, ...] = (
+    "package.json",
+    "pyproject.toml",
+    "requirements.txt",
+    "Cargo.toml",
+    "go.mod",
+    "Dockerfile",
+    "docker-compose.yml",
+    "docker-compose.yaml",
+    "Makefile",
+    "main.py",
+    "app.py",
+    "src/main.py",
+    "src/app.py",
+    "index.ts",
+    "index.js",
+    "src/index.ts",
+    "src/index.js",
+)
+
+
+@dataclass(frozen=True)
+class PackedContext:
+    """Rendered repo context that fits the requested token budget."""
+
+    tree_text: str
+    tech_text: str
+    tokens: int
+    truncated: bool
+
+
+class _TokenTally:
+    """Memoised fragment counter — each distinct string is encoded once."""
+
+    def __init__(self, count_tokens: TokenCounter) -> None:
+        self._count = count_tokens
+        self._cache: dict[str, int] = {}
+
+    def __call__(self, text: str) -> int:
+        cached = self._cache.get(text)
+        if cached is None:
+            cached = self._count(text)
+            self._cache[text] = cached
+        return cached
+
+
+# ---------------------------------------------------------------------------
+# File tree
+# ---------------------------------------------------------------------------
+
+def _dir_rank(name: str) -> int:
+    if name in _PRIMARY_DIRS:
+        return 0
+    if name in _SECONDARY_DIRS:
+        return 2
+    return 1
+
+
+class _TreePacker:
+    """Incrementally expandable rendering of a nested file tree."""
+
+    def __init__(self, file_tree: list[dict], tally: _TokenTally) -> None:
+        self._root = file_tree
+        self._tally = tally
+        self._expanded: set[int] = set()
+        self._counts: dict[int, tuple[int, int]] = {}
+        self._heap: list[tuple[int, int, int, int, dict]] = []
+        self._seq = 0
+        self.collapsed_any = False
+        self.tokens = self._entries_cost(file_tree, 0)
+        self._push_children(file_tree, 0)
+
+    # -- line rendering ----------------------------------------------------
+
+    def _descendant_counts(self, node: dict) -> tuple[int, int]:
+        key = id(node)
+        cached = self._counts.get(key)
+        if cached is not None:
+            return cached
+        files = dirs = 0
+        for child in node.get("children", []):
+            if child.get("type") == "dir":
+                sub_files, sub_dirs = self._descendant_counts(child)
+                files += sub_files
+                dirs += sub_dirs + 1
+            else:
+                files += 1
+        self._counts[key] = (files, dirs)
+        return files, dirs
+
+    def _line(self, node: dict, depth: int) -> str:
+        prefix = "  " * depth
+        if node.get("type") != "dir":
+            return f"{prefix}{node['name']}\n"
+        if id(node) in self._expanded:
+            return f"{prefix}{node['name']}/\n"
+        files, dirs = self._descendant_counts(node)
+        if not files and not dirs:
+            return f"{prefix}{node['name']}/\n"
+        return f"{prefix}{node['name']}/ ({files} files, {dirs} dirs)\n"
+
+    @staticmethod
+    def _overflow_line(hidden: int, depth: int) -> str:
+        return f"{'  ' * depth}... ({hidden} more entries)\n"
+
+    def _visible(self, entries: list[dict]) -> list[dict]:
+        return entries[:MAX_DIR_ENTRIES]
+
+    def _entries_cost(self, entries: list[dict], depth: int) -> int:
+        cost = sum(self._tally(self._line(e, depth)) for e in self._visible(entries))
+        hidden = len(entries) - MAX_DIR_ENTRIES
+        if hidden > 0:
+            cost += self._tally(self._overflow_line(hidden, depth))
+        return cost
+
+    # -- expansion ---------------------------------------------------------
+
+    def _push_children(self, entries: list[dict], depth: int) -> None:
+        for entry in self._visible(entries):
+            if entry.get("type") != "dir" or not entry.get("children"):
+                continue
+            rank = _dir_rank(entry["name"])
+            if entry["name"] in _LOW_VALUE_DIRS:
+                self.collapsed_any = True
+                continue
+            self._seq += 1
+            heapq.heappush(self._heap, (depth + rank, depth, rank, self._seq, entry))
+
+    def _expansion_cost(self, node: dict, depth: int) -> int:
+        collapsed = self._tally(self._line(node, depth))
+        expanded = self._tally(f"{'  ' * depth}{node['name']}/\n")
+        return expanded - collapsed + self._entries_cost(node.get("children", []), depth + 1)
+
+    def grow(self, limit: int) -> None:
+        """Expand directories in value order while the tree stays within ``limit``."""
+        deferred: list[tuple[int, int, int, int, dict]] = []
+        while self._heap:
+            item = heapq.heappop(self._heap)
+            _, depth, _, _, node = item
+            cost = self._expansion_cost(node, depth)
+            if self.tokens + cost > limit:
+                deferred.append(item)
+                continue
+            self._expanded.add(id(node))
+            self.tokens += cost
+            self._push_children(node.get("children", []), depth + 1)
+        for item in deferred:
+            heapq.heappush(self._heap, item)
+
+    # -- output ------------------------------------------------------------
+
+    def _render(self, entries: list[dict], depth: int, out: list[str]) -> None:
+        for entry in self._visible(entries):
+            out.append(self._line(entry, depth))
+            if id(entry) in self._expanded:
+                self._render(entry.get("children", []), depth + 1, out)
+        hidden = len(entries) - MAX_DIR_ENTRIES
+        if hidden > 0:
+            self.collapsed_any = True
+            out.append(self._overflow_line(hidden, depth))
+
+    def render(self) -> str:
+        out: list[str] = []
+        self._render(self._root, 0, out)
+        if self._heap:
+            self.collapsed_any = True
+        return "".join(out).rstrip("\n")
+
+
+# ---------------------------------------------------------------------------
+# Config / entry-point files
+# ---------------------------------------------------------------------------
+
+def _rank_tech_files(tech_stack_files: dict[str, str]) -> list[str]:
+    order = {name: i for i, name in enumerate(_TECH_FILE_PRIORITY)}
+    return sorted(
+        tech_stack_files,
+        key=lambda name: (order.get(name, len(order)), name),
+    )
+
+
+def truncate_head_tail(
+    text: str,
+    budget: int,
+    count_tokens: TokenCounter,
+    head_share: float = 0.6,
+) -> tuple[str, int, bool]:
+    """Fit ``text`` into ``budget`` tokens keeping its first and last lines.
+
+    Returns ``(fitted_text, tokens, truncated)``. ``fitted_text`` is empty
+    when not even the omission marker fits.
+    """
+    tally = count_tokens if isinstance(count_tokens, _TokenTally) else _TokenTally(count_tokens)
+    lines = text.splitlines()
+    costs = [tally(line + "\n") for line in lines]
+    total = sum(costs)
+    if total <= budget:
+        return "\n".join(lines), total, False
+
+    # Reserve room for the marker sized for the worst case (all lines omitted).
+    marker_reserve = tally(f"... [{len(lines)} lines omitted] ...\n")
+    available = budget - marker_reserve
+    if available <= 0:
+        return "", 0, True
+
+    head_budget = int(available * head_share)
+    head_end = 0
+    used = 0
+    while head_end < len(lines) and used + costs[head_end] <= head_budget:
+        used += costs[head_end]
+        head_end += 1
+
+    tail_start = len(lines)
+    while tail_start > head_end and used + costs[tail_start - 1] <= available:
+        tail_start -= 1
+        used += costs[tail_start]
+
+    omitted = tail_start - head_end
+    marker = f"... [{omitted} lines omitted] ..."
+    fitted = lines[:head_end] + [marker] + lines[tail_start:]
+    return "\n".join(fitted), used + tally(marker + "\n"), True
+
+
+def _pack_tech_files(
+    tech_stack_files: dict[str, str],
+    budget: int,
+    tally: _TokenTally,
+) -> tuple[list[str], int, bool]:
+    sections: list[str] = []
+    used = 0
+    truncated = False
+    ranked = _rank_tech_files(tech_stack_files)
+    for i, filename in enumerate(ranked):
+        remaining = budget - used
+        header = f"--- {filename} ---\n"
+        # Separator between sections ("\n\n") is charged to every section.
+        overhead = tally(header) + tally("\n\n")
+        if remaining - overhead < MIN_FILE_TOKENS:
+            truncated = True
+            break
+        # Don't let one giant file starve the next couple of higher-value ones.
+        files_left = len(ranked) - i
+        cap = max(MIN_FILE_TOKENS, (remaining - overhead) // min(files_left, 3))
+        body, body_tokens, cut = truncate_head_tail(tech_stack_files[filename], cap, tally)
+        if not body:
+            truncated = True
+            continue
+        sections.append(f"{header}{body}")
+        used += overhead + body_tokens
+        truncated = truncated or cut
+    return sections, used, truncated
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def pack_repo_context(
+    file_tree: list[dict],
+    tech_stack_files: dict[str, str],
+    budget_tokens: int,
+    count_tokens: TokenCounter,
+) -> PackedContext:
+    """Render the file tree + config files so together they fit ``budget_tokens``.
+
+    ``count_tokens`` is the model's tokenizer (``str -> int``). The returned
+    ``tokens`` is a running sum of per-fragment counts, which slightly
+    over-estimates the true joined-text count — i.e. it errs on the safe side.
+    """
+    tally = _TokenTally(count_tokens)
+    budget = max(budget_tokens, 0)
+
+    tree = _TreePacker(file_tree, tally)
+    tree.grow(int(budget * TREE_FIRST_PASS_SHARE))
+
+    sections, tech_tokens, tech_truncated = _pack_tech_files(
+        tech_stack_files, budget - tree.tokens, tally,
+    )
+
+    tree.grow(budget - tech_tokens)
+    tree_text = tree.render()
+
+    tech_text = "\n\n".join(sections) if sections else NO_CONFIG_FILES_TEXT
+    return PackedContext(
+        tree_text=tree_text,
+        tech_text=tech_text,
+        tokens=tree.tokens + tech_tokens,
+        truncated=tree.collapsed_any or tech_truncated,
+    )
@@ -0,0 +1,333 @@
+"""Local, LLM-free checks for generated Markdown docs.
+
+``generate_doc`` runs :func:`validate_doc` on every response. Only the
+sections it flags are sent back to the model, via
+``llm_service.repair_doc_sections``, and spliced in with
+:func:`apply_section_repairs`. Findings in the preamble (text before the
+first heading) are reported but not sent for repair. A bad Mermaid label therefore costs one
+short follow-up call, not a regenerated document or a Temporal retry.
+
+Checks:
+
+* the sections each doc type's prompt asks for, matched on heading keywords
+* a ``mermaid`` block in sections that call for a diagram
+* the ``MERMAID_RULES`` the prompt imposes: a ``graph TD`` header,
+  alphanumeric node IDs, no ``()``/``[]`` inside labels, and balanced
+  ``subgraph``/``end``
+* unterminated code fences
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+RULE_MISSING_SECTION = "missing_section"
+RULE_MISSING_DIAGRAM = "missing_diagram"
+RULE_MERMAID_SYNTAX = "mermaid_syntax"
+RULE_UNCLOSED_FENCE = "unclosed_fence"
+
+# Section label for findings in text before the first heading.
+PREAMBLE = "(preamble)"
+
+
+@dataclass(frozen=True)
+class RequiredSection:
+    """A section the doc prompt asks for.
+
+    ``level == 1`` matches the document title (any H1); otherwise the
+    section matches any heading containing one of ``keywords``.
+    """
+
+    name: str
+    keywords: tuple[str, ...] = ()
+    level: int = 2
+    needs_mermaid: bool = False
+
+    def matches(self, section: "Section") -> bool:
+        if self.level == 1:
+            return section.level == 1
+        title = section.heading.lower()
+        return section.level >= 1 and any(k in title for k in self.keywords)
+
+
+# Mirrors the structure DOC_TYPE_PROMPTS asks for — keep the two in sync.
+REQUIRED_SECTIONS: dict[str, tuple[RequiredSection, ...]] = {
+    "README": (
+        RequiredSection("Title", level=1),
+        RequiredSection("Quick Start", ("quick start", "getting started", "installation", "how to run")),
+        RequiredSection("Architecture", ("architecture",), needs_mermaid=True),
+        RequiredSection("Tech Stack", ("tech stack", "technolog", "built with")),
+        RequiredSection("Key Features", ("feature",)),
+    ),
+    "CONTRIBUTING": (
+        RequiredSection("Title", level=1),
+        RequiredSection("Development Setup", ("setup", "getting started", "development", "install")),
+        RequiredSection("Running Tests", ("test",)),
+        RequiredSection("Pull Requests", ("pull request", "submitting", "review")),
+    ),
+    "ARCHITECTURE": (
+        RequiredSection("Title", level=1),
+        RequiredSection("Overview", ("overview",)),
+        RequiredSection("System Diagram", ("diagram",), needs_mermaid=True),
+        RequiredSection("Components", ("component", "module")),
+        RequiredSection("Data Flow", ("data", "state", "storage")),
+    ),
+    "API": (
+        RequiredSection("Title", level=1),
+        RequiredSection("Overview", ("overview",)),
+        RequiredSection("Reference", ("reference", "endpoint", "function", "command", "usage")),
+    ),
+}
+
+
+@dataclass(frozen=True)
+class Section:
+    """A top-level slice of a Markdown doc, heading line included.
+
+    ``level`` is 0 for any preamble before the first heading.
+    """
+
+    heading: str
+    level: int
+    text: str
+
+
+@dataclass(frozen=True)
+class DocIssue:
+    """One validator finding.
+
+    ``section`` is the heading of the offending section, or the
+    :class:`RequiredSection` name when ``missing`` is set.
+    """
+
+    rule: str
+    section: str
+    message: str
+    missing: bool = False
+
+
+# H1/H2 only — deeper headings stay inside their parent section.
+_HEADING_RE = re.compile(r"^(#{1,2})\s+(.*?)\s*#*\s*$")
+_FENCE_RE = re.compile(r"^\s*(?:```|~~~)\s*([\w+-]*)")
+
+
+def split_sections(markdown: str) -> list[Section]:
+    """Split on H1/H2 headings outside code fences. Joining ``.text`` round-trips."""
+    sections: list[Section] = []
+    heading, level, lines = "", 0, []
+    in_fence = False
+    for line in markdown.splitlines(keepends=True):
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+        elif not in_fence and (match := _HEADING_RE.match(line.rstrip("\r\n"))):
+            if lines:
+                sections.append(Section(heading, level, "".join(lines)))
+            heading, level, lines = match.group(2), len(match.group(1)), []
+        lines.append(line)
+    if lines:
+        sections.append(Section(heading, level, "".join(lines)))
+    return sections
+
+
+def _code_blocks(text: str) -> tuple[list[tuple[str, str]], bool]:
+    """``[(language, body)]`` for every fenced block, plus whether one is left open."""
+    blocks: list[tuple[str, str]] = []
+    language, body, in_fence = "", [], False
+    for line in text.splitlines():
+        match = _FENCE_RE.match(line)
+        if not match:
+            if in_fence:
+                body.append(line)
+            continue
+        if in_fence:
+            blocks.append((language, "\n".join(body)))
+            in_fence = False
+        else:
+            language, body, in_fence = match.group(1).lower(), [], True
+    return blocks, in_fence
+
+
+# ---------------------------------------------------------------------------
+# Mermaid
+# ---------------------------------------------------------------------------
+
+_MERMAID_HEADER_RE = re.compile(r"^(?:graph|flowchart)\s+TD\b")
+_NODE_ID_RE = re.compile(r"^[A-Za-z0-9_]+$")
+# `A -- text --> B` / `A == text ==> B` → plain edges; `|text|` labels dropped.
+_EDGE_TEXT_RE = re.compile(r"--\s+[^-|>]+?\s+-->|==\s+[^=|>]+?\s+==>")
+_EDGE_LABEL_RE = re.compile(r"\|[^|]*\|")
+_EDGE_RE = re.compile(r"\s*(?:<?-\.+->?|<?-{2,}[>ox]?|<?={2,}>?|~~~)\s*|\s+&\s+")
+# Longest openers first so `((` isn't read as `(`.
+_SHAPES = (
+    ("((", "))"), ("[[", "]]"), ("[(", ")]"), ("([", "])"), ("{{", "}}"),
+    ("[/", "/]"), ("[\\", "\\]"), ("[", "]"), ("(", ")"), ("{", "}"), (">", "]"),
+)
+_SKIP_PREFIXES = ("classDef", "class ", "style", "linkStyle", "click", "%%", "direction")
+
+
+def _node_problems(token: str) -> list[str]:
+    token = token.strip().rstrip(";").split(":::")[0].strip()
+    if not token:
+        return []
+    split = re.match(r"[^\[\](){}>]*", token).end()
+    node_id, shape = token[:split].strip(), token[split:]
+    problems = []
+    if not _NODE_ID_RE.match(node_id):
+        problems.append(f"node ID {node_id!r} must be alphanumeric (no spaces or dashes)")
+    if shape:
+        for opener, closer in _SHAPES:
+            if (
+                shape.startswith(opener)
+                and shape.endswith(closer)
+                and len(shape) >= len(opener) + len(closer)
+            ):
+                label = shape[len(opener):len(shape) - len(closer)].strip().strip('"')
+                if any(ch in label for ch in "()[]"):
+                    problems.append(
+                        f"label {label!r} on node {node_id} contains parentheses or brackets"
+                    )
+                break
+        else:
+            problems.append(f"malformed node {token!r}")
+    return problems
+
+
+def check_mermaid(source: str) -> list[str]:
+    """Problems in one Mermaid block against ``MERMAID_RULES``; empty when clean."""
+    lines = [line.strip() for line in source.splitlines() if line.strip()]
+    if not lines:
+        return ["empty diagram"]
+    problems: list[str] = []
+    if not _MERMAID_HEADER_RE.match(lines[0]):
+        problems.append(f"diagram must start with 'graph TD', got {lines[0]!r}")
+    depth = 0
+    for line in lines[1:]:
+        if line.startswith("subgraph"):
+            depth += 1
+            continue
+        if line == "end":
+            depth -= 1
+            if depth < 0:
+                problems.append("'end' without a matching 'subgraph'")
+                depth = 0
+            continue
+        if line.startswith(_SKIP_PREFIXES):
+            continue
+        line = _EDGE_LABEL_RE.sub("", _EDGE_TEXT_RE.sub(" --> ", line))
+        for token in _EDGE_RE.split(line):
+            problems.extend(_node_problems(token))
+    if depth > 0:
+        problems.append(f"{depth} 'subgraph' block(s) missing 'end'")
+    return problems
+
+
+# ---------------------------------------------------------------------------
+# Validation + repair splicing
+# ---------------------------------------------------------------------------
+
+def validate_doc(markdown: str, doc_type: str) -> list[DocIssue]:
+    """Run every local check for ``doc_type``; an empty list means the doc passes."""
+    sections = split_sections(markdown)
+    issues: list[DocIssue] = []
+
+    for section in sections:
+        label = section.heading or PREAMBLE
+        blocks, unclosed = _code_blocks(section.text)
+        if unclosed:
+            issues.append(DocIssue(RULE_UNCLOSED_FENCE, label, "code fence is never closed"))
+        for language, body in blocks:
+            if language != "mermaid":
+                continue
+            for problem in check_mermaid(body):
+                issues.append(DocIssue(RULE_MERMAID_SYNTAX, label, problem))
+
+    for required in REQUIRED_SECTIONS.get(doc_type, ()):
+        found = next((s for s in sections if required.matches(s)), None)
+        if found is None:
+            issues.append(DocIssue(
+                RULE_MISSING_SECTION, required.name,
+                f"missing required section {required.name!r}", missing=True,
+            ))
+        elif required.needs_mermaid and not any(
+            lang == "mermaid" for lang, _ in _code_blocks(found.text)[0]
+        ):
+            issues.append(DocIssue(
+                RULE_MISSING_DIAGRAM, found.heading,
+                f"section {found.heading!r} needs a ```mermaid diagram",
+            ))
+    return issues
+
+
+def repairable(issues: list[DocIssue]) -> list[DocIssue]:
+    """The ``issues`` a section repair can fix.
+
+    Preamble findings are left out: the preamble has no heading for the
+    model to echo back, so :func:`apply_section_repairs` could never splice
+    a replacement over it.
+    """
+    return [issue for issue in issues if issue.section != PREAMBLE]
+
+
+def _requirement_for(heading: str, doc_type: str) -> RequiredSection | None:
+    for required in REQUIRED_SECTIONS.get(doc_type, ()):
+        if required.name == heading:
+            return required
+    return None
+
+
+def apply_section_repairs(
+    markdown: str, repaired: str, issues: list[DocIssue], doc_type: str,
+) -> str:
+    """Splice the sections in ``repaired`` over the flagged ones in ``markdown``.
+
+    Existing sections are matched by heading (falling back to the required
+    section they satisfy). A missing title is prepended and other missing
+    sections are appended. Sections the model didn't return are left as
+    they were.
+    """
+    original = split_sections(markdown)
+    fixes = [s for s in split_sections(repaired) if s.level]
+    used: set[int] = set()
+
+    def take(predicate) -> Section | None:
+        for i, candidate in enumerate(fixes):
+            if i not in used and predicate(candidate):
+                used.add(i)
+                return candidate
+        return None
+
+    def normalise(heading: str) -> str:
+        return re.sub(r"\W+", " ", heading).strip().lower()
+
+    flagged = {issue.section for issue in issues if not issue.missing}
+    result: list[Section] = []
+    for section in original:
+        if not section.level or section.heading not in flagged:
+            result.append(section)
+            continue
+        required = next(
+            (r for r in REQUIRED_SECTIONS.get(doc_type, ()) if r.matches(section)), None,
+        )
+        fix = take(lambda c: normalise(c.heading) == normalise(section.heading)) or (
+            required and take(required.matches)
+        )
+        if fix:
+            # Keep the original spacing before the next heading.
+            text = section.text
+            fix = Section(fix.heading, fix.level, fix.text.rstrip() + text[len(text.rstrip()):])
+        result.append(fix or section)
+
+    prepend: list[Section] = []
+    for name in dict.fromkeys(issue.section for issue in issues if issue.missing):
+        required = _requirement_for(name, doc_type)
+        fix = required and take(required.matches)
+        if fix:
+            (prepend if required.level == 1 else result).append(fix)
+
+    text = ""
+    for section in prepend + result:
+        if text and not text.endswith("\n\n"):
+            text = text.rstrip("\n") + "\n\n"
+        text += section.text
+    return text if text.endswith("\n") else text + "\n"
@@ -161,24 +161,42 @@ class GithubClient:
         return self._call(lambda: self._github.get_user().login)
 
     def list_user_repos_as_dicts(self) -> list[dict]:
-        """Return list of dicts matching the shape ``Repo`` schema expects."""
+        """Return list of dicts matching the shape ``Repo`` schema expects.
+
+        Includes the listing's own metadata (stars, fork, language,
+        pushed_at) at no extra cost; ``GET /api/repos`` snapshots it for
+        portfolio selection.
+        """
+        def fetch() -> list[dict]:
+            return [
+                _repo_listing_row(r) for r in self._github.get_user().get_repos(affiliation="owner")
+            ]
+        return self._call(fetch)
+
+    def list_user_repo_pushes(self) -> list[dict]:
+        """Return ``id`` / ``full_name`` / ``pushed_at`` for every owned repo.
+
+        One paginated listing, so change detection across a whole account
+        costs a handful of calls rather than one per repo.
+        """
         def fetch() -> list[dict]:
-            out: list[dict] = []
-            for r in self._github.get_user().get_repos(affiliation="owner"):
-                out.append({
-                    "id": r.id,
-                    "name": r.name,
-                    "full_name": r.full_name,
-                    "private": r.private,
-                    "html_url": r.html_url,
-                    "description": r.description,
-                })
-            return out
+            return [
+                {"id": r.id, "full_name": r.full_name, "pushed_at": r.pushed_at}
+                for r in self._github.get_user().get_repos(affiliation="owner")
+            ]
         return self._call(fetch)
 
+    def core_rate_limit(self) -> tuple[int, datetime]:
+        """Return ``(remaining, reset_at_utc)``; reading it costs no quota."""
+        return self._read_rate_limit()
+
     def get_repo_full_name(self, repo_id: int) -> str:
         return self._call(lambda: self._github.get_repo(repo_id).full_name)
 
+    def get_repo_metadata(self, repo_id: int) -> dict:
+        """One repo in the ``list_user_repos_as_dicts`` shape."""
+        return self._call(lambda: _repo_listing_row(self._github.get_repo(repo_id)))
+
     def get_repo_details(self, repo_id: int) -> dict:
         def fetch() -> dict:
             r = self._github.get_repo(repo_id)
@@ -186,5 +204,22 @@ class GithubClient:
                 "name": r.name,
                 "full_name": r.full_name,
                 "description": r.description or "",
+                # Content revision for derived workflow IDs; same GET /repos call.
+                "pushed_at": r.pushed_at.isoformat() if r.pushed_at else None,
             }
         return self._call(fetch)
+
+
+def _repo_listing_row(r) -> dict:
+    return {
+        "id": r.id,
+        "name": r.name,
+        "full_name": r.full_name,
+        "private": r.private,
+        "html_url": r.html_url,
+        "description": r.description,
+        "fork": r.fork,
+        "stargazers_count": r.stargazers_count,
+        "language": r.language,
+        "pushed_at": r.pushed_at.isoformat() if r.pushed_at else None,
+    }
@@ -67,7 +67,7 @@ def _get_repo_details(access_token: str, repo_id: int) -> dict:
 
 
 async def get_repo_details(access_token: str, repo_id: int) -> dict:
-    """Look up a repo's name, full_name, and description by ID."""
+    """Look up a repo's name, full_name, description and pushed_at by ID."""
     return await asyncio.to_thread(_get_repo_details, access_token, repo_id)
 
 
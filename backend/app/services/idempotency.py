@@ -9,6 +9,10 @@ Surface:
       workflow_id mapping. Idempotent (won't error on duplicate insert).
     * :func:`get_idempotency_key` — FastAPI dependency reading the
       ``Idempotency-Key`` request header.
+    * :func:`derive_workflow_id` + :data:`DEDUP_START_POLICIES` — workflow
+      IDs derived from what a request would do. Started with these
+      policies, a duplicate request attaches to the run already in flight
+      in Temporal itself, with or without an Idempotency-Key.
 
 The raw GitHub access token is never persisted — only a sha256 truncated
 to 32 chars is stored, so a DB leak doesn't expose tokens.
@@ -20,6 +24,7 @@ from datetime import datetime, timedelta, timezone
 import structlog
 from fastapi import Header
 from sqlmodel import Session, select
+from temporalio.common import WorkflowIDConflictPolicy, WorkflowIDReusePolicy
 
 from app.db.models import IdempotencyKey
 
@@ -29,6 +34,14 @@ logger = structlog.get_logger(__name__)
 # the prior workflow_id instead of starting a new workflow.
 DEDUP_WINDOW = timedelta(hours=24)
 
+# start_workflow options for derived IDs: a start while that ID is running
+# returns the running workflow instead of failing or starting a second one;
+# once it has closed (done, failed or cancelled), the same ID starts afresh.
+DEDUP_START_POLICIES = {
+    "id_conflict_policy": WorkflowIDConflictPolicy.USE_EXISTING,
+    "id_reuse_policy": WorkflowIDReusePolicy.ALLOW_DUPLICATE,
+}
+
 
 def fingerprint_token(token: str) -> str:
     """Stable per-token identifier suitable as a DB-safe namespace.
@@ -40,6 +53,16 @@ def fingerprint_token(token: str) -> str:
     return hashlib.sha256(token.encode("utf-8")).hexdigest()[:32]
 
 
+def derive_workflow_id(prefix: str, token: str, *parts: object) -> str:
+    """``<prefix>-<digest>`` of the caller's token fingerprint and ``parts``.
+
+    Same caller + same operation inputs (repo IDs, content revision, options)
+    gives the same workflow ID. The token only enters as its fingerprint.
+    """
+    material = "\x1f".join([fingerprint_token(token), prefix, *map(str, parts)])
+    return f"{prefix}-{hashlib.sha256(material.encode('utf-8')).hexdigest()[:24]}"
+
+
 def lookup_idempotency_key(
     session: Session,
     *,
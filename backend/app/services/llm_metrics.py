@@ -0,0 +1,157 @@
+"""In-process LLM call metrics, keyed by (operation, model).
+
+Each worker process keeps its own rolling window of outcomes and latencies
+per tier. The numbers drive runtime decisions (cascade reporting, latency
+quantiles) and are mirrored to structlog (``llm_tier_attempt``) so they can
+be aggregated across processes downstream.
+
+Surface:
+    * :func:`record_attempt` — log one call's outcome + latency.
+    * :func:`latency_quantile` — e.g. p90 latency of a tier, or None until
+      enough samples exist; ``primary=True`` reads the hedged primaries'
+      latencies instead.
+    * :func:`record_hedge` — log whether a hedgeable call fired a backup
+      request and which one won, plus how long the primary ran.
+    * :func:`snapshot` — per-tier counters and p50/p90, for logs/debugging.
+    * :func:`reset` — clear everything (tests).
+"""
+
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from threading import Lock
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+OUTCOME_OK = "ok"
+OUTCOME_PARSE_ERROR = "parse_error"
+OUTCOME_VALIDATION_ERROR = "validation_error"
+OUTCOME_ERROR = "error"
+
+# Latency samples kept per tier — enough for a stable p90, small enough to
+# track recent provider behaviour.
+WINDOW_SIZE = 256
+
+# Quantiles aren't reported below this many samples.
+MIN_SAMPLES = 20
+
+
+@dataclass
+class _TierStats:
+    outcomes: Counter = field(default_factory=Counter)
+    latencies: deque = field(default_factory=lambda: deque(maxlen=WINDOW_SIZE))
+    # Primary-request latencies of hedgeable calls. A primary cancelled
+    # because its hedge won contributes its elapsed time (a lower bound), so
+    # the hedge trigger still sees the slow tail it is meant to cut.
+    primary_latencies: deque = field(default_factory=lambda: deque(maxlen=WINDOW_SIZE))
+    hedge_eligible: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+
+    @property
+    def attempts(self) -> int:
+        return sum(self.outcomes.values())
+
+
+_stats: dict[tuple[str, str], _TierStats] = {}
+_lock = Lock()
+
+
+def record_attempt(operation: str, model: str, outcome: str, latency_s: float) -> None:
+    with _lock:
+        stats = _stats.setdefault((operation, model), _TierStats())
+        stats.outcomes[outcome] += 1
+        stats.latencies.append(latency_s)
+        attempts = stats.attempts
+        success_rate = stats.outcomes[OUTCOME_OK] / attempts
+    logger.info(
+        "llm_tier_attempt",
+        operation=operation,
+        model=model,
+        outcome=outcome,
+        latency_ms=round(latency_s * 1000, 1),
+        tier_attempts=attempts,
+        tier_success_rate=round(success_rate, 3),
+    )
+
+
+def record_hedge(
+    operation: str,
+    model: str,
+    hedged: bool,
+    hedge_won: bool = False,
+    primary_latency_s: float | None = None,
+) -> None:
+    """Count one hedgeable call; ``hedge_won`` = the backup request answered first.
+
+    ``primary_latency_s`` is how long the primary request ran — until it
+    finished, or until it was cancelled.
+    """
+    with _lock:
+        stats = _stats.setdefault((operation, model), _TierStats())
+        if primary_latency_s is not None:
+            stats.primary_latencies.append(primary_latency_s)
+        stats.hedge_eligible += 1
+        stats.hedges += int(hedged)
+        stats.hedge_wins += int(hedged and hedge_won)
+        hedge_rate = stats.hedges / stats.hedge_eligible
+        win_rate = stats.hedge_wins / stats.hedges if stats.hedges else None
+    if hedged:
+        logger.info(
+            "llm_hedge",
+            operation=operation,
+            model=model,
+            hedge_won=hedge_won,
+            hedge_rate=round(hedge_rate, 3),
+            hedge_win_rate=round(win_rate, 3) if win_rate is not None else None,
+        )
+
+
+def _quantile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def latency_quantile(operation: str, model: str, q: float, primary: bool = False) -> float | None:
+    """Latency (seconds) at quantile ``q`` for a tier, or None if under-sampled.
+
+    ``primary=True`` uses the primary-request samples from :func:`record_hedge`.
+    """
+    with _lock:
+        stats = _stats.get((operation, model))
+        if stats is None:
+            return None
+        samples = list(stats.primary_latencies if primary else stats.latencies)
+    if len(samples) < MIN_SAMPLES:
+        return None
+    return _quantile(samples, q)
+
+
+def snapshot() -> dict[str, dict[str, dict]]:
+    """``{operation: {model: {attempts, success_rate, outcomes, p50_ms, p90_ms,
+    hedge_rate, hedge_win_rate}}}``."""
+    with _lock:
+        items = [
+            (op, model, dict(s.outcomes), list(s.latencies), s.hedge_eligible, s.hedges, s.hedge_wins)
+            for (op, model), s in _stats.items()
+        ]
+    result: dict[str, dict[str, dict]] = {}
+    for op, model, outcomes, latencies, eligible, hedges, wins in items:
+        attempts = sum(outcomes.values())
+        result.setdefault(op, {})[model] = {
+            "attempts": attempts,
+            "success_rate": round(outcomes.get(OUTCOME_OK, 0) / attempts, 3) if attempts else None,
+            "outcomes": outcomes,
+            "p50_ms": round(_quantile(latencies, 0.5) * 1000, 1) if latencies else None,
+            "p90_ms": round(_quantile(latencies, 0.9) * 1000, 1) if latencies else None,
+            "hedge_rate": round(hedges / eligible, 3) if eligible else None,
+            "hedge_win_rate": round(wins / hedges, 3) if hedges else None,
+        }
+    return result
+
+
+def reset() -> None:
+    with _lock:
+        _stats.clear()
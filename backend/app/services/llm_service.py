@@ -1,13 +1,22 @@
+import asyncio
+import hashlib
 import json
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
 import structlog
 import tiktoken
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
 from litellm import acompletion
+from pydantic import BaseModel, ValidationError
 
 from app.core.config import settings
+from app.services import doc_validator, llm_metrics, spend_ledger
+from app.services.context_packer import PackedContext, pack_repo_context, truncate_head_tail
 
 logger = structlog.get_logger(__name__)
 
@@ -52,11 +61,41 @@ class LLMCostExceededError(Exception):
         self.prompt_tokens = prompt_tokens
 
 
-def _count_message_tokens(messages: list[dict], model: str) -> int:
+@lru_cache(maxsize=16)
+def _get_encoding(model: str) -> tiktoken.Encoding:
     try:
-        encoding = tiktoken.encoding_for_model(model)
+        return tiktoken.encoding_for_model(model)
     except KeyError:
-        encoding = tiktoken.get_encoding("cl100k_base")
+        return tiktoken.get_encoding("cl100k_base")
+
+
+# Token counts for large texts (the shared repo-context block) are memoised:
+# the same string is counted by the packer, the overflow check and the E5
+# pre-flight of every call in a Janitor run. Keyed by the encoding object so
+# a different tokenizer never sees a stale count.
+_TOKEN_MEMO_MIN_CHARS = 2048
+_TOKEN_MEMO_SIZE = 64
+_token_memo: "OrderedDict[tuple[Any, str], int]" = OrderedDict()
+
+
+def _count_text_tokens(text: str, model: str) -> int:
+    encoding = _get_encoding(model)
+    if len(text) < _TOKEN_MEMO_MIN_CHARS:
+        # encode_ordinary: repo files may legitimately contain "<|endoftext|>"
+        return len(encoding.encode_ordinary(text))
+    key = (encoding, text)
+    count = _token_memo.get(key)
+    if count is None:
+        count = len(encoding.encode_ordinary(text))
+        _token_memo[key] = count
+        if len(_token_memo) > _TOKEN_MEMO_SIZE:
+            _token_memo.popitem(last=False)
+    else:
+        _token_memo.move_to_end(key)
+    return count
+
+
+def _count_message_tokens(messages: list[dict], model: str) -> int:
     total = 0
     for m in messages:
         content = m.get("content") or ""
@@ -64,9 +103,9 @@ def _count_message_tokens(messages: list[dict], model: str) -> int:
             # multipart content (OpenAI vision-style): sum text segments
             for part in content:
                 if isinstance(part, dict) and part.get("type") == "text":
-                    total += len(encoding.encode(part.get("text", "")))
+                    total += _count_text_tokens(part.get("text", ""), model)
         else:
-            total += len(encoding.encode(content))
+            total += _count_text_tokens(content, model)
     return total
 
 
@@ -112,35 +151,281 @@ def _check_llm_budget(messages: list[dict], model: str) -> int:
     return prompt_tokens
 
 
+# Tokens held back from the packing budget for chat-format overhead (role
+# markers, message separators) that plain-text counting doesn't see.
+_PROMPT_HEADROOM_TOKENS = 64
+
+
+def _prompt_token_budget(model: str) -> int:
+    """Largest prompt (in tokens) that passes both pre-flight checks for ``model``."""
+    max_out = settings.LLM_MAX_TOKENS_PER_REQUEST
+    in_price, out_price = _PRICE_TABLE.get(model, _DEFAULT_PRICE)
+    spend_left = settings.LLM_MAX_COST_PER_REQUEST_USD - (max_out / 1000.0) * out_price
+    affordable = int(spend_left / in_price * 1000.0) if in_price > 0 else max_out
+    return max(0, min(max_out, affordable))
+
+
+def _context_budget(model: str, *frame: str, reserve: int = 0) -> int:
+    """Tokens left for repo context once the fixed prompt ``frame`` (and
+    ``reserve`` tokens for text sent after it) are paid for."""
+    overhead = sum(_count_text_tokens(part, model) for part in frame)
+    return _prompt_token_budget(model) - overhead - reserve - _PROMPT_HEADROOM_TOKENS
+
+
+def _pack_for_prompt(
+    model: str,
+    file_tree: list[dict],
+    tech_stack_files: dict[str, str],
+    *frame: str,
+    reserve: int = 0,
+) -> PackedContext:
+    """Pack tree + config files into whatever budget the prompt ``frame`` leaves.
+
+    Replaces "reject oversized prompts" with "shrink the context until it
+    fits": ``_check_llm_budget`` still runs afterwards as the last line of
+    defence, but a packed prompt passes it on the first try.
+    """
+    budget = _context_budget(model, *frame, reserve=reserve)
+    packed = pack_repo_context(
+        file_tree,
+        tech_stack_files,
+        budget,
+        lambda text: _count_text_tokens(text, model),
+    )
+    if packed.truncated:
+        logger.info(
+            "llm_context_packed",
+            model=model,
+            budget_tokens=budget,
+            context_tokens=packed.tokens,
+        )
+    return packed
+
+
 async def _safe_acompletion(**kwargs: Any) -> Any:
     """Wrapper around litellm.acompletion enforcing the E5 budget guardrails.
 
     - Counts prompt tokens via tiktoken; raises LLMCostExceededError if the
       prompt or its estimated cost exceeds the configured caps.
+    - Reserves the estimated cost in the spend ledger (rolling per-user and
+      per-workflow budgets) and settles it with actual usage afterwards.
     - Injects ``max_tokens=LLM_MAX_TOKENS_PER_REQUEST`` if the caller didn't
       pass it explicitly.
     - Logs post-call usage (prompt/completion tokens + actual cost) via
       structlog under event ``llm_post_call``.
+    - A cancelled call (hedging loser, cancelled activity) is booked at its
+      prompt cost: the provider has already accepted and billed the input.
     """
     messages = kwargs.get("messages") or []
     model = kwargs.get("model") or settings.LLM_MODEL
-    _check_llm_budget(messages, model)
+    prompt_tokens = _check_llm_budget(messages, model)
     kwargs.setdefault("max_tokens", settings.LLM_MAX_TOKENS_PER_REQUEST)
-    response = await acompletion(**kwargs)
+    reservation = await _reserve_spend(model, prompt_tokens, kwargs["max_tokens"])
+    try:
+        response = await acompletion(**kwargs)
+    except asyncio.CancelledError:
+        await _settle_cancelled(reservation, model, prompt_tokens)
+        raise
+    except BaseException:
+        await spend_ledger.release_call(reservation)
+        raise
     try:
         usage = response.usage
-        actual_cost = _estimate_cost(usage.prompt_tokens, usage.completion_tokens, model)
-        logger.info(
-            "llm_post_call",
-            model=model,
-            prompt_tokens=usage.prompt_tokens,
-            completion_tokens=usage.completion_tokens,
-            actual_cost_usd=round(actual_cost, 6),
+        prompt, completion, cached = (
+            usage.prompt_tokens,
+            usage.completion_tokens,
+            _cached_prompt_tokens(usage),
         )
     except (AttributeError, Exception) as exc:
         logger.warning("llm_post_call_usage_unavailable", error=str(exc))
+        # No usage reported: keep the estimate on the books rather than
+        # letting the call go uncounted.
+        prompt, completion, cached = prompt_tokens, kwargs["max_tokens"], 0
+    else:
+        _log_usage(model, prompt, completion, cached)
+    await _settle_spend(reservation, model, prompt, completion, cached)
     return response
 
+
+async def _reserve_spend(model: str, prompt_tokens: int, max_output_tokens: int):
+    return await spend_ledger.reserve_call(
+        model, _estimate_cost(prompt_tokens, max_output_tokens, model),
+    )
+
+
+async def _settle_spend(
+    reservation, model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int,
+) -> None:
+    await spend_ledger.settle_call(
+        reservation,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        cached_tokens=cached_tokens,
+        cost_usd=_estimate_cost(prompt_tokens, completion_tokens, model),
+    )
+
+
+async def _settle_cancelled(reservation, model: str, prompt_tokens: int) -> None:
+    logger.info("llm_call_cancelled", model=model, prompt_tokens=prompt_tokens)
+    await _settle_spend(reservation, model, prompt_tokens, 0, 0)
+
+
+def _cached_prompt_tokens(usage: Any) -> int:
+    """Prompt tokens served from the provider's prompt cache, if reported.
+
+    OpenAI reports ``prompt_tokens_details.cached_tokens``; LiteLLM maps
+    Anthropic's cache reads to ``cache_read_input_tokens``.
+    """
+    details = getattr(usage, "prompt_tokens_details", None)
+    if isinstance(details, dict):
+        cached = details.get("cached_tokens")
+    else:
+        cached = getattr(details, "cached_tokens", None)
+    if cached is None:
+        cached = getattr(usage, "cache_read_input_tokens", None)
+    return int(cached or 0)
+
+
+def _log_usage(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int) -> None:
+    actual_cost = _estimate_cost(prompt_tokens, completion_tokens, model)
+    logger.info(
+        "llm_post_call",
+        model=model,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        cached_tokens=cached_tokens,
+        actual_cost_usd=round(actual_cost, 6),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Shared repo-context prefix (provider prompt caching)
+# ---------------------------------------------------------------------------
+# Every repo-aware call (deep README, analyze, generate_doc, repair) is laid
+# out as:
+#
+#   [system]  REPO_CONTEXT_SYSTEM_PROMPT                 ┐ byte-identical for
+#   [user]    repo name + file tree + config files       ┘ one repo → cached
+#   [user]    task instructions + task-specific inputs     varies per call
+#
+# Providers cache on exact prefixes, so the big per-repo block must come
+# first and must not depend on the task. It is packed against a fixed
+# budget (prompt budget minus LLM_TASK_PROMPT_RESERVE_TOKENS) for the same
+# reason — only a task that overflows the reserve gets a smaller, uncached
+# context.
+
+REPO_CONTEXT_SYSTEM_PROMPT = (
+    "You are a senior software engineer and technical writer working on a single "
+    "repository. The first user message contains the repository context: its file "
+    "structure and the actual contents of its key configuration files. The next "
+    "message gives you a specific task. Follow that task's instructions and output "
+    "format exactly, and base every claim on the repository context."
+)
+
+
+def _render_repo_context(repo_name: str, tree_text: str, tech_text: str) -> str:
+    return (
+        f"Repository: {repo_name}\n\n"
+        f"## File Structure\n```\n{tree_text}\n```\n\n"
+        f"## Key Configuration Files (actual contents)\n\n{tech_text}"
+    )
+
+
+@dataclass(frozen=True)
+class RenderedContext:
+    """A repo-context block rendered for one (scan, model, budget)."""
+
+    text: str
+    tokens: int
+    truncated: bool
+
+
+# Rendered context blocks, most recently used last. One Janitor run asks for
+# the same block from analyze (every cascade tier) and every generate_doc
+# call; keep enough entries for a few concurrent runs per worker.
+_CONTEXT_CACHE_SIZE = 32
+_context_cache: "OrderedDict[tuple, RenderedContext]" = OrderedDict()
+
+
+def scan_fingerprint(file_tree: list[dict], tech_stack_files: dict[str, str]) -> str:
+    """Content hash of a deep-scan result — identical scans share a fingerprint."""
+    payload = json.dumps(
+        [file_tree, tech_stack_files], sort_keys=True, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _repo_context(
+    model: str,
+    repo_name: str,
+    file_tree: list[dict],
+    tech_stack_files: dict[str, str],
+    shrink_by: int = 0,
+) -> RenderedContext:
+    """Render the shared per-repo context block under the fixed context budget.
+
+    Memoised by scan content hash: every call in a run after the first
+    reuses the packed tree/config text and its token count.
+    """
+    frame = (REPO_CONTEXT_SYSTEM_PROMPT, _render_repo_context(repo_name, "", ""))
+    reserve = settings.LLM_TASK_PROMPT_RESERVE_TOKENS + shrink_by
+    key = (
+        scan_fingerprint(file_tree, tech_stack_files),
+        repo_name,
+        model,
+        _get_encoding(model),
+        _context_budget(model, *frame, reserve=reserve),
+    )
+    cached = _context_cache.get(key)
+    if cached is not None:
+        _context_cache.move_to_end(key)
+        logger.debug("llm_context_cache_hit", model=model, repo=repo_name)
+        return cached
+
+    packed = _pack_for_prompt(model, file_tree, tech_stack_files, *frame, reserve=reserve)
+    text = _render_repo_context(repo_name, packed.tree_text, packed.tech_text)
+    rendered = RenderedContext(
+        text=text,
+        tokens=_count_text_tokens(text, model),
+        truncated=packed.truncated,
+    )
+    _context_cache[key] = rendered
+    if len(_context_cache) > _CONTEXT_CACHE_SIZE:
+        _context_cache.popitem(last=False)
+    return rendered
+
+
+def _repo_messages(
+    model: str,
+    repo_name: str,
+    file_tree: list[dict],
+    tech_stack_files: dict[str, str],
+    task_prompt: str,
+    task_input: str,
+    cache_hint: bool,
+) -> list[dict]:
+    """Build the shared-prefix message list for a repo-aware task.
+
+    ``cache_hint`` marks the context block with an ephemeral
+    ``cache_control`` breakpoint. LiteLLM forwards it to providers that
+    need explicit hints (Anthropic) and strips it for ones that cache
+    automatically (OpenAI).
+    """
+    task_text = f"## Task\n{task_prompt}\n\n{task_input}"
+    overflow = _count_text_tokens(task_text, model) - settings.LLM_TASK_PROMPT_RESERVE_TOKENS
+    context = _repo_context(
+        model, repo_name, file_tree, tech_stack_files, shrink_by=max(overflow, 0),
+    )
+    context_block: dict = {"type": "text", "text": context.text}
+    if cache_hint and settings.LLM_PROMPT_CACHE_HINTS:
+        context_block["cache_control"] = {"type": "ephemeral"}
+    return [
+        {"role": "system", "content": REPO_CONTEXT_SYSTEM_PROMPT},
+        {"role": "user", "content": [context_block]},
+        {"role": "user", "content": task_text},
+    ]
+
+
 SYSTEM_PROMPT = (
     "You are a technical documentarian. "
     "Write a professional, concise README.md in Markdown format. "
@@ -173,15 +458,24 @@ async def generate_readme(
     description: str | None,
 ) -> str:
     """Generate a README.md using LiteLLM (legacy shallow mode)."""
-    user_prompt = (
-        f"Repository: {repo_name}\n"
-        f"Description: {description or 'No description provided.'}\n"
-        f"File structure:\n{chr(10).join(file_structure)}\n\n"
-        "Write a README.md for this project. Keep it concise and use Markdown."
+    def render(structure_text: str) -> str:
+        return (
+            f"Repository: {repo_name}\n"
+            f"Description: {description or 'No description provided.'}\n"
+            f"File structure:\n{structure_text}\n\n"
+            "Write a README.md for this project. Keep it concise and use Markdown."
+        )
+
+    model = settings.LLM_MODEL
+    structure_text, _, _ = truncate_head_tail(
+        "\n".join(file_structure),
+        _context_budget(model, SYSTEM_PROMPT, render("")),
+        lambda text: _count_text_tokens(text, model),
     )
+    user_prompt = render(structure_text)
 
     kwargs: dict = {
-        "model": settings.LLM_MODEL,
+        "model": model,
         "api_key": settings.LITELLM_API_KEY,
         "messages": [
             {"role": "system", "content": SYSTEM_PROMPT},
@@ -195,19 +489,6 @@ async def generate_readme(
     return response.choices[0].message.content
 
 
-def _format_tree_for_prompt(tree: list[dict], indent: int = 0) -> str:
-    """Flatten a nested file tree into an indented string for the LLM prompt."""
-    lines: list[str] = []
-    for node in tree:
-        prefix = "  " * indent
-        if node["type"] == "dir":
-            lines.append(f"{prefix}{node['name']}/")
-            lines.append(_format_tree_for_prompt(node.get("children", []), indent + 1))
-        else:
-            lines.append(f"{prefix}{node['name']}")
-    return "\n".join(lines)
-
-
 async def generate_deep_readme(
     repo_name: str,
     description: str | None,
@@ -215,28 +496,17 @@ async def generate_deep_readme(
     tech_stack_files: dict[str, str],
 ) -> str:
     """Generate a README.md using deep code context (file tree + actual file contents)."""
-    tree_text = _format_tree_for_prompt(file_tree)
-
-    tech_sections: list[str] = []
-    for filename, content in tech_stack_files.items():
-        tech_sections.append(f"--- {filename} ---\n{content}")
-    tech_text = "\n\n".join(tech_sections) if tech_sections else "No config files found."
-
-    user_prompt = (
-        f"Repository: {repo_name}\n"
-        f"Description: {description or 'No description provided.'}\n\n"
-        f"## File Structure\n```\n{tree_text}\n```\n\n"
-        f"## Key Configuration Files (actual contents)\n\n{tech_text}\n\n"
-        "Using the above real source context, write the README.md now."
-    )
-
+    model = settings.LLM_MODEL
     kwargs: dict = {
-        "model": settings.LLM_MODEL,
+        "model": model,
         "api_key": settings.LITELLM_API_KEY,
-        "messages": [
-            {"role": "system", "content": DEEP_SYSTEM_PROMPT},
-            {"role": "user", "content": user_prompt},
-        ],
+        "messages": _repo_messages(
+            model, repo_name, file_tree, tech_stack_files,
+            DEEP_SYSTEM_PROMPT,
+            f"Description: {description or 'No description provided.'}\n\n"
+            "Using the above real source context, write the README.md now.",
+            cache_hint=True,
+        ),
     }
     if settings.LITELLM_API_BASE:
         kwargs["api_base"] = settings.LITELLM_API_BASE
@@ -249,17 +519,16 @@ async def generate_deep_readme(
 # LangChain-powered multi-doc generation (Phase 12)
 # ---------------------------------------------------------------------------
 
-def _get_chat_model() -> ChatOpenAI:
+def _get_chat_model(model: str | None = None) -> ChatOpenAI:
     """Factory that builds a ChatOpenAI pointing at the LiteLLM proxy.
 
     E5: pass `max_tokens=LLM_MAX_TOKENS_PER_REQUEST` so LangChain-based
     chains share the same output cap as the direct ``acompletion`` path.
-    Cost-cap pre-flight is NOT applied here — LangChain chains construct
-    prompts dynamically via templates, so the check would need to run
-    after templating. Tracked as F-008 follow-up.
+    Every LangChain call goes through :func:`_ainvoke_chat`, which applies
+    the cost-cap pre-flight and the spend ledger.
     """
     kwargs: dict = {
-        "model": settings.LLM_MODEL,
+        "model": model or settings.LLM_MODEL,
         "api_key": settings.LITELLM_API_KEY,
         "max_tokens": settings.LLM_MAX_TOKENS_PER_REQUEST,
     }
@@ -268,6 +537,139 @@ def _get_chat_model() -> ChatOpenAI:
     return ChatOpenAI(**kwargs)
 
 
+async def _ainvoke_chat(
+    messages: list[dict], model: str | None = None, **invoke_kwargs: Any,
+) -> Any:
+    """Run pre-rendered messages through LangChain with the E5 pre-flight.
+
+    Mirrors :func:`_safe_acompletion` for the LangChain path: budget check
+    and spend-ledger reservation before the call, ``llm_post_call`` usage
+    (incl. cached prompt tokens) and ledger settlement after it — at prompt
+    cost if the call is cancelled. ``invoke_kwargs`` (e.g. ``response_format``) go to the request body.
+    """
+    model = model or settings.LLM_MODEL
+    max_out = settings.LLM_MAX_TOKENS_PER_REQUEST
+    prompt_tokens = _check_llm_budget(messages, model)
+    reservation = await _reserve_spend(model, prompt_tokens, max_out)
+    try:
+        response = await _get_chat_model(model).ainvoke(messages, **invoke_kwargs)
+    except asyncio.CancelledError:
+        await _settle_cancelled(reservation, model, prompt_tokens)
+        raise
+    except BaseException:
+        await spend_ledger.release_call(reservation)
+        raise
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        prompt, completion, cached = (
+            usage.get("input_tokens", 0),
+            usage.get("output_tokens", 0),
+            (usage.get("input_token_details") or {}).get("cache_read", 0),
+        )
+        _log_usage(model, prompt, completion, cached)
+    else:
+        logger.warning("llm_post_call_usage_unavailable", error="no usage_metadata")
+        prompt, completion, cached = prompt_tokens, max_out, 0
+    await _settle_spend(reservation, model, prompt, completion, cached)
+    return response
+
+
+def _hedge_delay(operation: str, model: str) -> float | None:
+    """Seconds to wait before hedging, or None when hedging doesn't apply.
+
+    Needs ``llm_metrics.MIN_SAMPLES`` observed latencies for the operation
+    first — no hedging on a cold worker. Once hedging runs, the delay comes
+    from primary-request latencies: a call's end-to-end latency is the
+    winner's, which would drag the quantile down after every hedge.
+    """
+    if not settings.LLM_HEDGING:
+        return None
+    observed = llm_metrics.latency_quantile(
+        operation, model, settings.LLM_HEDGE_QUANTILE, primary=True,
+    )
+    if observed is None:
+        observed = llm_metrics.latency_quantile(operation, model, settings.LLM_HEDGE_QUANTILE)
+    if observed is None:
+        return None
+    return max(observed, settings.LLM_HEDGE_MIN_DELAY_S)
+
+
+def _usable(response: Any) -> bool:
+    content = getattr(response, "content", None)
+    return isinstance(content, str) and bool(content.strip())
+
+
+async def _hedged_chat(operation: str, messages: list[dict]) -> Any:
+    """:func:`_ainvoke_chat` with request hedging against tail latency.
+
+    If the primary call is still running after :func:`_hedge_delay`, the
+    same messages go to ``LLM_HEDGE_MODEL`` (or the same model). The first
+    usable response wins. The other request is cancelled and awaited, so its
+    spend is settled (at prompt cost) before this returns. A failed or
+    budget-rejected hedge never fails a primary that later succeeds.
+    """
+    model = settings.LLM_MODEL
+    delay = _hedge_delay(operation, model)
+    if delay is None:
+        return await _ainvoke_chat(messages, model=model)
+
+    started = time.perf_counter()
+    primary = asyncio.create_task(_ainvoke_chat(messages, model=model))
+    primary_done_at: list[float] = []
+    primary.add_done_callback(lambda _: primary_done_at.append(time.perf_counter()))
+
+    def primary_latency() -> float:
+        # Still running means it's about to be cancelled: a lower bound.
+        return (primary_done_at[0] if primary_done_at else time.perf_counter()) - started
+
+    tasks = [primary]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done:
+            llm_metrics.record_hedge(
+                operation, model, hedged=False, primary_latency_s=primary_latency(),
+            )
+            return primary.result()
+
+        hedge = asyncio.create_task(
+            _ainvoke_chat(messages, model=settings.LLM_HEDGE_MODEL or model)
+        )
+        tasks.append(hedge)
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in (t for t in tasks if t in done):
+                if task.exception() is None and _usable(task.result()):
+                    llm_metrics.record_hedge(
+                        operation, model, hedged=True, hedge_won=task is hedge,
+                        primary_latency_s=primary_latency(),
+                    )
+                    return task.result()
+                logger.warning(
+                    "llm_hedge_attempt_failed",
+                    operation=operation,
+                    request="hedge" if task is hedge else "primary",
+                    error=str(task.exception() or "empty response"),
+                )
+        # Neither produced a usable answer: surface the primary's outcome.
+        llm_metrics.record_hedge(
+            operation, model, hedged=True, primary_latency_s=primary_latency(),
+        )
+        return primary.result()
+    finally:
+        losers = [t for t in tasks if not t.done()]
+        for task in losers:
+            task.cancel()
+        if losers:
+            await asyncio.gather(*losers, return_exceptions=True)
+
+
+def _langchain_cache_hint() -> bool:
+    # Only the LiteLLM proxy understands (or strips) cache_control blocks;
+    # a raw OpenAI endpoint would reject the unknown field.
+    return bool(settings.LITELLM_API_BASE)
+
+
 ANALYZE_SYSTEM_PROMPT = (
     "You are a senior software architect. Analyze the repository context provided "
     "and return a JSON object with the following keys:\n"
@@ -285,37 +687,138 @@ ANALYZE_SYSTEM_PROMPT = (
 )
 
 
+class CodebaseSummary(BaseModel):
+    """Schema ``ANALYZE_SYSTEM_PROMPT`` asks for; ``generate_doc`` consumes it."""
+
+    project_name: str
+    description: str
+    tech_stack: list[str]
+    key_features: list[str]
+    architecture_patterns: list[str]
+    build_system: str
+    entry_points: list[str]
+    has_tests: bool
+    has_ci: bool
+    has_docker: bool
+
+
+class SummaryValidationError(ValueError):
+    """Every cascade tier returned unparseable or off-schema analysis JSON.
+
+    Attributes:
+        attempts: list of ``(model, outcome, error)`` per tier tried
+    """
+
+    def __init__(self, message: str, attempts: list[tuple[str, str, str]]) -> None:
+        super().__init__(message)
+        self.attempts = attempts
+
+
+_JSON_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL)
+
+
+def parse_codebase_summary(raw: str) -> CodebaseSummary:
+    """Parse + validate an analysis response. Tolerates a ```json fence.
+
+    Raises ``json.JSONDecodeError`` for non-JSON and ``ValidationError``
+    for JSON that doesn't match :class:`CodebaseSummary`.
+    """
+    fenced = _JSON_FENCE_RE.match(raw)
+    payload = json.loads(fenced.group(1) if fenced else raw)
+    return CodebaseSummary.model_validate(payload)
+
+
+def _json_schema_format(schema_model: type[BaseModel], name: str) -> dict:
+    """OpenAI ``response_format`` enforcing ``schema_model`` (strict mode).
+
+    Strict mode needs every property required and no extras; the flat
+    summary models here satisfy the first, the second is added.
+    """
+    schema = schema_model.model_json_schema()
+    schema["additionalProperties"] = False
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "strict": True, "schema": schema},
+    }
+
+
+def _analysis_output_kwargs() -> dict:
+    if not settings.LLM_STRUCTURED_OUTPUT:
+        return {}
+    return {"response_format": _json_schema_format(CodebaseSummary, "codebase_summary")}
+
+
+def _analysis_tiers() -> list[str]:
+    """Models to try for analysis, cheapest first. Defaults to just LLM_MODEL."""
+    tiers = [m.strip() for m in settings.LLM_ANALYZE_CASCADE.split(",") if m.strip()]
+    return tiers or [settings.LLM_MODEL]
+
+
 async def analyze_codebase(
     repo_name: str,
     description: str,
     file_tree: list[dict],
     tech_stack_files: dict[str, str],
 ) -> str:
-    """Analyze repository and return a JSON summary string."""
-    tree_text = _format_tree_for_prompt(file_tree)
-
-    tech_sections: list[str] = []
-    for filename, content in tech_stack_files.items():
-        tech_sections.append(f"--- {filename} ---\n{content}")
-    tech_text = "\n\n".join(tech_sections) if tech_sections else "No config files found."
-
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", ANALYZE_SYSTEM_PROMPT),
-        ("human",
-         "Repository: {repo_name}\n"
-         "Description: {description}\n\n"
-         "## File Structure\n```\n{tree_text}\n```\n\n"
-         "## Key Configuration Files\n\n{tech_text}"),
-    ])
+    """Analyze repository and return a validated JSON summary string.
 
-    chain = prompt | _get_chat_model()
-    response = await chain.ainvoke({
-        "repo_name": repo_name,
-        "description": description or "No description provided.",
-        "tree_text": tree_text,
-        "tech_text": tech_text,
-    })
-    return response.content
+    Runs the ``LLM_ANALYZE_CASCADE`` tiers in order: each tier's output is
+    validated against :class:`CodebaseSummary` and the next (stronger) model
+    is tried only when parsing or validation fails. Provider errors and
+    budget rejections propagate untouched — escalating wouldn't fix them.
+
+    With ``LLM_STRUCTURED_OUTPUT`` the request carries the summary's JSON
+    schema as ``response_format``, so providers that support structured
+    outputs can't return off-schema JSON; validation still runs for those
+    that ignore it.
+    """
+    task_input = f"Description: {description or 'No description provided.'}"
+    attempts: list[tuple[str, str, str]] = []
+    for tier, model in enumerate(_analysis_tiers()):
+        messages = _repo_messages(
+            model, repo_name, file_tree, tech_stack_files,
+            ANALYZE_SYSTEM_PROMPT,
+            task_input,
+            cache_hint=_langchain_cache_hint(),
+        )
+        started = time.perf_counter()
+        try:
+            response = await _ainvoke_chat(messages, model=model, **_analysis_output_kwargs())
+        except Exception:
+            llm_metrics.record_attempt(
+                "analyze", model, llm_metrics.OUTCOME_ERROR, time.perf_counter() - started,
+            )
+            raise
+        latency = time.perf_counter() - started
+
+        try:
+            summary = parse_codebase_summary(response.content)
+        except json.JSONDecodeError as exc:
+            outcome, error = llm_metrics.OUTCOME_PARSE_ERROR, str(exc)
+        except ValidationError as exc:
+            outcome, error = llm_metrics.OUTCOME_VALIDATION_ERROR, str(exc)
+        else:
+            llm_metrics.record_attempt("analyze", model, llm_metrics.OUTCOME_OK, latency)
+            if tier:
+                logger.info("llm_cascade_escalated", operation="analyze", model=model, tier=tier)
+            return summary.model_dump_json()
+
+        llm_metrics.record_attempt("analyze", model, outcome, latency)
+        logger.warning(
+            "llm_cascade_rejected",
+            operation="analyze",
+            model=model,
+            tier=tier,
+            outcome=outcome,
+            error=error[:500],
+        )
+        attempts.append((model, outcome, error))
+
+    raise SummaryValidationError(
+        f"No analysis tier returned a valid summary for {repo_name} "
+        f"(tried {', '.join(m for m, _, _ in attempts)})",
+        attempts=attempts,
+    )
 
 
 # MERMAID_RULES are injected into every prompt to prevent syntax errors
@@ -344,13 +847,108 @@ DOC_TYPE_PROMPTS: dict[str, str] = {
         "5. **Key Features**: 3 bullet points highlighting what makes this project special.\n\n"
         "**Tone**: concise, professional, interview-ready. No fluff."
     ),
+    "CONTRIBUTING": (
+        "You are the maintainer of this repository. Write a CONTRIBUTING.md for new contributors.\n\n"
+        "**Structure:**\n"
+        "1. **Header**: `# Contributing to <project>` + one welcoming line.\n"
+        "2. **Development Setup**: prerequisites and the exact commands to install and run "
+        "the project locally, taken from the detected build files.\n"
+        "3. **Running Tests**: how to run the test suite and any linters/formatters that are "
+        "configured. If no tests are detected, say how to add the first ones.\n"
+        "4. **Pull Requests**: branch naming, commit messages, and what reviewers check.\n\n"
+        "**Tone**: friendly and specific. Only mention tools that appear in the repository."
+    ),
+    "ARCHITECTURE": (
+        "You are a Staff Engineer. Write an ARCHITECTURE.md that lets a new engineer find their "
+        "way around this codebase in ten minutes.\n\n"
+        "**Structure:**\n"
+        "1. **Header**: `# Architecture` + one line on what the system does.\n"
+        "2. **Overview**: the main runtime pieces and how a request/job flows through them.\n"
+        "3. **System Diagram**: a Mermaid diagram of the components and their interactions.\n"
+        f"{MERMAID_RULES}\n"
+        "4. **Components**: one short subsection per major directory/module: what it owns "
+        "and its key entry points.\n"
+        "5. **Data Flow**: where state lives (databases, queues, caches, files).\n\n"
+        "**Tone**: precise and factual. Describe only what the file tree and configs show."
+    ),
+    "API": (
+        "You are a Developer Experience engineer. Write an API.md reference for this repository's "
+        "public interface: HTTP endpoints for services, or the exported modules/functions for "
+        "libraries and CLIs.\n\n"
+        "**Structure:**\n"
+        "1. **Header**: `# API Reference` + one line on who the API is for.\n"
+        "2. **Overview**: base URL or import path, authentication or configuration needed.\n"
+        "3. **Reference**: one subsection per endpoint/command/function with its signature, "
+        "parameters, and a short example request/usage and response/output.\n\n"
+        "**Tone**: terse reference style. Never invent endpoints or functions that the "
+        "analysis and files don't support."
+    ),
 }
 
 DOC_TYPE_FILENAMES: dict[str, str] = {
     "README": "README.md",
+    "CONTRIBUTING": "CONTRIBUTING.md",
+    "ARCHITECTURE": "ARCHITECTURE.md",
+    "API": "API.md",
 }
 
 
+SECTION_REPAIR_PROMPT = (
+    "A generated {doc_type} failed automated checks. Rewrite ONLY the sections "
+    "listed below so they pass; the rest of the document is kept as-is.\n"
+    "- Start each section with its heading line. Keep existing headings unchanged; "
+    "use the given heading for missing sections (the title is a single `#` heading "
+    "followed by a one-line description).\n"
+    "- Output the rewritten sections only — no commentary, no other sections.\n\n"
+    f"{MERMAID_RULES}"
+)
+
+
+def _repair_task_input(
+    content: str, issues: list[doc_validator.DocIssue], summary_json: str,
+) -> str:
+    sections = {s.heading: s.text for s in doc_validator.split_sections(content)}
+    by_section: dict[str, list[doc_validator.DocIssue]] = {}
+    for issue in issues:
+        by_section.setdefault(issue.section, []).append(issue)
+
+    parts = [f"## Codebase Analysis\n{summary_json}"]
+    for heading, section_issues in by_section.items():
+        problems = "\n".join(f"- {issue.message}" for issue in section_issues)
+        if section_issues[0].missing:
+            parts.append(f"### Missing section: {heading}\nProblems:\n{problems}")
+        else:
+            parts.append(
+                f"### Section: {heading}\nProblems:\n{problems}\n"
+                f"Current text:\n{sections.get(heading, '').strip()}"
+            )
+    return "\n\n".join(parts)
+
+
+async def repair_doc_sections(
+    content: str,
+    issues: list[doc_validator.DocIssue],
+    summary_json: str,
+    doc_type: str,
+    repo_name: str,
+    file_tree: list[dict],
+    tech_stack_files: dict[str, str],
+) -> str:
+    """Regenerate only the sections ``issues`` flag and splice them into ``content``.
+
+    Reuses the shared repo-context prefix (prompt-cache hit); the task part
+    carries just the broken sections, not the whole document.
+    """
+    messages = _repo_messages(
+        settings.LLM_MODEL, repo_name, file_tree, tech_stack_files,
+        SECTION_REPAIR_PROMPT.format(doc_type=doc_type),
+        _repair_task_input(content, issues, summary_json),
+        cache_hint=_langchain_cache_hint(),
+    )
+    response = await _ainvoke_chat(messages)
+    return doc_validator.apply_section_repairs(content, response.content, issues, doc_type)
+
+
 async def generate_doc(
     summary_json: str,
     doc_type: str,
@@ -358,35 +956,62 @@ async def generate_doc(
     file_tree: list[dict],
     tech_stack_files: dict[str, str],
 ) -> str:
-    """Generate a single documentation file using LangChain."""
-    tree_text = _format_tree_for_prompt(file_tree)
-
-    tech_sections: list[str] = []
-    for filename, content in tech_stack_files.items():
-        tech_sections.append(f"--- {filename} ---\n{content}")
-    tech_text = "\n\n".join(tech_sections) if tech_sections else "No config files found."
-
-    system_prompt = DOC_TYPE_PROMPTS[doc_type]
-
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
-        ("human",
-         "Repository: {repo_name}\n\n"
-         "## Codebase Analysis\n{summary_json}\n\n"
-         "## File Structure\n```\n{tree_text}\n```\n\n"
-         "## Key Configuration Files\n\n{tech_text}\n\n"
-         "Generate the {doc_type} document now."),
-    ])
+    """Generate a single documentation file using LangChain.
 
-    chain = prompt | _get_chat_model()
-    response = await chain.ainvoke({
-        "repo_name": repo_name,
-        "summary_json": summary_json,
-        "tree_text": tree_text,
-        "tech_text": tech_text,
-        "doc_type": doc_type,
-    })
-    return response.content
+    The result is checked locally (:func:`doc_validator.validate_doc`);
+    flagged sections get up to ``LLM_DOC_REPAIR_ATTEMPTS`` targeted repair
+    calls (preamble findings aren't repairable and cost none). A doc that still fails is returned as-is with a
+    ``doc_validation_failed`` warning — it lands in a draft for review.
+    """
+    model = settings.LLM_MODEL
+    messages = _repo_messages(
+        model, repo_name, file_tree, tech_stack_files,
+        DOC_TYPE_PROMPTS[doc_type],
+        f"## Codebase Analysis\n{summary_json}\n\n"
+        f"Generate the {doc_type} document now.",
+        cache_hint=_langchain_cache_hint(),
+    )
+    started = time.perf_counter()
+    response = await _hedged_chat("generate_doc", messages)
+    content = response.content
+    issues = doc_validator.validate_doc(content, doc_type)
+    llm_metrics.record_attempt(
+        "generate_doc", model,
+        llm_metrics.OUTCOME_VALIDATION_ERROR if issues else llm_metrics.OUTCOME_OK,
+        time.perf_counter() - started,
+    )
+
+    for attempt in range(settings.LLM_DOC_REPAIR_ATTEMPTS):
+        to_repair = doc_validator.repairable(issues)
+        if not to_repair:
+            break
+        logger.info(
+            "doc_section_repair",
+            doc_type=doc_type,
+            repo=repo_name,
+            attempt=attempt + 1,
+            sections=sorted({issue.section for issue in to_repair}),
+            rules=sorted({issue.rule for issue in to_repair}),
+        )
+        started = time.perf_counter()
+        content = await repair_doc_sections(
+            content, to_repair, summary_json, doc_type, repo_name, file_tree, tech_stack_files,
+        )
+        issues = doc_validator.validate_doc(content, doc_type)
+        llm_metrics.record_attempt(
+            "repair_doc", model,
+            llm_metrics.OUTCOME_VALIDATION_ERROR if issues else llm_metrics.OUTCOME_OK,
+            time.perf_counter() - started,
+        )
+
+    if issues:
+        logger.warning(
+            "doc_validation_failed",
+            doc_type=doc_type,
+            repo=repo_name,
+            issues=[f"{issue.section}: {issue.message}" for issue in issues][:20],
+        )
+    return content
 
 
 # ---------------------------------------------------------------------------
@@ -418,7 +1043,7 @@ GOLDEN_PROFILE_SYSTEM_PROMPT = (
     "   ### [Project Name](url)\n"
     "   > One-line architecture summary (e.g., 'Full-stack app with FastAPI + React + Temporal workflows')\n\n"
     "   - Highlight the architecture and tech choices, not just what the app does.\n"
-    "   - If README excerpts or framework data is available, use it for specificity.\n"
+    "   - If summaries, highlights, README excerpts or framework data are available, use them for specificity.\n"
     "   - Include stars badge: `![Stars](https://img.shields.io/github/stars/owner/repo?style=social)`\n\n"
     "5. **GitHub Stats Widget**: Include this exact block:\n"
     "   ```\n"
@@ -432,13 +1057,90 @@ GOLDEN_PROFILE_SYSTEM_PROMPT = (
 )
 
 
+# Stage 1 of the portfolio pipeline: one compact card per repo, generated in
+# parallel and cached by (repo, HEAD SHA, PORTFOLIO_CARD_VERSION). Bump the
+# version whenever the card prompt or schema changes.
+PORTFOLIO_CARD_VERSION = 1
+
+PORTFOLIO_CARD_SYSTEM_PROMPT = (
+    "You summarise a single GitHub repository for its owner's profile README.\n"
+    "Return a JSON object with exactly these keys:\n"
+    "- summary (string — one line, architecture-focused, e.g. "
+    "'Full-stack app with FastAPI + React + Temporal workflows')\n"
+    "- highlights (list of 2-3 short strings — notable technical choices or features)\n"
+    "- stack (list of strings — languages, frameworks and tools actually used)\n\n"
+    "Base every claim on the provided README and dependency files. "
+    "Return ONLY valid JSON, no markdown fences, no extra text."
+)
+
+# Per-file token cap for dependency manifests in a card prompt.
+_CARD_DEPENDENCY_TOKENS = 400
+_CARD_README_CHARS = 1500
+
+
+class PortfolioCardSummary(BaseModel):
+    summary: str
+    highlights: list[str]
+    stack: list[str]
+
+
+async def generate_portfolio_card(scan: dict) -> dict:
+    """Summarise one scanned repo into a compact, cacheable portfolio card.
+
+    ``scan`` is a ``_portfolio_deep_scan``-shaped dict. Returns
+    ``{"summary", "highlights", "stack"}``; an unparseable response falls
+    back to the repo description rather than failing the portfolio.
+    """
+    model = settings.LLM_MODEL
+    dependency_sections: list[str] = []
+    for filename, content in sorted((scan.get("dependencies") or {}).items()):
+        body, _, _ = truncate_head_tail(
+            content, _CARD_DEPENDENCY_TOKENS, lambda text: _count_text_tokens(text, model),
+        )
+        if body:
+            dependency_sections.append(f"--- {filename} ---\n{body}")
+
+    user_content = (
+        f"Repository: {scan.get('full_name', '')}\n"
+        f"Description: {scan.get('description') or 'No description'}\n"
+        f"Primary language: {scan.get('language') or 'N/A'}\n"
+        f"Detected frameworks: {', '.join(scan.get('frameworks', [])) or 'N/A'}\n\n"
+        f"## README excerpt\n{(scan.get('readme_content') or 'No README.')[:_CARD_README_CHARS]}\n\n"
+        f"## Dependency files\n{chr(10).join(dependency_sections) or 'None found.'}"
+    )
+    response = await _ainvoke_chat([
+        {"role": "system", "content": PORTFOLIO_CARD_SYSTEM_PROMPT},
+        {"role": "user", "content": user_content},
+    ])
+    try:
+        fenced = _JSON_FENCE_RE.match(response.content)
+        card = PortfolioCardSummary.model_validate(
+            json.loads(fenced.group(1) if fenced else response.content)
+        )
+    except (json.JSONDecodeError, ValidationError) as exc:
+        logger.warning(
+            "portfolio_card_invalid", repo=scan.get("full_name"), error=str(exc)[:500],
+        )
+        card = PortfolioCardSummary(
+            summary=scan.get("description") or "",
+            highlights=[],
+            stack=list(scan.get("frameworks", [])),
+        )
+    return card.model_dump()
+
+
 async def generate_profile_readme(
     top_repos: list[dict],
     username: str,
     bio: str = "",
     links: dict | None = None,
 ) -> str:
-    """Generate a GitHub Profile README using LangChain with rich context."""
+    """Generate a GitHub Profile README using LangChain with rich context.
+
+    ``top_repos`` entries are either portfolio cards (see
+    :func:`generate_portfolio_card`) — the normal, compact path — or raw
+    scans carrying a ``readme_content`` excerpt.
+    """
     # Build aggregated language stats
     lang_counts: dict[str, int] = {}
     all_frameworks: set[str] = set()
@@ -471,9 +1173,17 @@ async def generate_profile_readme(
             f"- Frameworks: {', '.join(repo.get('frameworks', [])) or 'N/A'}\n"
             f"- Topics: {', '.join(repo.get('topics', [])) or 'N/A'}\n"
         )
-        readme_excerpt = repo.get("readme_content", "")
-        if readme_excerpt:
-            section += f"- README excerpt:\n{readme_excerpt[:1500]}\n"
+        if repo.get("summary"):
+            # Stage-2 input: a pre-summarised portfolio card.
+            section += f"- Summary: {repo['summary']}\n"
+            if repo.get("stack"):
+                section += f"- Stack: {', '.join(repo['stack'])}\n"
+            for highlight in repo.get("highlights", []):
+                section += f"- Highlight: {highlight}\n"
+        else:
+            readme_excerpt = repo.get("readme_content", "")
+            if readme_excerpt:
+                section += f"- README excerpt:\n{readme_excerpt[:1500]}\n"
         repo_sections.append(section)
 
     repos_context = "\n".join(repo_sections)
@@ -494,27 +1204,22 @@ async def generate_profile_readme(
 
     bio_context = bio if bio else "No bio provided."
 
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", GOLDEN_PROFILE_SYSTEM_PROMPT),
-        ("human",
-         "GitHub Username: {username}\n\n"
-         "## Bio\n{bio_context}\n\n"
-         "## Contact Links\n{links_context}\n\n"
-         "## Languages\n{lang_summary}\n\n"
-         "## Detected Frameworks\n{frameworks_summary}\n\n"
-         "## Topics\n{topics_summary}\n\n"
-         "## Featured Repositories\n{repos_context}\n\n"
-         "Generate the profile README now."),
-    ])
-
-    chain = prompt | _get_chat_model()
-    response = await chain.ainvoke({
-        "username": username,
-        "bio_context": bio_context,
-        "links_context": links_context,
-        "lang_summary": lang_summary,
-        "frameworks_summary": frameworks_summary,
-        "topics_summary": topics_summary,
-        "repos_context": repos_context,
-    })
+    messages = [
+        {"role": "system", "content": GOLDEN_PROFILE_SYSTEM_PROMPT},
+        {"role": "user", "content": (
+            f"GitHub Username: {username}\n\n"
+            f"## Bio\n{bio_context}\n\n"
+            f"## Contact Links\n{links_context}\n\n"
+            f"## Languages\n{lang_summary}\n\n"
+            f"## Detected Frameworks\n{frameworks_summary}\n\n"
+            f"## Topics\n{topics_summary}\n\n"
+            f"## Featured Repositories\n{repos_context}\n\n"
+            "Generate the profile README now."
+        )},
+    ]
+    started = time.perf_counter()
+    response = await _hedged_chat("profile", messages)
+    llm_metrics.record_attempt(
+        "profile", settings.LLM_MODEL, llm_metrics.OUTCOME_OK, time.perf_counter() - started,
+    )
     return response.content
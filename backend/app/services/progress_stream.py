@@ -0,0 +1,124 @@
+"""Fan-out of workflow progress events to SSE / long-poll clients.
+
+Workflows append events to ``workflow_events`` through
+``publish_progress_activity``. This module tails that table so that
+watching a workflow never touches Temporal. There is no client connection,
+no query, and so no history replay on the worker.
+
+Per API process there is at most one tail loop per watched workflow,
+whatever the number of subscribers. Every open tab of the same dashboard
+shares one indexed ``id > cursor`` read per ``PROGRESS_POLL_INTERVAL_S``.
+The loop stops once the workflow has published a terminal event, or once
+nobody has been listening for a poll interval.
+"""
+
+import asyncio
+
+import structlog
+
+from app.core.config import settings
+from app.db.crud import list_workflow_events
+from app.db.session import get_session
+
+logger = structlog.get_logger(__name__)
+
+# Kinds after which a workflow publishes nothing more.
+TERMINAL_EVENTS = frozenset({"cancelled", "completed", "draft_ready", "failed"})
+
+
+def _load_events(workflow_id: str, after_id: int) -> list[dict]:
+    with get_session() as session:
+        return [
+            {"id": row.id, "kind": row.kind, **row.data}
+            for row in list_workflow_events(session, workflow_id=workflow_id, after_id=after_id)
+        ]
+
+
+class _Feed:
+    """Everything one workflow has published so far, plus a wake-up signal."""
+
+    def __init__(self) -> None:
+        self.events: list[dict] = []
+        self.changed = asyncio.Condition()
+        self.subscribers = 0
+        # Terminal event seen: nothing more will arrive.
+        self.done = False
+        # Tail loop exited; waiters return and the next wait() re-attaches.
+        self.closed = False
+
+    @property
+    def last_id(self) -> int:
+        return self.events[-1]["id"] if self.events else 0
+
+    def after(self, cursor: int) -> list[dict]:
+        return [event for event in self.events if event["id"] > cursor]
+
+
+class ProgressHub:
+    def __init__(self, poll_interval_s: float | None = None) -> None:
+        self._poll_interval_s = poll_interval_s
+        self._feeds: dict[str, _Feed] = {}
+
+    @property
+    def poll_interval_s(self) -> float:
+        if self._poll_interval_s is not None:
+            return self._poll_interval_s
+        return settings.PROGRESS_POLL_INTERVAL_S
+
+    async def wait(
+        self, workflow_id: str, after_id: int = 0, timeout_s: float = 25.0,
+    ) -> tuple[list[dict], bool]:
+        """Events with ``id > after_id``, waiting up to ``timeout_s`` for one.
+
+        Returns ``(events, done)``. ``events`` is empty on timeout. ``done``
+        means the workflow has published its terminal event and nothing
+        after ``after_id`` is pending.
+        """
+        feed = self._join(workflow_id)
+        try:
+            async with feed.changed:
+                try:
+                    await asyncio.wait_for(
+                        feed.changed.wait_for(lambda: feed.last_id > after_id or feed.closed),
+                        timeout_s,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            events = feed.after(after_id)
+            return events, feed.done and (not events or events[-1]["kind"] in TERMINAL_EVENTS)
+        finally:
+            feed.subscribers -= 1
+
+    def _join(self, workflow_id: str) -> _Feed:
+        feed = self._feeds.get(workflow_id)
+        if feed is None:
+            feed = self._feeds[workflow_id] = _Feed()
+            asyncio.get_running_loop().create_task(self._tail(workflow_id, feed))
+        feed.subscribers += 1
+        return feed
+
+    async def _tail(self, workflow_id: str, feed: _Feed) -> None:
+        try:
+            while True:
+                try:
+                    events = await asyncio.to_thread(_load_events, workflow_id, feed.last_id)
+                except Exception as exc:
+                    logger.warning("progress_tail_failed", workflow_id=workflow_id, error=str(exc))
+                    events = []
+                if events:
+                    async with feed.changed:
+                        feed.events.extend(events)
+                        feed.done = any(event["kind"] in TERMINAL_EVENTS for event in events)
+                        feed.changed.notify_all()
+                if feed.done or feed.subscribers <= 0:
+                    return
+                await asyncio.sleep(self.poll_interval_s)
+        finally:
+            if self._feeds.get(workflow_id) is feed:
+                del self._feeds[workflow_id]
+            async with feed.changed:
+                feed.closed = True
+                feed.changed.notify_all()
+
+
+hub = ProgressHub()
@@ -0,0 +1,395 @@
+"""Persistent LLM spend ledger with reserve-then-settle budget enforcement.
+
+The E5 pre-flight in ``llm_service`` only caps a *single* request. This
+module caps aggregate spend:
+
+* **Per user** — rolling 24h spend per token fingerprint must stay under
+  ``LLM_DAILY_BUDGET_USD``.
+* **Per workflow** — lifetime spend of one Temporal workflow must stay under
+  ``LLM_WORKFLOW_BUDGET_USD``.
+
+Surface:
+    * :func:`attribute_spend` — context manager binding (token fingerprint,
+      workflow_id) for every LLM call made inside it. Temporal activities
+      bind it; calls made with nothing bound are not ledgered.
+    * :func:`reserve` / :func:`settle` / :func:`release` — the sync,
+      session-level primitives.
+    * :func:`reserve_call` / :func:`settle_call` / :func:`release_call` —
+      async wrappers used by ``llm_service`` (own session, run in a thread).
+    * :func:`get_spend_summary` / :func:`get_workflow_spend` — query API
+      behind ``GET /api/llm/spend``.
+
+Concurrency: ``reserve`` takes a per-fingerprint transaction-scoped
+advisory lock on Postgres, so two workers can't both read "$0.10 left" and
+both spend it. The estimate is held as a ``reserved`` row until the call
+settles; reservations older than :data:`RESERVATION_TTL` (worker died
+mid-call) stop counting.
+"""
+
+import asyncio
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+import structlog
+from sqlalchemy import func, text
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.db.models import LLMSpendEntry
+from app.db.session import get_session
+
+logger = structlog.get_logger(__name__)
+
+STATUS_RESERVED = "reserved"
+STATUS_SETTLED = "settled"
+STATUS_RELEASED = "released"
+
+# Rolling window for the per-user budget.
+BUDGET_WINDOW = timedelta(hours=24)
+
+# A reservation that hasn't settled within this long is treated as abandoned.
+RESERVATION_TTL = timedelta(minutes=15)
+
+
+class LLMBudgetExceededError(Exception):
+    """Raised pre-call when a rolling per-user or per-workflow budget is spent.
+
+    Attributes:
+        scope: ``"user"`` or ``"workflow"``
+        spent: float USD already settled + reserved in the scope
+        requested: float USD the rejected call would have reserved
+        budget: float USD (the configured cap)
+    """
+
+    def __init__(self, message: str, scope: str, spent: float, requested: float, budget: float) -> None:
+        super().__init__(message)
+        self.scope = scope
+        self.spent = spent
+        self.requested = requested
+        self.budget = budget
+
+
+@dataclass(frozen=True)
+class SpendAttribution:
+    token_fingerprint: str
+    workflow_id: str | None
+
+
+_attribution: ContextVar[SpendAttribution | None] = ContextVar("llm_spend_attribution", default=None)
+
+
+@contextmanager
+def attribute_spend(token_fingerprint: str, workflow_id: str | None) -> Iterator[None]:
+    """Ledger every LLM call in this scope against the given user + workflow."""
+    reset = _attribution.set(SpendAttribution(token_fingerprint or "", workflow_id))
+    try:
+        yield
+    finally:
+        _attribution.reset(reset)
+
+
+def current_attribution() -> SpendAttribution | None:
+    return _attribution.get()
+
+
+# ---------------------------------------------------------------------------
+# Session-level primitives
+# ---------------------------------------------------------------------------
+
+def _lock_fingerprint(session: Session, token_fingerprint: str) -> None:
+    """Serialise reservations per user. Postgres only — SQLite serialises writes anyway."""
+    if session.get_bind().dialect.name == "postgresql":
+        session.exec(
+            text("SELECT pg_advisory_xact_lock(hashtext(:key))").bindparams(
+                key=f"llm_spend:{token_fingerprint}",
+            )
+        )
+
+
+def _committed_spend(session: Session, *conditions) -> float:
+    """Settled cost + live reservations matching ``conditions``."""
+    live_cutoff = datetime.now(timezone.utc) - RESERVATION_TTL
+    settled = session.exec(
+        select(func.coalesce(func.sum(LLMSpendEntry.cost_usd), 0.0)).where(
+            LLMSpendEntry.status == STATUS_SETTLED, *conditions,
+        )
+    ).one()
+    reserved = session.exec(
+        select(func.coalesce(func.sum(LLMSpendEntry.reserved_cost_usd), 0.0)).where(
+            LLMSpendEntry.status == STATUS_RESERVED,
+            LLMSpendEntry.created_at >= live_cutoff,
+            *conditions,
+        )
+    ).one()
+    return float(settled) + float(reserved)
+
+
+def _enforce(scope: str, spent: float, requested: float, budget: float) -> None:
+    if budget > 0 and spent + requested > budget:
+        logger.warning(
+            "llm_budget_exceeded",
+            scope=scope,
+            spent_usd=round(spent, 6),
+            requested_usd=round(requested, 6),
+            budget_usd=budget,
+        )
+        raise LLMBudgetExceededError(
+            f"LLM {scope} budget exhausted: ${spent:.4f} spent/reserved + "
+            f"${requested:.4f} requested exceeds ${budget:.4f}",
+            scope=scope,
+            spent=spent,
+            requested=requested,
+            budget=budget,
+        )
+
+
+def reserve(
+    session: Session,
+    *,
+    attribution: SpendAttribution,
+    model: str,
+    estimated_cost: float,
+) -> uuid.UUID:
+    """Check rolling budgets and hold ``estimated_cost`` against them.
+
+    Raises :class:`LLMBudgetExceededError` if either budget would be
+    exceeded. Caller should ``session.commit()`` — the advisory lock is
+    released with the transaction.
+    """
+    fp = attribution.token_fingerprint
+    _lock_fingerprint(session, fp)
+
+    if fp:
+        window_start = datetime.now(timezone.utc) - BUDGET_WINDOW
+        _enforce(
+            "user",
+            _committed_spend(
+                session,
+                LLMSpendEntry.token_fingerprint == fp,
+                LLMSpendEntry.created_at >= window_start,
+            ),
+            estimated_cost,
+            settings.LLM_DAILY_BUDGET_USD,
+        )
+    if attribution.workflow_id:
+        _enforce(
+            "workflow",
+            _committed_spend(session, LLMSpendEntry.workflow_id == attribution.workflow_id),
+            estimated_cost,
+            settings.LLM_WORKFLOW_BUDGET_USD,
+        )
+
+    entry = LLMSpendEntry(
+        token_fingerprint=fp,
+        workflow_id=attribution.workflow_id,
+        model=model,
+        status=STATUS_RESERVED,
+        reserved_cost_usd=estimated_cost,
+    )
+    session.add(entry)
+    session.flush()
+    return entry.id
+
+
+def settle(
+    session: Session,
+    *,
+    entry_id: uuid.UUID,
+    prompt_tokens: int,
+    completion_tokens: int,
+    cached_tokens: int,
+    cost_usd: float,
+) -> bool:
+    """Replace a reservation with actual usage. Returns False if the row is gone."""
+    entry = session.get(LLMSpendEntry, entry_id)
+    if entry is None:
+        return False
+    entry.status = STATUS_SETTLED
+    entry.prompt_tokens = prompt_tokens
+    entry.completion_tokens = completion_tokens
+    entry.cached_tokens = cached_tokens
+    entry.cost_usd = cost_usd
+    entry.settled_at = datetime.now(timezone.utc)
+    session.flush()
+    return True
+
+
+def release(session: Session, *, entry_id: uuid.UUID) -> bool:
+    """Drop a reservation whose call failed before producing usage."""
+    entry = session.get(LLMSpendEntry, entry_id)
+    if entry is None or entry.status != STATUS_RESERVED:
+        return False
+    entry.status = STATUS_RELEASED
+    entry.settled_at = datetime.now(timezone.utc)
+    session.flush()
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Async wrappers for llm_service
+# ---------------------------------------------------------------------------
+
+async def reserve_call(model: str, estimated_cost: float) -> uuid.UUID | None:
+    """Reserve for the currently attributed caller; None when nothing is bound.
+
+    Ledger outages fail open (logged) — a DB blip shouldn't take down doc
+    generation — but a real budget violation always propagates.
+    """
+    attribution = current_attribution()
+    if attribution is None:
+        return None
+
+    def _reserve() -> uuid.UUID:
+        with get_session() as session:
+            entry_id = reserve(
+                session, attribution=attribution, model=model, estimated_cost=estimated_cost,
+            )
+            session.commit()
+            return entry_id
+
+    try:
+        return await asyncio.to_thread(_reserve)
+    except LLMBudgetExceededError:
+        raise
+    except Exception as exc:
+        logger.warning("llm_spend_reserve_failed", error=str(exc))
+        return None
+
+
+async def settle_call(
+    entry_id: uuid.UUID | None,
+    *,
+    prompt_tokens: int,
+    completion_tokens: int,
+    cached_tokens: int,
+    cost_usd: float,
+) -> None:
+    if entry_id is None:
+        return
+
+    def _settle() -> None:
+        with get_session() as session:
+            settle(
+                session,
+                entry_id=entry_id,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                cached_tokens=cached_tokens,
+                cost_usd=cost_usd,
+            )
+            session.commit()
+
+    try:
+        await asyncio.to_thread(_settle)
+    except Exception as exc:
+        logger.warning("llm_spend_settle_failed", entry_id=str(entry_id), error=str(exc))
+
+
+async def release_call(entry_id: uuid.UUID | None) -> None:
+    if entry_id is None:
+        return
+
+    def _release() -> None:
+        with get_session() as session:
+            release(session, entry_id=entry_id)
+            session.commit()
+
+    try:
+        await asyncio.to_thread(_release)
+    except Exception as exc:
+        logger.warning("llm_spend_release_failed", entry_id=str(entry_id), error=str(exc))
+
+
+# ---------------------------------------------------------------------------
+# Query API
+# ---------------------------------------------------------------------------
+
+def _totals(entries: list[LLMSpendEntry]) -> dict:
+    settled = [e for e in entries if e.status == STATUS_SETTLED]
+    return {
+        "calls": len(settled),
+        "prompt_tokens": sum(e.prompt_tokens for e in settled),
+        "completion_tokens": sum(e.completion_tokens for e in settled),
+        "cached_tokens": sum(e.cached_tokens for e in settled),
+        "spent_usd": round(sum(e.cost_usd for e in settled), 6),
+        "reserved_usd": round(sum(
+            e.reserved_cost_usd for e in entries if e.status == STATUS_RESERVED
+        ), 6),
+    }
+
+
+def get_spend_summary(
+    session: Session,
+    *,
+    token_fingerprint: str,
+    window: timedelta = BUDGET_WINDOW,
+) -> dict:
+    """Rolling-window spend for one user, broken down by workflow."""
+    since = datetime.now(timezone.utc) - window
+    entries = list(session.exec(
+        select(LLMSpendEntry).where(
+            LLMSpendEntry.token_fingerprint == token_fingerprint,
+            LLMSpendEntry.created_at >= since,
+        )
+    ).all())
+
+    by_workflow: dict[str, list[LLMSpendEntry]] = {}
+    for entry in entries:
+        by_workflow.setdefault(entry.workflow_id or "", []).append(entry)
+
+    summary = _totals(entries)
+    budget = settings.LLM_DAILY_BUDGET_USD
+    summary.update({
+        "window_hours": window.total_seconds() / 3600,
+        "budget_usd": budget,
+        "remaining_usd": (
+            round(max(budget - summary["spent_usd"] - summary["reserved_usd"], 0.0), 6)
+            if budget > 0 else None
+        ),
+        "workflows": [
+            {"workflow_id": wf_id or None, **_totals(rows)}
+            for wf_id, rows in sorted(by_workflow.items())
+        ],
+    })
+    return summary
+
+
+def get_workflow_spend(
+    session: Session,
+    *,
+    workflow_id: str,
+    token_fingerprint: str,
+) -> dict | None:
+    """Per-call ledger for one workflow, scoped to its owner. None if unknown."""
+    entries = list(session.exec(
+        select(LLMSpendEntry)
+        .where(
+            LLMSpendEntry.workflow_id == workflow_id,
+            LLMSpendEntry.token_fingerprint == token_fingerprint,
+        )
+        .order_by(LLMSpendEntry.created_at)
+    ).all())
+    if not entries:
+        return None
+    return {
+        "workflow_id": workflow_id,
+        "budget_usd": settings.LLM_WORKFLOW_BUDGET_USD,
+        **_totals(entries),
+        "entries": [
+            {
+                "model": e.model,
+                "status": e.status,
+                "prompt_tokens": e.prompt_tokens,
+                "completion_tokens": e.completion_tokens,
+                "cached_tokens": e.cached_tokens,
+                "cost_usd": e.cost_usd,
+                "reserved_cost_usd": e.reserved_cost_usd,
+                "created_at": e.created_at.isoformat(),
+            }
+            for e in entries
+        ],
+    }
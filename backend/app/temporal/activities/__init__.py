@@ -6,9 +6,12 @@
 
 from app.temporal.activities.analysis import (
     analyze_repo_health,
+    analyze_repo_health_batch,
     deep_scan_repo,
     get_repo_context_activity,
+    plan_incremental_gardening_activity,
     say_hello,
+    select_stale_repos_activity,
 )
 from app.temporal.activities.github import (
     create_or_update_profile_repo_activity,
@@ -25,20 +28,26 @@ from app.temporal.activities.generation import (
     generate_readme_activity,
 )
 from app.temporal.activities.persistence import (
+    publish_progress_activity,
     save_draft_proposal_activity,
     set_repo_status_activity,
 )
 from app.temporal.activities.portfolio import (
     create_docs_pull_request_activity,
+    portfolio_card_activity,
     portfolio_deep_scan_activity,
+    resolve_portfolio_repos_activity,
 )
 
 __all__ = [
     # analysis.py
     "say_hello",
     "analyze_repo_health",
+    "analyze_repo_health_batch",
     "deep_scan_repo",
     "get_repo_context_activity",
+    "select_stale_repos_activity",
+    "plan_incremental_gardening_activity",
     # github.py
     "fetch_repo_list_activity",
     "create_pull_request_activity",
@@ -52,9 +61,12 @@ __all__ = [
     "generate_doc_activity",
     "generate_profile_readme_activity",
     # persistence.py
+    "publish_progress_activity",
     "save_draft_proposal_activity",
     "set_repo_status_activity",
     # portfolio.py
     "create_docs_pull_request_activity",
     "portfolio_deep_scan_activity",
+    "portfolio_card_activity",
+    "resolve_portfolio_repos_activity",
 ]
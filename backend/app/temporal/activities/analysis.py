@@ -1,17 +1,30 @@
 import asyncio
-from datetime import datetime, timezone
+import base64
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 from temporalio import activity
 from github import Auth, Github, GithubException
+from sqlmodel import Session
 
 from app.db.crud import (
+    get_latest_analysis_for_repos,
     upsert_user,
     upsert_repository,
     upsert_analysis_result,
     update_structure_map,
 )
 from app.db.session import get_session
+from app.services.github_client import GithubClient
+from app.temporal.activities.heartbeat import Heartbeater, last_checkpoint
 
 
 # ---------------------------------------------------------------------------
@@ -30,6 +43,19 @@ async def say_hello(name: str) -> str:
 def _analyze_repo(repo_full_name: str, access_token: str) -> dict:
     """Synchronous PyGithub analysis — run via asyncio.to_thread."""
     g = Github(auth=Auth.Token(access_token))
+    try:
+        with get_session() as session:
+            return _analyze_repo_with(g, session, repo_full_name)
+    finally:
+        g.close()
+
+
+def _analyze_repo_with(g: Github, session: Session, repo_full_name: str) -> dict:
+    """Health-check one repo on a caller-owned client + session.
+
+    Commits its own DB writes so a chunk keeps the repos done before a
+    failure; persistence errors are rolled back and logged, not raised.
+    """
     try:
         repo = g.get_repo(repo_full_name)
     except GithubException as exc:
@@ -90,34 +116,32 @@ def _analyze_repo(repo_full_name: str, access_token: str) -> dict:
 
     # Persist results to database
     try:
-        with get_session() as session:
-            db_user = upsert_user(
-                session,
-                github_id=repo.owner.id,
-                username=repo.owner.login,
-            )
-            db_repo = upsert_repository(
-                session,
-                github_repo_id=repo.id,
-                owner_id=db_user.id,
-                name=repo.name,
-                full_name=repo.full_name,
-                html_url=repo.html_url,
-            )
-            upsert_analysis_result(
-                session,
-                repo_id=db_repo.id,
-                health_score=max(score, 0),
-                issues=issues,
-                pending_fix_url=pending_fix_url,
-                last_gardener_run_at=last_gardener_run_at,
-            )
-            session.commit()
+        db_user = upsert_user(
+            session,
+            github_id=repo.owner.id,
+            username=repo.owner.login,
+        )
+        db_repo = upsert_repository(
+            session,
+            github_repo_id=repo.id,
+            owner_id=db_user.id,
+            name=repo.name,
+            full_name=repo.full_name,
+            html_url=repo.html_url,
+        )
+        upsert_analysis_result(
+            session,
+            repo_id=db_repo.id,
+            health_score=max(score, 0),
+            issues=issues,
+            pending_fix_url=pending_fix_url,
+            last_gardener_run_at=last_gardener_run_at,
+        )
+        session.commit()
     except Exception as exc:
+        session.rollback()
         activity.logger.warning("DB persistence failed (non-fatal): %s", exc)
 
-    g.close()
-
     return {
         "repo_name": repo.full_name,
         "health_score": max(score, 0),
@@ -134,6 +158,209 @@ async def analyze_repo_health(repo_full_name: str, access_token: str) -> dict:
     return await asyncio.to_thread(_analyze_repo, repo_full_name, access_token)
 
 
+ANALYSIS_FAILED_ISSUE = "Analysis failed"
+
+
+def failed_health_result(repo_full_name: str, when: datetime) -> dict:
+    """Placeholder report for a repo whose analysis failed."""
+    return {
+        "repo_name": repo_full_name,
+        "health_score": 0,
+        "issues": [ANALYSIS_FAILED_ISSUE],
+        "last_commit_date": when.isoformat(),
+    }
+
+
+def is_failed_health_result(result: dict) -> bool:
+    return result.get("issues") == [ANALYSIS_FAILED_ISSUE]
+
+
+@activity.defn
+async def analyze_repo_health_batch(repo_full_names: list[str], access_token: str) -> list[dict]:
+    """Analyze a chunk of repos on one GitHub client + DB session.
+
+    Batch-mode counterpart to one ``AnalysisWorkflow`` per repo: the chunk
+    pays for a single activity task instead of a child workflow, activity
+    and their history per repo. Heartbeats after every repo with the
+    results so far, and a retry resumes after the last repo reported. A
+    repo that fails gets a placeholder report; the others carry on.
+    """
+    results = _resume_batch(last_checkpoint(), repo_full_names)
+    if results:
+        activity.logger.info(
+            "Resuming batch after %d of %d repos", len(results), len(repo_full_names),
+        )
+    g = Github(auth=Auth.Token(access_token))
+    try:
+        progress = {"completed": len(results), "total": len(repo_full_names), "results": list(results)}
+        async with Heartbeater(progress) as heartbeater:
+            with get_session() as session:
+                for repo_full_name in repo_full_names[len(results):]:
+                    try:
+                        result = await asyncio.to_thread(
+                            _analyze_repo_with, g, session, repo_full_name,
+                        )
+                    except Exception as exc:
+                        activity.logger.warning("Batch analysis failed for %s: %s", repo_full_name, exc)
+                        result = failed_health_result(repo_full_name, datetime.now(timezone.utc))
+                    results.append(result)
+                    heartbeater.beat(completed=len(results), results=list(results))
+    finally:
+        g.close()
+    return results
+
+
+def _resume_batch(checkpoint: dict | None, repo_full_names: list[str]) -> list[dict]:
+    """Results a previous attempt already heartbeated, if they match this chunk."""
+    results = (checkpoint or {}).get("results") or []
+    done = [result.get("repo_name") for result in results]
+    if done != repo_full_names[:len(done)]:
+        return []
+    return list(results)
+
+
+def needs_reanalysis(
+    pushed_at: datetime | None,
+    last_analyzed_at: datetime | None,
+    now: datetime,
+    max_age: timedelta,
+) -> bool:
+    """Whether a stored health report is out of date.
+
+    Stale when it was never analysed, when it has been pushed to since the
+    last analysis, or when the report is older than ``max_age``. The age
+    limit matters because the staleness and open-PR checks drift even
+    without pushes.
+    """
+    if last_analyzed_at is None or pushed_at is None:
+        return True
+    if last_analyzed_at.tzinfo is None:  # SQLite hands back naive UTC
+        last_analyzed_at = last_analyzed_at.replace(tzinfo=timezone.utc)
+    return pushed_at > last_analyzed_at or now - last_analyzed_at > max_age
+
+
+def _split_by_freshness(
+    repos: list[dict], force_refresh: bool, max_age_hours: int,
+) -> tuple[list[dict], list[dict]]:
+    """Split ``{"id", "full_name", "pushed_at"}`` dicts into (stale, fresh).
+
+    Fresh entries are the stored health report, shaped like
+    :func:`analyze_repo_health` output.
+    """
+    now = datetime.now(timezone.utc)
+    max_age = timedelta(hours=max_age_hours)
+    stale: list[dict] = []
+    fresh: list[dict] = []
+    with get_session() as session:
+        latest = {} if force_refresh else get_latest_analysis_for_repos(
+            session, [repo["id"] for repo in repos],
+        )
+        for repo in repos:
+            analysis = latest.get(repo["id"])
+            if force_refresh or needs_reanalysis(
+                repo["pushed_at"], analysis and analysis.last_analyzed_at, now, max_age,
+            ):
+                stale.append(repo)
+                continue
+            fresh.append({
+                "repo_name": repo["full_name"],
+                "health_score": analysis.health_score,
+                "issues": list(analysis.issues),
+                "last_commit_date": repo["pushed_at"].isoformat(),
+                "pending_fix_url": analysis.pending_fix_url,
+                "status": analysis.status,
+                "last_gardener_run_at": (
+                    analysis.last_gardener_run_at.isoformat()
+                    if analysis.last_gardener_run_at else None
+                ),
+            })
+    return stale, fresh
+
+
+def _select_stale_repos(
+    access_token: str, repo_ids: list[int], force_refresh: bool, max_age_hours: int,
+) -> dict:
+    g = Github(auth=Auth.Token(access_token))
+    repos = []
+    try:
+        for repo_id in repo_ids:
+            try:
+                repo = g.get_repo(repo_id)
+            except GithubException as exc:
+                activity.logger.warning("Skipping repo %s: %s", repo_id, exc)
+                continue
+            repos.append({"id": repo.id, "full_name": repo.full_name, "pushed_at": repo.pushed_at})
+    finally:
+        g.close()
+
+    stale, fresh = _split_by_freshness(repos, force_refresh, max_age_hours)
+    return {"stale": [repo["full_name"] for repo in stale], "fresh": fresh}
+
+
+@activity.defn
+async def select_stale_repos_activity(
+    access_token: str,
+    repo_ids: list[int],
+    force_refresh: bool = False,
+    max_age_hours: int = 168,
+) -> dict:
+    """Split ``repo_ids`` into repos that need a health check and fresh ones.
+
+    Compares each repo's ``pushed_at`` with its stored
+    ``AnalysisResult.last_analyzed_at`` (see :func:`needs_reanalysis`).
+    Returns ``{"stale": [full_name], "fresh": [stored health report]}``.
+    ``force_refresh`` marks everything stale. IDs GitHub can't resolve are
+    logged and dropped.
+    """
+    return await asyncio.to_thread(
+        _select_stale_repos, access_token, repo_ids, force_refresh, max_age_hours,
+    )
+
+
+# GitHub core-API calls one _analyze_repo_with makes (repo, README,
+# commits, open PRs, plus pagination slack).
+GITHUB_CALLS_PER_ANALYSIS = 5
+
+
+def _plan_incremental_gardening(
+    access_token: str, max_age_hours: int, rate_limit_share: float,
+) -> dict:
+    with GithubClient(access_token) as client:
+        repos = client.list_user_repo_pushes()
+        remaining, reset_at = client.core_rate_limit()
+
+    stale, _ = _split_by_freshness(repos, False, max_age_hours)
+    # Most recently pushed first: that's what the user is looking at.
+    never_pushed = datetime.min.replace(tzinfo=timezone.utc)
+    stale.sort(key=lambda repo: repo["pushed_at"] or never_pushed, reverse=True)
+    budget = max(0, int(remaining * rate_limit_share) // GITHUB_CALLS_PER_ANALYSIS)
+    return {
+        "stale": [repo["full_name"] for repo in stale[:budget]],
+        "deferred": max(0, len(stale) - budget),
+        "rate_limit_remaining": remaining,
+        "rate_limit_reset_at": reset_at.isoformat(),
+    }
+
+
+@activity.defn
+async def plan_incremental_gardening_activity(
+    access_token: str,
+    max_age_hours: int = 168,
+    rate_limit_share: float = 0.5,
+) -> dict:
+    """Pick the user's repos that changed since their last health report.
+
+    Lists every owned repo in one paginated call and applies
+    :func:`needs_reanalysis`. The pick is capped so that analysing it spends
+    at most ``rate_limit_share`` of the remaining GitHub core quota.
+    Repos over the cap are counted in ``deferred`` and stay stale for the
+    next run.
+    """
+    return await asyncio.to_thread(
+        _plan_incremental_gardening, access_token, max_age_hours, rate_limit_share,
+    )
+
+
 # ---------------------------------------------------------------------------
 # Phase 9: Deep Repo Scanner
 # ---------------------------------------------------------------------------
@@ -164,8 +391,17 @@ HIGH_VALUE_ENTRY_POINTS = {
 MAX_FILE_LINES = 200
 
 
-def _build_file_tree(root: Path, prefix: str = "") -> list[dict]:
-    """Walk a directory and return a JSON-serialisable tree structure."""
+def _build_file_tree(
+    root: Path,
+    prefix: str = "",
+    progress: dict | None = None,
+    cancelled: threading.Event | None = None,
+) -> list[dict]:
+    """Walk a directory and return a JSON-serialisable tree structure.
+
+    ``progress["files_walked"]``, when given, counts entries as they are
+    seen. The walk raises :class:`ScanCancelled` once ``cancelled`` is set.
+    """
     tree: list[dict] = []
     try:
         entries = sorted(root.iterdir(), key=lambda e: (not e.is_dir(), e.name.lower()))
@@ -176,8 +412,12 @@ def _build_file_tree(root: Path, prefix: str = "") -> list[dict]:
         if entry.name.startswith("."):
             continue
         rel = f"{prefix}{entry.name}" if not prefix else f"{prefix}/{entry.name}"
+        if progress is not None:
+            progress["files_walked"] = progress.get("files_walked", 0) + 1
+        if cancelled is not None and cancelled.is_set():
+            raise ScanCancelled("scan cancelled")
         if entry.is_dir():
-            children = _build_file_tree(entry, rel)
+            children = _build_file_tree(entry, rel, progress, cancelled)
             tree.append({"name": entry.name, "type": "dir", "path": rel, "children": children})
         else:
             tree.append({"name": entry.name, "type": "file", "path": rel})
@@ -200,34 +440,194 @@ def _read_high_value_files(root: Path) -> dict[str, str]:
     return contents
 
 
-def _deep_scan(repo_url: str, access_token: str, github_repo_id: int) -> dict:
-    """Clone repo shallow, map files, read key files, persist structure_map."""
-    import subprocess
-    import tempfile
-    from urllib.parse import urlparse
-    
-    parsed = urlparse(repo_url)
-    # Insert token into URL for auth — masked in any log output
-    auth_url = f"https://oauth2:{access_token}@{parsed.hostname}{parsed.path}.git"
-    masked_url = f"https://oauth2:****@{parsed.hostname}{parsed.path}.git"
-
-    with tempfile.TemporaryDirectory() as tmpdir:
-        clone_dir = Path(tmpdir) / "repo"
-        activity.logger.info("Cloning %s into temp directory", masked_url)
-
-        result = subprocess.run(
-            ["git", "clone", "--depth", "1", "--single-branch", auth_url, str(clone_dir)],
-            capture_output=True,
-            text=True,
-            timeout=120,
+# Per-activity clone directories (owner-only). A finished clone survives a
+# failed walk so a retry on the same host can skip the clone; anything else
+# is removed when the attempt ends, and leftovers older than a day are swept.
+# Clones never hold the token: it goes to git as an HTTP header via the
+# environment, not in the remote URL that git writes to .git/config.
+SCAN_WORKDIR = Path(tempfile.gettempdir()) / "gardener-scan"
+SCAN_WORKDIR_MAX_AGE_S = 24 * 3600
+CLONE_TIMEOUT_S = 120
+
+# Checkpoint phases a retry can pick up from (the clone is complete).
+_RESUMABLE_PHASES = ("walking", "scanned")
+
+_CLONE_RECEIVED = re.compile(r"Receiving objects:.*?([\d.]+) (KiB|MiB|GiB)")
+_BYTE_UNITS = {"KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3}
+
+
+def _scan_dir(workflow_id: str, activity_id: str, github_repo_id: int) -> Path:
+    """Same path for every attempt of one activity, unique across activities."""
+    key = hashlib.sha256(f"{workflow_id}/{activity_id}".encode()).hexdigest()[:16]
+    return SCAN_WORKDIR / f"{github_repo_id}-{key}"
+
+
+def _ensure_scan_workdir() -> None:
+    """Create ``SCAN_WORKDIR`` as 0700, refusing one another user planted."""
+    SCAN_WORKDIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    st = SCAN_WORKDIR.lstat()
+    if SCAN_WORKDIR.is_symlink() or st.st_uid != os.getuid():
+        raise RuntimeError(f"{SCAN_WORKDIR} is not a directory owned by this user")
+    if st.st_mode & 0o777 != 0o700:
+        SCAN_WORKDIR.chmod(0o700)
+
+
+def _git_auth_env(access_token: str) -> dict[str, str]:
+    """Environment passing the token as an HTTP header (git >= 2.31).
+
+    Unlike a token in the URL or ``git clone -c``, this is neither written
+    to the clone's .git/config nor visible in the process arguments.
+    """
+    basic = base64.b64encode(f"x-access-token:{access_token}".encode()).decode()
+    return {
+        **os.environ,
+        "GIT_TERMINAL_PROMPT": "0",
+        "GIT_CONFIG_COUNT": "1",
+        "GIT_CONFIG_KEY_0": "http.extraHeader",
+        "GIT_CONFIG_VALUE_0": f"Authorization: Basic {basic}",
+    }
+
+
+def _sweep_stale_scan_dirs() -> None:
+    cutoff = time.time() - SCAN_WORKDIR_MAX_AGE_S
+    for path in SCAN_WORKDIR.glob("*"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
+
+
+class ScanCancelled(Exception):
+    """The activity was cancelled; raised in the scan thread to stop it."""
+
+
+def _clone(
+    clone_url: str,
+    clone_dir: Path,
+    access_token: str,
+    progress: dict,
+    cancelled: threading.Event | None = None,
+) -> None:
+    """Shallow clone, reporting received bytes in ``progress["clone_bytes"]``.
+
+    ``clone_url`` carries no credentials; see :func:`_git_auth_env`. git is
+    killed after ``CLONE_TIMEOUT_S`` or as soon as ``cancelled`` is set.
+    """
+    cancelled = cancelled or threading.Event()
+    proc = subprocess.Popen(
+        ["git", "clone", "--depth", "1", "--single-branch", "--progress", clone_url, str(clone_dir)],
+        env=_git_auth_env(access_token),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+    )
+    finished = threading.Event()
+    deadline = time.monotonic() + CLONE_TIMEOUT_S
+
+    def watchdog() -> None:
+        while not finished.wait(0.2):
+            if cancelled.is_set() or time.monotonic() > deadline:
+                proc.kill()
+                return
+
+    threading.Thread(target=watchdog, daemon=True).start()
+    output: list[str] = []
+    try:
+        # git redraws its progress line with \r; read in chunks, not lines.
+        buffer = ""
+        for chunk in iter(lambda: proc.stderr.read(512), ""):
+            buffer += chunk
+            *lines, buffer = re.split(r"[\r\n]", buffer)
+            for line in lines:
+                match = _CLONE_RECEIVED.search(line)
+                if match:
+                    progress["clone_bytes"] = int(float(match.group(1)) * _BYTE_UNITS[match.group(2)])
+                elif line.strip():
+                    output.append(line)
+        returncode = proc.wait()
+    finally:
+        finished.set()
+    if cancelled.is_set():
+        raise ScanCancelled("git clone cancelled")
+    if returncode != 0:
+        # Mask token in error output before raising
+        stderr = "\n".join(output[-20:]).replace(access_token, "****")
+        raise RuntimeError(f"git clone failed: {stderr}")
+
+
+def _deep_scan(
+    repo_url: str,
+    access_token: str,
+    github_repo_id: int,
+    clone_dir: Path,
+    progress: dict,
+    checkpoint: dict | None = None,
+    cancelled: threading.Event | None = None,
+) -> dict:
+    """Clone repo shallow, map files, read key files, persist structure_map.
+
+    ``progress`` is the live heartbeat payload. When ``checkpoint`` (the last
+    heartbeat of a previous attempt) shows the clone finished and it is
+    still on disk, the clone is skipped. Setting ``cancelled`` kills the
+    clone or stops the walk.
+
+    The clone directory is removed when the scan ends, unless it failed
+    after a complete clone, which the next attempt can reuse.
+    """
+    cancelled = cancelled or threading.Event()
+    succeeded = False
+    try:
+        result = _scan_clone(
+            repo_url, access_token, github_repo_id, clone_dir, progress, checkpoint, cancelled,
         )
-        if result.returncode != 0:
-            # Mask token in error output before raising
-            stderr = result.stderr.replace(access_token, "****")
-            raise RuntimeError(f"git clone failed: {stderr}")
+        succeeded = True
+        return result
+    finally:
+        if succeeded or cancelled.is_set() or progress.get("phase") not in _RESUMABLE_PHASES:
+            shutil.rmtree(clone_dir, ignore_errors=True)
+
+
+def _scan_clone(
+    repo_url: str,
+    access_token: str,
+    github_repo_id: int,
+    clone_dir: Path,
+    progress: dict,
+    checkpoint: dict | None,
+    cancelled: threading.Event,
+) -> dict:
+    from urllib.parse import urlparse
 
-        file_tree = _build_file_tree(clone_dir)
-        tech_stack_files = _read_high_value_files(clone_dir)
+    parsed = urlparse(repo_url)
+    clone_url = f"https://{parsed.hostname}{parsed.path}.git"
+
+    resumed = (
+        checkpoint is not None
+        and checkpoint.get("phase") in _RESUMABLE_PHASES
+        and checkpoint.get("clone_dir") == str(clone_dir)
+        and (clone_dir / ".git").is_dir()
+    )
+    progress["clone_dir"] = str(clone_dir)
+    if resumed:
+        activity.logger.info("Reusing clone of %s from the previous attempt", clone_url)
+        progress.update(resumed=True, clone_bytes=checkpoint.get("clone_bytes", 0))
+    else:
+        _sweep_stale_scan_dirs()
+        # A half-written clone from a failed attempt can't be resumed by git.
+        shutil.rmtree(clone_dir, ignore_errors=True)
+        _ensure_scan_workdir()
+        progress["phase"] = "cloning"
+        activity.logger.info("Cloning %s into %s", clone_url, clone_dir)
+        _clone(clone_url, clone_dir, access_token, progress, cancelled)
+
+    progress.update(phase="walking", files_walked=0)
+    file_tree = _build_file_tree(clone_dir, progress=progress, cancelled=cancelled)
+    tech_stack_files = _read_high_value_files(clone_dir)
+    if cancelled.is_set():
+        raise ScanCancelled("scan cancelled")
+    progress["phase"] = "scanned"
 
     # Persist structure_map to DB
     try:
@@ -249,8 +649,25 @@ def _deep_scan(repo_url: str, access_token: str, github_repo_id: int) -> dict:
 
 @activity.defn
 async def deep_scan_repo(repo_url: str, access_token: str, github_repo_id: int) -> dict:
-    """Ephemeral clone + deep file analysis of a repository."""
-    return await asyncio.to_thread(_deep_scan, repo_url, access_token, github_repo_id)
+    """Ephemeral clone + deep file analysis of a repository.
+
+    Heartbeats its phase, clone bytes and files walked. A retry on the same
+    worker host reuses a finished clone instead of fetching it again. When
+    the activity is cancelled, git is killed and the scan thread stops.
+    """
+    info = activity.info()
+    clone_dir = _scan_dir(info.workflow_id, info.activity_id, github_repo_id)
+    checkpoint = last_checkpoint()
+    cancelled = threading.Event()
+    async with Heartbeater({"phase": "starting", "clone_bytes": 0, "files_walked": 0}) as heartbeater:
+        try:
+            return await asyncio.to_thread(
+                _deep_scan, repo_url, access_token, github_repo_id,
+                clone_dir, heartbeater.details, checkpoint, cancelled,
+            )
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
 
 
 # ---------------------------------------------------------------------------
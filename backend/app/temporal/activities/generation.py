@@ -1,9 +1,30 @@
 import asyncio
 import json
+from contextlib import contextmanager
+from typing import Iterator
 
 from temporalio import activity
+from temporalio.exceptions import ApplicationError
 
 from app.services import llm_service
+from app.services.spend_ledger import LLMBudgetExceededError, attribute_spend
+from app.temporal.activities.heartbeat import heartbeating
+
+
+@contextmanager
+def llm_spend_scope(token_fingerprint: str) -> Iterator[None]:
+    """Attribute LLM spend in this activity to the caller + parent workflow."""
+    try:
+        workflow_id = activity.info().workflow_id
+    except RuntimeError:
+        # Called outside a Temporal activity context (tests, scripts).
+        workflow_id = None
+    try:
+        with attribute_spend(token_fingerprint, workflow_id):
+            yield
+    except LLMBudgetExceededError as exc:
+        # A spent budget won't refill within the retry window — fail fast.
+        raise ApplicationError(str(exc), type="LLMBudgetExceeded", non_retryable=True) from exc
 
 
 # ---------------------------------------------------------------------------
@@ -11,9 +32,15 @@ from app.services import llm_service
 # ---------------------------------------------------------------------------
 
 @activity.defn
-async def generate_readme_activity(repo_name: str, file_structure: list[str], description: str) -> str:
+async def generate_readme_activity(
+    repo_name: str,
+    file_structure: list[str],
+    description: str,
+    token_fingerprint: str = "",
+) -> str:
     """Generate a README.md using LiteLLM (legacy shallow mode)."""
-    return await llm_service.generate_readme(repo_name, file_structure, description)
+    with llm_spend_scope(token_fingerprint):
+        return await llm_service.generate_readme(repo_name, file_structure, description)
 
 
 @activity.defn
@@ -22,11 +49,13 @@ async def generate_deep_readme_activity(
     description: str,
     file_tree: list[dict],
     tech_stack_files: dict[str, str],
+    token_fingerprint: str = "",
 ) -> str:
     """Generate a README.md using deep code context."""
-    return await llm_service.generate_deep_readme(
-        repo_name, description, file_tree, tech_stack_files
-    )
+    with llm_spend_scope(token_fingerprint):
+        return await llm_service.generate_deep_readme(
+            repo_name, description, file_tree, tech_stack_files
+        )
 
 
 # ---------------------------------------------------------------------------
@@ -34,32 +63,38 @@ async def generate_deep_readme_activity(
 # ---------------------------------------------------------------------------
 
 @activity.defn
+@heartbeating
 async def analyze_codebase_activity(
     repo_name: str,
     description: str,
     file_tree: list[dict],
     tech_stack_files: dict[str, str],
+    token_fingerprint: str = "",
 ) -> str:
     """Analyze codebase and return a JSON summary string."""
-    return await llm_service.analyze_codebase(
-        repo_name, description, file_tree, tech_stack_files
-    )
+    with llm_spend_scope(token_fingerprint):
+        return await llm_service.analyze_codebase(
+            repo_name, description, file_tree, tech_stack_files
+        )
 
 
 @activity.defn
+@heartbeating
 async def generate_doc_activity(
     summary_json: str,
     doc_type: str,
     repo_name: str,
     file_tree: list[dict],
     tech_stack_files: dict[str, str],
+    token_fingerprint: str = "",
 ) -> dict:
     """Generate a single doc file. Returns dict with filename, content, doc_type, error."""
     filename = llm_service.DOC_TYPE_FILENAMES[doc_type]
     try:
-        content = await llm_service.generate_doc(
-            summary_json, doc_type, repo_name, file_tree, tech_stack_files
-        )
+        with llm_spend_scope(token_fingerprint):
+            content = await llm_service.generate_doc(
+                summary_json, doc_type, repo_name, file_tree, tech_stack_files
+            )
         return {
             "filename": filename,
             "content": content,
@@ -81,13 +116,16 @@ async def generate_doc_activity(
 # ---------------------------------------------------------------------------
 
 @activity.defn
+@heartbeating
 async def generate_profile_readme_activity(
     top_repos_json: str,
     username: str,
     bio: str = "",
     links_json: str = "{}",
+    token_fingerprint: str = "",
 ) -> str:
     """Generate a GitHub Profile README from the top repos."""
     top_repos: list[dict] = json.loads(top_repos_json)
     links: dict = json.loads(links_json) if links_json else {}
-    return await llm_service.generate_profile_readme(top_repos, username, bio=bio, links=links)
+    with llm_spend_scope(token_fingerprint):
+        return await llm_service.generate_profile_readme(top_repos, username, bio=bio, links=links)
@@ -0,0 +1,91 @@
+"""Heartbeat + checkpoint helpers for long-running activities.
+
+Long activities call these so that:
+
+* a dead worker is noticed within the workflow's ``heartbeat_timeout``
+  (seconds) instead of only after ``start_to_close_timeout`` (minutes)
+* a retry picks up from the last heartbeat's details (its checkpoint)
+  instead of starting over
+* a cancelled workflow's cancel reaches the activity, since Temporal only
+  delivers activity cancellation in the response to a heartbeat. It
+  arrives as ``asyncio.CancelledError`` at the activity's current ``await``
+  (e.g. an in-flight LLM request, which is aborted).
+
+Blocking work runs in ``asyncio.to_thread`` and can't heartbeat itself.
+It updates :attr:`Heartbeater.details` as it goes, and a ticker on the
+event loop sends the latest details every ``interval_s``.
+"""
+
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, TypeVar
+
+from temporalio import activity
+
+# How often the ticker re-sends progress. Keep well under the workflows'
+# heartbeat_timeout; the SDK throttles what actually goes to the server.
+HEARTBEAT_INTERVAL_S = 5.0
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+def last_checkpoint() -> dict | None:
+    """Details of the previous attempt's last heartbeat, if any."""
+    details = activity.info().heartbeat_details
+    if details and isinstance(details[0], dict):
+        return details[0]
+    return None
+
+
+class Heartbeater:
+    """Sends ``details`` as a heartbeat now and then, while the block runs.
+
+    ``details`` is a plain dict. Writers (including worker threads) replace
+    keys, and each tick sends a shallow copy. Outside an activity (tests,
+    scripts calling the function directly) nothing is sent.
+    """
+
+    def __init__(self, details: dict[str, Any] | None = None, interval_s: float = HEARTBEAT_INTERVAL_S) -> None:
+        self.details: dict[str, Any] = dict(details or {})
+        self._interval_s = interval_s
+        self._task: asyncio.Task | None = None
+
+    def beat(self, **updates: Any) -> None:
+        """Merge ``updates`` into the details and heartbeat right away."""
+        self.details.update(updates)
+        self._send()
+
+    def _send(self) -> None:
+        if activity.in_activity():
+            activity.heartbeat(dict(self.details))
+
+    async def _tick(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval_s)
+            self._send()
+
+    async def __aenter__(self) -> "Heartbeater":
+        self._send()
+        self._task = asyncio.create_task(self._tick())
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+def heartbeating(fn: F) -> F:
+    """Run an async activity inside a :class:`Heartbeater` with no details.
+
+    For activities that just await I/O (LLM calls) and only need to stay
+    cancellable. Put it under ``@activity.defn``.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        async with Heartbeater():
+            return await fn(*args, **kwargs)
+    return wrapper  # type: ignore[return-value]
@@ -4,6 +4,7 @@ import json
 from temporalio import activity
 
 from app.db.crud import (
+    append_workflow_events,
     save_draft_proposal,
     set_repo_status,
 )
@@ -48,3 +49,17 @@ async def set_repo_status_activity(github_repo_id: int, status: str) -> bool:
             session.commit()
             return ok
     return await asyncio.to_thread(_set)
+
+
+# ---------------------------------------------------------------------------
+# Progress events for the SSE / long-poll endpoints
+# ---------------------------------------------------------------------------
+
+@activity.defn
+async def publish_progress_activity(workflow_id: str, events: list[dict]) -> None:
+    """Append progress events for ``workflow_id`` (run as a local activity)."""
+    def _append() -> None:
+        with get_session() as session:
+            append_workflow_events(session, workflow_id=workflow_id, events=events)
+            session.commit()
+    await asyncio.to_thread(_append)
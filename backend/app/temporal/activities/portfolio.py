@@ -1,11 +1,24 @@
 import asyncio
 import json
+from datetime import datetime, timedelta, timezone
 
 from temporalio import activity
 from github import Auth, Github, GithubException
 
+from app.core.config import settings
 from app.db.session import get_session
-from app.db.crud import update_structure_map
+from app.db.crud import (
+    get_portfolio_card,
+    get_repo_metadata_snapshot,
+    save_portfolio_card,
+    save_repo_metadata_snapshot,
+    update_structure_map,
+)
+from app.services import llm_service
+from app.services.github_client import GithubClient
+from app.services.idempotency import fingerprint_token
+from app.temporal.activities.generation import llm_spend_scope
+from app.temporal.activities.heartbeat import heartbeating
 
 
 # ---------------------------------------------------------------------------
@@ -174,14 +187,27 @@ def _extract_frameworks(dependencies: dict[str, str]) -> list[str]:
     return sorted(frameworks)
 
 
-def _portfolio_deep_scan(repo_full_name: str, access_token: str) -> dict:
-    """Lightweight deep scan using PyGithub API (no git clone)."""
-    g = Github(auth=Auth.Token(access_token))
+def _repo_metadata(repo) -> dict:
+    """Display metadata that changes independently of the code (stars, topics)."""
+    topics: list[str] = []
     try:
-        repo = g.get_repo(repo_full_name)
-    except GithubException as exc:
-        raise ValueError(f"Could not fetch repo '{repo_full_name}': {exc.data}")
+        topics = repo.get_topics()
+    except GithubException:
+        pass
+    return {
+        "full_name": repo.full_name,
+        "name": repo.name,
+        "description": repo.description or "",
+        "html_url": repo.html_url,
+        "language": repo.language or "",
+        "stargazers_count": repo.stargazers_count,
+        "forks_count": repo.forks_count,
+        "topics": topics,
+    }
 
+
+def _scan_repo_contents(repo) -> dict:
+    """README excerpt + dependency files + detected frameworks."""
     # Read README (first 3000 chars)
     readme_content = ""
     try:
@@ -200,34 +226,197 @@ def _portfolio_deep_scan(repo_full_name: str, access_token: str) -> dict:
         except GithubException:
             pass
 
-    # Extract topics
-    topics: list[str] = []
-    try:
-        topics = repo.get_topics()
-    except GithubException:
-        pass
-
-    # Extract frameworks from dependencies
-    frameworks = _extract_frameworks(dep_files)
-
-    g.close()
-
     return {
-        "full_name": repo.full_name,
-        "name": repo.name,
-        "description": repo.description or "",
-        "html_url": repo.html_url,
-        "language": repo.language or "",
-        "stargazers_count": repo.stargazers_count,
-        "forks_count": repo.forks_count,
-        "topics": topics,
         "readme_content": readme_content,
         "dependencies": dep_files,
-        "frameworks": frameworks,
+        "frameworks": _extract_frameworks(dep_files),
     }
 
 
+def _portfolio_deep_scan(repo_full_name: str, access_token: str) -> dict:
+    """Lightweight deep scan using PyGithub API (no git clone)."""
+    g = Github(auth=Auth.Token(access_token))
+    try:
+        repo = g.get_repo(repo_full_name)
+    except GithubException as exc:
+        raise ValueError(f"Could not fetch repo '{repo_full_name}': {exc.data}")
+
+    result = {**_repo_metadata(repo), **_scan_repo_contents(repo)}
+    g.close()
+    return result
+
+
 @activity.defn
 async def portfolio_deep_scan_activity(repo_full_name: str, access_token: str) -> dict:
     """Lightweight deep scan for portfolio — no git clone, uses GitHub API."""
     return await asyncio.to_thread(_portfolio_deep_scan, repo_full_name, access_token)
+
+
+# ---------------------------------------------------------------------------
+# Phase 19: Portfolio selection (from the /repos metadata snapshot)
+# ---------------------------------------------------------------------------
+
+def _load_repo_snapshot(token_fingerprint: str, max_age_hours: int) -> list[dict] | None:
+    """The caller's snapshot if it is younger than ``max_age_hours``."""
+    try:
+        with get_session() as session:
+            row = get_repo_metadata_snapshot(session, token_fingerprint=token_fingerprint)
+            if row is None:
+                return None
+            refreshed_at = row.refreshed_at
+            if refreshed_at.tzinfo is None:
+                refreshed_at = refreshed_at.replace(tzinfo=timezone.utc)
+            if datetime.now(timezone.utc) - refreshed_at > timedelta(hours=max_age_hours):
+                return None
+            return list(row.repos)
+    except Exception as exc:
+        activity.logger.warning("Repo snapshot lookup failed (non-fatal): %s", exc)
+        return None
+
+
+def _store_repo_snapshot(token_fingerprint: str, repos: list[dict]) -> None:
+    try:
+        with get_session() as session:
+            save_repo_metadata_snapshot(session, token_fingerprint=token_fingerprint, repos=repos)
+            session.commit()
+    except Exception as exc:
+        activity.logger.warning("Repo snapshot save failed (non-fatal): %s", exc)
+
+
+def _resolve_portfolio_repos(
+    access_token: str, username: str, repo_ids: list[int] | None, max_age_hours: int,
+) -> dict:
+    fingerprint = fingerprint_token(access_token)
+    snapshot = _load_repo_snapshot(fingerprint, max_age_hours)
+
+    with GithubClient(access_token) as client:
+        if not repo_ids:
+            # Auto-selection ranks the whole account, so it needs a full listing.
+            if snapshot is not None:
+                return {"repos": snapshot, "from_snapshot": len(snapshot), "fetched": 0}
+            repos = client.list_user_repos_as_dicts()
+            _store_repo_snapshot(fingerprint, repos)
+            return {"repos": repos, "from_snapshot": 0, "fetched": len(repos)}
+
+        by_id = {repo["id"]: repo for repo in snapshot or []}
+        misses = [repo_id for repo_id in repo_ids if repo_id not in by_id]
+        for repo_id in misses:
+            try:
+                repo = client.get_repo_metadata(repo_id)
+            except GithubException as exc:
+                if exc.status == 404:
+                    continue
+                raise
+            # Same rule as the owner listing: only the caller's own repos.
+            if repo["full_name"].split("/")[0].lower() == username.lower():
+                by_id[repo_id] = repo
+
+    return {
+        "repos": [by_id[repo_id] for repo_id in repo_ids if repo_id in by_id],
+        "from_snapshot": len(repo_ids) - len(misses),
+        "fetched": len(misses),
+    }
+
+
+@activity.defn
+async def resolve_portfolio_repos_activity(
+    access_token: str, username: str, repo_ids: list[int] | None, max_age_hours: int = 24,
+) -> dict:
+    """Metadata for the selected repos, read from the /repos snapshot.
+
+    Only IDs missing from the snapshot (or all of them, if it is older than
+    ``max_age_hours``) are looked up on GitHub, one call each. With no
+    selection, the whole snapshot is returned, or a fresh listing if there
+    is none.
+    """
+    return await asyncio.to_thread(
+        _resolve_portfolio_repos, access_token, username, repo_ids, max_age_hours,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Phase 19: Portfolio cards (stage 1 of profile README generation)
+# ---------------------------------------------------------------------------
+
+def _portfolio_card_inputs(repo_full_name: str, access_token: str) -> dict:
+    """Fetch fresh metadata + HEAD SHA; scan contents only on a card-cache miss.
+
+    Returns ``{"meta", "head_sha", "card"}`` on a hit, or ``{"meta",
+    "head_sha", "scan"}`` on a miss. ``head_sha`` is "" when the default
+    branch can't be resolved (e.g. empty repo) — such cards aren't cached.
+    """
+    g = Github(auth=Auth.Token(access_token))
+    try:
+        repo = g.get_repo(repo_full_name)
+    except GithubException as exc:
+        raise ValueError(f"Could not fetch repo '{repo_full_name}': {exc.data}")
+
+    try:
+        meta = _repo_metadata(repo)
+        head_sha = ""
+        try:
+            head_sha = repo.get_branch(repo.default_branch).commit.sha
+        except GithubException:
+            pass
+
+        if head_sha:
+            try:
+                with get_session() as session:
+                    row = get_portfolio_card(
+                        session,
+                        repo_full_name=repo.full_name,
+                        head_sha=head_sha,
+                        card_version=llm_service.PORTFOLIO_CARD_VERSION,
+                    )
+                    if row is not None:
+                        return {"meta": meta, "head_sha": head_sha, "card": dict(row.card)}
+            except Exception as exc:
+                activity.logger.warning("Portfolio card lookup failed (non-fatal): %s", exc)
+
+        return {"meta": meta, "head_sha": head_sha, "scan": _scan_repo_contents(repo)}
+    finally:
+        g.close()
+
+
+def _save_portfolio_card(repo_full_name: str, head_sha: str, card: dict) -> None:
+    try:
+        with get_session() as session:
+            save_portfolio_card(
+                session,
+                repo_full_name=repo_full_name,
+                head_sha=head_sha,
+                card_version=llm_service.PORTFOLIO_CARD_VERSION,
+                card=card,
+                model=settings.LLM_MODEL,
+            )
+            session.commit()
+    except Exception as exc:
+        activity.logger.warning("Portfolio card save failed (non-fatal): %s", exc)
+
+
+@activity.defn
+@heartbeating
+async def portfolio_card_activity(
+    repo_full_name: str,
+    access_token: str,
+    token_fingerprint: str = "",
+) -> dict:
+    """Return the portfolio card for a repo, reusing the (repo, HEAD SHA) cache.
+
+    The result merges fresh display metadata with the cached or newly
+    generated card (``summary``, ``highlights``, ``stack``, ``frameworks``);
+    ``card_cached`` says which.
+    """
+    inputs = await asyncio.to_thread(_portfolio_card_inputs, repo_full_name, access_token)
+    meta, head_sha = inputs["meta"], inputs["head_sha"]
+
+    if "card" in inputs:
+        return {**meta, **inputs["card"], "head_sha": head_sha, "card_cached": True}
+
+    scan = {**meta, **inputs["scan"]}
+    with llm_spend_scope(token_fingerprint):
+        summary = await llm_service.generate_portfolio_card(scan)
+    card = {**summary, "frameworks": scan["frameworks"]}
+    if head_sha:
+        await asyncio.to_thread(_save_portfolio_card, meta["full_name"], head_sha, card)
+    return {**meta, **card, "head_sha": head_sha, "card_cached": False}
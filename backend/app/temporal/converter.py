@@ -0,0 +1,135 @@
+"""Temporal data converter: orjson encoding + compression codec.
+
+Every workflow input and result goes into history: file trees,
+tech-stack file contents, README drafts and batch results. The stock
+converter encodes them with ``json.dumps`` and stores them uncompressed.
+This one:
+
+* encodes ``json/plain`` payloads with orjson. The bytes stay plain JSON,
+  so old histories and other SDKs read them unchanged, and values orjson
+  can't handle (e.g. ints over 64 bits) fall back to the stock encoder.
+* compresses any payload of at least ``TEMPORAL_COMPRESS_MIN_BYTES`` with
+  zstd (or zlib), keeping the result only if it is actually smaller.
+  Decoding handles both codecs and passes uncompressed payloads through,
+  so existing histories keep working after the switch.
+
+Client and worker must use the same converter: ``app.api.deps`` and
+``app.temporal.worker`` both connect through :func:`connect`. Compressed
+payloads show up as ``binary/zstd`` in the Temporal UI.
+"""
+
+import zlib
+from dataclasses import replace
+from typing import Any, Sequence
+
+import orjson
+import zstandard
+from temporalio.api.common.v1 import Payload
+from temporalio.client import Client
+from temporalio.converter import (
+    AdvancedJSONEncoder,
+    CompositePayloadConverter,
+    DataConverter,
+    DefaultPayloadConverter,
+    JSONPlainPayloadConverter,
+    PayloadCodec,
+    value_to_type,
+)
+
+from app.core.config import settings
+
+CODECS = ("zstd", "zlib", "none")
+
+_ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+_fallback_encoder = AdvancedJSONEncoder()
+
+
+class OrjsonPayloadConverter(JSONPlainPayloadConverter):
+    """``json/plain`` via orjson; same wire format as the stock converter."""
+
+    def to_payload(self, value: Any) -> Payload | None:
+        try:
+            data = orjson.dumps(value, default=_fallback_encoder.default, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().to_payload(value)
+        return Payload(metadata={"encoding": b"json/plain"}, data=data)
+
+    def from_payload(self, payload: Payload, type_hint: type | None = None) -> Any:
+        try:
+            obj = orjson.loads(payload.data)
+        except orjson.JSONDecodeError as err:
+            raise RuntimeError("Failed parsing") from err
+        if type_hint:
+            obj = value_to_type(type_hint, obj, self._custom_type_converters)
+        return obj
+
+
+class FastPayloadConverter(CompositePayloadConverter):
+    """The default converter chain with orjson in place of ``json.dumps``."""
+
+    def __init__(self) -> None:
+        super().__init__(*(
+            OrjsonPayloadConverter()
+            if isinstance(converter, JSONPlainPayloadConverter) else converter
+            for converter in DefaultPayloadConverter.default_encoding_payload_converters
+        ))
+
+
+class CompressionCodec(PayloadCodec):
+    """Compresses payloads of at least ``min_bytes``; decodes zstd and zlib."""
+
+    def __init__(self, codec: str = "zstd", min_bytes: int = 4096, level: int = 3) -> None:
+        if codec not in ("zstd", "zlib"):
+            raise ValueError(f"Unknown payload codec {codec!r}, expected one of {CODECS}")
+        self.codec = codec
+        self.min_bytes = min_bytes
+        self.level = level
+        self._encoding = f"binary/{codec}".encode()
+
+    def compress(self, data: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        return zlib.compress(data, self.level)
+
+    async def encode(self, payloads: Sequence[Payload]) -> list[Payload]:
+        encoded = []
+        for payload in payloads:
+            if payload.ByteSize() >= self.min_bytes:
+                raw = payload.SerializeToString()
+                compressed = self.compress(raw)
+                if len(compressed) < len(raw):
+                    payload = Payload(metadata={"encoding": self._encoding}, data=compressed)
+            encoded.append(payload)
+        return encoded
+
+    async def decode(self, payloads: Sequence[Payload]) -> list[Payload]:
+        decoded = []
+        for payload in payloads:
+            encoding = payload.metadata.get("encoding", b"")
+            if encoding == b"binary/zstd":
+                payload = Payload.FromString(zstandard.ZstdDecompressor().decompress(payload.data))
+            elif encoding == b"binary/zlib":
+                payload = Payload.FromString(zlib.decompress(payload.data))
+            decoded.append(payload)
+        return decoded
+
+
+def build_data_converter(codec: str | None = None, min_bytes: int | None = None) -> DataConverter:
+    codec = codec if codec is not None else settings.TEMPORAL_PAYLOAD_CODEC
+    if codec not in CODECS:
+        raise ValueError(f"Unknown payload codec {codec!r}, expected one of {CODECS}")
+    return replace(
+        DataConverter.default,
+        payload_converter_class=FastPayloadConverter,
+        payload_codec=None if codec == "none" else CompressionCodec(
+            codec,
+            min_bytes if min_bytes is not None else settings.TEMPORAL_COMPRESS_MIN_BYTES,
+        ),
+    )
+
+
+async def connect(address: str | None = None) -> Client:
+    """``Client.connect`` with the app's data converter."""
+    return await Client.connect(
+        address or settings.TEMPORAL_ADDRESS, data_converter=build_data_converter(),
+    )
@@ -0,0 +1,91 @@
+"""Task queues per workload class.
+
+Workflows stay on ``gardener-queue``. Each activity is dispatched to the
+queue of its workload class, and every queue gets its own worker with its
+own ``max_concurrent_activities``. A 5-minute clone therefore never holds
+the slot a millisecond status update is waiting for. The worker entrypoint
+can run any subset of pools (see ``app/temporal/worker.py``), so each
+class scales independently.
+"""
+
+from typing import Callable
+
+WORKFLOW_QUEUE = "gardener-queue"
+
+POOL_WORKFLOWS = "workflows"
+POOL_GITHUB_IO = "github-io"
+POOL_LLM = "llm"
+POOL_SCAN = "scan"
+POOL_DB = "db"
+
+POOL_QUEUES: dict[str, str] = {
+    POOL_WORKFLOWS: WORKFLOW_QUEUE,
+    POOL_GITHUB_IO: "gardener-github-io",
+    POOL_LLM: "gardener-llm",
+    POOL_SCAN: "gardener-scan",
+    POOL_DB: "gardener-db",
+}
+
+# Activity name -> pool. Anything missing runs on the workflow queue.
+ACTIVITY_POOLS: dict[str, str] = {
+    # GitHub REST calls: network-bound, cheap on the worker
+    "analyze_repo_health": POOL_GITHUB_IO,
+    "analyze_repo_health_batch": POOL_GITHUB_IO,
+    "select_stale_repos_activity": POOL_GITHUB_IO,
+    "plan_incremental_gardening_activity": POOL_GITHUB_IO,
+    "fetch_repo_list_activity": POOL_GITHUB_IO,
+    "fetch_repos_extended_activity": POOL_GITHUB_IO,
+    "get_repo_context_activity": POOL_GITHUB_IO,
+    "portfolio_deep_scan_activity": POOL_GITHUB_IO,
+    "resolve_portfolio_repos_activity": POOL_GITHUB_IO,
+    "create_pull_request_activity": POOL_GITHUB_IO,
+    "create_docs_pull_request_activity": POOL_GITHUB_IO,
+    "create_or_update_profile_repo_activity": POOL_GITHUB_IO,
+    "sync_pr_status_activity": POOL_GITHUB_IO,
+    # LLM calls: long waits on the provider, bounded by spend + rate limits
+    "analyze_codebase_activity": POOL_LLM,
+    "generate_doc_activity": POOL_LLM,
+    "generate_readme_activity": POOL_LLM,
+    "generate_deep_readme_activity": POOL_LLM,
+    "generate_profile_readme_activity": POOL_LLM,
+    "portfolio_card_activity": POOL_LLM,
+    # git clone + file walk: CPU and disk heavy
+    "deep_scan_repo": POOL_SCAN,
+    # Millisecond DB writes
+    "save_draft_proposal_activity": POOL_DB,
+    "set_repo_status_activity": POOL_DB,
+    "publish_progress_activity": POOL_DB,
+}
+
+# Also run as local activities, so the workflows pool registers them too.
+LOCAL_ACTIVITIES = frozenset({
+    "save_draft_proposal_activity",
+    "set_repo_status_activity",
+    "publish_progress_activity",
+})
+
+
+def queue_for(activity_fn: Callable) -> str:
+    """Task queue the workflow should dispatch ``activity_fn`` to."""
+    return POOL_QUEUES[ACTIVITY_POOLS.get(activity_fn.__name__, POOL_WORKFLOWS)]
+
+
+def pool_activities(pool: str, activities: list[Callable]) -> list[Callable]:
+    """The subset of ``activities`` a worker for ``pool`` registers."""
+    return [
+        fn for fn in activities
+        if ACTIVITY_POOLS.get(fn.__name__, POOL_WORKFLOWS) == pool
+        or (pool == POOL_WORKFLOWS and fn.__name__ in LOCAL_ACTIVITIES)
+    ]
+
+
+def parse_pools(value: str) -> list[str]:
+    """Comma-separated pool names -> list; empty means every pool.
+
+    Raises ValueError on an unknown name.
+    """
+    pools = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = sorted(set(pools) - POOL_QUEUES.keys())
+    if unknown:
+        raise ValueError(f"Unknown worker pool(s): {', '.join(unknown)}")
+    return pools or list(POOL_QUEUES)
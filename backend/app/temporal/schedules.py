@@ -0,0 +1,103 @@
+"""Per-user Temporal Schedules for background re-gardening.
+
+Each user gets at most one schedule, ``regarden-<username>``. It starts a
+:class:`ScheduledGardeningWorkflow` every ``REGARDEN_INTERVAL_HOURS``. Start
+times are jittered across half the interval so users don't all fire at
+once. Each run spreads its batches over the other half, which keeps
+GitHub and worker load a steady trickle.
+"""
+
+from datetime import timedelta
+
+from temporalio.client import (
+    Client,
+    Schedule,
+    ScheduleActionStartWorkflow,
+    ScheduleAlreadyRunningError,
+    ScheduleIntervalSpec,
+    ScheduleOverlapPolicy,
+    SchedulePolicy,
+    ScheduleSpec,
+    ScheduleUpdate,
+)
+from temporalio.service import RPCError, RPCStatusCode
+
+from app.core.config import settings
+from app.temporal.queues import WORKFLOW_QUEUE
+from app.temporal.workflows import ScheduledGardeningInput, ScheduledGardeningWorkflow
+
+
+def regarden_schedule_id(username: str) -> str:
+    return f"regarden-{username}"
+
+
+def build_regarden_schedule(access_token: str, username: str) -> Schedule:
+    interval = timedelta(hours=settings.REGARDEN_INTERVAL_HOURS)
+    return Schedule(
+        action=ScheduleActionStartWorkflow(
+            ScheduledGardeningWorkflow.run,
+            ScheduledGardeningInput(
+                access_token=access_token,
+                username=username,
+                window_seconds=int(interval.total_seconds() / 2),
+                batch_size=settings.REGARDEN_BATCH_SIZE,
+                max_age_hours=settings.BATCH_FRESHNESS_MAX_AGE_HOURS,
+                rate_limit_share=settings.REGARDEN_RATE_LIMIT_SHARE,
+            ),
+            id=regarden_schedule_id(username),
+            task_queue=WORKFLOW_QUEUE,
+        ),
+        spec=ScheduleSpec(intervals=[ScheduleIntervalSpec(every=interval)], jitter=interval / 2),
+        # A tick that's still trickling, or one missed while the server was
+        # down, is dropped rather than stacked: the next tick re-plans anyway.
+        policy=SchedulePolicy(
+            overlap=ScheduleOverlapPolicy.SKIP,
+            catchup_window=timedelta(minutes=10),
+        ),
+    )
+
+
+async def upsert_regarden_schedule(client: Client, access_token: str, username: str) -> str:
+    """Create the user's schedule, or refresh its token and settings."""
+    schedule_id = regarden_schedule_id(username)
+    schedule = build_regarden_schedule(access_token, username)
+    try:
+        await client.create_schedule(schedule_id, schedule)
+    except ScheduleAlreadyRunningError:
+        await client.get_schedule_handle(schedule_id).update(
+            lambda _: ScheduleUpdate(schedule=schedule)
+        )
+    return schedule_id
+
+
+async def describe_regarden_schedule(client: Client, username: str) -> dict | None:
+    """Next run times and recent runs, or None when no schedule exists."""
+    try:
+        desc = await client.get_schedule_handle(regarden_schedule_id(username)).describe()
+    except RPCError as exc:
+        if exc.status == RPCStatusCode.NOT_FOUND:
+            return None
+        raise
+    return {
+        "schedule_id": desc.id,
+        "paused": desc.schedule.state.paused,
+        "next_action_times": [t.isoformat() for t in desc.info.next_action_times],
+        "recent_runs": [
+            {
+                "started_at": action.started_at.isoformat(),
+                "workflow_id": action.action.workflow_id,
+            }
+            for action in desc.info.recent_actions
+        ],
+    }
+
+
+async def delete_regarden_schedule(client: Client, username: str) -> bool:
+    """Delete the user's schedule; False when there was none."""
+    try:
+        await client.get_schedule_handle(regarden_schedule_id(username)).delete()
+    except RPCError as exc:
+        if exc.status == RPCStatusCode.NOT_FOUND:
+            return False
+        raise
+    return True
@@ -0,0 +1,244 @@
+"""Multi-process worker supervisor.
+
+One ``app.temporal.worker`` process is bound to a single core by the GIL:
+tree building, tokenisation, framework extraction and JSON encoding all
+queue behind each other. The supervisor starts several worker processes,
+each with its own Temporal connection and its own subset of task-queue
+pools, so that one container can use every core.
+
+* crash -> restart with exponential backoff (reset once a process has stayed
+  up for ``STABLE_AFTER_S``)
+* SIGTERM / SIGINT -> forwarded to every worker, which drains in-flight
+  activities for ``WORKER_SHUTDOWN_GRACE_S``. Stragglers are killed after that.
+* ``GET /`` on ``WORKER_HEALTH_PORT`` -> JSON status of every process; 200
+  when all are up, 503 otherwise
+
+Usage::
+
+    python -m app.temporal.supervisor                      # one all-pools worker per core
+    python -m app.temporal.supervisor --processes 4 --pools llm,scan
+    python -m app.temporal.supervisor --process-pools "workflows,github-io,db;llm*2;scan*2"
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from app.core.config import settings
+from app.temporal.queues import parse_pools
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    stream=sys.stdout,
+)
+logger = logging.getLogger(__name__)
+
+# A process that ran this long before dying counts as a fresh failure, so
+# its restart backoff starts over.
+STABLE_AFTER_S = 60.0
+
+
+def parse_process_pools(spec: str) -> list[str]:
+    """``"workflows,db;llm*2"`` -> ``["workflows,db", "llm", "llm"]``.
+
+    Each entry is a comma-separated pool list for one process (``all`` or
+    empty = every pool); ``*N`` repeats it. Raises ValueError on an unknown
+    pool or a bad count.
+    """
+    processes: list[str] = []
+    for entry in spec.split(";"):
+        entry = entry.strip()
+        if not entry:
+            continue
+        pools, _, count = entry.partition("*")
+        pools = "" if pools.strip() == "all" else pools
+        copies = int(count) if count else 1
+        if copies < 1:
+            raise ValueError(f"Process count must be >= 1 in {entry!r}")
+        processes.extend([",".join(parse_pools(pools))] * copies)
+    return processes
+
+
+def plan_processes(processes: int, pools: str, process_pools: str) -> list[str]:
+    """Pool set for each worker process to start."""
+    if process_pools.strip():
+        return parse_process_pools(process_pools)
+    count = processes if processes > 0 else os.cpu_count() or 1
+    return [",".join(parse_pools(pools))] * count
+
+
+def worker_command(pools: str) -> list[str]:
+    return [sys.executable, "-m", "app.temporal.worker", "--pools", pools]
+
+
+@dataclass
+class _Child:
+    index: int
+    pools: str
+    proc: asyncio.subprocess.Process | None = None
+    started_at: float = 0.0
+    restarts: int = 0
+    failures: int = 0
+    last_exit_code: int | None = None
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.returncode is None
+
+
+class Supervisor:
+    def __init__(
+        self,
+        process_pools: list[str],
+        command: Callable[[str], list[str]] = worker_command,
+        shutdown_grace_s: float | None = None,
+        backoff_base_s: float = 1.0,
+        backoff_max_s: float = 30.0,
+    ) -> None:
+        self._children = [_Child(index, pools) for index, pools in enumerate(process_pools)]
+        self._command = command
+        # Slightly longer than the workers' own drain timeout, so they
+        # normally finish on their own.
+        self._shutdown_grace_s = (
+            shutdown_grace_s if shutdown_grace_s is not None else settings.WORKER_SHUTDOWN_GRACE_S + 5
+        )
+        self._backoff_base_s = backoff_base_s
+        self._backoff_max_s = backoff_max_s
+        self._stopping = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._keep_alive(child)) for child in self._children]
+
+    async def wait(self) -> None:
+        await asyncio.gather(*self._tasks)
+
+    async def _keep_alive(self, child: _Child) -> None:
+        while not self._stopping.is_set():
+            child.proc = await asyncio.create_subprocess_exec(*self._command(child.pools))
+            child.started_at = time.monotonic()
+            logger.info("Worker %d started (pid %d, pools %s)", child.index, child.proc.pid, child.pools)
+            child.last_exit_code = await child.proc.wait()
+            if self._stopping.is_set():
+                return
+
+            if time.monotonic() - child.started_at >= STABLE_AFTER_S:
+                child.failures = 0
+            child.failures += 1
+            child.restarts += 1
+            delay = min(self._backoff_base_s * 2 ** (child.failures - 1), self._backoff_max_s)
+            logger.error(
+                "Worker %d exited with code %s; restarting in %.1fs",
+                child.index, child.last_exit_code, delay,
+            )
+            try:
+                await asyncio.wait_for(self._stopping.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def shutdown(self) -> None:
+        """Forward SIGTERM to every worker; kill whatever outlives the grace period."""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        for child in self._children:
+            if child.alive:
+                child.proc.terminate()
+        _, pending = await asyncio.wait(self._tasks, timeout=self._shutdown_grace_s)
+        if pending:
+            for child in self._children:
+                if child.alive:
+                    logger.warning("Worker %d did not drain in time, killing", child.index)
+                    child.proc.kill()
+            await asyncio.wait(pending)
+        logger.info("All workers stopped")
+
+    def health(self) -> dict:
+        now = time.monotonic()
+        processes = [
+            {
+                "index": child.index,
+                "pools": child.pools,
+                "pid": child.proc.pid if child.alive else None,
+                "alive": child.alive,
+                "uptime_s": round(now - child.started_at, 1) if child.alive else 0.0,
+                "restarts": child.restarts,
+                "last_exit_code": child.last_exit_code,
+            }
+            for child in self._children
+        ]
+        alive = sum(process["alive"] for process in processes)
+        if self._stopping.is_set():
+            status = "stopping"
+        elif alive == len(processes):
+            status = "ok"
+        elif alive:
+            status = "degraded"
+        else:
+            status = "down"
+        return {"status": status, "alive": alive, "processes": processes}
+
+    async def serve_health(self, port: int) -> asyncio.AbstractServer:
+        """Bare HTTP/1.1 responder: every request gets the health JSON."""
+
+        async def respond(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            try:
+                await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)
+                report = self.health()
+                body = json.dumps(report).encode()
+                status = "200 OK" if report["status"] == "ok" else "503 Service Unavailable"
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                pass
+            finally:
+                writer.close()
+
+        return await asyncio.start_server(respond, "0.0.0.0", port)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run several Gardener Temporal workers")
+    parser.add_argument("--processes", type=int, default=settings.WORKER_PROCESSES,
+                        help="worker processes (default: one per CPU core)")
+    parser.add_argument("--pools", default=settings.WORKER_POOLS,
+                        help="pools every process serves (default: all)")
+    parser.add_argument("--process-pools", default=settings.WORKER_PROCESS_POOLS,
+                        help='per-process pool sets, e.g. "workflows,db;llm*2;scan"')
+    parser.add_argument("--health-port", type=int, default=settings.WORKER_HEALTH_PORT,
+                        help="aggregated health endpoint port (0 = off)")
+    return parser.parse_args(argv)
+
+
+async def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    supervisor = Supervisor(plan_processes(args.processes, args.pools, args.process_pools))
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, lambda: asyncio.create_task(supervisor.shutdown()))
+
+    supervisor.start()
+    server = await supervisor.serve_health(args.health_port) if args.health_port else None
+    if server is not None:
+        logger.info("Worker health on :%d", args.health_port)
+    try:
+        await supervisor.wait()
+    finally:
+        if server is not None:
+            server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,6 +1,9 @@
+import argparse
 import asyncio
 import logging
+import signal
 import sys
+from datetime import timedelta
 
 from temporalio.client import Client
 from temporalio.worker import Worker
@@ -18,6 +21,7 @@ from app.core.config import settings
 from app.temporal.activities import (
     analyze_codebase_activity,
     analyze_repo_health,
+    analyze_repo_health_batch,
     create_docs_pull_request_activity,
     create_or_update_profile_repo_activity,
     create_pull_request_activity,
@@ -29,30 +33,102 @@ from app.temporal.activities import (
     generate_profile_readme_activity,
     generate_readme_activity,
     get_repo_context_activity,
+    plan_incremental_gardening_activity,
+    portfolio_card_activity,
     portfolio_deep_scan_activity,
+    publish_progress_activity,
+    resolve_portfolio_repos_activity,
     save_draft_proposal_activity,
+    select_stale_repos_activity,
     set_repo_status_activity,
     say_hello,
 )
+from app.temporal.converter import connect
+from app.temporal.queues import POOL_QUEUES, POOL_WORKFLOWS, parse_pools, pool_activities
 from app.temporal.workflows import (
     AnalysisWorkflow,
     BatchGardeningWorkflow,
     GreetingWorkflow,
     JanitorWorkflow,
     PortfolioWorkflow,
+    ScheduledGardeningWorkflow,
 )
 
-TASK_QUEUE = "gardener-queue"
+WORKFLOWS = [
+    GreetingWorkflow,
+    AnalysisWorkflow,
+    BatchGardeningWorkflow,
+    JanitorWorkflow,
+    PortfolioWorkflow,
+    ScheduledGardeningWorkflow,
+]
+
+ACTIVITIES = [
+    say_hello,
+    analyze_repo_health,
+    analyze_repo_health_batch,
+    analyze_codebase_activity,
+    deep_scan_repo,
+    fetch_repo_list_activity,
+    fetch_repos_extended_activity,
+    get_repo_context_activity,
+    generate_readme_activity,
+    generate_deep_readme_activity,
+    generate_doc_activity,
+    generate_profile_readme_activity,
+    portfolio_deep_scan_activity,
+    portfolio_card_activity,
+    resolve_portfolio_repos_activity,
+    create_pull_request_activity,
+    create_docs_pull_request_activity,
+    create_or_update_profile_repo_activity,
+    select_stale_repos_activity,
+    plan_incremental_gardening_activity,
+    save_draft_proposal_activity,
+    set_repo_status_activity,
+    publish_progress_activity,
+]
+
+
+def max_concurrent_activities(pool: str) -> int:
+    return getattr(settings, f"WORKER_MAX_CONCURRENT_{pool.upper().replace('-', '_')}")
+
+
+def build_workers(client: Client, pools: list[str]) -> list[Worker]:
+    """One Worker per pool, each polling its own task queue."""
+    workers = []
+    for pool in pools:
+        workers.append(Worker(
+            client,
+            task_queue=POOL_QUEUES[pool],
+            workflows=WORKFLOWS if pool == POOL_WORKFLOWS else [],
+            activities=pool_activities(pool, ACTIVITIES),
+            max_concurrent_activities=max_concurrent_activities(pool),
+            graceful_shutdown_timeout=timedelta(seconds=settings.WORKER_SHUTDOWN_GRACE_S),
+        ))
+    return workers
 
 
-async def main():
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Gardener Temporal worker")
+    parser.add_argument(
+        "--pools",
+        default=settings.WORKER_POOLS,
+        help=f"comma-separated subset of {', '.join(POOL_QUEUES)} (default: all)",
+    )
+    return parser.parse_args(argv)
+
+
+async def main(argv: list[str] | None = None):
+    pools = parse_pools(parse_args(argv).pools)
+
     # --- START OF CHANGE: RETRY LOOP ---
     client = None
     retries = 0
     while not client:
         try:
             logger.info(f"Attempting to connect to Temporal at {settings.TEMPORAL_ADDRESS}...")
-            client = await Client.connect(settings.TEMPORAL_ADDRESS)
+            client = await connect(settings.TEMPORAL_ADDRESS)
             logger.info("Successfully connected to Temporal!")
         except Exception as e:
             retries += 1
@@ -62,39 +138,38 @@ async def main():
             await asyncio.sleep(wait_time)
     # --- END OF CHANGE ---
 
-    worker = Worker(
-        client,
-        task_queue=TASK_QUEUE,
-        workflows=[
-            GreetingWorkflow,
-            AnalysisWorkflow,
-            BatchGardeningWorkflow,
-            JanitorWorkflow,
-            PortfolioWorkflow,
-        ],
-        activities=[
-            say_hello,
-            analyze_repo_health,
-            analyze_codebase_activity,
-            deep_scan_repo,
-            fetch_repo_list_activity,
-            fetch_repos_extended_activity,
-            get_repo_context_activity,
-            generate_readme_activity,
-            generate_deep_readme_activity,
-            generate_doc_activity,
-            generate_profile_readme_activity,
-            portfolio_deep_scan_activity,
-            create_pull_request_activity,
-            create_docs_pull_request_activity,
-            create_or_update_profile_repo_activity,
-            save_draft_proposal_activity,
-            set_repo_status_activity,
-        ],
-    )
+    workers = build_workers(client, pools)
+    for pool in pools:
+        logger.info(
+            "Worker pool %s listening on queue: %s (max %d activities)",
+            pool, POOL_QUEUES[pool], max_concurrent_activities(pool),
+        )
+    await run_until_signalled(workers)
 
-    logger.info("Worker started, listening on queue: %s", TASK_QUEUE)
-    await worker.run()
+
+async def run_until_signalled(workers: list[Worker]) -> None:
+    """Run the workers until SIGTERM / SIGINT, then drain them.
+
+    On the signal, every worker stops polling and in-flight activities get
+    ``WORKER_SHUTDOWN_GRACE_S`` to finish before they are cancelled. If any
+    worker fails, the rest are shut down and the error propagates, so the
+    process exits non-zero and the supervisor restarts it.
+    """
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    runs = [asyncio.create_task(worker.run()) for worker in workers]
+    stopper = asyncio.create_task(stop.wait())
+    await asyncio.wait([*runs, stopper], return_when=asyncio.FIRST_COMPLETED)
+    stopper.cancel()
+    if stop.is_set():
+        logger.info("Shutdown requested, draining in-flight activities...")
+    await asyncio.gather(
+        *(worker.shutdown() for worker, run in zip(workers, runs) if not run.done()),
+    )
+    await asyncio.gather(*runs)
 
 
 if __name__ == "__main__":
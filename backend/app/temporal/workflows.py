@@ -1,30 +1,70 @@
 import asyncio
-from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass, field, replace
+from datetime import timedelta
 
 from temporalio import workflow
 from temporalio.common import RetryPolicy
+from temporalio.exceptions import is_cancelled_exception
 
 with workflow.unsafe.imports_passed_through():
     from app.temporal.activities import (
         analyze_codebase_activity,
         analyze_repo_health,
+        analyze_repo_health_batch,
         create_docs_pull_request_activity,
         create_or_update_profile_repo_activity,
         create_pull_request_activity,
         deep_scan_repo,
         fetch_repo_list_activity,
-        fetch_repos_extended_activity,
         generate_deep_readme_activity,
         generate_doc_activity,
         generate_profile_readme_activity,
         generate_readme_activity,
         get_repo_context_activity,
+        plan_incremental_gardening_activity,
+        portfolio_card_activity,
         portfolio_deep_scan_activity,
+        publish_progress_activity,
+        resolve_portfolio_repos_activity,
         save_draft_proposal_activity,
         set_repo_status_activity,
         say_hello,
+        select_stale_repos_activity,
     )
+    from app.services.idempotency import fingerprint_token
+    from app.temporal.queues import queue_for
+    from app.temporal.activities.analysis import (
+        failed_health_result,
+        is_failed_health_result,
+    )
+
+# Long activities heartbeat every few seconds (see activities/heartbeat.py),
+# so a lost worker is noticed this quickly rather than at start_to_close.
+HEARTBEAT_TIMEOUT = timedelta(seconds=20)
+
+
+# ---------------------------------------------------------------------------
+# Progress events (tailed by the SSE / long-poll endpoints)
+# ---------------------------------------------------------------------------
+
+def _progress_event(kind: str, **data) -> dict:
+    return {"kind": kind, "at": workflow.now().isoformat(), **data}
+
+
+async def _publish_progress(*events: dict) -> None:
+    """Append progress events for this workflow; never fails the workflow.
+
+    A local activity: no task-queue round trip, just a marker in history.
+    """
+    try:
+        await workflow.execute_local_activity(
+            publish_progress_activity,
+            args=[workflow.info().workflow_id, list(events)],
+            start_to_close_timeout=timedelta(seconds=10),
+            retry_policy=RetryPolicy(maximum_attempts=3),
+        )
+    except Exception as exc:
+        workflow.logger.warning("Progress publish failed: %s", exc)
 
 
 # ---------------------------------------------------------------------------
@@ -58,6 +98,7 @@ class AnalysisWorkflow:
     async def run(self, input: AnalysisInput) -> dict:
         return await workflow.execute_activity(
             analyze_repo_health,
+            task_queue=queue_for(analyze_repo_health),
             args=[input.repo_full_name, input.access_token],
             start_to_close_timeout=timedelta(seconds=30),
         )
@@ -67,10 +108,37 @@ class AnalysisWorkflow:
 # Phase 5: Batch Gardening
 # ---------------------------------------------------------------------------
 
+# Most recent child results kept in workflow state (and carried across
+# continue-as-new); older ones are dropped and counted in results_offset.
+BATCH_RESULTS_RETAINED = 200
+
+
 @dataclass
 class BatchGardeningInput:
     access_token: str
     limit: int = 5
+    # Sliding window: at most this many AnalysisWorkflow children in flight.
+    max_concurrent: int = 5
+    # Repos started per run before continuing-as-new — bounds history.
+    children_per_run: int = 200
+    # > 0: analyse this many repos per analyze_repo_health_batch activity
+    # (the window then counts chunks) instead of one AnalysisWorkflow per repo.
+    chunk_size: int = 0
+    # Targeted mode: only these GitHub repo IDs, skipping ones whose stored
+    # health report is newer than their last push (and < max_age_hours old).
+    repo_ids: list[int] | None = None
+    force_refresh: bool = False
+    max_age_hours: int = 168
+    # Progress carried over continue-as-new; leave unset when starting a batch.
+    repo_full_names: list[str] | None = None
+    next_index: int = 0
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    score_sum: int = 0
+    scored: int = 0
+    results: list[dict] = field(default_factory=list)
+    results_offset: int = 0
 
 
 @workflow.defn
@@ -78,16 +146,54 @@ class BatchGardeningWorkflow:
     def __init__(self) -> None:
         self._total: int = 0
         self._completed: int = 0
+        self._failed: int = 0
+        self._skipped: int = 0
+        # Running totals over every result, not just the retained ones.
+        self._score_sum: int = 0
+        self._scored: int = 0
         self._results: list[dict] = []
+        self._results_offset: int = 0
 
     @workflow.query
-    def get_status(self) -> dict:
+    def get_status(self, since: int | None = None) -> dict:
+        """Counters, aggregates and results.
+
+        Without ``since`` every retained result is returned (the original
+        shape). With ``since`` only results at batch index >= ``since`` are
+        returned. Pass the previous response's ``next_index`` to poll deltas.
+        """
+        start = 0 if since is None else max(0, since - self._results_offset)
         return {
             "total": self._total,
             "completed": self._completed,
-            "results": list(self._results),
+            "failed": self._failed,
+            "skipped": self._skipped,
+            "average_score": round(self._score_sum / self._scored, 1) if self._scored else None,
+            "results": self._results[start:],
+            "results_offset": self._results_offset + min(start, len(self._results)),
+            "next_index": self._results_offset + len(self._results),
         }
 
+    def _record(self, result: dict) -> None:
+        if not is_failed_health_result(result):
+            self._score_sum += result["health_score"]
+            self._scored += 1
+        self._results.append(result)
+        overflow = len(self._results) - BATCH_RESULTS_RETAINED
+        if overflow > 0:
+            del self._results[:overflow]
+            self._results_offset += overflow
+
+    def _repo_done_event(self, result: dict) -> dict:
+        return _progress_event(
+            "repo_done",
+            repo=result["repo_name"],
+            health_score=result["health_score"],
+            failed=is_failed_health_result(result),
+            completed=self._completed,
+            total=self._total,
+        )
+
     async def _run_child(self, repo_full_name: str, access_token: str) -> None:
         try:
             result = await workflow.execute_child_workflow(
@@ -98,36 +204,227 @@ class BatchGardeningWorkflow:
                 ),
                 id=f"batch-child-{repo_full_name}-{workflow.uuid4()}",
             )
-            self._results.append(result)
-        except Exception:
-            self._results.append({
-                "repo_name": repo_full_name,
-                "health_score": 0,
-                "issues": ["Analysis failed"],
-                "last_commit_date": datetime.now(timezone.utc).isoformat(),
-            })
-        finally:
+        except Exception as exc:
+            if is_cancelled_exception(exc):
+                raise
+            self._failed += 1
+            result = failed_health_result(repo_full_name, workflow.now())
+        self._record(result)
+        self._completed += 1
+        await _publish_progress(self._repo_done_event(result))
+
+    async def _run_chunk(self, repo_full_names: list[str], access_token: str) -> None:
+        try:
+            results = await workflow.execute_activity(
+                analyze_repo_health_batch,
+                task_queue=queue_for(analyze_repo_health_batch),
+                args=[repo_full_names, access_token],
+                start_to_close_timeout=timedelta(seconds=30 * len(repo_full_names) + 30),
+                heartbeat_timeout=HEARTBEAT_TIMEOUT,
+                retry_policy=RetryPolicy(maximum_attempts=2),
+            )
+        except Exception as exc:
+            if is_cancelled_exception(exc):
+                raise
+            results = [failed_health_result(name, workflow.now()) for name in repo_full_names]
+        events = []
+        for result in results:
+            self._failed += int(is_failed_health_result(result))
+            self._record(result)
             self._completed += 1
+            events.append(self._repo_done_event(result))
+        await _publish_progress(*events)
 
     @workflow.run
     async def run(self, input: BatchGardeningInput) -> list[dict]:
-        repos = await workflow.execute_activity(
-            fetch_repo_list_activity,
-            args=[input.access_token, input.limit],
-            start_to_close_timeout=timedelta(seconds=30),
-        )
-
-        self._total = len(repos)
+        try:
+            return await self._garden(input)
+        except (asyncio.CancelledError, Exception) as exc:
+            # Cancelled: children still queued for a slot never start, and
+            # the results so far stay queryable. Either way, close the
+            # progress feed before the error propagates.
+            if is_cancelled_exception(exc):
+                await _publish_progress(_progress_event("cancelled", **self._counters()))
+            else:
+                await _publish_progress(_progress_event(
+                    "failed", errors=[str(exc)], **self._counters(),
+                ))
+            raise
 
-        tasks = [
-            self._run_child(repo["full_name"], input.access_token)
-            for repo in repos
-        ]
-        await asyncio.gather(*tasks)
+    def _counters(self) -> dict:
+        return {
+            "total": self._total,
+            "completed": self._completed,
+            "failed": self._failed,
+            "skipped": self._skipped,
+        }
 
+    async def _garden(self, input: BatchGardeningInput) -> list[dict]:
+        self._completed = input.completed
+        self._failed = input.failed
+        self._skipped = input.skipped
+        self._score_sum = input.score_sum
+        self._scored = input.scored
+        self._results = list(input.results)
+        self._results_offset = input.results_offset
+
+        if input.repo_full_names is not None:
+            repo_full_names = input.repo_full_names
+        elif input.repo_ids is not None:
+            selection = await workflow.execute_activity(
+                select_stale_repos_activity,
+                task_queue=queue_for(select_stale_repos_activity),
+                args=[input.access_token, input.repo_ids, input.force_refresh, input.max_age_hours],
+                start_to_close_timeout=timedelta(seconds=60),
+                retry_policy=RetryPolicy(maximum_attempts=3),
+            )
+            repo_full_names = selection["stale"]
+            # Fresh repos count as done, reported with their stored health.
+            for report in selection["fresh"]:
+                self._record(report)
+            self._skipped = len(selection["fresh"])
+            self._completed += self._skipped
+        else:
+            repos = await workflow.execute_activity(
+                fetch_repo_list_activity,
+                task_queue=queue_for(fetch_repo_list_activity),
+                args=[input.access_token, input.limit],
+                start_to_close_timeout=timedelta(seconds=30),
+            )
+            repo_full_names = [repo["full_name"] for repo in repos]
+
+        self._total = len(repo_full_names) + self._skipped
+        if input.repo_full_names is None:
+            await _publish_progress(_progress_event(
+                "started", total=self._total, skipped=self._skipped,
+            ))
+
+        # Sliding window: every unit of this run (a child workflow, or a
+        # chunk activity in batch mode) is scheduled up front but only
+        # `max_concurrent` hold a slot; each finish frees one.
+        window = asyncio.Semaphore(max(1, input.max_concurrent))
+        stop = min(len(repo_full_names), input.next_index + max(1, input.children_per_run))
+        todo = repo_full_names[input.next_index:stop]
+
+        async def windowed(unit) -> None:
+            async with window:
+                if input.chunk_size > 0:
+                    await self._run_chunk(unit, input.access_token)
+                else:
+                    await self._run_child(unit, input.access_token)
+
+        if input.chunk_size > 0:
+            units = [todo[i:i + input.chunk_size] for i in range(0, len(todo), input.chunk_size)]
+        else:
+            units = todo
+        await asyncio.gather(*[windowed(unit) for unit in units])
+
+        if stop < len(repo_full_names):
+            workflow.continue_as_new(replace(
+                input,
+                repo_full_names=repo_full_names,
+                next_index=stop,
+                completed=self._completed,
+                failed=self._failed,
+                skipped=self._skipped,
+                score_sum=self._score_sum,
+                scored=self._scored,
+                results=self._results,
+                results_offset=self._results_offset,
+            ))
+
+        await _publish_progress(_progress_event("completed", **self._counters()))
         return list(self._results)
 
 
+@dataclass
+class ScheduledGardeningInput:
+    access_token: str
+    username: str
+    # Batches are spaced evenly across this window so a run trickles
+    # instead of bursting; keep it under the schedule interval.
+    window_seconds: int = 3 * 3600
+    batch_size: int = 5
+    max_age_hours: int = 168
+    # Share of the remaining GitHub core quota one run may spend.
+    rate_limit_share: float = 0.5
+
+
+@workflow.defn
+class ScheduledGardeningWorkflow:
+    """One tick of a user's background re-gardening schedule.
+
+    Started by the ``regarden-<username>`` Temporal Schedule (see
+    ``app.temporal.schedules``). It health-checks only the repos pushed to
+    since their last report, in ``batch_size`` chunks spread across
+    ``window_seconds``.
+    """
+
+    def __init__(self) -> None:
+        self._planned: int = 0
+        self._deferred: int = 0
+        self._analysed: int = 0
+        self._failed: int = 0
+
+    @workflow.query
+    def get_status(self) -> dict:
+        return {
+            "planned": self._planned,
+            "deferred": self._deferred,
+            "analysed": self._analysed,
+            "failed": self._failed,
+        }
+
+    @workflow.run
+    async def run(self, input: ScheduledGardeningInput) -> dict:
+        try:
+            return await self._regarden(input)
+        except (asyncio.CancelledError, Exception) as exc:
+            if is_cancelled_exception(exc):
+                await _publish_progress(_progress_event("cancelled", **self.get_status()))
+            raise
+
+    async def _regarden(self, input: ScheduledGardeningInput) -> dict:
+        plan = await workflow.execute_activity(
+            plan_incremental_gardening_activity,
+            task_queue=queue_for(plan_incremental_gardening_activity),
+            args=[input.access_token, input.max_age_hours, input.rate_limit_share],
+            start_to_close_timeout=timedelta(seconds=120),
+            retry_policy=RetryPolicy(maximum_attempts=2),
+        )
+        stale = plan["stale"]
+        self._planned = len(stale)
+        self._deferred = plan["deferred"]
+
+        size = max(1, input.batch_size)
+        batches = [stale[i:i + size] for i in range(0, len(stale), size)]
+        pause = timedelta(seconds=input.window_seconds / max(1, len(batches)))
+        for i, batch in enumerate(batches):
+            if i:
+                await workflow.sleep(pause)
+            try:
+                results = await workflow.execute_activity(
+                    analyze_repo_health_batch,
+                    task_queue=queue_for(analyze_repo_health_batch),
+                    args=[batch, input.access_token],
+                    start_to_close_timeout=timedelta(seconds=30 * len(batch) + 30),
+                    heartbeat_timeout=HEARTBEAT_TIMEOUT,
+                    retry_policy=RetryPolicy(maximum_attempts=2),
+                )
+            except Exception as exc:
+                if is_cancelled_exception(exc):
+                    raise
+                # Most likely the rate limit ran out. Whatever is left is
+                # still stale, so the next tick picks it up.
+                workflow.logger.warning("Scheduled gardening for %s stopped: %s", input.username, exc)
+                self._deferred += len(stale) - self._analysed
+                break
+            self._analysed += len(results)
+            self._failed += sum(is_failed_health_result(result) for result in results)
+
+        return self.get_status()
+
+
 # ---------------------------------------------------------------------------
 # Phase 6: Janitor (README generation + PR)
 # ---------------------------------------------------------------------------
@@ -138,29 +435,108 @@ class JanitorInput:
     access_token: str
     description: str = ""
     github_repo_id: int = 0
+    # Docs generated from the one scan + analysis (keys of DOC_TYPE_PROMPTS),
+    # at most max_concurrent_docs generate_doc_activity calls at a time.
+    doc_types: list[str] = field(default_factory=lambda: ["README"])
+    max_concurrent_docs: int = 3
+    # Run the millisecond DB writes (status flips, draft save) as local
+    # activities: no task-queue round trip and fewer history events.
+    local_persistence: bool = True
+
+
+# Short DB-only steps: retried quickly in-process rather than rescheduled.
+PERSISTENCE_RETRY = RetryPolicy(
+    initial_interval=timedelta(milliseconds=200),
+    backoff_coefficient=2.0,
+    maximum_interval=timedelta(seconds=5),
+    maximum_attempts=5,
+)
 
 
 @workflow.defn
 class JanitorWorkflow:
+    def __init__(self) -> None:
+        self._stage: str = "starting"
+        self._docs_generated: list[str] = []
+
+    async def _persist(self, input: JanitorInput, fn, *args) -> None:
+        if input.local_persistence:
+            await workflow.execute_local_activity(
+                fn,
+                args=list(args),
+                start_to_close_timeout=timedelta(seconds=10),
+                schedule_to_close_timeout=timedelta(seconds=60),
+                retry_policy=PERSISTENCE_RETRY,
+            )
+        else:
+            await workflow.execute_activity(
+                fn,
+                task_queue=queue_for(fn),
+                args=list(args),
+                start_to_close_timeout=timedelta(seconds=30),
+            )
+
+    async def _generate_doc(
+        self,
+        input: JanitorInput,
+        doc_type: str,
+        summary_json: str,
+        file_tree: list[dict],
+        tech_stack_files: dict[str, str],
+    ) -> dict:
+        return await workflow.execute_activity(
+            generate_doc_activity,
+            task_queue=queue_for(generate_doc_activity),
+            heartbeat_timeout=HEARTBEAT_TIMEOUT,
+            args=[
+                summary_json,
+                doc_type,
+                input.repo_full_name,
+                file_tree,
+                tech_stack_files,
+                fingerprint_token(input.access_token),
+            ],
+            start_to_close_timeout=timedelta(seconds=120),
+            retry_policy=RetryPolicy(
+                maximum_attempts=2,
+                initial_interval=timedelta(seconds=5),
+            ),
+        )
+
     @workflow.run
     async def run(self, input: JanitorInput) -> dict:
+        try:
+            return await self._draft(input)
+        except (asyncio.CancelledError, Exception) as exc:
+            if not is_cancelled_exception(exc):
+                raise
+            # Clean up after the cancel, then let it end the workflow. A
+            # draft that was already saved is still up for review.
+            if input.github_repo_id:
+                status = "review_ready" if self._stage == "saved" else "idle"
+                await self._persist(input, set_repo_status_activity, input.github_repo_id, status)
+            await _publish_progress(_progress_event(
+                "cancelled", stage=self._stage, docs_generated=list(self._docs_generated),
+            ))
+            raise
+
+    async def _draft(self, input: JanitorInput) -> dict:
         import json as _json
 
         repo_url = f"https://github.com/{input.repo_full_name}"
 
         # Step 0: Mark repo as "drafting_docs" in DB (persistent state)
         if input.github_repo_id:
-            await workflow.execute_activity(
-                set_repo_status_activity,
-                args=[input.github_repo_id, "drafting_docs"],
-                start_to_close_timeout=timedelta(seconds=10),
-            )
+            await self._persist(input, set_repo_status_activity, input.github_repo_id, "drafting_docs")
 
         # Step 1: Deep Scan — clone repo, map files, read key configs
+        self._stage = "scanning"
         scan_result = await workflow.execute_activity(
             deep_scan_repo,
+            task_queue=queue_for(deep_scan_repo),
             args=[repo_url, input.access_token, input.github_repo_id],
             start_to_close_timeout=timedelta(minutes=5),
+            heartbeat_timeout=HEARTBEAT_TIMEOUT,
             retry_policy=RetryPolicy(
                 maximum_attempts=3,
                 initial_interval=timedelta(seconds=5),
@@ -171,13 +547,17 @@ class JanitorWorkflow:
         tech_stack_files = scan_result["tech_stack_files"]
 
         # Step 2: Analyze — produce a structured JSON summary of the codebase
+        self._stage = "analyzing"
         summary_json = await workflow.execute_activity(
             analyze_codebase_activity,
+            task_queue=queue_for(analyze_codebase_activity),
+            heartbeat_timeout=HEARTBEAT_TIMEOUT,
             args=[
                 input.repo_full_name,
                 input.description,
                 file_tree,
                 tech_stack_files,
+                fingerprint_token(input.access_token),
             ],
             start_to_close_timeout=timedelta(seconds=120),
             retry_policy=RetryPolicy(
@@ -186,28 +566,29 @@ class JanitorWorkflow:
             ),
         )
 
-        # Step 3: Generate README
-        doc_types = ["README"]
-        doc_tasks = []
-        for doc_type in doc_types:
-            task = workflow.execute_activity(
-                generate_doc_activity,
-                args=[
-                    summary_json,
-                    doc_type,
-                    input.repo_full_name,
-                    file_tree,
-                    tech_stack_files,
-                ],
-                start_to_close_timeout=timedelta(seconds=120),
-                retry_policy=RetryPolicy(
-                    maximum_attempts=2,
-                    initial_interval=timedelta(seconds=5),
-                ),
-            )
-            doc_tasks.append(task)
-
-        doc_results = await asyncio.gather(*doc_tasks)
+        # Step 3: Generate docs — every doc type shares the scan + analysis
+        # (and the repo-context prompt prefix); bounded fan-out.
+        self._stage = "generating"
+        doc_slots = asyncio.Semaphore(max(1, input.max_concurrent_docs))
+
+        async def generate(doc_type: str) -> dict:
+            async with doc_slots:
+                try:
+                    result = await self._generate_doc(
+                        input, doc_type, summary_json, file_tree, tech_stack_files,
+                    )
+                except Exception as exc:
+                    if is_cancelled_exception(exc):
+                        raise
+                    # Timed out / retries exhausted: keep the other docs.
+                    return {"doc_type": doc_type, "filename": "", "content": "", "error": str(exc)}
+                if not result["error"]:
+                    self._docs_generated.append(doc_type)
+                return result
+
+        doc_results = await asyncio.gather(*[
+            generate(doc_type) for doc_type in dict.fromkeys(input.doc_types)
+        ])
 
         # Step 4: Aggregate — collect successes and failures
         files: dict[str, str] = {}
@@ -231,19 +612,12 @@ class JanitorWorkflow:
 
         # Step 5: Save draft — persist to DB for human review (no auto-commit)
         files_json = _json.dumps(files)
-        await workflow.execute_activity(
-            save_draft_proposal_activity,
-            args=[input.github_repo_id, files_json],
-            start_to_close_timeout=timedelta(seconds=30),
-        )
+        await self._persist(input, save_draft_proposal_activity, input.github_repo_id, files_json)
+        self._stage = "saved"
 
         # Step 6: Mark repo as "review_ready" in DB
         if input.github_repo_id:
-            await workflow.execute_activity(
-                set_repo_status_activity,
-                args=[input.github_repo_id, "review_ready"],
-                start_to_close_timeout=timedelta(seconds=10),
-            )
+            await self._persist(input, set_repo_status_activity, input.github_repo_id, "review_ready")
 
         status = "review_ready" if not errors else "partial_review_ready"
         return {
@@ -264,6 +638,10 @@ class PortfolioInput:
     repo_ids: list[int] | None = None
     bio: str = ""
     links_json: str = "{}"
+    # Portfolio-card activities in flight at once during scanning.
+    max_concurrent_scans: int = 4
+    # /repos metadata snapshots older than this are ignored (IDs re-fetched).
+    snapshot_max_age_hours: int = 24
 
 
 @workflow.defn
@@ -285,25 +663,90 @@ class PortfolioWorkflow:
             "errors": list(self._errors),
         }
 
+    async def _portfolio_card(self, repo: dict, access_token: str) -> dict:
+        try:
+            card = await workflow.execute_activity(
+                portfolio_card_activity,
+                task_queue=queue_for(portfolio_card_activity),
+                args=[repo["full_name"], access_token, fingerprint_token(access_token)],
+                start_to_close_timeout=timedelta(seconds=90),
+                heartbeat_timeout=HEARTBEAT_TIMEOUT,
+                retry_policy=RetryPolicy(
+                    maximum_attempts=2,
+                    initial_interval=timedelta(seconds=5),
+                ),
+            )
+        except Exception as exc:
+            if is_cancelled_exception(exc):
+                raise
+            self._errors.append(f"Scan failed for {repo['full_name']}: {str(exc)}")
+            # Still include basic info so the repo shows up in the profile
+            card = {
+                "full_name": repo["full_name"],
+                "name": repo.get("name", ""),
+                "description": repo.get("description", ""),
+                "html_url": repo.get("html_url", ""),
+                "language": repo.get("language", ""),
+                "stargazers_count": repo.get("stargazers_count", 0),
+                "forks_count": 0,
+                "topics": [],
+                "readme_content": "",
+                "dependencies": {},
+                "frameworks": [],
+            }
+        self._scanned += 1
+        await _publish_progress(_progress_event(
+            "repo_scanned",
+            repo=repo["full_name"],
+            scanned=self._scanned,
+            total=self._total_repos,
+        ))
+        return card
+
     @workflow.run
     async def run(self, input: PortfolioInput) -> dict:
+        try:
+            return await self._build(input)
+        except (asyncio.CancelledError, Exception) as exc:
+            if is_cancelled_exception(exc):
+                await self._cancelled()
+                raise
+            # Close open progress streams before the failure propagates.
+            await _publish_progress(_progress_event(
+                "failed", errors=[*self._errors, str(exc)],
+            ))
+            raise
+
+    async def _cancelled(self) -> None:
+        self._stage = "cancelled"
+        await _publish_progress(_progress_event(
+            "cancelled",
+            scanned=self._scanned,
+            total=self._total_repos,
+            errors=list(self._errors),
+        ))
+
+    async def _build(self, input: PortfolioInput) -> dict:
         import json as _json
 
-        # Step 1: Resolving — fetch all repos, filter to selected IDs
+        # Step 1: Resolving — selected IDs from the /repos metadata snapshot;
+        # GitHub is only asked about IDs the snapshot doesn't have.
         self._stage = "resolving"
-        all_repos = await workflow.execute_activity(
-            fetch_repos_extended_activity,
-            args=[input.access_token],
+        await _publish_progress(_progress_event("stage", stage=self._stage))
+        resolved = await workflow.execute_activity(
+            resolve_portfolio_repos_activity,
+            task_queue=queue_for(resolve_portfolio_repos_activity),
+            args=[input.access_token, input.username, input.repo_ids, input.snapshot_max_age_hours],
             start_to_close_timeout=timedelta(seconds=60),
             retry_policy=RetryPolicy(
                 maximum_attempts=2,
                 initial_interval=timedelta(seconds=5),
             ),
         )
+        all_repos = resolved["repos"]
 
         if input.repo_ids:
-            selected_ids = set(input.repo_ids)
-            selected_repos = [r for r in all_repos if r["id"] in selected_ids]
+            selected_repos = all_repos
         else:
             # Fallback: auto-select top 4 non-fork repos by stars
             candidates = [r for r in all_repos if not r.get("fork", False)]
@@ -318,53 +761,47 @@ class PortfolioWorkflow:
         if not selected_repos:
             self._stage = "failed"
             self._errors.append("No eligible repositories found")
+            await _publish_progress(_progress_event("failed", errors=list(self._errors)))
             return {
                 "status": "failure",
                 "draft_readme": None,
                 "errors": self._errors,
             }
 
-        # Step 2: Scanning — deep scan each selected repo
+        # Step 2: Scanning — one portfolio card per repo, at most
+        # `max_concurrent_scans` at a time. Cards are cached by (repo, HEAD
+        # SHA), so unchanged repos cost no LLM call. gather keeps the
+        # selection order regardless of which scan finishes first.
         self._stage = "scanning"
-        scanned_repos: list[dict] = []
+        await _publish_progress(_progress_event(
+            "stage", stage=self._stage, total_repos=self._total_repos,
+        ))
+        scan_slots = asyncio.Semaphore(max(1, input.max_concurrent_scans))
 
-        for repo in selected_repos:
-            try:
-                scan_result = await workflow.execute_activity(
-                    portfolio_deep_scan_activity,
-                    args=[repo["full_name"], input.access_token],
-                    start_to_close_timeout=timedelta(seconds=60),
-                    retry_policy=RetryPolicy(
-                        maximum_attempts=2,
-                        initial_interval=timedelta(seconds=5),
-                    ),
-                )
-                scanned_repos.append(scan_result)
-            except Exception as exc:
-                self._errors.append(f"Scan failed for {repo['full_name']}: {str(exc)}")
-                # Still include basic info so the repo shows up in the profile
-                scanned_repos.append({
-                    "full_name": repo["full_name"],
-                    "name": repo.get("name", ""),
-                    "description": repo.get("description", ""),
-                    "html_url": repo.get("html_url", ""),
-                    "language": repo.get("language", ""),
-                    "stargazers_count": repo.get("stargazers_count", 0),
-                    "forks_count": 0,
-                    "topics": [],
-                    "readme_content": "",
-                    "dependencies": {},
-                    "frameworks": [],
-                })
-            self._scanned += 1
-
-        # Step 3: Generating — produce profile README with rich context
+        async def bounded_card(repo: dict) -> dict:
+            async with scan_slots:
+                return await self._portfolio_card(repo, input.access_token)
+
+        scanned_repos = list(await asyncio.gather(*[
+            bounded_card(repo) for repo in selected_repos
+        ]))
+
+        # Step 3: Generating — compose the cards into the profile README
         self._stage = "generating"
+        await _publish_progress(_progress_event("stage", stage=self._stage))
         top_repos_json = _json.dumps(scanned_repos, default=str)
         readme_content = await workflow.execute_activity(
             generate_profile_readme_activity,
-            args=[top_repos_json, input.username, input.bio, input.links_json],
+            task_queue=queue_for(generate_profile_readme_activity),
+            args=[
+                top_repos_json,
+                input.username,
+                input.bio,
+                input.links_json,
+                fingerprint_token(input.access_token),
+            ],
             start_to_close_timeout=timedelta(seconds=120),
+            heartbeat_timeout=HEARTBEAT_TIMEOUT,
             retry_policy=RetryPolicy(
                 maximum_attempts=2,
                 initial_interval=timedelta(seconds=5),
@@ -374,6 +811,9 @@ class PortfolioWorkflow:
         # Step 4: Draft ready — store in workflow state, do NOT auto-publish
         self._stage = "draft_ready"
         self._draft_readme = readme_content
+        await _publish_progress(_progress_event(
+            "draft_ready", draft_readme=readme_content, errors=list(self._errors),
+        ))
 
         return {
             "status": "draft_ready",
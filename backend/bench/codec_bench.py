@@ -0,0 +1,143 @@
+"""Temporal payload converter benchmark on real scan payloads.
+
+Each checkout given with ``--path`` is scanned the same way ``deep_scan_repo``
+scans a clone (``_build_file_tree`` + ``_read_high_value_files``). The
+Markdown files found there stand in for a Janitor draft
+(``save_draft_proposal_activity``'s ``files_json``). Every payload is then
+put through each converter configuration, the same ``DataConverter``
+encode / decode calls the client and worker make. For each
+(payload, configuration) the output shows:
+
+* ``bytes``: size stored in history
+* ``ratio``: stored size relative to the stock converter
+* ``enc us`` / ``dec us``: CPU per encode / decode, best of ``--repeat``
+
+No Temporal server is needed::
+
+    cd backend
+    python -m bench.codec_bench                         # scans this repository
+    python -m bench.codec_bench --path ~/src/big-monorepo --repeat 50 --json out.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from temporalio.converter import DataConverter
+
+from app.temporal.activities.analysis import _build_file_tree, _read_high_value_files
+from app.temporal.converter import build_data_converter
+
+CONFIGS = ("stock", "orjson", "orjson+zlib", "orjson+zstd")
+MAX_DRAFT_BYTES = 200_000
+
+
+# ---------------------------------------------------------------------------
+# Payloads
+# ---------------------------------------------------------------------------
+
+def scan_payloads(root: Path) -> dict[str, object]:
+    """``deep_scan_repo``'s result and a draft built from ``root``'s Markdown."""
+    file_tree = _build_file_tree(root)
+    tech_stack_files = _read_high_value_files(root)
+    draft: dict[str, str] = {}
+    size = 0
+    for md in sorted(root.rglob("*.md")):
+        if any(part.startswith(".") or part == "node_modules" for part in md.relative_to(root).parts):
+            continue
+        text = md.read_text(encoding="utf-8", errors="replace")
+        if size + len(text) > MAX_DRAFT_BYTES:
+            break
+        draft[str(md.relative_to(root))] = text
+        size += len(text)
+    return {
+        f"{root.name}:scan_result": {"file_tree": file_tree, "tech_stack_files": tech_stack_files},
+        f"{root.name}:draft": json.dumps(draft),
+    }
+
+
+def converter_for(config: str) -> DataConverter:
+    if config == "stock":
+        return DataConverter.default
+    return build_data_converter(codec=config.partition("+")[2] or "none")
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+@dataclass
+class CodecResult:
+    payload: str
+    config: str
+    bytes: int
+    ratio: float
+    encode_us: float
+    decode_us: float
+
+
+async def measure(name: str, value: object, repeat: int) -> list[CodecResult]:
+    results: list[CodecResult] = []
+    baseline = None
+    for config in CONFIGS:
+        converter = converter_for(config)
+        encode_s = decode_s = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            payloads = await converter.encode([value])
+            encode_s = min(encode_s, time.perf_counter() - started)
+            started = time.perf_counter()
+            decoded = await converter.decode(payloads, [type(value)])
+            decode_s = min(decode_s, time.perf_counter() - started)
+        assert decoded[0] == value, f"{config} round trip changed {name}"
+        stored = sum(payload.ByteSize() for payload in payloads)
+        baseline = baseline or stored
+        results.append(CodecResult(
+            payload=name, config=config, bytes=stored, ratio=stored / baseline,
+            encode_us=encode_s * 1e6, decode_us=decode_s * 1e6,
+        ))
+    return results
+
+
+def _print_table(results: list[CodecResult]) -> None:
+    header = f"{'payload':<32} {'config':<12} {'bytes':>9} {'ratio':>6} {'enc us':>9} {'dec us':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r.payload[:32]:<32} {r.config:<12} {r.bytes:>9} {r.ratio:>6.2f} "
+            f"{r.encode_us:>9.1f} {r.decode_us:>9.1f}"
+        )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", action="append", type=Path,
+                        help="checkout to scan (repeatable; default: this repository)")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per measurement (best is kept)")
+    parser.add_argument("--json", help="also write results to this file")
+    return parser.parse_args(argv)
+
+
+async def main(argv: list[str] | None = None) -> list[CodecResult]:
+    args = parse_args(argv)
+    roots = args.path or [Path(__file__).resolve().parents[2]]
+    results: list[CodecResult] = []
+    for root in roots:
+        for name, value in scan_payloads(root.resolve()).items():
+            results.extend(await measure(name, value, args.repeat))
+
+    _print_table(results)
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump([asdict(r) for r in results], fh, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,220 @@
+"""Orchestration benchmark for ``JanitorWorkflow``'s persistence steps.
+
+Runs ``JanitorWorkflow`` end to end with ``local_persistence`` on and off.
+Scan, LLM and DB activities are replaced by stand-ins registered under the
+real activity names, so the numbers isolate Temporal's scheduling cost.
+Per mode it reports:
+
+* p50 / p90 / p99 end-to-end workflow latency
+* history events per run (each regular activity adds three: scheduled,
+  started and completed; a local activity adds a single marker)
+
+Needs a Temporal server. By default ``WorkflowEnvironment.start_local()``
+is used, which downloads the dev server on first use. Pass ``--address``
+to target one already running, e.g. the docker-compose service::
+
+    cd backend
+    python -m bench.janitor_bench --runs 50 --concurrency 5
+    python -m bench.janitor_bench --address localhost:7233 --db-ms 3 --step-ms 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from contextlib import AsyncExitStack
+from dataclasses import asdict, dataclass
+
+from temporalio import activity
+from temporalio.client import Client
+from temporalio.testing import WorkflowEnvironment
+from temporalio.worker import Worker
+
+from app.temporal.queues import POOL_QUEUES, POOL_WORKFLOWS, pool_activities
+from app.temporal.workflows import JanitorInput, JanitorWorkflow
+
+MODES = ("local", "regular")
+
+
+# ---------------------------------------------------------------------------
+# Stand-in activities (same names and shapes as the real ones, so
+# queue_for routes them to the same pools)
+# ---------------------------------------------------------------------------
+
+def stand_in_activities(db_ms: float, step_ms: float) -> list:
+    @activity.defn
+    async def set_repo_status_activity(github_repo_id: int, status: str) -> bool:
+        await asyncio.sleep(db_ms / 1000)
+        return True
+
+    @activity.defn
+    async def save_draft_proposal_activity(github_repo_id: int, files_json: str) -> bool:
+        await asyncio.sleep(db_ms / 1000)
+        return True
+
+    @activity.defn
+    async def deep_scan_repo(repo_url: str, access_token: str, github_repo_id: int) -> dict:
+        await asyncio.sleep(step_ms / 1000)
+        return {"file_tree": [], "tech_stack_files": {}}
+
+    @activity.defn
+    async def analyze_codebase_activity(*args) -> str:
+        await asyncio.sleep(step_ms / 1000)
+        return "{}"
+
+    @activity.defn
+    async def generate_doc_activity(summary_json: str, doc_type: str, *args) -> dict:
+        await asyncio.sleep(step_ms / 1000)
+        return {"doc_type": doc_type, "filename": f"{doc_type}.md", "content": "# bench", "error": None}
+
+    return [
+        set_repo_status_activity,
+        save_draft_proposal_activity,
+        deep_scan_repo,
+        analyze_codebase_activity,
+        generate_doc_activity,
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ModeResult:
+    mode: str
+    runs: int
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    mean_ms: float
+    history_events: float
+
+
+def _pct(samples: list[float], q: float) -> float:
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] * 1000
+
+
+def summarise(mode: str, latencies: list[float], history_lengths: list[int]) -> ModeResult:
+    return ModeResult(
+        mode=mode,
+        runs=len(latencies),
+        p50_ms=_pct(latencies, 0.50),
+        p90_ms=_pct(latencies, 0.90),
+        p99_ms=_pct(latencies, 0.99),
+        mean_ms=statistics.fmean(latencies) * 1000 if latencies else float("nan"),
+        history_events=statistics.fmean(history_lengths) if history_lengths else float("nan"),
+    )
+
+
+async def run_mode(
+    client: Client, task_queue: str, mode: str, runs: int, concurrency: int,
+) -> ModeResult:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    history_lengths: list[int] = []
+
+    async def one() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            handle = await client.start_workflow(
+                JanitorWorkflow.run,
+                JanitorInput(
+                    repo_full_name="bench/repo",
+                    access_token="bench-token",
+                    github_repo_id=1,
+                    local_persistence=mode == "local",
+                ),
+                id=f"janitor-bench-{mode}-{uuid.uuid4()}",
+                task_queue=task_queue,
+            )
+            await handle.result()
+            latencies.append(time.perf_counter() - started)
+            history = await handle.fetch_history()
+            history_lengths.append(len(history.events))
+
+    await asyncio.gather(*(one() for _ in range(runs)))
+    return summarise(mode, latencies, history_lengths)
+
+
+def bench_workers(client: Client, task_queue: str, activities: list) -> list[Worker]:
+    """Workflow worker on ``task_queue`` plus one per activity pool queue.
+
+    Mirrors the production layout: activities are dispatched to their
+    pool's queue, local activities run on the workflow worker.
+    """
+    workers = [Worker(
+        client,
+        task_queue=task_queue,
+        workflows=[JanitorWorkflow],
+        activities=pool_activities(POOL_WORKFLOWS, activities),
+    )]
+    for pool, queue in POOL_QUEUES.items():
+        pooled = pool_activities(pool, activities)
+        if pool != POOL_WORKFLOWS and pooled:
+            workers.append(Worker(client, task_queue=queue, activities=pooled))
+    return workers
+
+
+def _print_table(results: list[ModeResult]) -> None:
+    header = f"{'mode':<8} {'runs':>5} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'mean ms':>8} {'events':>7}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r.mode:<8} {r.runs:>5} {r.p50_ms:>8.1f} {r.p90_ms:>8.1f} "
+            f"{r.p99_ms:>8.1f} {r.mean_ms:>8.1f} {r.history_events:>7.1f}"
+        )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--address", help="Temporal frontend (default: start a local dev server)")
+    parser.add_argument("--runs", type=int, default=30, help="workflows per mode")
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--db-ms", type=float, default=2.0, help="simulated DB write time")
+    parser.add_argument("--step-ms", type=float, default=0.0, help="simulated scan / LLM step time")
+    parser.add_argument("--json", help="also write results to this file")
+    return parser.parse_args(argv)
+
+
+async def main(argv: list[str] | None = None) -> list[ModeResult]:
+    args = parse_args(argv)
+    env = None
+    if args.address:
+        client = await Client.connect(args.address)
+    else:
+        env = await WorkflowEnvironment.start_local()
+        client = env.client
+
+    task_queue = f"janitor-bench-{uuid.uuid4()}"
+    results: list[ModeResult] = []
+    try:
+        async with AsyncExitStack() as stack:
+            for worker in bench_workers(client, task_queue, stand_in_activities(args.db_ms, args.step_ms)):
+                await stack.enter_async_context(worker)
+            for mode in args.modes.split(","):
+                # One warm-up run so worker start-up isn't charged to a mode.
+                await run_mode(client, task_queue, mode, 1, 1)
+                results.append(await run_mode(client, task_queue, mode, args.runs, args.concurrency))
+    finally:
+        if env is not None:
+            await env.shutdown()
+
+    _print_table(results)
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump([asdict(r) for r in results], fh, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,297 @@
+"""Throughput / latency benchmark for ``llm_service`` against the mock server.
+
+Drives ``generate_deep_readme``, ``analyze_codebase``, ``generate_doc`` and
+``generate_profile_readme`` at increasing concurrency and reports, per
+(operation, concurrency):
+
+* throughput (successful calls / wall second)
+* p50 / p90 / p99 end-to-end latency
+* mean client-side overhead per call — E5 pre-flight (token counting +
+  cost check) and repo-context rendering — and its share of latency
+
+By default a mock server (``bench.mock_llm_server``) is started in a
+background thread; pass ``--base-url`` to target one already running (or
+any OpenAI-compatible endpoint)::
+
+    cd backend
+    python -m bench.llm_bench --concurrency 1,8,32 --requests 64
+    python -m bench.llm_bench --ops analyze --tree-files 20000 --json out.json
+
+Token counting uses tiktoken, whose encodings must be cached locally or
+downloadable. Calls run with no spend attribution bound, so the spend
+ledger is bypassed and no database is needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable
+
+from bench.mock_llm_server import MockLLMConfig, create_app, parse_args as parse_mock_args
+
+from app.core.config import settings
+from app.services import llm_service
+
+OPERATIONS = ("deep_readme", "analyze", "generate_doc", "profile")
+
+
+# ---------------------------------------------------------------------------
+# Synthetic inputs
+# ---------------------------------------------------------------------------
+
+def synthetic_tree(n_files: int, fanout: int = 12) -> list[dict]:
+    """A ``_build_file_tree``-shaped tree with roughly ``n_files`` files."""
+    counter = iter(range(n_files))
+
+    def build(prefix: str, depth: int) -> list[dict]:
+        entries: list[dict] = []
+        for d in range(fanout // 3 if depth < 4 else 0):
+            path = f"{prefix}pkg{d}" if not prefix else f"{prefix}/pkg{d}"
+            entries.append({
+                "name": f"pkg{d}", "type": "dir", "path": path,
+                "children": build(path, depth + 1),
+            })
+        for _ in range(fanout):
+            i = next(counter, None)
+            if i is None:
+                break
+            path = f"{prefix}/mod{i}.py" if prefix else f"mod{i}.py"
+            entries.append({"name": f"mod{i}.py", "type": "file", "path": path})
+        return entries
+
+    return [{"name": "src", "type": "dir", "path": "src", "children": build("src", 0)}]
+
+
+def synthetic_tech_files(lines: int = 300) -> dict[str, str]:
+    return {
+        "pyproject.toml": "\n".join(f'dep{i} = ">=1.{i}"' for i in range(lines)),
+        "Dockerfile": "FROM python:3.12-slim\nWORKDIR /app\nCOPY . .\nCMD [\"python\", \"main.py\"]",
+        "main.py": "\n".join(f"def handler_{i}():\n    return {i}" for i in range(lines // 2)),
+    }
+
+
+def synthetic_cards(n: int = 6) -> list[dict]:
+    return [
+        {
+            "full_name": f"bench/repo{i}",
+            "html_url": f"https://github.com/bench/repo{i}",
+            "language": "Python",
+            "stargazers_count": i * 10,
+            "forks_count": i,
+            "description": "Benchmark repository",
+            "frameworks": ["FastAPI", "Temporal"],
+            "topics": ["api"],
+            "summary": "FastAPI service with Temporal workflows",
+            "highlights": ["Durable workflows", "Typed API"],
+            "stack": ["Python", "FastAPI"],
+        }
+        for i in range(n)
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Overhead instrumentation
+# ---------------------------------------------------------------------------
+
+class _OverheadTimer:
+    """Wraps sync llm_service helpers and accumulates their wall time."""
+
+    TARGETS = ("_check_llm_budget", "_repo_messages")
+
+    def __init__(self) -> None:
+        self.seconds: dict[str, float] = defaultdict(float)
+        self._originals: dict[str, Callable] = {}
+
+    def install(self) -> None:
+        for name in self.TARGETS:
+            original = getattr(llm_service, name)
+            self._originals[name] = original
+
+            def timed(*args, _name=name, _fn=original, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return _fn(*args, **kwargs)
+                finally:
+                    self.seconds[_name] += time.perf_counter() - started
+
+            setattr(llm_service, name, timed)
+
+    def uninstall(self) -> None:
+        for name, original in self._originals.items():
+            setattr(llm_service, name, original)
+
+    def take(self) -> dict[str, float]:
+        snapshot = dict(self.seconds)
+        self.seconds.clear()
+        return snapshot
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+@dataclass
+class LevelResult:
+    operation: str
+    concurrency: int
+    requests: int
+    errors: int
+    throughput_rps: float
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    preflight_ms: float
+    render_ms: float
+    overhead_share: float
+
+
+def _pct(samples: list[float], q: float) -> float:
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] * 1000
+
+
+def _operation_factory(name: str, tree: list[dict], files: dict[str, str]) -> Callable[[], Awaitable]:
+    summary_json = json.dumps({
+        "project_name": "bench", "description": "d", "tech_stack": ["Python"],
+        "key_features": [], "architecture_patterns": [], "build_system": "pip",
+        "entry_points": ["main.py"], "has_tests": True, "has_ci": False, "has_docker": True,
+    })
+    cards = synthetic_cards()
+    return {
+        "deep_readme": lambda: llm_service.generate_deep_readme("bench/repo", "desc", tree, files),
+        "analyze": lambda: llm_service.analyze_codebase("bench/repo", "desc", tree, files),
+        "generate_doc": lambda: llm_service.generate_doc(summary_json, "README", "bench/repo", tree, files),
+        "profile": lambda: llm_service.generate_profile_readme(cards, "bench-user", bio="Engineer"),
+    }[name]
+
+
+async def run_level(
+    operation: str,
+    call: Callable[[], Awaitable],
+    concurrency: int,
+    requests: int,
+    timer: _OverheadTimer,
+    cold_context: bool,
+) -> LevelResult:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def one() -> None:
+        nonlocal errors
+        async with semaphore:
+            if cold_context:
+                llm_service._context_cache.clear()
+            started = time.perf_counter()
+            try:
+                await call()
+            except Exception:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+
+    timer.take()
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    overhead = timer.take()
+
+    preflight = overhead.get("_check_llm_budget", 0.0) / requests * 1000
+    # _repo_messages includes packing + counting of the repo context.
+    render = overhead.get("_repo_messages", 0.0) / requests * 1000
+    mean_latency_ms = statistics.fmean(latencies) * 1000 if latencies else float("nan")
+    return LevelResult(
+        operation=operation,
+        concurrency=concurrency,
+        requests=requests,
+        errors=errors,
+        throughput_rps=len(latencies) / elapsed if elapsed else 0.0,
+        p50_ms=_pct(latencies, 0.50),
+        p90_ms=_pct(latencies, 0.90),
+        p99_ms=_pct(latencies, 0.99),
+        preflight_ms=preflight,
+        render_ms=render,
+        overhead_share=(preflight + render) / mean_latency_ms if latencies else float("nan"),
+    )
+
+
+def _start_mock_server(config: MockLLMConfig) -> str:
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(config), host="127.0.0.1", port=0, log_level="warning",
+    ))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return f"http://127.0.0.1:{port}/v1"
+
+
+def _print_table(results: list[LevelResult]) -> None:
+    header = (
+        f"{'operation':<13} {'conc':>5} {'req':>5} {'err':>4} {'rps':>8} "
+        f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'prefl ms':>9} {'render ms':>9} {'ovhd %':>7}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r.operation:<13} {r.concurrency:>5} {r.requests:>5} {r.errors:>4} "
+            f"{r.throughput_rps:>8.2f} {r.p50_ms:>8.1f} {r.p90_ms:>8.1f} {r.p99_ms:>8.1f} "
+            f"{r.preflight_ms:>9.2f} {r.render_ms:>9.2f} {r.overhead_share * 100:>6.2f}%"
+        )
+
+
+async def main(argv: list[str] | None = None) -> list[LevelResult]:
+    parser = argparse.ArgumentParser(description="Benchmark llm_service against a mock LLM server.")
+    parser.add_argument("--base-url", help="Existing OpenAI-compatible endpoint (skip the in-process mock)")
+    parser.add_argument("--ops", default=",".join(OPERATIONS))
+    parser.add_argument("--concurrency", default="1,4,16,64")
+    parser.add_argument("--requests", type=int, default=32, help="Calls per (operation, concurrency)")
+    parser.add_argument("--tree-files", type=int, default=3000)
+    parser.add_argument("--cold-context", action="store_true",
+                        help="Clear the rendered-context cache before every call")
+    parser.add_argument("--json", dest="json_path", help="Also write results as JSON")
+    args, mock_argv = parser.parse_known_args(argv)
+    _, mock_config = parse_mock_args(mock_argv)
+
+    base_url = args.base_url or _start_mock_server(mock_config)
+    settings.LITELLM_API_BASE = base_url
+    settings.LITELLM_API_KEY = settings.LITELLM_API_KEY or "sk-mock"
+    print(f"# target: {base_url}  model: {settings.LLM_MODEL}")
+
+    tree = synthetic_tree(args.tree_files)
+    files = synthetic_tech_files()
+    timer = _OverheadTimer()
+    timer.install()
+    results: list[LevelResult] = []
+    try:
+        for operation in [op.strip() for op in args.ops.split(",") if op.strip()]:
+            call = _operation_factory(operation, tree, files)
+            for concurrency in [int(c) for c in args.concurrency.split(",")]:
+                results.append(await run_level(
+                    operation, call, concurrency, args.requests, timer, args.cold_context,
+                ))
+    finally:
+        timer.uninstall()
+
+    _print_table(results)
+    if args.json_path:
+        with open(args.json_path, "w") as fh:
+            json.dump([asdict(r) for r in results], fh, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,300 @@
+"""Local OpenAI-compatible stand-in for load-testing ``llm_service``.
+
+Serves ``POST /v1/chat/completions`` (and ``/chat/completions``) with a
+configurable latency profile so the LiteLLM and LangChain paths can be
+driven at high concurrency without paying a provider:
+
+* time-to-first-token drawn from a log-normal distribution
+  (``--ttft-median-ms`` / ``--ttft-sigma``)
+* output paced at ``--tokens-per-second``; ``stream=true`` emits SSE
+  chunks at that pace, non-streaming requests wait for the full duration
+* a ``--rate-limit-prob`` fraction of requests get ``429`` + ``Retry-After``
+* ``usage`` on every response (and on the final stream chunk when
+  ``stream_options.include_usage`` is set)
+
+Responses are shaped to pass ``llm_service`` validation: analysis prompts
+get a ``CodebaseSummary`` JSON, portfolio-card prompts a card JSON, and
+everything else Markdown padded to ``--completion-tokens``.
+
+Point the backend at it with ``LITELLM_API_BASE=http://127.0.0.1:8911/v1``::
+
+    cd backend
+    python -m bench.mock_llm_server --port 8911 --ttft-median-ms 400 --rate-limit-prob 0.02
+
+``GET /mock/stats`` returns request / 429 / token counters.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Rough chars-per-token ratio used for prompt usage — the server has no
+# tokenizer, and the benchmark only needs plausible numbers.
+_CHARS_PER_TOKEN = 4
+
+# Stream at most this often; chunks carry however many tokens accrued.
+_STREAM_TICK_S = 0.02
+
+
+@dataclass
+class MockLLMConfig:
+    ttft_median_ms: float = 300.0
+    ttft_sigma: float = 0.5
+    tokens_per_second: float = 80.0
+    completion_tokens: int = 400
+    rate_limit_prob: float = 0.0
+    retry_after_s: int = 1
+    seed: int | None = None
+
+
+@dataclass
+class MockLLMStats:
+    requests: int = 0
+    rate_limited: int = 0
+    streamed: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    by_kind: dict[str, int] = field(default_factory=dict)
+
+
+# ---------------------------------------------------------------------------
+# Response content
+# ---------------------------------------------------------------------------
+
+_ANALYSIS = {
+    "project_name": "mock-project",
+    "description": "A mock project used for load testing.",
+    "tech_stack": ["Python", "FastAPI"],
+    "key_features": ["Fast", "Deterministic"],
+    "architecture_patterns": ["monolith"],
+    "build_system": "pip",
+    "entry_points": ["main.py"],
+    "has_tests": True,
+    "has_ci": True,
+    "has_docker": False,
+}
+
+_CARD = {
+    "summary": "FastAPI service with Temporal workflows",
+    "highlights": ["Durable workflows", "Typed API"],
+    "stack": ["Python", "FastAPI", "Temporal"],
+}
+
+_FILLER = (
+    "The service exposes a small HTTP API backed by durable workflows and a "
+    "relational store, with structured logging throughout."
+).split()
+
+
+def _prompt_text(messages: list[dict]) -> str:
+    parts: list[str] = []
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            parts.extend(p.get("text", "") for p in content if isinstance(p, dict))
+        else:
+            parts.append(str(content))
+    return "\n".join(parts)
+
+
+def _classify(prompt: str) -> str:
+    # Match on instruction text only — doc prompts embed the analysis JSON.
+    if "- project_name (string)" in prompt:
+        return "analysis"
+    if "- highlights (list" in prompt:
+        return "card"
+    return "markdown"
+
+
+# Passes doc_validator's README checks so benchmarks don't trigger repairs.
+_README_SKELETON = (
+    "# Mock Project\n\nA mock project used for load testing.\n\n"
+    "## Quick Start\n\n```bash\npip install -r requirements.txt\npython main.py\n```\n\n"
+    "## Architecture\n\n```mermaid\ngraph TD\n    API[API Service] --> DB[Database]\n```\n\n"
+    "## Tech Stack\n\n- Python\n- FastAPI\n\n"
+    "## Key Features\n\n"
+)
+
+
+def _markdown(n_tokens: int) -> str:
+    filler = max(n_tokens - _approx_tokens(_README_SKELETON), 0)
+    return _README_SKELETON + " ".join(_FILLER[i % len(_FILLER)] for i in range(filler)) + "\n"
+
+
+def _content_for(kind: str, n_tokens: int) -> str:
+    if kind == "analysis":
+        return json.dumps(_ANALYSIS)
+    if kind == "card":
+        return json.dumps(_CARD)
+    return _markdown(n_tokens)
+
+
+def _approx_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / _CHARS_PER_TOKEN))
+
+
+# ---------------------------------------------------------------------------
+# App
+# ---------------------------------------------------------------------------
+
+def create_app(config: MockLLMConfig | None = None) -> FastAPI:
+    config = config or MockLLMConfig()
+    rng = random.Random(config.seed)
+    stats = MockLLMStats()
+    app = FastAPI(title="Mock LLM server")
+    app.state.config = config
+    app.state.stats = stats
+
+    def ttft_s() -> float:
+        if config.ttft_median_ms <= 0:
+            return 0.0
+        return rng.lognormvariate(math.log(config.ttft_median_ms / 1000.0), config.ttft_sigma)
+
+    def decode_s(tokens: int) -> float:
+        return tokens / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats.requests += 1
+
+        if config.rate_limit_prob > 0 and rng.random() < config.rate_limit_prob:
+            stats.rate_limited += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": str(config.retry_after_s)},
+                content={"error": {
+                    "message": "Rate limit reached (mock)",
+                    "type": "rate_limit_error",
+                    "code": "rate_limit_exceeded",
+                }},
+            )
+
+        model = body.get("model", "mock")
+        prompt = _prompt_text(body.get("messages") or [])
+        kind = _classify(prompt)
+        stats.by_kind[kind] = stats.by_kind.get(kind, 0) + 1
+        max_tokens = body.get("max_tokens") or body.get("max_completion_tokens")
+        target = min(config.completion_tokens, max_tokens or config.completion_tokens)
+        content = _content_for(kind, target)
+        usage = {
+            "prompt_tokens": _approx_tokens(prompt),
+            "completion_tokens": _approx_tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        stats.prompt_tokens += usage["prompt_tokens"]
+        stats.completion_tokens += usage["completion_tokens"]
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if body.get("stream"):
+            stats.streamed += 1
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            return StreamingResponse(
+                _stream(completion_id, created, model, content, usage, include_usage),
+                media_type="text/event-stream",
+            )
+
+        await asyncio.sleep(ttft_s() + decode_s(usage["completion_tokens"]))
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }
+
+    async def _stream(completion_id, created, model, content, usage, include_usage):
+        def chunk(delta: dict, finish_reason: str | None = None) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        await asyncio.sleep(ttft_s())
+        yield chunk({"role": "assistant", "content": ""})
+
+        # Split on character count so each emitted piece ≈ one token.
+        pieces = [content[i:i + _CHARS_PER_TOKEN] for i in range(0, len(content), _CHARS_PER_TOKEN)]
+        per_tick = max(1, round(config.tokens_per_second * _STREAM_TICK_S)) \
+            if config.tokens_per_second > 0 else len(pieces)
+        for i in range(0, len(pieces), per_tick):
+            batch = pieces[i:i + per_tick]
+            await asyncio.sleep(decode_s(len(batch)))
+            yield chunk({"content": "".join(batch)})
+
+        yield chunk({}, "stop")
+        if include_usage:
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [],
+                "usage": usage,
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    app.add_api_route("/v1/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/chat/completions", chat_completions, methods=["POST"])
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]}
+
+    @app.get("/mock/stats")
+    async def mock_stats():
+        return {"config": asdict(config), **asdict(stats)}
+
+    return app
+
+
+def parse_args(argv: list[str] | None = None) -> tuple[argparse.Namespace, MockLLMConfig]:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8911)
+    defaults = MockLLMConfig()
+    parser.add_argument("--ttft-median-ms", type=float, default=defaults.ttft_median_ms)
+    parser.add_argument("--ttft-sigma", type=float, default=defaults.ttft_sigma)
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second)
+    parser.add_argument("--completion-tokens", type=int, default=defaults.completion_tokens)
+    parser.add_argument("--rate-limit-prob", type=float, default=defaults.rate_limit_prob)
+    parser.add_argument("--retry-after-s", type=int, default=defaults.retry_after_s)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    config = MockLLMConfig(
+        ttft_median_ms=args.ttft_median_ms,
+        ttft_sigma=args.ttft_sigma,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        rate_limit_prob=args.rate_limit_prob,
+        retry_after_s=args.retry_after_s,
+        seed=args.seed,
+    )
+    return args, config
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    _args, _config = parse_args()
+    uvicorn.run(create_app(_config), host=_args.host, port=_args.port, log_level="warning")
@@ -4,6 +4,7 @@ Same mocking pattern as test_routes_repos.py. Covers:
   - POST /portfolio/generate (happy + 400 on bad repo count +
     idempotency hit)
   - GET /portfolio/status/{workflow_id} (happy + 404)
+  - POST /portfolio/cancel/{workflow_id} (happy)
   - POST /portfolio/publish (happy)
 """
 from unittest.mock import AsyncMock, MagicMock
@@ -12,7 +13,9 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.pool import StaticPool
 from sqlmodel import Session, SQLModel, create_engine
+from temporalio.client import WorkflowExecutionStatus
 
+from app.core.config import settings
 from app.main import app
 
 
@@ -81,6 +84,8 @@ class TestGeneratePortfolio:
         assert r.status_code == 200
         assert r.json()["workflow_id"].startswith("portfolio-alice-")
         mock_temporal.start_workflow.assert_awaited_once()
+        portfolio_input = mock_temporal.start_workflow.call_args.args[1]
+        assert portfolio_input.max_concurrent_scans == settings.PORTFOLIO_MAX_CONCURRENT_SCANS
 
     def test_empty_repo_ids_returns_400(self, client, auth_headers):
         r = client.post(
@@ -142,6 +147,19 @@ class TestPortfolioStatus:
         assert r.status_code == 404
 
 
+class TestPortfolioCancel:
+    def test_cancels_running_workflow(self, client, auth_headers, mock_temporal):
+        handle = mock_temporal.get_workflow_handle.return_value
+        handle.describe = AsyncMock(return_value=MagicMock(status=WorkflowExecutionStatus.RUNNING))
+        handle.cancel = AsyncMock()
+
+        r = client.post("/api/portfolio/cancel/portfolio-alice-abc", headers=auth_headers)
+
+        assert r.status_code == 200
+        assert r.json()["status"] == "cancelling"
+        handle.cancel.assert_awaited_once()
+
+
 class TestPortfolioPublish:
     def test_publish_calls_activity(
         self, client, auth_headers, mock_github, monkeypatch,
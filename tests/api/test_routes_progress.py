@@ -0,0 +1,134 @@
+"""Push-style progress for batch / portfolio workflows.
+
+Covers:
+- publish_progress_activity appends events to workflow_events
+- ProgressHub wakes waiters as events land, shares one tail per workflow,
+  and reports done after the terminal event
+- /progress/{id} long-poll returns events + cursor; /stream emits SSE
+  frames and closes after the terminal event, honouring Last-Event-ID
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+from temporalio.testing import ActivityEnvironment
+
+from app.db.crud import append_workflow_events, list_workflow_events
+from app.main import app
+from app.services import progress_stream
+from app.services.progress_stream import ProgressHub
+from app.temporal.activities.persistence import publish_progress_activity
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr("app.services.progress_stream.get_session", lambda: Session(engine))
+    monkeypatch.setattr("app.temporal.activities.persistence.get_session", lambda: Session(engine))
+    return engine
+
+
+def _publish(engine, workflow_id: str, *events: dict) -> None:
+    with Session(engine) as session:
+        append_workflow_events(session, workflow_id=workflow_id, events=list(events))
+        session.commit()
+
+
+@pytest.mark.asyncio
+async def test_publish_activity_appends_events(engine):
+    await ActivityEnvironment().run(
+        publish_progress_activity, "wf-1",
+        [{"kind": "stage", "stage": "scanning"}, {"kind": "repo_scanned", "repo": "a/b"}],
+    )
+    with Session(engine) as session:
+        rows = list_workflow_events(session, workflow_id="wf-1")
+    assert [(row.kind, row.data) for row in rows] == [
+        ("stage", {"stage": "scanning"}), ("repo_scanned", {"repo": "a/b"}),
+    ]
+
+
+@pytest.mark.asyncio
+class TestProgressHub:
+    async def test_waiter_woken_by_new_event(self, engine):
+        hub = ProgressHub(poll_interval_s=0.01)
+        waiter = asyncio.create_task(hub.wait("wf-1", 0, timeout_s=2))
+        await asyncio.sleep(0.05)
+        _publish(engine, "wf-1", {"kind": "started", "total": 2})
+        events, done = await waiter
+        assert [event["kind"] for event in events] == ["started"]
+        assert events[0]["total"] == 2
+        assert not done
+
+    async def test_cursor_and_done(self, engine):
+        _publish(engine, "wf-1", {"kind": "started"}, {"kind": "repo_done"}, {"kind": "completed"})
+        hub = ProgressHub(poll_interval_s=0.01)
+        events, done = await hub.wait("wf-1", 0, timeout_s=1)
+        assert [event["kind"] for event in events] == ["started", "repo_done", "completed"]
+        assert done
+        events, done = await hub.wait("wf-1", events[0]["id"], timeout_s=1)
+        assert [event["kind"] for event in events] == ["repo_done", "completed"]
+        assert done
+
+    async def test_subscribers_share_one_tail(self, engine, monkeypatch):
+        reads: list[int] = []
+        load = progress_stream._load_events
+
+        def counting_load(workflow_id, after_id):
+            reads.append(after_id)
+            return load(workflow_id, after_id)
+
+        monkeypatch.setattr(progress_stream, "_load_events", counting_load)
+        hub = ProgressHub(poll_interval_s=0.05)
+        waiters = [asyncio.create_task(hub.wait("wf-1", 0, timeout_s=2)) for _ in range(20)]
+        await asyncio.sleep(0.12)
+        _publish(engine, "wf-1", {"kind": "completed"})
+        results = await asyncio.gather(*waiters)
+        assert all(done for _, done in results)
+        # One read per poll interval, not one per subscriber.
+        assert len(reads) < 10
+
+    async def test_timeout_returns_nothing(self, engine):
+        events, done = await ProgressHub(poll_interval_s=0.01).wait("wf-none", 0, timeout_s=0.05)
+        assert (events, done) == ([], False)
+
+
+class TestProgressRoutes:
+    @pytest.fixture
+    def client(self, engine, monkeypatch):
+        monkeypatch.setattr("app.api.routes.progress.hub", ProgressHub(poll_interval_s=0.01))
+        return TestClient(app)
+
+    def test_long_poll(self, client, engine):
+        _publish(engine, "wf-1", {"kind": "stage", "stage": "scanning"})
+        r = client.get(
+            "/api/progress/wf-1", params={"timeout": 1},
+            headers={"Authorization": "Bearer t"},
+        )
+        assert r.status_code == 200
+        body = r.json()
+        assert body["events"][0]["stage"] == "scanning"
+        assert body["cursor"] == body["events"][0]["id"]
+        assert body["done"] is False
+
+    def test_stream_ends_after_terminal_event(self, client, engine):
+        _publish(
+            engine, "wf-1",
+            {"kind": "stage", "stage": "generating"},
+            {"kind": "draft_ready", "draft_readme": "# hi"},
+        )
+        with client.stream(
+            "GET", "/api/progress/wf-1/stream",
+            headers={"Authorization": "Bearer t", "Last-Event-ID": "1"},
+        ) as r:
+            assert r.headers["content-type"].startswith("text/event-stream")
+            body = "".join(r.iter_text())
+        assert "event: stage" not in body
+        assert "id: 2\nevent: draft_ready\n" in body
+
+    def test_requires_auth(self, client):
+        assert client.get("/api/progress/wf-1").status_code == 401
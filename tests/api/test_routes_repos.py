@@ -6,6 +6,7 @@ external services. Covers most paths in:
   - /repos (GET, hydration with stored analysis)
   - /analyze/{repo_id} (POST + 404)
   - /fix/{repo_id} (POST + 404 + idempotency hit)
+  - /fix/cancel/{workflow_id} (POST + 404 + 409 not running)
   - /sync (POST)
   - /repos/{repo_id}/commit (POST happy + 404 no draft + 400 no files +
     repo not found + idempotency hit)
@@ -19,7 +20,11 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.pool import StaticPool
 from sqlmodel import Session, SQLModel, create_engine
+from temporalio.client import WorkflowExecutionStatus
+from temporalio.common import WorkflowIDConflictPolicy, WorkflowIDReusePolicy
+from temporalio.service import RPCError, RPCStatusCode
 
+from app.core.config import settings
 from app.db.crud import (
     save_draft_proposal,
     upsert_analysis_result,
@@ -111,6 +116,7 @@ def mock_github(monkeypatch):
     get_repo_full_name = AsyncMock(return_value="alice/proj")
     get_repo_details = AsyncMock(return_value={
         "name": "proj", "full_name": "alice/proj", "description": "d",
+        "pushed_at": "2026-03-01T00:00:00+00:00",
     })
 
     monkeypatch.setattr("app.api.routes.repos.github_service.list_user_repos", list_user_repos)
@@ -144,6 +150,33 @@ class TestListRepos:
         other = next(x for x in repos if x["id"] == 99)
         assert other.get("health") is None
 
+    def test_saves_metadata_snapshot(self, client, auth_headers, seeded_db, mock_github):
+        from app.db.crud import get_repo_metadata_snapshot
+        from app.services.idempotency import fingerprint_token
+
+        client.get("/api/repos", headers=auth_headers)
+        token = auth_headers["Authorization"].removeprefix("Bearer ")
+        with Session(seeded_db) as s:
+            snapshot = get_repo_metadata_snapshot(s, token_fingerprint=fingerprint_token(token))
+        assert [repo["id"] for repo in snapshot.repos] == [12345, 99]
+        assert snapshot.repos[0]["full_name"] == "alice/proj"
+        assert {"fork", "stargazers_count", "language", "pushed_at"} <= snapshot.repos[0].keys()
+        assert "health" not in snapshot.repos[0]
+
+    def test_snapshot_save_failure_still_lists_repos(
+        self, client, auth_headers, seeded_db, mock_github, monkeypatch,
+    ):
+        monkeypatch.setattr(
+            "app.api.routes.repos.save_repo_metadata_snapshot",
+            MagicMock(side_effect=RuntimeError("db locked")),
+        )
+        logger = MagicMock()
+        monkeypatch.setattr("app.api.routes.repos.logger", logger)
+        r = client.get("/api/repos", headers=auth_headers)
+        assert r.status_code == 200
+        assert [repo["id"] for repo in r.json()] == [12345, 99]
+        logger.warning.assert_called_once_with("repo_snapshot_save_failed", error="db locked")
+
     def test_github_fail_returns_502(self, client, auth_headers, monkeypatch):
         monkeypatch.setattr(
             "app.api.routes.repos.github_service.list_user_repos",
@@ -178,7 +211,7 @@ class TestAnalyzeRepo:
 
     def test_repo_not_found_returns_404(self, client, auth_headers, monkeypatch):
         monkeypatch.setattr(
-            "app.api.routes.repos.github_service.get_repo_full_name",
+            "app.api.routes.repos.github_service.get_repo_details",
             AsyncMock(side_effect=RuntimeError("404")),
         )
         r = client.post("/api/analyze/99999", headers=auth_headers)
@@ -194,6 +227,56 @@ class TestFixRepo:
         assert r.json()["workflow_id"].startswith("janitor-12345-")
         mock_temporal.start_workflow.assert_awaited_once()
 
+    def test_repeat_request_reuses_workflow_id(
+        self, client, auth_headers, mock_github, mock_temporal,
+    ):
+        body = {"doc_types": ["README", "API"]}
+        first = client.post("/api/fix/12345", json=body, headers=auth_headers).json()
+        again = client.post("/api/fix/12345", json={"doc_types": ["API", "README"]}, headers=auth_headers).json()
+        other = client.post("/api/fix/12345", json={"doc_types": ["README"]}, headers=auth_headers).json()
+
+        assert first["workflow_id"] == again["workflow_id"]
+        assert other["workflow_id"] != first["workflow_id"]
+        kwargs = mock_temporal.start_workflow.call_args.kwargs
+        assert kwargs["id_conflict_policy"] == WorkflowIDConflictPolicy.USE_EXISTING
+        assert kwargs["id_reuse_policy"] == WorkflowIDReusePolicy.ALLOW_DUPLICATE
+
+    def test_new_push_gets_new_workflow_id(
+        self, client, auth_headers, mock_github, mock_temporal, monkeypatch,
+    ):
+        first = client.post("/api/fix/12345", headers=auth_headers).json()
+        monkeypatch.setattr(
+            "app.api.routes.repos.github_service.get_repo_details",
+            AsyncMock(return_value={
+                "name": "proj", "full_name": "alice/proj", "description": "d",
+                "pushed_at": "2026-03-02T00:00:00+00:00",
+            }),
+        )
+        second = client.post("/api/fix/12345", headers=auth_headers).json()
+        assert second["workflow_id"] != first["workflow_id"]
+
+    def test_default_doc_types_from_settings(
+        self, client, auth_headers, mock_github, mock_temporal, monkeypatch,
+    ):
+        monkeypatch.setattr(settings, "JANITOR_DOC_TYPES", "README, CONTRIBUTING")
+        client.post("/api/fix/12345", headers=auth_headers)
+        janitor_input = mock_temporal.start_workflow.call_args.args[1]
+        assert janitor_input.doc_types == ["README", "CONTRIBUTING"]
+        assert janitor_input.max_concurrent_docs == settings.JANITOR_MAX_CONCURRENT_DOCS
+
+    def test_requested_doc_types(self, client, auth_headers, mock_github, mock_temporal):
+        r = client.post(
+            "/api/fix/12345", headers=auth_headers,
+            json={"doc_types": ["ARCHITECTURE", "API"]},
+        )
+        assert r.status_code == 200
+        assert mock_temporal.start_workflow.call_args.args[1].doc_types == ["ARCHITECTURE", "API"]
+
+    def test_unknown_doc_type_returns_400(self, client, auth_headers, mock_github, mock_temporal):
+        r = client.post("/api/fix/12345", headers=auth_headers, json={"doc_types": ["CHANGELOG"]})
+        assert r.status_code == 400
+        mock_temporal.start_workflow.assert_not_awaited()
+
     def test_repo_not_found_returns_404(self, client, auth_headers, monkeypatch):
         monkeypatch.setattr(
             "app.api.routes.repos.github_service.get_repo_details",
@@ -219,6 +302,51 @@ class TestFixRepo:
         assert mock_temporal.start_workflow.await_count == 1
 
 
+def _workflow_handle(status=WorkflowExecutionStatus.RUNNING, describe_error=None):
+    handle = MagicMock()
+    handle.describe = AsyncMock(
+        side_effect=describe_error, return_value=MagicMock(status=status),
+    )
+    handle.cancel = AsyncMock()
+    return handle
+
+
+class TestCancelFix:
+    def test_requests_cancellation(self, client, auth_headers, mock_temporal):
+        handle = _workflow_handle()
+        mock_temporal.get_workflow_handle = MagicMock(return_value=handle)
+
+        r = client.post("/api/fix/cancel/janitor-12345-abc", headers=auth_headers)
+
+        assert r.status_code == 200
+        assert r.json() == {"workflow_id": "janitor-12345-abc", "status": "cancelling"}
+        mock_temporal.get_workflow_handle.assert_called_once_with("janitor-12345-abc")
+        handle.cancel.assert_awaited_once()
+
+    def test_other_workflow_kind_returns_404(self, client, auth_headers, mock_temporal):
+        r = client.post("/api/fix/cancel/batch-gardening-abc", headers=auth_headers)
+        assert r.status_code == 404
+
+    def test_unknown_workflow_returns_404(self, client, auth_headers, mock_temporal):
+        handle = _workflow_handle(describe_error=RPCError("gone", RPCStatusCode.NOT_FOUND, b""))
+        mock_temporal.get_workflow_handle = MagicMock(return_value=handle)
+
+        r = client.post("/api/fix/cancel/janitor-1-abc", headers=auth_headers)
+
+        assert r.status_code == 404
+        handle.cancel.assert_not_awaited()
+
+    def test_finished_workflow_returns_409(self, client, auth_headers, mock_temporal):
+        handle = _workflow_handle(status=WorkflowExecutionStatus.COMPLETED)
+        mock_temporal.get_workflow_handle = MagicMock(return_value=handle)
+
+        r = client.post("/api/fix/cancel/janitor-1-abc", headers=auth_headers)
+
+        assert r.status_code == 409
+        assert "completed" in r.json()["detail"]
+        handle.cancel.assert_not_awaited()
+
+
 class TestSync:
     def test_calls_sync_pr_status_activity(self, client, auth_headers, monkeypatch):
         sync_mock = AsyncMock(return_value=3)
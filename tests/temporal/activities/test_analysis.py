@@ -1,10 +1,33 @@
 """Tests for temporal activities analysis module."""
 
+import asyncio
+import dataclasses
+import subprocess
+import threading
+
 import pytest
 from unittest.mock import patch, AsyncMock, MagicMock
 from datetime import datetime, timezone, timedelta
 
-from app.temporal.activities.analysis import say_hello, _analyze_repo
+from github import GithubException
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+from temporalio.testing import ActivityEnvironment
+
+from app.db.crud import upsert_analysis_result, upsert_repository, upsert_user
+from app.temporal.activities.analysis import (
+    ScanCancelled,
+    _analyze_repo,
+    _clone,
+    _scan_dir,
+    analyze_repo_health_batch,
+    deep_scan_repo,
+    is_failed_health_result,
+    needs_reanalysis,
+    plan_incremental_gardening_activity,
+    say_hello,
+    select_stale_repos_activity,
+)
 
 
 class TestAnalysisActivities:
@@ -130,3 +153,395 @@ class TestAnalysisActivities:
         assert expected_keys.issubset(result.keys())
         assert isinstance(result["health_score"], (int, float))
         assert isinstance(result["issues"], list)
+
+
+def _healthy_repo(full_name: str) -> MagicMock:
+    repo = MagicMock()
+    repo.full_name = full_name
+    repo.name = full_name.split("/")[1]
+    repo.pushed_at = datetime.now(timezone.utc)
+    repo.description = "A repo"
+    repo.get_commits.return_value = []
+    repo.get_pulls.return_value.totalCount = 0
+    return repo
+
+
+class TestAnalyzeRepoHealthBatch:
+    """One activity health-checks a chunk on a shared client + session."""
+
+    @pytest.mark.asyncio
+    @patch('app.temporal.activities.analysis.get_session')
+    @patch('app.temporal.activities.analysis.Github')
+    async def test_chunk_shares_client_and_session(self, mock_github_class, mock_session):
+        def get_repo(name):
+            if name == "org/missing":
+                raise GithubException(404, {"message": "Not Found"})
+            return _healthy_repo(name)
+
+        mock_github_class.return_value.get_repo.side_effect = get_repo
+        names = ["org/a", "org/missing", "org/b"]
+        heartbeats: list = []
+        env = ActivityEnvironment()
+        env.on_heartbeat = lambda *details: heartbeats.append(details[0])
+
+        results = await env.run(analyze_repo_health_batch, names, "token")
+
+        assert [r["repo_name"] for r in results] == names
+        assert [is_failed_health_result(r) for r in results] == [False, True, False]
+        assert [h["completed"] for h in heartbeats] == [0, 1, 2, 3]
+        assert heartbeats[-1]["results"] == results
+        assert mock_github_class.call_count == 1
+        assert mock_session.call_count == 1
+        mock_github_class.return_value.close.assert_called_once()
+
+    @pytest.mark.asyncio
+    @patch('app.temporal.activities.analysis.get_session')
+    @patch('app.temporal.activities.analysis.Github')
+    async def test_retry_resumes_after_last_heartbeat(self, mock_github_class, mock_session):
+        mock_github_class.return_value.get_repo.side_effect = _healthy_repo
+        names = ["org/a", "org/b", "org/c"]
+        done = {"repo_name": "org/a", "health_score": 90}
+        env = ActivityEnvironment()
+        env.info = dataclasses.replace(
+            env.info, heartbeat_details=[{"completed": 1, "total": 3, "results": [done]}],
+        )
+
+        results = await env.run(analyze_repo_health_batch, names, "token")
+
+        assert results[0] == done
+        assert [r["repo_name"] for r in results] == names
+        fetched = [c.args[0] for c in mock_github_class.return_value.get_repo.call_args_list]
+        assert fetched == ["org/b", "org/c"]
+
+    @pytest.mark.asyncio
+    @patch('app.temporal.activities.analysis.get_session')
+    @patch('app.temporal.activities.analysis.Github')
+    async def test_checkpoint_for_another_chunk_ignored(self, mock_github_class, mock_session):
+        mock_github_class.return_value.get_repo.side_effect = _healthy_repo
+        env = ActivityEnvironment()
+        env.info = dataclasses.replace(
+            env.info, heartbeat_details=[{"results": [{"repo_name": "org/other"}]}],
+        )
+
+        results = await env.run(analyze_repo_health_batch, ["org/a"], "token")
+
+        assert [r["repo_name"] for r in results] == ["org/a"]
+        assert mock_github_class.return_value.get_repo.call_count == 1
+
+
+def _fake_clone(auth_url, clone_dir, access_token, progress, cancelled=None):
+    (clone_dir / ".git").mkdir(parents=True)
+    (clone_dir / "src").mkdir()
+    (clone_dir / "src" / "main.py").write_text("print('hi')\n")
+    (clone_dir / "pyproject.toml").write_text("[project]\nname = 'demo'\n")
+    progress["clone_bytes"] = 2048
+
+
+@patch('app.temporal.activities.analysis.get_session')
+class TestDeepScanRepo:
+    """Heartbeats scan progress; a retry reuses a finished clone."""
+
+    @pytest.fixture(autouse=True)
+    def _workdir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr('app.temporal.activities.analysis.SCAN_WORKDIR', tmp_path / "gardener-scan")
+
+    @pytest.mark.asyncio
+    async def test_clones_without_token_into_owner_only_dir(self, mock_session, tmp_path):
+        env = ActivityEnvironment()
+        with patch('app.temporal.activities.analysis._clone', side_effect=_fake_clone) as clone:
+            await env.run(deep_scan_repo, "https://github.com/octo/demo", "ghp_secret", 7)
+
+        clone_url = clone.call_args.args[0]
+        assert clone_url == "https://github.com/octo/demo.git"
+        assert (tmp_path / "gardener-scan").stat().st_mode & 0o777 == 0o700
+
+    @pytest.mark.asyncio
+    async def test_failed_clone_removes_directory(self, mock_session):
+        def failing_clone(auth_url, clone_dir, access_token, progress, cancelled=None):
+            (clone_dir / ".git").mkdir(parents=True)
+            raise RuntimeError("git clone failed: connection reset")
+
+        env = ActivityEnvironment()
+        clone_dir = _scan_dir(env.info.workflow_id, env.info.activity_id, 7)
+        with patch('app.temporal.activities.analysis._clone', side_effect=failing_clone):
+            with pytest.raises(RuntimeError):
+                await env.run(deep_scan_repo, "https://github.com/octo/demo", "token", 7)
+
+        assert not clone_dir.exists()
+
+    @pytest.mark.asyncio
+    async def test_failed_walk_keeps_clone_for_retry(self, mock_session):
+        env = ActivityEnvironment()
+        clone_dir = _scan_dir(env.info.workflow_id, env.info.activity_id, 7)
+        with patch('app.temporal.activities.analysis._clone', side_effect=_fake_clone), \
+                patch('app.temporal.activities.analysis._read_high_value_files', side_effect=OSError("disk")):
+            with pytest.raises(OSError):
+                await env.run(deep_scan_repo, "https://github.com/octo/demo", "token", 7)
+
+        assert (clone_dir / ".git").is_dir()
+
+    @pytest.mark.asyncio
+    async def test_heartbeats_progress_and_cleans_up(self, mock_session):
+        heartbeats: list = []
+        env = ActivityEnvironment()
+        env.on_heartbeat = lambda *details: heartbeats.append(details[0])
+
+        with patch('app.temporal.activities.analysis._clone', side_effect=_fake_clone) as clone:
+            result = await env.run(deep_scan_repo, "https://github.com/octo/demo", "token", 7)
+
+        clone.assert_called_once()
+        assert {entry["path"] for entry in result["file_tree"]} == {"src", "pyproject.toml"}
+        assert "pyproject.toml" in result["tech_stack_files"]
+        assert heartbeats[0]["phase"] == "starting"
+        clone_dir = _scan_dir(env.info.workflow_id, env.info.activity_id, 7)
+        assert not clone_dir.exists()
+
+    @pytest.mark.asyncio
+    async def test_retry_skips_clone_when_walk_had_started(self, mock_session):
+        env = ActivityEnvironment()
+        clone_dir = _scan_dir(env.info.workflow_id, env.info.activity_id, 7)
+        _fake_clone(None, clone_dir, None, {})
+        env.info = dataclasses.replace(env.info, heartbeat_details=[{
+            "phase": "walking", "clone_dir": str(clone_dir), "clone_bytes": 2048, "files_walked": 1,
+        }])
+        heartbeats: list = []
+        env.on_heartbeat = lambda *details: heartbeats.append(details[0])
+
+        with patch('app.temporal.activities.analysis._clone') as clone:
+            result = await env.run(deep_scan_repo, "https://github.com/octo/demo", "token", 7)
+
+        clone.assert_not_called()
+        assert {entry["path"] for entry in result["file_tree"]} == {"src", "pyproject.toml"}
+        assert not clone_dir.exists()
+
+    @pytest.mark.asyncio
+    async def test_retry_reclones_partial_clone(self, mock_session):
+        env = ActivityEnvironment()
+        clone_dir = _scan_dir(env.info.workflow_id, env.info.activity_id, 7)
+        (clone_dir / "half-written").mkdir(parents=True)
+        env.info = dataclasses.replace(env.info, heartbeat_details=[{
+            "phase": "cloning", "clone_dir": str(clone_dir), "clone_bytes": 1024,
+        }])
+
+        with patch('app.temporal.activities.analysis._clone', side_effect=_fake_clone) as clone:
+            result = await env.run(deep_scan_repo, "https://github.com/octo/demo", "token", 7)
+
+        clone.assert_called_once()
+        assert "half-written" not in {entry["path"] for entry in result["file_tree"]}
+
+
+    @pytest.mark.asyncio
+    async def test_cancel_stops_clone_and_removes_directory(self, mock_session):
+        clone_started = threading.Event()
+
+        def blocking_clone(auth_url, clone_dir, access_token, progress, cancelled):
+            (clone_dir / ".git").mkdir(parents=True)
+            clone_started.set()
+            assert cancelled.wait(5)
+            raise ScanCancelled("git clone cancelled")
+
+        env = ActivityEnvironment()
+        clone_dir = _scan_dir(env.info.workflow_id, env.info.activity_id, 7)
+        with patch('app.temporal.activities.analysis._clone', side_effect=blocking_clone):
+            task = asyncio.create_task(
+                env.run(deep_scan_repo, "https://github.com/octo/demo", "token", 7),
+            )
+            await asyncio.to_thread(clone_started.wait, 5)
+            env.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            # The scan thread notices the cancel and cleans up after itself.
+            for _ in range(50):
+                if not clone_dir.exists():
+                    break
+                await asyncio.sleep(0.1)
+
+        assert not clone_dir.exists()
+
+
+def _git_source(tmp_path) -> str:
+    source = tmp_path / "source"
+    source.mkdir()
+    (source / "blob").write_bytes(bytes(range(256)) * 8192)
+    git = ["git", "-c", "user.email=t@example.com", "-c", "user.name=t", "-C", str(source)]
+    subprocess.run([*git, "init", "-q"], check=True)
+    subprocess.run([*git, "add", "blob"], check=True)
+    subprocess.run([*git, "commit", "-qm", "blob"], check=True)
+    return f"file://{source}"
+
+
+class TestClone:
+    def test_reports_received_bytes(self, tmp_path):
+        source = _git_source(tmp_path)
+        progress: dict = {}
+
+        _clone(source, tmp_path / "clone", "token", progress)
+
+        assert (tmp_path / "clone" / "blob").exists()
+        assert progress["clone_bytes"] > 0
+
+    def test_token_not_written_to_clone(self, tmp_path):
+        _clone(_git_source(tmp_path), tmp_path / "clone", "ghp_secret-token", {})
+
+        git_dir = tmp_path / "clone" / ".git"
+        assert "ghp_secret-token" not in (git_dir / "config").read_text()
+        for path in git_dir.rglob("*"):
+            if path.is_file():
+                assert b"ghp_secret-token" not in path.read_bytes(), path
+
+    def test_cancelled_clone_raises_scan_cancelled(self, tmp_path):
+        cancelled = threading.Event()
+        cancelled.set()
+        with pytest.raises(ScanCancelled):
+            _clone(f"file://{tmp_path}/missing", tmp_path / "clone", "token", {}, cancelled)
+
+    def test_failure_masks_token(self, tmp_path):
+        with pytest.raises(RuntimeError, match="git clone failed") as exc_info:
+            _clone(f"file://{tmp_path}/secret-token", tmp_path / "clone", "secret-token", {})
+        assert "secret-token" not in str(exc_info.value)
+
+
+class TestNeedsReanalysis:
+    NOW = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    WEEK = timedelta(days=7)
+
+    def test_never_analysed(self):
+        assert needs_reanalysis(self.NOW, None, self.NOW, self.WEEK)
+
+    def test_pushed_since_analysis(self):
+        analysed = self.NOW - timedelta(days=1)
+        assert needs_reanalysis(self.NOW - timedelta(hours=1), analysed, self.NOW, self.WEEK)
+
+    def test_unchanged_and_recent_is_fresh(self):
+        analysed = self.NOW - timedelta(days=1)
+        assert not needs_reanalysis(self.NOW - timedelta(days=30), analysed, self.NOW, self.WEEK)
+
+    def test_unchanged_but_report_too_old(self):
+        analysed = self.NOW - timedelta(days=8)
+        assert needs_reanalysis(self.NOW - timedelta(days=30), analysed, self.NOW, self.WEEK)
+
+    def test_naive_timestamps_are_utc(self):
+        analysed = (self.NOW - timedelta(days=1)).replace(tzinfo=None)
+        assert not needs_reanalysis(self.NOW - timedelta(days=2), analysed, self.NOW, self.WEEK)
+
+
+class TestSelectStaleRepos:
+    """Targeted batches only dispatch repos changed since their last report."""
+
+    @pytest.fixture
+    def engine(self, monkeypatch):
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool,
+        )
+        SQLModel.metadata.create_all(engine)
+        monkeypatch.setattr(
+            "app.temporal.activities.analysis.get_session", lambda: Session(engine)
+        )
+        return engine
+
+    def _store(self, engine, github_repo_id: int, full_name: str) -> None:
+        with Session(engine) as session:
+            user = upsert_user(session, github_id=1, username="org")
+            repo = upsert_repository(
+                session, github_repo_id=github_repo_id, owner_id=user.id,
+                name=full_name.split("/")[1], full_name=full_name, html_url="",
+            )
+            upsert_analysis_result(
+                session, repo_id=repo.id, health_score=80, issues=["No description"],
+                pending_fix_url=None,
+            )
+            session.commit()
+
+    @pytest.fixture
+    def github(self):
+        now = datetime.now(timezone.utc)
+        repos = {
+            1: MagicMock(id=1, full_name="org/unchanged", pushed_at=now - timedelta(days=3)),
+            2: MagicMock(id=2, full_name="org/pushed", pushed_at=now + timedelta(minutes=1)),
+            3: MagicMock(id=3, full_name="org/new", pushed_at=now - timedelta(days=3)),
+        }
+
+        def get_repo(repo_id):
+            if repo_id not in repos:
+                raise GithubException(404, {"message": "Not Found"})
+            return repos[repo_id]
+
+        with patch('app.temporal.activities.analysis.Github') as mock_github_class:
+            mock_github_class.return_value.get_repo.side_effect = get_repo
+            yield
+
+    @pytest.mark.asyncio
+    async def test_fresh_repos_skipped_with_stored_report(self, engine, github):
+        self._store(engine, 1, "org/unchanged")
+        self._store(engine, 2, "org/pushed")
+
+        selection = await ActivityEnvironment().run(
+            select_stale_repos_activity, "token", [1, 2, 3, 404],
+        )
+
+        assert selection["stale"] == ["org/pushed", "org/new"]
+        (fresh,) = selection["fresh"]
+        assert (fresh["repo_name"], fresh["health_score"]) == ("org/unchanged", 80)
+
+    @pytest.mark.asyncio
+    async def test_force_refresh_dispatches_everything(self, engine, github):
+        self._store(engine, 1, "org/unchanged")
+
+        selection = await ActivityEnvironment().run(
+            select_stale_repos_activity, "token", [1, 3], True,
+        )
+
+        assert selection == {"stale": ["org/unchanged", "org/new"], "fresh": []}
+
+
+class TestPlanIncrementalGardening:
+    """Scheduled runs pick changed repos, capped by the GitHub quota."""
+
+    @pytest.fixture
+    def listing(self, monkeypatch):
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool,
+        )
+        SQLModel.metadata.create_all(engine)
+        monkeypatch.setattr(
+            "app.temporal.activities.analysis.get_session", lambda: Session(engine)
+        )
+        with Session(engine) as session:
+            user = upsert_user(session, github_id=1, username="org")
+            repo = upsert_repository(
+                session, github_repo_id=1, owner_id=user.id, name="unchanged",
+                full_name="org/unchanged", html_url="",
+            )
+            upsert_analysis_result(
+                session, repo_id=repo.id, health_score=80, issues=[], pending_fix_url=None,
+            )
+            session.commit()
+
+        now = datetime.now(timezone.utc)
+        repos = [
+            {"id": 1, "full_name": "org/unchanged", "pushed_at": now - timedelta(days=3)},
+            {"id": 2, "full_name": "org/old", "pushed_at": now - timedelta(days=30)},
+            {"id": 3, "full_name": "org/recent", "pushed_at": now - timedelta(hours=1)},
+            {"id": 4, "full_name": "org/empty", "pushed_at": None},
+        ]
+        with patch('app.temporal.activities.analysis.GithubClient') as mock_client_class:
+            client = mock_client_class.return_value.__enter__.return_value
+            client.list_user_repo_pushes.return_value = repos
+            client.core_rate_limit.return_value = (5000, now + timedelta(hours=1))
+            yield client
+
+    @pytest.mark.asyncio
+    async def test_only_changed_repos_most_recent_first(self, listing):
+        plan = await ActivityEnvironment().run(plan_incremental_gardening_activity, "token")
+        assert plan["stale"] == ["org/recent", "org/old", "org/empty"]
+        assert plan["deferred"] == 0
+
+    @pytest.mark.asyncio
+    async def test_capped_by_rate_limit_share(self, listing):
+        listing.core_rate_limit.return_value = (20, datetime.now(timezone.utc))
+        plan = await ActivityEnvironment().run(
+            plan_incremental_gardening_activity, "token", 168, 0.5,
+        )
+        # 20 * 0.5 = 10 calls -> 2 repos at 5 calls each
+        assert plan["stale"] == ["org/recent", "org/old"]
+        assert (plan["deferred"], plan["rate_limit_remaining"]) == (1, 20)
@@ -1,8 +1,11 @@
 """Tests for temporal activities generation module."""
 
+import asyncio
+
 import pytest
 from unittest.mock import patch, AsyncMock, MagicMock
 import json
+from temporalio.testing import ActivityEnvironment
 
 from app.temporal.activities.generation import (
     generate_readme_activity,
@@ -167,3 +170,35 @@ class TestGenerationActivities:
                 assert isinstance(result, dict)
                 assert result["error"] is not None
                 assert "Generation error" in result["error"]
+
+
+class TestCancellation:
+    """LLM activities heartbeat, so a workflow cancel reaches the request."""
+
+    @pytest.mark.asyncio
+    async def test_cancel_aborts_in_flight_llm_call(self):
+        started = asyncio.Event()
+        aborted = asyncio.Event()
+
+        async def slow_generate(*args):
+            started.set()
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                aborted.set()
+                raise
+
+        env = ActivityEnvironment()
+        heartbeats: list = []
+        env.on_heartbeat = lambda *details: heartbeats.append(details)
+        with patch('app.temporal.activities.generation.llm_service.generate_doc', slow_generate):
+            task = asyncio.create_task(env.run(
+                generate_doc_activity, "{}", "README", "octo/demo", [], {},
+            ))
+            await started.wait()
+            env.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        assert aborted.is_set()
+        assert heartbeats
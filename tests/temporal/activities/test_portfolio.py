@@ -0,0 +1,225 @@
+"""Tests for temporal activities portfolio module (portfolio cards)."""
+
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from types import SimpleNamespace
+
+from github import GithubException
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.db.models import PortfolioCard
+from app.services import llm_service
+from app.temporal.activities.portfolio import portfolio_card_activity
+
+
+CARD = {"summary": "FastAPI service", "highlights": ["Temporal workflows"], "stack": ["Python"]}
+
+
+def _mock_repo(head_sha="abc123", stars=5):
+    repo = MagicMock()
+    repo.full_name = "alice/proj"
+    repo.name = "proj"
+    repo.description = "A project"
+    repo.html_url = "https://github.com/alice/proj"
+    repo.language = "Python"
+    repo.stargazers_count = stars
+    repo.forks_count = 1
+    repo.default_branch = "main"
+    repo.get_topics.return_value = ["api"]
+    if head_sha:
+        repo.get_branch.return_value.commit.sha = head_sha
+    else:
+        repo.get_branch.side_effect = GithubException(404, {"message": "Branch not found"})
+    repo.get_readme.return_value.decoded_content = b"# proj"
+    repo.get_contents.side_effect = lambda path: (
+        SimpleNamespace(decoded_content=b"fastapi\ntemporalio")
+        if path == "requirements.txt"
+        else (_ for _ in ()).throw(GithubException(404, {}))
+    )
+    return repo
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(
+        "app.temporal.activities.portfolio.get_session", lambda: Session(engine)
+    )
+    return engine
+
+
+@pytest.fixture
+def github(monkeypatch):
+    state = {"repo": _mock_repo()}
+    client = MagicMock()
+    client.get_repo.side_effect = lambda name: state["repo"]
+    monkeypatch.setattr(
+        "app.temporal.activities.portfolio.Github", lambda auth=None: client
+    )
+    return state
+
+
+class TestPortfolioCardActivity:
+    """Test suite for the cached portfolio card activity."""
+
+    @pytest.mark.asyncio
+    @patch('app.temporal.activities.portfolio.llm_service.generate_portfolio_card', new_callable=AsyncMock)
+    async def test_miss_generates_and_caches(self, mock_card, engine, github):
+        mock_card.return_value = dict(CARD)
+
+        result = await portfolio_card_activity("alice/proj", "token")
+
+        assert result["summary"] == "FastAPI service"
+        assert result["frameworks"] == ["FastAPI", "Temporal"]
+        assert result["card_cached"] is False
+        assert "readme_content" not in result
+        scan = mock_card.call_args.args[0]
+        assert scan["readme_content"] == "# proj"
+        with Session(engine) as session:
+            row = session.exec(select(PortfolioCard)).one()
+        assert (row.head_sha, row.card_version) == ("abc123", llm_service.PORTFOLIO_CARD_VERSION)
+
+    @pytest.mark.asyncio
+    @patch('app.temporal.activities.portfolio.llm_service.generate_portfolio_card', new_callable=AsyncMock)
+    async def test_hit_skips_scan_and_llm_but_refreshes_metadata(self, mock_card, engine, github):
+        mock_card.return_value = dict(CARD)
+        await portfolio_card_activity("alice/proj", "token")
+        github["repo"] = _mock_repo(stars=99)
+
+        result = await portfolio_card_activity("alice/proj", "token")
+
+        assert mock_card.await_count == 1
+        assert result["card_cached"] is True
+        assert result["stargazers_count"] == 99
+        github["repo"].get_readme.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch('app.temporal.activities.portfolio.llm_service.generate_portfolio_card', new_callable=AsyncMock)
+    async def test_new_head_sha_regenerates(self, mock_card, engine, github):
+        mock_card.return_value = dict(CARD)
+        await portfolio_card_activity("alice/proj", "token")
+        github["repo"] = _mock_repo(head_sha="def456")
+
+        result = await portfolio_card_activity("alice/proj", "token")
+
+        assert mock_card.await_count == 2
+        assert result["head_sha"] == "def456"
+
+    @pytest.mark.asyncio
+    @patch('app.temporal.activities.portfolio.llm_service.generate_portfolio_card', new_callable=AsyncMock)
+    async def test_unresolvable_head_is_not_cached(self, mock_card, engine, github):
+        mock_card.return_value = dict(CARD)
+        github["repo"] = _mock_repo(head_sha="")
+
+        await portfolio_card_activity("alice/proj", "token")
+
+        with Session(engine) as session:
+            assert session.exec(select(PortfolioCard)).all() == []
+
+
+class TestProfileFromCards:
+    """The compose step uses card summaries instead of README excerpts."""
+
+    @pytest.mark.asyncio
+    async def test_cards_rendered_into_prompt(self, monkeypatch):
+        captured = {}
+
+        async def fake_ainvoke_chat(messages, model=None):
+            captured["messages"] = messages
+            return SimpleNamespace(content="# Hi")
+
+        monkeypatch.setattr(llm_service, "_ainvoke_chat", fake_ainvoke_chat)
+        card = {"full_name": "alice/proj", **CARD, "frameworks": ["FastAPI"]}
+        await llm_service.generate_profile_readme([card], "alice")
+
+        prompt = captured["messages"][1]["content"]
+        assert "- Summary: FastAPI service" in prompt
+        assert "- Highlight: Temporal workflows" in prompt
+        assert "README excerpt" not in prompt
+
+
+def _listed(repo_id, full_name, stars=0, fork=False):
+    return {
+        "id": repo_id, "name": full_name.split("/")[1], "full_name": full_name,
+        "private": False, "html_url": f"https://github.com/{full_name}", "description": "",
+        "fork": fork, "stargazers_count": stars, "language": "Python", "pushed_at": None,
+    }
+
+
+class TestResolvePortfolioRepos:
+    """Selection comes from the /repos snapshot; GitHub only for misses."""
+
+    @pytest.fixture
+    def gh(self, monkeypatch):
+        client = MagicMock()
+        client.__enter__.return_value = client
+        client.list_user_repos_as_dicts.return_value = [
+            _listed(1, "alice/a", stars=3), _listed(2, "alice/b", stars=9),
+        ]
+        client.get_repo_metadata.side_effect = lambda repo_id: {
+            3: _listed(3, "alice/c"), 4: _listed(4, "mallory/x"),
+        }[repo_id] if repo_id in (3, 4) else (_ for _ in ()).throw(GithubException(404, {}))
+        monkeypatch.setattr(
+            "app.temporal.activities.portfolio.GithubClient", lambda token: client,
+        )
+        return client
+
+    def _snapshot(self, engine, repos, age_hours=0):
+        from datetime import datetime, timedelta, timezone
+
+        from app.db.crud import save_repo_metadata_snapshot
+        from app.services.idempotency import fingerprint_token
+
+        with Session(engine) as session:
+            row = save_repo_metadata_snapshot(
+                session, token_fingerprint=fingerprint_token("token"), repos=repos,
+            )
+            row.refreshed_at = datetime.now(timezone.utc) - timedelta(hours=age_hours)
+            session.commit()
+
+    @pytest.mark.asyncio
+    async def test_selected_ids_served_from_snapshot(self, engine, gh):
+        from app.temporal.activities.portfolio import resolve_portfolio_repos_activity
+
+        self._snapshot(engine, [_listed(1, "alice/a"), _listed(2, "alice/b")])
+        result = await resolve_portfolio_repos_activity("token", "alice", [2, 1])
+        assert [repo["id"] for repo in result["repos"]] == [2, 1]
+        assert (result["from_snapshot"], result["fetched"]) == (2, 0)
+        gh.list_user_repos_as_dicts.assert_not_called()
+        gh.get_repo_metadata.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_misses_fetched_individually(self, engine, gh):
+        from app.temporal.activities.portfolio import resolve_portfolio_repos_activity
+
+        self._snapshot(engine, [_listed(1, "alice/a")])
+        result = await resolve_portfolio_repos_activity("token", "alice", [1, 3, 4, 5])
+        # 4 belongs to someone else, 5 doesn't exist: both dropped.
+        assert [repo["id"] for repo in result["repos"]] == [1, 3]
+        assert (result["from_snapshot"], result["fetched"]) == (1, 3)
+        gh.list_user_repos_as_dicts.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_stale_snapshot_ignored(self, engine, gh):
+        from app.temporal.activities.portfolio import resolve_portfolio_repos_activity
+
+        self._snapshot(engine, [_listed(3, "alice/c")], age_hours=48)
+        result = await resolve_portfolio_repos_activity("token", "alice", [3], 24)
+        assert result["fetched"] == 1
+        gh.get_repo_metadata.assert_called_once_with(3)
+
+    @pytest.mark.asyncio
+    async def test_no_selection_lists_once_and_snapshots(self, engine, gh):
+        from app.temporal.activities.portfolio import resolve_portfolio_repos_activity
+
+        first = await resolve_portfolio_repos_activity("token", "alice", None)
+        second = await resolve_portfolio_repos_activity("token", "alice", None)
+        assert [repo["id"] for repo in first["repos"]] == [1, 2]
+        assert second == {"repos": first["repos"], "from_snapshot": 2, "fetched": 0}
+        gh.list_user_repos_as_dicts.assert_called_once()
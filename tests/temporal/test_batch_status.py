@@ -0,0 +1,193 @@
+"""BatchGardeningWorkflow.get_status cursors and aggregates, and the run loop.
+
+The query handler is plain Python, so it's exercised on a bare workflow
+instance without a Temporal test server. The run loop (sliding window,
+continue-as-new slicing and payload) runs the same way, with the workflow
+APIs patched.
+"""
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.temporal.activities.analysis import failed_health_result
+from app.temporal.workflows import BATCH_RESULTS_RETAINED, BatchGardeningInput, BatchGardeningWorkflow
+
+
+def _result(name: str, score: int) -> dict:
+    return {"repo_name": name, "health_score": score, "issues": [], "last_commit_date": "2026-01-01"}
+
+
+def _batch(*results: dict) -> BatchGardeningWorkflow:
+    wf = BatchGardeningWorkflow()
+    wf._total = len(results)
+    for result in results:
+        wf._record(result)
+        wf._completed += 1
+    return wf
+
+
+class TestBatchStatus:
+    def test_without_cursor_returns_all_retained(self):
+        status = _batch(_result("a", 80), _result("b", 60)).get_status()
+        assert [r["repo_name"] for r in status["results"]] == ["a", "b"]
+        assert (status["results_offset"], status["next_index"]) == (0, 2)
+
+    def test_cursor_returns_only_new_results(self):
+        wf = _batch(_result("a", 80), _result("b", 60))
+        first = wf.get_status(since=0)
+        wf._record(_result("c", 40))
+        delta = wf.get_status(since=first["next_index"])
+        assert [r["repo_name"] for r in delta["results"]] == ["c"]
+        assert (delta["results_offset"], delta["next_index"]) == (2, 3)
+        assert wf.get_status(since=delta["next_index"])["results"] == []
+
+    def test_average_excludes_failures(self):
+        failed = failed_health_result("x", datetime.now(timezone.utc))
+        status = _batch(_result("a", 90), _result("b", 60), failed).get_status(since=3)
+        assert status["average_score"] == 75.0
+        assert status["results"] == []
+
+    def test_average_none_before_any_result(self):
+        assert BatchGardeningWorkflow().get_status()["average_score"] is None
+
+    def test_cursor_behind_retention_starts_at_oldest_kept(self):
+        wf = _batch(*[_result(str(i), 50) for i in range(BATCH_RESULTS_RETAINED + 5)])
+        status = wf.get_status(since=0)
+        assert status["results_offset"] == 5
+        assert len(status["results"]) == BATCH_RESULTS_RETAINED
+        # aggregates still cover the trimmed results
+        assert status["average_score"] == 50.0
+
+    def test_record_trims_to_retention_and_advances_offset(self):
+        wf = _batch(*[_result(str(i), 50) for i in range(BATCH_RESULTS_RETAINED)])
+        assert (len(wf._results), wf._results_offset) == (BATCH_RESULTS_RETAINED, 0)
+
+        wf._record(_result("next", 50))
+        assert len(wf._results) == BATCH_RESULTS_RETAINED
+        assert wf._results_offset == 1
+        assert (wf._results[0]["repo_name"], wf._results[-1]["repo_name"]) == ("1", "next")
+
+
+class TestGardenStatusRoute:
+    @pytest.fixture
+    def handle(self, monkeypatch):
+        handle = MagicMock()
+        handle.query = AsyncMock(return_value={"total": 3, "completed": 1})
+        client_mock = MagicMock(get_workflow_handle=MagicMock(return_value=handle))
+
+        async def fake_get_temporal():
+            return client_mock
+
+        monkeypatch.setattr("app.api.routes.garden.get_temporal_client", fake_get_temporal)
+        return handle
+
+    def test_since_forwarded_to_query(self, handle):
+        r = TestClient(app).get(
+            "/api/garden/status/wf-1", params={"since": 7},
+            headers={"Authorization": "Bearer t"},
+        )
+        assert r.status_code == 200
+        assert handle.query.call_args.args == (BatchGardeningWorkflow.get_status, 7)
+
+    def test_no_cursor_keeps_argless_query(self, handle):
+        TestClient(app).get("/api/garden/status/wf-1", headers={"Authorization": "Bearer t"})
+        assert handle.query.call_args.args == (BatchGardeningWorkflow.get_status,)
+
+
+class _ContinuedAsNew(BaseException):
+    """Stands in for the ContinueAsNewError the real call raises."""
+
+
+@pytest.mark.asyncio
+class TestBatchRun:
+    REPOS = [f"o/r{i}" for i in range(7)]
+
+    async def _run(self, input: BatchGardeningInput, child_delay: int = 0, execute_activity=None):
+        """Run with every child scoring 70; returns (outcome, children started, peak in flight, publish)."""
+        started: list[str] = []
+        in_flight = peak = 0
+
+        async def execute_child_workflow(_run, child_input, **kwargs):
+            nonlocal in_flight, peak
+            started.append(child_input.repo_full_name)
+            in_flight += 1
+            peak = max(peak, in_flight)
+            for _ in range(child_delay):
+                await asyncio.sleep(0)
+            in_flight -= 1
+            return _result(child_input.repo_full_name, 70)
+
+        publish = AsyncMock()
+        wf = BatchGardeningWorkflow()
+        with patch("app.temporal.workflows.workflow.execute_child_workflow", side_effect=execute_child_workflow), \
+                patch("app.temporal.workflows.workflow.execute_activity", side_effect=execute_activity), \
+                patch("app.temporal.workflows.workflow.continue_as_new", side_effect=_ContinuedAsNew) as can, \
+                patch("app.temporal.workflows.workflow.uuid4", return_value="u"), \
+                patch("app.temporal.workflows.workflow.now", return_value=datetime(2026, 1, 1, tzinfo=timezone.utc)), \
+                patch("app.temporal.workflows.workflow.logger", MagicMock()), \
+                patch("app.temporal.workflows._publish_progress", publish):
+            try:
+                outcome = await wf.run(input)
+            except _ContinuedAsNew:
+                (outcome,) = can.call_args.args
+            except Exception as exc:
+                outcome = exc
+        return outcome, started, peak, publish
+
+    async def test_window_bounds_children_in_flight(self):
+        _, started, peak, _ = await self._run(
+            BatchGardeningInput(access_token="t", repo_full_names=self.REPOS, max_concurrent=3),
+            child_delay=5,
+        )
+        assert sorted(started) == sorted(self.REPOS)
+        assert peak == 3
+
+    async def test_run_stops_at_children_per_run_and_continues(self):
+        carried = _result("earlier", 40)
+        next_input, started, _, publish = await self._run(BatchGardeningInput(
+            access_token="t", repo_full_names=self.REPOS, next_index=2, children_per_run=3,
+            completed=2, failed=1, results=[carried], results_offset=1,
+        ))
+        assert started == ["o/r2", "o/r3", "o/r4"]
+        assert isinstance(next_input, BatchGardeningInput)
+        assert next_input.repo_full_names == self.REPOS
+        assert next_input.next_index == 5
+        assert (next_input.completed, next_input.failed) == (5, 1)
+        assert [r["repo_name"] for r in next_input.results] == ["earlier", "o/r2", "o/r3", "o/r4"]
+        assert next_input.results_offset == 1
+        # continuing is not a terminal event
+        assert not [c for c in publish.await_args_list if c.args[0]["kind"] in ("failed", "completed")]
+
+    async def test_continue_as_new_carries_trimmed_results(self):
+        next_input, _, _, _ = await self._run(BatchGardeningInput(
+            access_token="t", repo_full_names=self.REPOS, children_per_run=3,
+            results=[_result(str(i), 50) for i in range(BATCH_RESULTS_RETAINED)], results_offset=10,
+        ))
+        assert len(next_input.results) == BATCH_RESULTS_RETAINED
+        assert next_input.results_offset == 13
+        assert next_input.results[-1]["repo_name"] == "o/r2"
+
+    async def test_last_run_returns_retained_results(self):
+        results, started, _, _ = await self._run(BatchGardeningInput(
+            access_token="t", repo_full_names=self.REPOS, next_index=5, children_per_run=3,
+        ))
+        assert started == ["o/r5", "o/r6"]
+        assert [r["repo_name"] for r in results] == ["o/r5", "o/r6"]
+
+    async def test_failed_selection_closes_progress_feed(self):
+        async def execute_activity(fn, *args, **kwargs):
+            raise RuntimeError("github down")
+
+        outcome, started, _, publish = await self._run(
+            BatchGardeningInput(access_token="t", repo_ids=[1, 2]),
+            execute_activity=execute_activity,
+        )
+        assert isinstance(outcome, RuntimeError)
+        assert started == []
+        (event,) = publish.await_args.args
+        assert event["kind"] == "failed"
+        assert event["errors"] == ["github down"]
@@ -0,0 +1,73 @@
+"""orjson payload converter + compression codec."""
+import os
+
+import pytest
+from temporalio.converter import DataConverter
+
+from app.temporal.converter import CompressionCodec, build_data_converter
+from app.temporal.workflows import JanitorInput
+
+SCAN_RESULT = {
+    "file_tree": [
+        {"name": f"mod{i}.py", "type": "file", "path": f"src/pkg/mod{i}.py"} for i in range(300)
+    ],
+    "tech_stack_files": {"pyproject.toml": "[project]\nname = \"demo\"\n" * 50},
+}
+
+
+def _encoding(payload) -> bytes:
+    return payload.metadata["encoding"]
+
+
+@pytest.mark.asyncio
+class TestDataConverter:
+    async def test_round_trips_dataclass_with_type_hint(self):
+        converter = build_data_converter(codec="zstd", min_bytes=64)
+        value = JanitorInput(
+            repo_full_name="octo/demo", access_token="t", github_repo_id=7,
+            doc_types=["README", "API"],
+        )
+        payloads = await converter.encode([value])
+        assert await converter.decode(payloads, [JanitorInput]) == [value]
+
+    async def test_small_payload_stays_plain_json(self):
+        converter = build_data_converter(codec="zstd", min_bytes=4096)
+        [payload] = await converter.encode([{"status": "analyzing"}])
+        assert _encoding(payload) == b"json/plain"
+        assert payload.data == b'{"status":"analyzing"}'
+
+    @pytest.mark.parametrize("codec", ["zstd", "zlib"])
+    async def test_large_payload_compressed(self, codec):
+        converter = build_data_converter(codec=codec, min_bytes=1024)
+        [stock] = await DataConverter.default.encode([SCAN_RESULT])
+        [payload] = await converter.encode([SCAN_RESULT])
+        assert _encoding(payload) == f"binary/{codec}".encode()
+        assert payload.ByteSize() < stock.ByteSize() / 3
+        assert await converter.decode([payload]) == [SCAN_RESULT]
+
+    async def test_reads_payloads_written_by_stock_converter(self):
+        payloads = await DataConverter.default.encode([SCAN_RESULT, "hello", None])
+        assert await build_data_converter().decode(payloads) == [SCAN_RESULT, "hello", None]
+
+    async def test_same_json_bytes_as_stock_converter(self):
+        value = {"b": [1, 2.5, None], "a": {"z": True, "y": "x"}}
+        [stock] = await DataConverter.default.encode([value])
+        [fast] = await build_data_converter(codec="none").encode([value])
+        assert fast.data == stock.data
+
+    async def test_falls_back_for_values_orjson_rejects(self):
+        converter = build_data_converter(codec="none")
+        payloads = await converter.encode([{"big": 2**70}])
+        assert await converter.decode(payloads) == [{"big": 2**70}]
+
+    async def test_incompressible_payload_left_alone(self):
+        codec = CompressionCodec("zstd", min_bytes=16)
+        converter = build_data_converter(codec="none")
+        [payload] = await converter.encode([os.urandom(4096)])
+        [encoded] = await codec.encode([payload])
+        assert encoded == payload
+
+
+def test_unknown_codec_rejected():
+    with pytest.raises(ValueError, match="lz4"):
+        build_data_converter(codec="lz4")
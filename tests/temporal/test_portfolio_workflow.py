@@ -0,0 +1,87 @@
+"""PortfolioWorkflow scanning: bounded concurrency, card order, failure fallback.
+
+Workflow logic on a bare instance, with the workflow APIs patched; no
+Temporal test server.
+"""
+import asyncio
+import json
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.temporal.activities import (
+    generate_profile_readme_activity,
+    portfolio_card_activity,
+    resolve_portfolio_repos_activity,
+)
+from app.temporal.workflows import PortfolioInput, PortfolioWorkflow
+
+
+REPOS = [
+    {"full_name": f"alice/r{i}", "name": f"r{i}", "html_url": f"https://github.com/alice/r{i}"}
+    for i in range(7)
+]
+
+
+@pytest.mark.asyncio
+class TestPortfolioScanning:
+    async def _run(self, max_concurrent_scans: int, failing: tuple[str, ...] = ()):
+        """Run over REPOS; returns (result, cards passed to generation, peak scans in flight)."""
+        in_flight = peak = 0
+        generated_from: list[dict] = []
+
+        async def execute_activity(fn, *args, **kwargs):
+            nonlocal in_flight, peak
+            if fn is resolve_portfolio_repos_activity:
+                return {"repos": REPOS}
+            if fn is generate_profile_readme_activity:
+                generated_from.extend(json.loads(kwargs["args"][0]))
+                return "# alice"
+            assert fn is portfolio_card_activity
+            full_name = kwargs["args"][0]
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                # Later repos finish first, so input order isn't finish order.
+                for _ in range(len(REPOS) - int(full_name[-1])):
+                    await asyncio.sleep(0)
+                if full_name in failing:
+                    raise RuntimeError("clone failed")
+                return {"full_name": full_name, "readme_content": "scanned"}
+            finally:
+                in_flight -= 1
+
+        wf = PortfolioWorkflow()
+        with patch("app.temporal.workflows.workflow.execute_activity", side_effect=execute_activity), \
+                patch("app.temporal.workflows.workflow.now", return_value=datetime(2026, 1, 1, tzinfo=timezone.utc)), \
+                patch("app.temporal.workflows.workflow.logger", MagicMock()), \
+                patch("app.temporal.workflows._publish_progress", AsyncMock()):
+            result = await wf.run(PortfolioInput(
+                access_token="t", username="alice", repo_ids=[1],
+                max_concurrent_scans=max_concurrent_scans,
+            ))
+        return result, generated_from, peak
+
+    async def test_scans_never_exceed_max_concurrent(self):
+        result, cards, peak = await self._run(max_concurrent_scans=3)
+        assert peak == 3
+        assert result["status"] == "draft_ready"
+        assert len(cards) == len(REPOS)
+
+    async def test_cards_keep_selection_order(self):
+        _, cards, _ = await self._run(max_concurrent_scans=3)
+        assert [c["full_name"] for c in cards] == [r["full_name"] for r in REPOS]
+
+    async def test_failed_scan_falls_back_to_basic_card(self):
+        result, cards, peak = await self._run(max_concurrent_scans=2, failing=("alice/r1", "alice/r4"))
+        assert peak == 2
+        assert [c["full_name"] for c in cards] == [r["full_name"] for r in REPOS]
+        fallback = cards[1]
+        assert (fallback["html_url"], fallback["readme_content"]) == ("https://github.com/alice/r1", "")
+        assert cards[2]["readme_content"] == "scanned"
+        assert result["status"] == "draft_ready"
+        assert result["errors"] == [
+            "Scan failed for alice/r1: clone failed",
+            "Scan failed for alice/r4: clone failed",
+        ]
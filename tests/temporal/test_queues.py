@@ -0,0 +1,55 @@
+"""Per-workload task queues and the worker pools that poll them."""
+import pytest
+
+from app.temporal.queues import (
+    ACTIVITY_POOLS,
+    POOL_QUEUES,
+    POOL_WORKFLOWS,
+    WORKFLOW_QUEUE,
+    parse_pools,
+    pool_activities,
+    queue_for,
+)
+from app.temporal.worker import ACTIVITIES, max_concurrent_activities
+
+
+def test_every_mapped_activity_is_registered():
+    registered = {fn.__name__ for fn in ACTIVITIES}
+    assert set(ACTIVITY_POOLS) - registered <= {"sync_pr_status_activity"}
+
+
+def test_each_activity_is_served_by_its_queue():
+    for fn in ACTIVITIES:
+        serving = [
+            POOL_QUEUES[pool] for pool in POOL_QUEUES if fn in pool_activities(pool, ACTIVITIES)
+        ]
+        assert queue_for(fn) in serving, fn.__name__
+
+
+def test_workload_classes_are_split():
+    by_name = {fn.__name__: fn for fn in ACTIVITIES}
+    queues = {
+        name: queue_for(by_name[name])
+        for name in ("deep_scan_repo", "generate_doc_activity", "analyze_repo_health", "set_repo_status_activity")
+    }
+    assert len(set(queues.values())) == 4
+    assert WORKFLOW_QUEUE not in queues.values()
+    assert queue_for(by_name["say_hello"]) == WORKFLOW_QUEUE
+
+
+def test_workflows_pool_keeps_local_activities():
+    names = {fn.__name__ for fn in pool_activities(POOL_WORKFLOWS, ACTIVITIES)}
+    assert {"set_repo_status_activity", "save_draft_proposal_activity", "publish_progress_activity"} <= names
+    assert "deep_scan_repo" not in names
+
+
+def test_parse_pools():
+    assert parse_pools("") == list(POOL_QUEUES)
+    assert parse_pools(" llm, scan ") == ["llm", "scan"]
+    with pytest.raises(ValueError, match="gpu"):
+        parse_pools("llm,gpu")
+
+
+def test_every_pool_has_a_concurrency_setting():
+    for pool in POOL_QUEUES:
+        assert max_concurrent_activities(pool) > 0
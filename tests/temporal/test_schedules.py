@@ -0,0 +1,156 @@
+"""Per-user re-gardening schedules.
+
+Covers:
+- The schedule starts ScheduledGardeningWorkflow on the configured interval,
+  jittered, skipping overlaps, with the window inside the interval
+- Upsert creates, or updates in place when the schedule already exists
+- Describe / delete map NOT_FOUND to None / False
+- ScheduledGardeningWorkflow defers the rest when a batch fails, but a
+  cancel ends the run as cancelled (workflow logic on a bare instance,
+  with the workflow APIs patched; no Temporal test server)
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from temporalio.client import ScheduleAlreadyRunningError, ScheduleOverlapPolicy
+from temporalio.exceptions import ActivityError, CancelledError
+from temporalio.service import RPCError, RPCStatusCode
+
+from app.core.config import settings
+from app.temporal.schedules import (
+    build_regarden_schedule,
+    delete_regarden_schedule,
+    describe_regarden_schedule,
+    upsert_regarden_schedule,
+)
+from app.temporal.activities import analyze_repo_health_batch, plan_incremental_gardening_activity
+from app.temporal.workflows import ScheduledGardeningInput, ScheduledGardeningWorkflow
+
+
+def _not_found() -> RPCError:
+    return RPCError("not found", RPCStatusCode.NOT_FOUND, b"")
+
+
+class TestBuildSchedule:
+    def test_interval_jitter_and_window(self, monkeypatch):
+        monkeypatch.setattr(settings, "REGARDEN_INTERVAL_HOURS", 4)
+        schedule = build_regarden_schedule("tok", "alice")
+
+        (interval,) = schedule.spec.intervals
+        assert interval.every == timedelta(hours=4)
+        assert schedule.spec.jitter == timedelta(hours=2)
+        assert schedule.policy.overlap == ScheduleOverlapPolicy.SKIP
+
+        (workflow_input,) = schedule.action.args
+        assert isinstance(workflow_input, ScheduledGardeningInput)
+        assert workflow_input.username == "alice"
+        # jitter + window never exceed the interval
+        assert timedelta(seconds=workflow_input.window_seconds) + schedule.spec.jitter <= interval.every
+        assert schedule.action.id == "regarden-alice"
+
+
+@pytest.mark.asyncio
+class TestScheduleLifecycle:
+    async def test_upsert_creates(self):
+        client = MagicMock(create_schedule=AsyncMock())
+        assert await upsert_regarden_schedule(client, "tok", "alice") == "regarden-alice"
+        client.create_schedule.assert_awaited_once()
+        client.get_schedule_handle.assert_not_called()
+
+    async def test_upsert_updates_existing(self):
+        client = MagicMock(create_schedule=AsyncMock(side_effect=ScheduleAlreadyRunningError()))
+        handle = client.get_schedule_handle.return_value
+        handle.update = AsyncMock()
+        await upsert_regarden_schedule(client, "new-tok", "alice")
+
+        client.get_schedule_handle.assert_called_once_with("regarden-alice")
+        updater = handle.update.call_args.args[0]
+        (workflow_input,) = updater(None).schedule.action.args
+        assert workflow_input.access_token == "new-tok"
+
+    async def test_describe(self):
+        started = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        client = MagicMock()
+        client.get_schedule_handle.return_value.describe = AsyncMock(return_value=SimpleNamespace(
+            id="regarden-alice",
+            schedule=SimpleNamespace(state=SimpleNamespace(paused=False)),
+            info=SimpleNamespace(
+                next_action_times=[started + timedelta(hours=6)],
+                recent_actions=[SimpleNamespace(
+                    started_at=started, action=SimpleNamespace(workflow_id="regarden-alice-1"),
+                )],
+            ),
+        ))
+        described = await describe_regarden_schedule(client, "alice")
+        assert described["next_action_times"] == ["2026-01-01T06:00:00+00:00"]
+        assert described["recent_runs"][0]["workflow_id"] == "regarden-alice-1"
+
+    async def test_missing_schedule(self):
+        client = MagicMock()
+        handle = client.get_schedule_handle.return_value
+        handle.describe = AsyncMock(side_effect=_not_found())
+        handle.delete = AsyncMock(side_effect=_not_found())
+        assert await describe_regarden_schedule(client, "alice") is None
+        assert await delete_regarden_schedule(client, "alice") is False
+
+
+def _activity_error(cause: BaseException) -> ActivityError:
+    err = ActivityError(
+        "activity failed", scheduled_event_id=1, started_event_id=2, identity="w",
+        activity_type="analyze_repo_health_batch", activity_id="1", retry_state=None,
+    )
+    err.__cause__ = cause
+    return err
+
+
+@pytest.mark.asyncio
+class TestScheduledGardeningWorkflow:
+    STALE = ["o/a", "o/b", "o/c", "o/d"]
+
+    async def _run(self, batch_outcomes: list) -> tuple[object, AsyncMock]:
+        """Run with batches of 2; each batch call pops its outcome."""
+        outcomes = list(batch_outcomes)
+
+        async def execute_activity(fn, *args, **kwargs):
+            if fn is plan_incremental_gardening_activity:
+                return {"stale": self.STALE, "deferred": 0}
+            assert fn is analyze_repo_health_batch
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, BaseException):
+                raise outcome
+            return [{"repo_name": name, "health_score": 80} for name in kwargs["args"][0]]
+
+        publish = AsyncMock()
+        wf = ScheduledGardeningWorkflow()
+        with patch("app.temporal.workflows.workflow.execute_activity", side_effect=execute_activity), \
+                patch("app.temporal.workflows.workflow.sleep", AsyncMock()), \
+                patch("app.temporal.workflows.workflow.now", return_value=datetime(2026, 1, 1, tzinfo=timezone.utc)), \
+                patch("app.temporal.workflows.workflow.logger", MagicMock()), \
+                patch("app.temporal.workflows._publish_progress", publish):
+            try:
+                result = await wf.run(ScheduledGardeningInput(
+                    access_token="t", username="alice", batch_size=2,
+                ))
+            except BaseException as exc:
+                result = exc
+        return result, publish
+
+    async def test_failed_batch_defers_the_rest(self):
+        result, publish = await self._run([None, RuntimeError("rate limited")])
+        assert result == {"planned": 4, "deferred": 2, "analysed": 2, "failed": 0}
+        publish.assert_not_awaited()
+
+    async def test_cancelled_batch_ends_run_as_cancelled(self):
+        result, publish = await self._run([None, _activity_error(CancelledError("cancelled"))])
+        assert isinstance(result, ActivityError)
+        (event,) = publish.await_args.args
+        assert event["kind"] == "cancelled"
+        assert (event["analysed"], event["deferred"]) == (2, 0)
+
+    async def test_task_cancel_ends_run_as_cancelled(self):
+        result, publish = await self._run([asyncio.CancelledError()])
+        assert isinstance(result, asyncio.CancelledError)
+        assert publish.await_args.args[0]["kind"] == "cancelled"
@@ -0,0 +1,103 @@
+"""Multi-process worker supervisor: process planning, restart, shutdown, health.
+
+Children are small ``python -c`` scripts standing in for the worker.
+"""
+import asyncio
+import sys
+
+import pytest
+
+from app.temporal.queues import POOL_QUEUES
+from app.temporal.supervisor import Supervisor, parse_process_pools, plan_processes
+
+ALL_POOLS = ",".join(POOL_QUEUES)
+
+
+def _script(code: str):
+    return lambda pools: [sys.executable, "-c", code]
+
+
+class TestPlanProcesses:
+    def test_process_pools_spec(self):
+        assert parse_process_pools("workflows, db; llm*2 ;scan") == ["workflows,db", "llm", "llm", "scan"]
+
+    def test_all_keyword(self):
+        assert parse_process_pools("all*2") == [ALL_POOLS, ALL_POOLS]
+
+    def test_unknown_pool_or_count(self):
+        with pytest.raises(ValueError):
+            parse_process_pools("gpu")
+        with pytest.raises(ValueError):
+            parse_process_pools("llm*0")
+
+    def test_defaults_to_one_process_per_core(self, monkeypatch):
+        monkeypatch.setattr("app.temporal.supervisor.os.cpu_count", lambda: 3)
+        assert plan_processes(0, "", "") == [ALL_POOLS] * 3
+        assert plan_processes(2, "llm", "") == ["llm", "llm"]
+        assert plan_processes(8, "", "scan*2") == ["scan", "scan"]
+
+
+@pytest.mark.asyncio
+class TestSupervisor:
+    async def test_restarts_crashed_worker(self):
+        supervisor = Supervisor(["llm"], command=_script("raise SystemExit(3)"), backoff_base_s=0.01)
+        supervisor.start()
+        for _ in range(200):
+            if supervisor.health()["processes"][0]["restarts"] >= 2:
+                break
+            await asyncio.sleep(0.02)
+        report = supervisor.health()["processes"][0]
+        assert report["restarts"] >= 2
+        assert report["last_exit_code"] == 3
+        await supervisor.shutdown()
+
+    async def test_shutdown_forwards_sigterm(self):
+        # Exits 0 on SIGTERM, like a draining worker.
+        code = (
+            "import signal, sys, time\n"
+            "signal.signal(signal.SIGTERM, lambda *a: sys.exit(0))\n"
+            "time.sleep(30)\n"
+        )
+        supervisor = Supervisor(["llm", "scan"], command=_script(code), shutdown_grace_s=5)
+        supervisor.start()
+        await _until_alive(supervisor, 2)
+        await asyncio.sleep(0.5)  # let the children install their handlers
+        assert supervisor.health()["status"] == "ok"
+        await supervisor.shutdown()
+        report = supervisor.health()
+        assert report["status"] == "stopping"
+        assert [p["last_exit_code"] for p in report["processes"]] == [0, 0]
+        assert all(p["restarts"] == 0 for p in report["processes"])
+
+    async def test_kills_worker_that_ignores_sigterm(self):
+        code = "import signal, time\nsignal.signal(signal.SIGTERM, signal.SIG_IGN)\ntime.sleep(30)\n"
+        supervisor = Supervisor(["llm"], command=_script(code), shutdown_grace_s=0.2)
+        supervisor.start()
+        await _until_alive(supervisor, 1)
+        await asyncio.sleep(0.5)  # let the child install its handler
+        await supervisor.shutdown()
+        assert supervisor.health()["processes"][0]["last_exit_code"] == -9
+
+    async def test_health_endpoint(self):
+        supervisor = Supervisor(["llm"], command=_script("import time; time.sleep(30)"), shutdown_grace_s=5)
+        supervisor.start()
+        await _until_alive(supervisor, 1)
+        server = await supervisor.serve_health(0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET / HTTP/1.1\r\nHost: x\r\n\r\n")
+        response = (await reader.read()).decode()
+        writer.close()
+        server.close()
+        await supervisor.shutdown()
+        assert response.startswith("HTTP/1.1 200 OK")
+        assert '"status": "ok"' in response
+        assert '"pools": "llm"' in response
+
+
+async def _until_alive(supervisor: Supervisor, count: int) -> None:
+    for _ in range(200):
+        if supervisor.health()["alive"] == count:
+            return
+        await asyncio.sleep(0.02)
+    raise AssertionError("workers did not start")
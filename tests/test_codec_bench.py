@@ -0,0 +1,25 @@
+"""Payload codec benchmark helpers (runs without a Temporal server)."""
+import pytest
+
+from bench.codec_bench import CONFIGS, measure, scan_payloads
+
+
+def test_scan_payloads_use_deep_scan_shape(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "main.py").write_text("print('hi')\n")
+    (tmp_path / "requirements.txt").write_text("fastapi\n")
+    (tmp_path / "README.md").write_text("# Demo\n")
+    payloads = scan_payloads(tmp_path)
+    scan = payloads[f"{tmp_path.name}:scan_result"]
+    assert scan["file_tree"][0]["path"] == "src"
+    assert scan["tech_stack_files"]["requirements.txt"] == "fastapi"
+    assert "README.md" in payloads[f"{tmp_path.name}:draft"]
+
+
+@pytest.mark.asyncio
+async def test_measure_covers_every_config():
+    value = {"file_tree": [{"name": f"f{i}.py", "type": "file", "path": f"f{i}.py"} for i in range(500)]}
+    results = await measure("tree", value, repeat=1)
+    assert [r.config for r in results] == list(CONFIGS)
+    assert results[0].ratio == 1.0
+    assert results[-1].bytes < results[0].bytes
@@ -0,0 +1,103 @@
+"""Memoised repo-context rendering across the calls of one Janitor run.
+
+Covers:
+- analyze + every generate_doc call for the same scan pack the context once
+- A changed scan (content hash) or a different model re-renders
+- The big context block is tokenised once, not once per pre-flight
+- scan_fingerprint is order-insensitive for config files
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services import llm_service
+
+TREE = [
+    {"name": "src", "type": "dir", "path": "src", "children": [
+        {"name": f"mod{i}.py", "type": "file", "path": f"src/mod{i}.py"} for i in range(300)
+    ]},
+]
+FILES = {"requirements.txt": "\n".join(f"pkg{i}==1.0" for i in range(200))}
+
+
+class _CountingEncoding:
+    def __init__(self) -> None:
+        self.encoded: list[str] = []
+
+    def encode_ordinary(self, text: str) -> list[int]:
+        self.encoded.append(text)
+        return [0] * len(text.split())
+
+
+@pytest.fixture
+def encoding(monkeypatch):
+    enc = _CountingEncoding()
+    monkeypatch.setattr(llm_service, "_get_encoding", lambda model: enc)
+    monkeypatch.setattr(llm_service, "_context_cache", type(llm_service._context_cache)())
+    monkeypatch.setattr(llm_service, "_token_memo", type(llm_service._token_memo)())
+    monkeypatch.setattr(settings, "LLM_ANALYZE_CASCADE", "")
+    return enc
+
+
+@pytest.fixture
+def pack_calls(monkeypatch):
+    calls: list[str] = []
+    real = llm_service.pack_repo_context
+
+    def counting_pack(*args, **kwargs):
+        calls.append("pack")
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(llm_service, "pack_repo_context", counting_pack)
+    return calls
+
+
+@pytest.fixture
+def fake_chat(monkeypatch):
+    summary = llm_service.CodebaseSummary(
+        project_name="x", description="d", tech_stack=[], key_features=[],
+        architecture_patterns=[], build_system="pip", entry_points=[],
+        has_tests=False, has_ci=False, has_docker=False,
+    ).model_dump_json()
+
+    class FakeChat:
+        async def ainvoke(self, messages, **kwargs):
+            return SimpleNamespace(content=summary, usage_metadata=None)
+
+    monkeypatch.setattr(llm_service, "_get_chat_model", lambda model=None: FakeChat())
+    return summary
+
+
+@pytest.mark.asyncio
+class TestRenderedContextCache:
+    async def test_janitor_run_packs_once(self, encoding, pack_calls, fake_chat):
+        summary = await llm_service.analyze_codebase("alice/proj", "desc", TREE, FILES)
+        for _ in range(3):
+            await llm_service.generate_doc(summary, "README", "alice/proj", TREE, FILES)
+        assert pack_calls == ["pack"]
+
+    async def test_context_block_tokenised_once(self, encoding, pack_calls, fake_chat):
+        summary = await llm_service.analyze_codebase("alice/proj", "desc", TREE, FILES)
+        await llm_service.generate_doc(summary, "README", "alice/proj", TREE, FILES)
+        context = llm_service._repo_context(settings.LLM_MODEL, "alice/proj", TREE, FILES).text
+        assert encoding.encoded.count(context) == 1
+
+
+class TestCacheKey:
+    def test_changed_scan_rerenders(self, encoding, pack_calls):
+        llm_service._repo_context("gpt-4o-mini", "alice/proj", TREE, FILES)
+        llm_service._repo_context("gpt-4o-mini", "alice/proj", TREE, {**FILES, "Makefile": "all:"})
+        assert len(pack_calls) == 2
+
+    def test_model_is_part_of_key(self, encoding, pack_calls):
+        llm_service._repo_context("gpt-4o-mini", "alice/proj", TREE, FILES)
+        llm_service._repo_context("gpt-4o", "alice/proj", TREE, FILES)
+        llm_service._repo_context("gpt-4o-mini", "alice/proj", TREE, FILES)
+        assert len(pack_calls) == 2
+
+    def test_fingerprint_ignores_dict_order(self):
+        a = llm_service.scan_fingerprint(TREE, {"a": "1", "b": "2"})
+        b = llm_service.scan_fingerprint(TREE, {"b": "2", "a": "1"})
+        assert a == b
+        assert a != llm_service.scan_fingerprint(TREE, {"a": "1"})
@@ -0,0 +1,166 @@
+"""Token-budget context packer.
+
+Covers:
+- Small repos render in full (nothing collapsed, nothing truncated)
+- Deep trees collapse into ``name/ (N files, M dirs)`` summaries under a
+  tight budget, and the packed total never exceeds the budget
+- Vendored dirs (node_modules etc.) are never expanded
+- Long config files are truncated at head AND tail with an omission marker
+- Manifests win over entry points when the budget is tight
+- Each fragment is counted once (incremental counting)
+- llm_service packs oversized repos instead of raising LLMCostExceededError
+"""
+from unittest.mock import patch
+
+import pytest
+
+from app.core.config import settings
+from app.services import llm_service
+from app.services.context_packer import (
+    NO_CONFIG_FILES_TEXT,
+    pack_repo_context,
+    truncate_head_tail,
+)
+
+
+def words(text: str) -> int:
+    """Deterministic stand-in tokenizer: one token per whitespace-separated word."""
+    return len(text.split()) + 1
+
+
+def _file(path: str) -> dict:
+    return {"name": path.rsplit("/", 1)[-1], "type": "file", "path": path}
+
+
+def _dir(path: str, children: list[dict]) -> dict:
+    return {"name": path.rsplit("/", 1)[-1], "type": "dir", "path": path, "children": children}
+
+
+def _deep_tree(depth: int, width: int, prefix: str = "src") -> dict:
+    children = [_file(f"{prefix}/f{i}.py") for i in range(width)]
+    if depth > 0:
+        children.insert(0, _dir(f"{prefix}/sub", [_deep_tree(depth - 1, width, f"{prefix}/sub")]))
+    return _dir(prefix, children)
+
+
+SMALL_TREE = [
+    _dir("src", [_file("src/main.py"), _file("src/util.py")]),
+    _file("README.md"),
+]
+
+
+class TestPackRepoContext:
+    def test_small_repo_is_rendered_in_full(self):
+        packed = pack_repo_context(
+            SMALL_TREE, {"requirements.txt": "fastapi\nuvicorn"}, 1000, words,
+        )
+        assert packed.tree_text == "src/\n  main.py\n  util.py\nREADME.md"
+        assert packed.tech_text == "--- requirements.txt ---\nfastapi\nuvicorn"
+        assert packed.truncated is False
+
+    def test_no_config_files_placeholder(self):
+        packed = pack_repo_context(SMALL_TREE, {}, 1000, words)
+        assert packed.tech_text == NO_CONFIG_FILES_TEXT
+
+    def test_deep_tree_collapses_under_tight_budget(self):
+        tree = [_deep_tree(depth=6, width=30)]
+        packed = pack_repo_context(tree, {}, 80, words)
+        assert packed.truncated is True
+        assert "files," in packed.tree_text and "dirs)" in packed.tree_text
+        assert packed.tokens <= 80
+
+    def test_vendored_dirs_are_never_expanded(self):
+        tree = [
+            _dir("node_modules", [_file("node_modules/left-pad.js")]),
+            _dir("src", [_file("src/app.ts")]),
+        ]
+        packed = pack_repo_context(tree, {}, 1000, words)
+        assert "node_modules/ (1 files, 0 dirs)" in packed.tree_text
+        assert "left-pad.js" not in packed.tree_text
+        assert "  app.ts" in packed.tree_text
+
+    def test_large_directory_lists_first_entries_and_summarises_rest(self):
+        tree = [_dir("src", [_file(f"src/m{i}.py") for i in range(100)])]
+        packed = pack_repo_context(tree, {}, 10_000, words)
+        assert "... (60 more entries)" in packed.tree_text
+
+    def test_manifest_beats_entry_point_when_budget_is_tight(self):
+        files = {
+            "main.py": "\n".join(f"print({i})" for i in range(50)),
+            "package.json": '{"name": "x", "dependencies": {"next": "15"}}',
+        }
+        packed = pack_repo_context([], files, 80, words)
+        assert "--- package.json ---" in packed.tech_text
+        assert packed.tech_text.index("package.json") < packed.tech_text.find("main.py") \
+            or "main.py" not in packed.tech_text
+
+    def test_total_tokens_within_budget_for_big_inputs(self):
+        tree = [_deep_tree(depth=4, width=50, prefix=p) for p in ("src", "lib", "tests")]
+        files = {name: "\n".join(f"line {i} of {name}" for i in range(400))
+                 for name in ("package.json", "pyproject.toml", "Dockerfile")}
+        packed = pack_repo_context(tree, files, 1500, words)
+        assert packed.tokens <= 1500
+        assert words(packed.tree_text) + words(packed.tech_text) <= 1500 + 10
+
+    def test_each_fragment_counted_once(self):
+        seen: list[str] = []
+
+        def counting(text: str) -> int:
+            seen.append(text)
+            return words(text)
+
+        tree = [_deep_tree(depth=3, width=10)]
+        pack_repo_context(tree, {"Makefile": "all:\n\techo hi"}, 5000, counting)
+        assert len(seen) == len(set(seen))
+
+
+class TestTruncateHeadTail:
+    def test_fits_untouched(self):
+        text, tokens, cut = truncate_head_tail("a\nb\nc", 100, words)
+        assert text == "a\nb\nc" and not cut and tokens > 0
+
+    def test_keeps_head_and_tail(self):
+        content = "\n".join(f"line{i}" for i in range(200))
+        text, tokens, cut = truncate_head_tail(content, 60, words)
+        assert cut is True
+        assert text.startswith("line0\n")
+        assert text.endswith("line199")
+        assert "lines omitted] ..." in text
+        assert tokens <= 60
+
+    def test_budget_too_small_for_anything(self):
+        text, tokens, cut = truncate_head_tail("x\n" * 50, 2, words)
+        assert text == "" and tokens == 0 and cut
+
+
+class _WordEncoding:
+    """Offline stand-in for a tiktoken Encoding."""
+
+    def encode_ordinary(self, text: str) -> list[int]:
+        return [0] * len(text.split())
+
+
+@pytest.mark.asyncio
+class TestLLMServicePacking:
+    async def test_oversized_repo_is_packed_not_rejected(self, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_MAX_TOKENS_PER_REQUEST", 600)
+        monkeypatch.setattr(settings, "LLM_TASK_PROMPT_RESERVE_TOKENS", 100)
+        monkeypatch.setattr(llm_service, "_get_encoding", lambda model: _WordEncoding())
+        captured: dict = {}
+
+        async def fake_acompletion(**kwargs):
+            captured.update(kwargs)
+            return type("R", (), {
+                "choices": [type("C", (), {"message": type("M", (), {"content": "# ok"})})],
+                "usage": None,
+            })()
+
+        tree = [_deep_tree(depth=5, width=40)]
+        files = {"package.json": "\n".join(f'"dep{i}": "1.0.{i}",' for i in range(2000))}
+        with patch("app.services.llm_service.acompletion", fake_acompletion):
+            result = await llm_service.generate_deep_readme("big/repo", "desc", tree, files)
+
+        assert result == "# ok"
+        prompt_tokens = llm_service._count_message_tokens(captured["messages"], settings.LLM_MODEL)
+        assert prompt_tokens <= 600
+        assert "lines omitted" in captured["messages"][1]["content"][0]["text"]
@@ -0,0 +1,208 @@
+"""Local doc validation and section-level repair.
+
+Covers:
+- A well-formed README passes; missing sections / diagrams are flagged
+- MERMAID_RULES violations (header, node IDs, labels, subgraph balance)
+- Unclosed fences; headings inside code blocks don't split sections
+- apply_section_repairs replaces only flagged sections, adds missing ones
+- generate_doc sends only the broken section back and splices the fix in
+- Preamble findings are reported but never sent for repair
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services import doc_validator, llm_service
+from app.services.doc_validator import (
+    RULE_MERMAID_SYNTAX,
+    RULE_MISSING_DIAGRAM,
+    RULE_MISSING_SECTION,
+    RULE_UNCLOSED_FENCE,
+    PREAMBLE,
+    apply_section_repairs,
+    check_mermaid,
+    split_sections,
+    validate_doc,
+)
+
+GOOD_DIAGRAM = "```mermaid\ngraph TD\n    API[API Service] --> DB[(Postgres)]\n    API -->|jobs| W1[Worker]\n```"
+
+
+def _readme(architecture: str = GOOD_DIAGRAM, *, features: bool = True) -> str:
+    doc = (
+        "# Proj\n\nOne-liner.\n\n"
+        "## Quick Start\n\n```bash\n# not a heading\nmake run\n```\n\n"
+        f"## Architecture\n\n{architecture}\n\n"
+        "## Tech Stack\n\n- Python\n\n"
+    )
+    if features:
+        doc += "## Key Features\n\n- Fast\n"
+    return doc
+
+
+class TestValidateDoc:
+    def test_good_readme_passes(self):
+        assert validate_doc(_readme(), "README") == []
+
+    def test_missing_section(self):
+        (issue,) = validate_doc(_readme(features=False), "README")
+        assert (issue.rule, issue.section, issue.missing) == (RULE_MISSING_SECTION, "Key Features", True)
+
+    def test_missing_diagram(self):
+        (issue,) = validate_doc(_readme("Just prose."), "README")
+        assert (issue.rule, issue.section) == (RULE_MISSING_DIAGRAM, "Architecture")
+
+    def test_contributing_sections(self):
+        doc = (
+            "# Contributing to Proj\n\nWelcome.\n\n## Development Setup\n\n```bash\nmake\n```\n\n"
+            "## Running Tests\n\n`pytest`\n\n## Pull Requests\n\nOne change per PR.\n"
+        )
+        assert validate_doc(doc, "CONTRIBUTING") == []
+        (issue,) = validate_doc(doc.split("## Pull Requests")[0], "CONTRIBUTING")
+        assert issue.section == "Pull Requests"
+
+    def test_architecture_needs_diagram(self):
+        doc = (
+            "# Architecture\n\nWhat it does.\n\n## Overview\n\nAPI + worker.\n\n"
+            "## System Diagram\n\nTODO\n\n## Components\n\n### api/\n\n## Data Flow\n\nPostgres.\n"
+        )
+        (issue,) = validate_doc(doc, "ARCHITECTURE")
+        assert (issue.rule, issue.section) == (RULE_MISSING_DIAGRAM, "System Diagram")
+
+    def test_every_doc_type_has_prompt_filename_and_rules(self):
+        assert set(llm_service.DOC_TYPE_PROMPTS) == set(llm_service.DOC_TYPE_FILENAMES)
+        assert set(llm_service.DOC_TYPE_PROMPTS) == set(doc_validator.REQUIRED_SECTIONS)
+
+    def test_unknown_doc_type_only_checks_syntax(self):
+        assert validate_doc("no headings at all", "CHANGELOG") == []
+
+    def test_heading_inside_code_block_does_not_split(self):
+        headings = [s.heading for s in split_sections(_readme())]
+        assert "not a heading" not in headings
+        assert "".join(s.text for s in split_sections(_readme())) == _readme()
+
+    def test_unclosed_fence(self):
+        doc = _readme() + "\n## Extra\n\n```bash\nmake\n"
+        assert any(i.rule == RULE_UNCLOSED_FENCE and i.section == "Extra" for i in validate_doc(doc, "README"))
+
+    def test_mermaid_problem_is_attributed_to_its_section(self):
+        bad = "```mermaid\ngraph TD\n    A[User (Client)] --> B\n```"
+        (issue,) = validate_doc(_readme(bad), "README")
+        assert (issue.rule, issue.section) == (RULE_MERMAID_SYNTAX, "Architecture")
+
+
+class TestCheckMermaid:
+    def test_clean_diagram(self):
+        src = "graph TD\n  A((Start)) --> B{Check}\n  B -- yes --> C[Done]\n  subgraph Core\n  C --> D\n  end\n  classDef x fill:#f9f"
+        assert check_mermaid(src) == []
+
+    @pytest.mark.parametrize("src, fragment", [
+        ("graph LR\n  A --> B", "graph TD"),
+        ("graph TD\n  user-service --> B", "alphanumeric"),
+        ("graph TD\n  A[Frontend [web]] --> B", "parentheses or brackets"),
+        ("graph TD\n  subgraph X\n  A --> B", "missing 'end'"),
+        ("graph TD\n  A --> B\n  end", "without a matching"),
+        ("", "empty"),
+    ])
+    def test_rule_violations(self, src, fragment):
+        assert any(fragment in problem for problem in check_mermaid(src))
+
+
+class TestApplySectionRepairs:
+    def test_replaces_only_flagged_section(self):
+        bad = "```mermaid\ngraph TD\n    A[User (Client)] --> B\n```"
+        doc = _readme(bad)
+        issues = validate_doc(doc, "README")
+        fixed = apply_section_repairs(
+            doc, f"## Architecture\n\n{GOOD_DIAGRAM}\n\n## Tech Stack\n\n- hallucinated\n", issues, "README",
+        )
+        assert fixed == _readme()
+
+    def test_appends_missing_and_prepends_title(self):
+        doc = _readme(features=False).split("\n", 3)[3]  # drop the H1 + one-liner
+        issues = validate_doc(doc, "README")
+        assert {i.section for i in issues} == {"Title", "Key Features"}
+        fixed = apply_section_repairs(doc, "# Proj\n\nOne-liner.\n\n## Key Features\n\n- Fast\n", issues, "README")
+        assert fixed.startswith("# Proj\n")
+        assert fixed.rstrip().endswith("- Fast")
+        assert validate_doc(fixed, "README") == []
+
+
+@pytest.mark.asyncio
+class TestGenerateDocRepair:
+    @pytest.fixture(autouse=True)
+    def offline(self, monkeypatch):
+        class _WordEncoding:
+            def encode_ordinary(self, text):
+                return [0] * len(text.split())
+
+        monkeypatch.setattr(llm_service, "_get_encoding", lambda model: _WordEncoding())
+
+    @pytest.fixture
+    def replies(self, monkeypatch):
+        queue: list[str] = []
+        tasks: list[str] = []
+
+        async def fake_ainvoke_chat(messages, model=None, **kwargs):
+            tasks.append(messages[-1]["content"])
+            return SimpleNamespace(content=queue.pop(0))
+
+        monkeypatch.setattr(llm_service, "_ainvoke_chat", fake_ainvoke_chat)
+        return queue, tasks
+
+    async def _generate(self):
+        return await llm_service.generate_doc("{}", "README", "alice/proj", [], {"a.txt": "x"})
+
+    async def test_valid_doc_needs_one_call(self, replies):
+        queue, tasks = replies
+        queue.append(_readme())
+        assert await self._generate() == _readme()
+        assert len(tasks) == 1
+
+    async def test_broken_section_repaired_in_isolation(self, replies):
+        queue, tasks = replies
+        queue.extend([
+            _readme("```mermaid\ngraph TD\n    A[User (Client)] --> B\n```"),
+            f"## Architecture\n\n{GOOD_DIAGRAM}\n",
+        ])
+        assert await self._generate() == _readme()
+        repair_task = tasks[1]
+        assert "### Section: Architecture" in repair_task
+        assert "User (Client)" in repair_task
+        assert "Quick Start" not in repair_task.split("### Section:")[1]
+
+    async def test_gives_up_after_configured_attempts(self, replies, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_DOC_REPAIR_ATTEMPTS", 1)
+        queue, tasks = replies
+        queue.extend([_readme(features=False), "no sections here"])
+        result = await self._generate()
+        assert len(tasks) == 2
+        assert doc_validator.validate_doc(result, "README")
+
+    async def test_preamble_only_issue_skips_repair(self, replies):
+        queue, tasks = replies
+        doc = "```mermaid\ngraph TD\n    A[User (Client)] --> B\n```\n\n" + _readme()
+        queue.append(doc)
+        (issue,) = validate_doc(doc, "README")
+        assert issue.section == PREAMBLE
+        assert await self._generate() == doc
+        assert len(tasks) == 1
+
+    async def test_preamble_issue_not_sent_with_section_repairs(self, replies):
+        queue, tasks = replies
+        queue.extend([
+            "```bash\nmake\n```\n```mermaid\ngraph LR\n```\n\n" + _readme(features=False),
+            "## Key Features\n\n- Fast\n",
+        ])
+        result = await self._generate()
+        assert len(tasks) == 2
+        assert PREAMBLE not in tasks[1]
+        assert "## Key Features" in result
+
+    async def test_repair_disabled(self, replies, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_DOC_REPAIR_ATTEMPTS", 0)
+        queue, tasks = replies
+        queue.append(_readme(features=False))
+        await self._generate()
+        assert len(tasks) == 1
@@ -93,6 +93,8 @@ class TestPublicSurface:
         fake_repo = MagicMock(
             id=123, full_name="alice/r", private=False,
             html_url="https://github.com/alice/r", description="d",
+            fork=False, stargazers_count=7, language="Python",
+            pushed_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
         )
         fake_repo.name = "r"
         gh.get_user.return_value.get_repos.return_value = [fake_repo]
@@ -100,9 +102,38 @@ class TestPublicSurface:
         assert out == [{
             "id": 123, "name": "r", "full_name": "alice/r",
             "private": False, "html_url": "https://github.com/alice/r",
-            "description": "d",
+            "description": "d", "fork": False, "stargazers_count": 7,
+            "language": "Python", "pushed_at": "2026-01-01T00:00:00+00:00",
         }]
 
+    def test_get_repo_metadata(self):
+        client, gh = _patched_client(remaining=4500)
+        fake = MagicMock(
+            id=42, full_name="alice/r", private=True, html_url="u", description=None,
+            fork=True, stargazers_count=0, language=None, pushed_at=None,
+        )
+        fake.name = "r"
+        gh.get_repo.return_value = fake
+        out = client.get_repo_metadata(42)
+        gh.get_repo.assert_called_once_with(42)
+        assert (out["id"], out["fork"], out["pushed_at"]) == (42, True, None)
+
+    def test_list_user_repo_pushes(self):
+        client, gh = _patched_client(remaining=4500)
+        pushed = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        gh.get_user.return_value.get_repos.return_value = [
+            MagicMock(id=1, full_name="alice/r", pushed_at=pushed),
+        ]
+        assert client.list_user_repo_pushes() == [
+            {"id": 1, "full_name": "alice/r", "pushed_at": pushed},
+        ]
+
+    def test_core_rate_limit(self):
+        client, _ = _patched_client(remaining=321)
+        remaining, reset_at = client.core_rate_limit()
+        assert remaining == 321
+        assert reset_at.tzinfo is not None
+
     def test_get_repo_full_name(self):
         client, gh = _patched_client(remaining=4500)
         gh.get_repo.return_value.full_name = "alice/proj"
@@ -110,12 +141,18 @@ class TestPublicSurface:
 
     def test_get_repo_details(self):
         client, gh = _patched_client(remaining=4500)
-        fake = MagicMock(name="r", full_name="alice/r", description=None)
+        fake = MagicMock(
+            name="r", full_name="alice/r", description=None,
+            pushed_at=datetime(2026, 3, 1, tzinfo=timezone.utc),
+        )
         # MagicMock attribute aliasing — set explicitly because `name` is special
         fake.name = "r"
         gh.get_repo.return_value = fake
         out = client.get_repo_details(42)
-        assert out == {"name": "r", "full_name": "alice/r", "description": ""}
+        assert out == {
+            "name": "r", "full_name": "alice/r", "description": "",
+            "pushed_at": "2026-03-01T00:00:00+00:00",
+        }
 
 
 class TestContextManager:
@@ -7,6 +7,7 @@ Covers:
 - record_idempotency_key roundtrip
 - record is idempotent on duplicate (race safety)
 - get_idempotency_key header parser (empty / too-long / good)
+- derive_workflow_id determinism + scoping
 - End-to-end: POST /api/garden twice with same key spawns ONE workflow
 """
 from datetime import datetime, timedelta, timezone
@@ -34,8 +35,11 @@ def _make_inmem_engine():
     )
     SQLModel.metadata.create_all(engine)
     return engine
+from temporalio.common import WorkflowIDConflictPolicy
+
 from app.services.idempotency import (
     DEDUP_WINDOW,
+    derive_workflow_id,
     fingerprint_token,
     get_idempotency_key,
     lookup_idempotency_key,
@@ -68,6 +72,25 @@ class TestFingerprint:
         assert secret not in fp
 
 
+class TestDeriveWorkflowId:
+    def test_deterministic(self):
+        assert derive_workflow_id("janitor-7", "tok", "2026-03-01", ["README"]) == \
+            derive_workflow_id("janitor-7", "tok", "2026-03-01", ["README"])
+
+    def test_keeps_prefix(self):
+        assert derive_workflow_id("janitor-7", "tok").startswith("janitor-7-")
+
+    def test_scoped_to_token_and_inputs(self):
+        base = derive_workflow_id("janitor-7", "tok", "2026-03-01")
+        assert derive_workflow_id("janitor-7", "other", "2026-03-01") != base
+        assert derive_workflow_id("janitor-7", "tok", "2026-03-02") != base
+        assert derive_workflow_id("analysis-7", "tok", "2026-03-01") != base
+
+    def test_does_not_contain_raw_token(self):
+        secret = "ghp_supersecrettokenvalue"
+        assert secret not in derive_workflow_id("batch-gardening", secret)
+
+
 class TestLookup:
     def test_returns_none_when_no_row(self, session):
         assert lookup_idempotency_key(
@@ -186,14 +209,6 @@ class TestEndToEnd:
 
         monkeypatch.setattr("app.api.routes.garden.get_session", fake_get_session)
         monkeypatch.setattr("app.api.routes.garden.get_temporal_client", fake_get_temporal)
-        # Pre-existing bug: BatchGardeningInput doesn't accept `repo_ids` but
-        # the route passes it. Out of E5 scope — see FINDINGS.md F-009. Mock
-        # the input class to a permissive stand-in for this test.
-        monkeypatch.setattr(
-            "app.api.routes.garden.BatchGardeningInput",
-            lambda **kw: MagicMock(**kw),
-        )
-
         client = TestClient(app)
         headers = {
             "Authorization": "Bearer fake-test-token",
@@ -207,6 +222,8 @@ class TestEndToEnd:
         wf1 = r1.json()["workflow_id"]
         assert wf1.startswith("batch-gardening-")
         assert start_workflow.call_count == 1
+        batch_input = start_workflow.call_args.args[1]
+        assert (batch_input.repo_ids, batch_input.force_refresh) == ([1, 2, 3], False)
 
         # Second call with the SAME key: should return cached workflow_id,
         # NOT call start_workflow again.
@@ -216,10 +233,19 @@ class TestEndToEnd:
         assert r2.json().get("idempotent") is True
         assert start_workflow.call_count == 1  # still 1, not 2
 
-        # Third call with a DIFFERENT key: starts a new workflow.
+        # Third call with a DIFFERENT key misses the DB cache, but the
+        # workflow ID is derived from the same request, so Temporal attaches
+        # it to the running batch rather than starting another.
         headers2 = {**headers, "Idempotency-Key": "user-key-xyz"}
         r3 = client.post("/api/garden", json=body, headers=headers2)
         assert r3.status_code == 200
-        wf3 = r3.json()["workflow_id"]
-        assert wf3 != wf1
+        assert r3.json()["workflow_id"] == wf1
         assert start_workflow.call_count == 2
+        assert start_workflow.call_args.kwargs["id_conflict_policy"] == WorkflowIDConflictPolicy.USE_EXISTING
+
+        # Another selection is another batch.
+        r4 = client.post(
+            "/api/garden", json={"repo_ids": [1, 2]},
+            headers={"Authorization": headers["Authorization"]},
+        )
+        assert r4.json()["workflow_id"] != wf1
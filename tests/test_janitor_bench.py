@@ -0,0 +1,30 @@
+"""Janitor orchestration benchmark helpers.
+
+The benchmark itself needs a Temporal server; these cover the stand-in
+activities (they must match the real activity names and result shapes)
+and the summary maths.
+"""
+import pytest
+from temporalio.testing import ActivityEnvironment
+
+from bench.janitor_bench import stand_in_activities, summarise
+
+
+def test_stand_ins_use_real_activity_names():
+    names = {fn.__temporal_activity_definition.name for fn in stand_in_activities(0, 0)}
+    assert names == {
+        "set_repo_status_activity", "save_draft_proposal_activity",
+        "deep_scan_repo", "analyze_codebase_activity", "generate_doc_activity",
+    }
+
+
+@pytest.mark.asyncio
+async def test_generate_doc_stand_in_shape():
+    generate_doc = stand_in_activities(0, 0)[-1]
+    result = await ActivityEnvironment().run(generate_doc, "{}", "README", "bench/repo", [], {}, "fp")
+    assert result == {"doc_type": "README", "filename": "README.md", "content": "# bench", "error": None}
+
+
+def test_summarise():
+    result = summarise("local", [0.1, 0.2, 0.3, 0.4], [20, 22])
+    assert (result.runs, result.p50_ms, result.history_events) == (4, 300.0, 21.0)
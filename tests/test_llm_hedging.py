@@ -0,0 +1,190 @@
+"""Request hedging for generate_doc / generate_profile_readme.
+
+Covers:
+- No hedge when disabled, under-sampled, or the primary beats the delay
+- A slow primary is hedged; the faster hedge wins and the primary is cancelled
+- A failing hedge doesn't fail a primary that later succeeds
+- Cancelled calls are settled in the spend ledger at prompt cost
+- Hedge rate / win rate metrics
+- The hedge delay tracks primary latencies, cancelled primaries included,
+  so hedging doesn't pull its own trigger quantile down
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services import llm_metrics, llm_service, spend_ledger
+
+MESSAGES = [{"role": "user", "content": "write the profile"}]
+
+
+class _WordEncoding:
+    def encode_ordinary(self, text: str) -> list[int]:
+        return [0] * len(text.split())
+
+
+@pytest.fixture(autouse=True)
+def setup(monkeypatch):
+    monkeypatch.setattr(llm_service, "_get_encoding", lambda model: _WordEncoding())
+    monkeypatch.setattr(settings, "LLM_HEDGING", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MODEL", "gpt-4o")
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY_S", 0.0)
+    llm_metrics.reset()
+    yield
+    llm_metrics.reset()
+
+
+def _warm(operation: str = "profile", latency_s: float = 0.05) -> None:
+    for _ in range(llm_metrics.MIN_SAMPLES):
+        llm_metrics.record_attempt(operation, settings.LLM_MODEL, llm_metrics.OUTCOME_OK, latency_s)
+
+
+@pytest.fixture
+def models(monkeypatch):
+    """model -> (delay_s, content or exception); records calls + cancellations."""
+    behaviour: dict[str, tuple[float, object]] = {}
+    log: dict[str, list[str]] = {"called": [], "cancelled": []}
+
+    async def fake_ainvoke_chat(messages, model=None, **kwargs):
+        log["called"].append(model)
+        delay, reply = behaviour[model]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            log["cancelled"].append(model)
+            raise
+        if isinstance(reply, Exception):
+            raise reply
+        return SimpleNamespace(content=reply)
+
+    monkeypatch.setattr(llm_service, "_ainvoke_chat", fake_ainvoke_chat)
+    return behaviour, log
+
+
+@pytest.mark.asyncio
+class TestHedgedChat:
+    async def test_no_hedge_without_samples(self, models):
+        behaviour, log = models
+        behaviour[settings.LLM_MODEL] = (0.2, "primary")
+        assert (await llm_service._hedged_chat("profile", MESSAGES)).content == "primary"
+        assert log["called"] == [settings.LLM_MODEL]
+
+    async def test_no_hedge_when_disabled(self, models, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_HEDGING", False)
+        _warm()
+        behaviour, log = models
+        behaviour[settings.LLM_MODEL] = (0.2, "primary")
+        await llm_service._hedged_chat("profile", MESSAGES)
+        assert log["called"] == [settings.LLM_MODEL]
+
+    async def test_fast_primary_is_not_hedged(self, models):
+        _warm(latency_s=0.2)
+        behaviour, log = models
+        behaviour[settings.LLM_MODEL] = (0.0, "primary")
+        await llm_service._hedged_chat("profile", MESSAGES)
+        assert log["called"] == [settings.LLM_MODEL]
+        assert llm_metrics.snapshot()["profile"][settings.LLM_MODEL]["hedge_rate"] == 0.0
+
+    async def test_slow_primary_hedged_and_cancelled(self, models):
+        _warm()
+        behaviour, log = models
+        behaviour[settings.LLM_MODEL] = (5.0, "primary")
+        behaviour["gpt-4o"] = (0.0, "hedge")
+        result = await llm_service._hedged_chat("profile", MESSAGES)
+        assert result.content == "hedge"
+        assert log["called"] == [settings.LLM_MODEL, "gpt-4o"]
+        assert log["cancelled"] == [settings.LLM_MODEL]
+        stats = llm_metrics.snapshot()["profile"][settings.LLM_MODEL]
+        assert (stats["hedge_rate"], stats["hedge_win_rate"]) == (1.0, 1.0)
+
+    async def test_failed_hedge_falls_back_to_primary(self, models):
+        _warm()
+        behaviour, log = models
+        behaviour[settings.LLM_MODEL] = (0.2, "primary")
+        behaviour["gpt-4o"] = (0.0, RuntimeError("budget"))
+        assert (await llm_service._hedged_chat("profile", MESSAGES)).content == "primary"
+        assert llm_metrics.snapshot()["profile"][settings.LLM_MODEL]["hedge_win_rate"] == 0.0
+
+    async def test_both_fail_raises_primary_error(self, models):
+        _warm()
+        behaviour, _ = models
+        behaviour[settings.LLM_MODEL] = (0.1, ValueError("primary down"))
+        behaviour["gpt-4o"] = (0.0, RuntimeError("hedge down"))
+        with pytest.raises(ValueError, match="primary down"):
+            await llm_service._hedged_chat("profile", MESSAGES)
+
+    async def test_profile_readme_goes_through_hedging(self, models):
+        _warm()
+        behaviour, _ = models
+        behaviour[settings.LLM_MODEL] = (5.0, "# slow")
+        behaviour["gpt-4o"] = (0.0, "# fast")
+        result = await llm_service.generate_profile_readme([{"full_name": "a/b"}], "alice")
+        assert result == "# fast"
+
+
+def test_hedge_delay_prefers_primary_samples():
+    # Hedged calls report the winner's latency; the primaries ran longer.
+    _warm(latency_s=0.05)
+    assert llm_service._hedge_delay("profile", settings.LLM_MODEL) == 0.05
+    for _ in range(llm_metrics.MIN_SAMPLES):
+        llm_metrics.record_hedge("profile", settings.LLM_MODEL, hedged=True, primary_latency_s=2.0)
+    assert llm_service._hedge_delay("profile", settings.LLM_MODEL) == 2.0
+
+
+@pytest.mark.asyncio
+class TestHedgeDelaySamples:
+    async def test_cancelled_primary_recorded_as_lower_bound(self, models, monkeypatch):
+        _warm(latency_s=0.05)
+        behaviour, log = models
+        behaviour[settings.LLM_MODEL] = (5.0, "primary")
+        behaviour["gpt-4o"] = (0.0, "hedge")
+        await llm_service._hedged_chat("profile", MESSAGES)
+        assert log["cancelled"] == [settings.LLM_MODEL]
+
+        monkeypatch.setattr(llm_metrics, "MIN_SAMPLES", 1)
+        primary = llm_metrics.latency_quantile("profile", settings.LLM_MODEL, 0.5, primary=True)
+        # ran at least the hedge delay before it was cut short
+        assert 0.05 <= primary < 5.0
+
+    async def test_unhedged_primary_latency_recorded(self, models, monkeypatch):
+        _warm(latency_s=0.2)
+        behaviour, _ = models
+        behaviour[settings.LLM_MODEL] = (0.0, "primary")
+        await llm_service._hedged_chat("profile", MESSAGES)
+
+        monkeypatch.setattr(llm_metrics, "MIN_SAMPLES", 1)
+        assert llm_metrics.latency_quantile("profile", settings.LLM_MODEL, 0.5, primary=True) < 0.2
+
+
+
+@pytest.mark.asyncio
+class TestCancelledSpend:
+    async def test_cancelled_call_settled_at_prompt_cost(self, monkeypatch):
+        events: list[tuple] = []
+
+        class SlowChat:
+            async def ainvoke(self, messages, **kwargs):
+                await asyncio.sleep(5)
+
+        async def fake_reserve(model, estimated_cost):
+            return "reservation"
+
+        async def fake_settle(entry_id, **kwargs):
+            events.append(("settle", entry_id, kwargs["prompt_tokens"], kwargs["completion_tokens"]))
+
+        async def fake_release(entry_id):
+            events.append(("release", entry_id))
+
+        monkeypatch.setattr(llm_service, "_get_chat_model", lambda model=None: SlowChat())
+        monkeypatch.setattr(spend_ledger, "reserve_call", fake_reserve)
+        monkeypatch.setattr(spend_ledger, "settle_call", fake_settle)
+        monkeypatch.setattr(spend_ledger, "release_call", fake_release)
+
+        task = asyncio.create_task(llm_service._ainvoke_chat(MESSAGES))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert events == [("settle", "reservation", 3, 0)]
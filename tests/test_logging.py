@@ -5,6 +5,13 @@ import pytest
 from app.temporal.middleware import temporal_activity_context
 
 
+@pytest.fixture(autouse=True)
+def reset_structlog():
+    """These tests reconfigure structlog globally — restore defaults after each."""
+    yield
+    structlog.reset_defaults()
+
+
 def test_workflow_logs_structured():
     """Capture and parse JSON logs from a test activity."""
     output = StringIO()
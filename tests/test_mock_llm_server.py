@@ -0,0 +1,80 @@
+"""Local mock LLM server used by the llm_service benchmark.
+
+Covers:
+- Non-streaming completions carry usage and respect max_tokens
+- Streaming emits SSE chunks, a usage chunk on request, and [DONE]
+- Rate-limit injection returns 429 with Retry-After
+- Analysis / card prompts get JSON that passes llm_service validation
+"""
+import json
+
+from fastapi.testclient import TestClient
+
+from app.services import llm_service
+from bench.mock_llm_server import MockLLMConfig, create_app
+
+INSTANT = dict(ttft_median_ms=0, tokens_per_second=0, seed=7)
+
+
+def _client(**overrides) -> TestClient:
+    return TestClient(create_app(MockLLMConfig(**{**INSTANT, **overrides})))
+
+
+def _chat(client, messages, **extra):
+    return client.post("/v1/chat/completions", json={"model": "gpt-4o-mini", "messages": messages, **extra})
+
+
+class TestMockLLMServer:
+    def test_completion_reports_usage(self):
+        client = _client(completion_tokens=50)
+        resp = _chat(client, [{"role": "user", "content": "write a readme " * 20}])
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["choices"][0]["message"]["content"].startswith("# Mock Project")
+        assert body["usage"]["prompt_tokens"] > 0
+        assert body["usage"]["total_tokens"] == (
+            body["usage"]["prompt_tokens"] + body["usage"]["completion_tokens"]
+        )
+
+    def test_max_tokens_caps_output(self):
+        client = _client(completion_tokens=500)
+        short = _chat(client, [{"role": "user", "content": "hi"}], max_tokens=20).json()
+        long = _chat(client, [{"role": "user", "content": "hi"}]).json()
+        assert short["usage"]["completion_tokens"] < long["usage"]["completion_tokens"]
+
+    def test_streaming(self):
+        client = _client(completion_tokens=40)
+        resp = _chat(
+            client, [{"role": "user", "content": "hi"}],
+            stream=True, stream_options={"include_usage": True},
+        )
+        events = [line[len("data: "):] for line in resp.text.splitlines() if line.startswith("data: ")]
+        assert events[-1] == "[DONE]"
+        chunks = [json.loads(e) for e in events[:-1]]
+        text = "".join(c["choices"][0]["delta"].get("content", "") for c in chunks if c["choices"])
+        assert text.startswith("# Mock Project")
+        assert chunks[-1]["usage"]["completion_tokens"] > 0
+
+    def test_rate_limit_injection(self):
+        client = _client(rate_limit_prob=1.0, retry_after_s=3)
+        resp = _chat(client, [{"role": "user", "content": "hi"}])
+        assert resp.status_code == 429
+        assert resp.headers["retry-after"] == "3"
+        assert client.get("/mock/stats").json()["rate_limited"] == 1
+
+    def test_analysis_prompt_gets_valid_summary(self):
+        client = _client()
+        messages = [{"role": "user", "content": llm_service.ANALYZE_SYSTEM_PROMPT}]
+        content = _chat(client, messages).json()["choices"][0]["message"]["content"]
+        assert llm_service.parse_codebase_summary(content).project_name == "mock-project"
+
+    def test_card_prompt_gets_card_json(self):
+        client = _client()
+        messages = [{"role": "system", "content": llm_service.PORTFOLIO_CARD_SYSTEM_PROMPT}]
+        content = _chat(client, messages).json()["choices"][0]["message"]["content"]
+        llm_service.PortfolioCardSummary.model_validate_json(content)
+
+    def test_unprefixed_route(self):
+        client = _client()
+        resp = client.post("/chat/completions", json={"model": "m", "messages": []})
+        assert resp.status_code == 200
@@ -0,0 +1,186 @@
+"""Validation-driven model cascade for analyze_codebase.
+
+Covers:
+- Valid JSON from the cheap tier is returned without calling the big tier
+- Parse and schema failures escalate to the next tier
+- Exhausting every tier raises SummaryValidationError
+- Provider errors propagate without escalating
+- ```json fences are tolerated; output is re-serialised canonical JSON
+- Per-tier outcome + latency metrics are recorded
+- The summary JSON schema is sent as a strict response_format
+"""
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services import llm_metrics, llm_service
+
+TREE = [{"name": "main.py", "type": "file", "path": "main.py"}]
+FILES = {"requirements.txt": "fastapi"}
+
+VALID = {
+    "project_name": "proj",
+    "description": "A thing.",
+    "tech_stack": ["Python"],
+    "key_features": ["fast"],
+    "architecture_patterns": ["monolith"],
+    "build_system": "pip",
+    "entry_points": ["main.py"],
+    "has_tests": True,
+    "has_ci": False,
+    "has_docker": False,
+}
+
+
+class _WordEncoding:
+    def encode_ordinary(self, text: str) -> list[int]:
+        return [0] * len(text.split())
+
+
+@pytest.fixture(autouse=True)
+def setup(monkeypatch):
+    monkeypatch.setattr(llm_service, "_get_encoding", lambda model: _WordEncoding())
+    monkeypatch.setattr(settings, "LLM_ANALYZE_CASCADE", "gpt-4o-mini, gpt-4o")
+    llm_metrics.reset()
+    yield
+    llm_metrics.reset()
+
+
+@pytest.fixture
+def replies(monkeypatch):
+    """Map model -> response content (or exception); records models called."""
+    by_model: dict[str, object] = {}
+    called: list[str] = []
+
+    async def fake_ainvoke_chat(messages, model=None, **kwargs):
+        called.append(model)
+        reply = by_model[model]
+        if isinstance(reply, Exception):
+            raise reply
+        return SimpleNamespace(content=reply)
+
+    monkeypatch.setattr(llm_service, "_ainvoke_chat", fake_ainvoke_chat)
+    return by_model, called
+
+
+async def _analyze():
+    return await llm_service.analyze_codebase("alice/proj", "desc", TREE, FILES)
+
+
+@pytest.mark.asyncio
+class TestCascade:
+    async def test_cheap_tier_success_skips_escalation(self, replies):
+        by_model, called = replies
+        by_model["gpt-4o-mini"] = json.dumps(VALID)
+        result = await _analyze()
+        assert json.loads(result) == VALID
+        assert called == ["gpt-4o-mini"]
+
+    async def test_unparseable_json_escalates(self, replies):
+        by_model, called = replies
+        by_model["gpt-4o-mini"] = "Sure! Here is the analysis: {project_name: proj"
+        by_model["gpt-4o"] = json.dumps(VALID)
+        assert json.loads(await _analyze()) == VALID
+        assert called == ["gpt-4o-mini", "gpt-4o"]
+
+    async def test_schema_violation_escalates(self, replies):
+        by_model, called = replies
+        by_model["gpt-4o-mini"] = json.dumps({**VALID, "tech_stack": "Python"})
+        by_model["gpt-4o"] = json.dumps(VALID)
+        await _analyze()
+        assert called == ["gpt-4o-mini", "gpt-4o"]
+
+    async def test_all_tiers_invalid_raises(self, replies):
+        by_model, _ = replies
+        by_model["gpt-4o-mini"] = "nope"
+        by_model["gpt-4o"] = json.dumps({"project_name": "proj"})
+        with pytest.raises(llm_service.SummaryValidationError) as exc_info:
+            await _analyze()
+        assert [outcome for _, outcome, _ in exc_info.value.attempts] == [
+            llm_metrics.OUTCOME_PARSE_ERROR, llm_metrics.OUTCOME_VALIDATION_ERROR,
+        ]
+
+    async def test_provider_error_does_not_escalate(self, replies):
+        by_model, called = replies
+        by_model["gpt-4o-mini"] = RuntimeError("503")
+        with pytest.raises(RuntimeError):
+            await _analyze()
+        assert called == ["gpt-4o-mini"]
+
+    async def test_fenced_json_accepted_and_canonicalised(self, replies):
+        by_model, called = replies
+        by_model["gpt-4o-mini"] = "```json\n" + json.dumps({**VALID, "extra": 1}) + "\n```"
+        result = await _analyze()
+        assert json.loads(result) == VALID
+        assert called == ["gpt-4o-mini"]
+
+    async def test_default_single_tier_uses_llm_model(self, replies, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_ANALYZE_CASCADE", "")
+        by_model, called = replies
+        by_model[settings.LLM_MODEL] = json.dumps(VALID)
+        await _analyze()
+        assert called == [settings.LLM_MODEL]
+
+    async def test_per_tier_metrics(self, replies):
+        by_model, _ = replies
+        by_model["gpt-4o-mini"] = "nope"
+        by_model["gpt-4o"] = json.dumps(VALID)
+        await _analyze()
+        stats = llm_metrics.snapshot()["analyze"]
+        assert stats["gpt-4o-mini"]["outcomes"] == {llm_metrics.OUTCOME_PARSE_ERROR: 1}
+        assert stats["gpt-4o-mini"]["success_rate"] == 0.0
+        assert stats["gpt-4o"]["success_rate"] == 1.0
+        assert stats["gpt-4o"]["p90_ms"] is not None
+
+
+@pytest.mark.asyncio
+class TestStructuredOutput:
+    @pytest.fixture
+    def sent_kwargs(self, monkeypatch):
+        sent: list[dict] = []
+
+        async def fake_ainvoke_chat(messages, model=None, **kwargs):
+            sent.append(kwargs)
+            return SimpleNamespace(content=json.dumps(VALID))
+
+        monkeypatch.setattr(llm_service, "_ainvoke_chat", fake_ainvoke_chat)
+        return sent
+
+    async def test_schema_sent_as_response_format(self, sent_kwargs):
+        await _analyze()
+        fmt = sent_kwargs[0]["response_format"]
+        assert fmt["type"] == "json_schema"
+        assert fmt["json_schema"]["strict"] is True
+        schema = fmt["json_schema"]["schema"]
+        assert schema["additionalProperties"] is False
+        assert set(schema["required"]) == set(VALID)
+
+    async def test_can_be_disabled(self, sent_kwargs, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_STRUCTURED_OUTPUT", False)
+        await _analyze()
+        assert sent_kwargs == [{}]
+
+    async def test_forwarded_to_langchain_request(self, monkeypatch):
+        seen = {}
+
+        class FakeChat:
+            async def ainvoke(self, messages, **kwargs):
+                seen.update(kwargs)
+                return SimpleNamespace(content=json.dumps(VALID), usage_metadata=None)
+
+        monkeypatch.setattr(llm_service, "_get_chat_model", lambda model=None: FakeChat())
+        await _analyze()
+        assert seen["response_format"]["json_schema"]["name"] == "codebase_summary"
+
+
+class TestLatencyQuantile:
+    def test_undersampled_tier_has_no_quantile(self):
+        llm_metrics.record_attempt("op", "m", llm_metrics.OUTCOME_OK, 0.1)
+        assert llm_metrics.latency_quantile("op", "m", 0.9) is None
+
+    def test_p90(self):
+        for i in range(1, 101):
+            llm_metrics.record_attempt("op", "m", llm_metrics.OUTCOME_OK, i / 100)
+        assert llm_metrics.latency_quantile("op", "m", 0.9) == pytest.approx(0.9, abs=0.011)
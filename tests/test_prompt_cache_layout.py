@@ -0,0 +1,146 @@
+"""Prompt-prefix-cache-friendly layout for repo-aware LLM calls.
+
+Covers:
+- analyze_codebase, generate_doc (incl. section repair) and
+  generate_deep_readme send a byte-identical [system, repo-context] prefix
+  for the same repo
+- The task-specific text only appears after the shared prefix
+- cache_control hints are attached only when routed through LiteLLM
+- A task that overflows the reserve shrinks the context instead of failing
+- Cached prompt tokens are extracted from OpenAI / Anthropic-style usage
+"""
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from app.core.config import settings
+from app.services import llm_service
+
+TREE = [
+    {"name": "src", "type": "dir", "path": "src", "children": [
+        {"name": "main.py", "type": "file", "path": "src/main.py"},
+    ]},
+    {"name": "README.md", "type": "file", "path": "README.md"},
+]
+FILES = {"requirements.txt": "fastapi\nuvicorn", "Dockerfile": "FROM python:3.12"}
+SUMMARY_JSON = llm_service.CodebaseSummary(
+    project_name="x", description="d", tech_stack=[], key_features=[],
+    architecture_patterns=[], build_system="pip", entry_points=[],
+    has_tests=False, has_ci=False, has_docker=True,
+).model_dump_json()
+
+
+class _WordEncoding:
+    def encode_ordinary(self, text: str) -> list[int]:
+        return [0] * len(text.split())
+
+
+@pytest.fixture(autouse=True)
+def offline_tokenizer(monkeypatch):
+    monkeypatch.setattr(llm_service, "_get_encoding", lambda model: _WordEncoding())
+
+
+@pytest.fixture
+def captured_calls(monkeypatch):
+    """Capture the messages of every LangChain + LiteLLM call."""
+    calls: list[list[dict]] = []
+
+    async def fake_ainvoke_chat(messages, model=None, **kwargs):
+        calls.append(messages)
+        return SimpleNamespace(content=SUMMARY_JSON)
+
+    async def fake_acompletion(**kwargs):
+        calls.append(kwargs["messages"])
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="# x"))],
+            usage=None,
+        )
+
+    monkeypatch.setattr(llm_service, "_ainvoke_chat", fake_ainvoke_chat)
+    monkeypatch.setattr(llm_service, "acompletion", fake_acompletion)
+    return calls
+
+
+@pytest.mark.asyncio
+class TestSharedPrefix:
+    async def test_analyze_generate_and_deep_readme_share_prefix(self, monkeypatch, captured_calls):
+        monkeypatch.setattr(settings, "LITELLM_API_BASE", "http://litellm:4000")
+        await llm_service.analyze_codebase("alice/proj", "desc", TREE, FILES)
+        await llm_service.generate_doc('{"a": 1}', "README", "alice/proj", TREE, FILES)
+        await llm_service.generate_deep_readme("alice/proj", "desc", TREE, FILES)
+
+        # The stub doc fails validation, so a section repair call rides the
+        # same prefix too.
+        assert len(captured_calls) == 4
+        prefixes = [msgs[:2] for msgs in captured_calls]
+        assert all(prefix == prefixes[0] for prefix in prefixes)
+        assert prefixes[0][1]["content"][0]["cache_control"] == {"type": "ephemeral"}
+        # Task text differs and lives only in the trailing message
+        tasks = [msgs[2]["content"] for msgs in captured_calls]
+        assert len(set(tasks)) == 4
+        assert "fastapi\nuvicorn" not in "".join(tasks)
+
+    async def test_no_cache_hint_on_langchain_without_litellm(self, monkeypatch, captured_calls):
+        monkeypatch.setattr(settings, "LITELLM_API_BASE", None)
+        await llm_service.analyze_codebase("alice/proj", "desc", TREE, FILES)
+        assert "cache_control" not in captured_calls[0][1]["content"][0]
+
+    async def test_cache_hints_can_be_disabled(self, monkeypatch, captured_calls):
+        monkeypatch.setattr(settings, "LLM_PROMPT_CACHE_HINTS", False)
+        await llm_service.generate_deep_readme("alice/proj", "desc", TREE, FILES)
+        assert "cache_control" not in captured_calls[0][1]["content"][0]
+
+
+class TestTaskOverflow:
+    def test_oversized_task_shrinks_context_to_fit(self, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_MAX_TOKENS_PER_REQUEST", 400)
+        monkeypatch.setattr(settings, "LLM_TASK_PROMPT_RESERVE_TOKENS", 50)
+        big_tree = [{"name": "src", "type": "dir", "path": "src", "children": [
+            {"name": f"m{i}.py", "type": "file", "path": f"src/m{i}.py"} for i in range(300)
+        ]}]
+        task_input = "word " * 200
+        messages = llm_service._repo_messages(
+            "gpt-4o-mini", "alice/proj", big_tree, {}, "Do it.", task_input, cache_hint=False,
+        )
+        assert llm_service._count_message_tokens(messages, "gpt-4o-mini") <= 400
+
+
+class TestCachedTokenExtraction:
+    def test_openai_prompt_tokens_details(self):
+        usage = SimpleNamespace(prompt_tokens_details=SimpleNamespace(cached_tokens=1024))
+        assert llm_service._cached_prompt_tokens(usage) == 1024
+
+    def test_dict_prompt_tokens_details(self):
+        usage = SimpleNamespace(prompt_tokens_details={"cached_tokens": 7})
+        assert llm_service._cached_prompt_tokens(usage) == 7
+
+    def test_anthropic_cache_read(self):
+        usage = SimpleNamespace(prompt_tokens_details=None, cache_read_input_tokens=2048)
+        assert llm_service._cached_prompt_tokens(usage) == 2048
+
+    def test_missing_is_zero(self):
+        assert llm_service._cached_prompt_tokens(SimpleNamespace()) == 0
+
+
+@pytest.mark.asyncio
+class TestAinvokeChat:
+    async def test_logs_cached_tokens_from_usage_metadata(self, monkeypatch):
+        logged: list[tuple] = []
+        response = SimpleNamespace(
+            content="ok",
+            usage_metadata={
+                "input_tokens": 1500, "output_tokens": 200,
+                "input_token_details": {"cache_read": 1200},
+            },
+        )
+
+        class FakeChat:
+            async def ainvoke(self, messages):
+                return response
+
+        monkeypatch.setattr(llm_service, "_get_chat_model", lambda model=None: FakeChat())
+        monkeypatch.setattr(llm_service, "_log_usage", lambda *args: logged.append(args))
+        result = await llm_service._ainvoke_chat([{"role": "user", "content": "hi"}])
+        assert result is response
+        assert logged == [(settings.LLM_MODEL, 1500, 200, 1200)]
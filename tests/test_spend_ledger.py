@@ -0,0 +1,278 @@
+"""LLM spend ledger — reserve-then-settle + rolling budgets.
+
+Covers:
+- reserve/settle/release primitives and what counts toward a budget
+- create_all builds the same indexes as migration 005
+- Per-user rolling 24h budget (old entries and stale reservations drop out)
+- Per-workflow budget
+- llm_service paths (LiteLLM + LangChain) settle actual usage, release on
+  failure, and skip the ledger when nothing is attributed
+- GET /llm/spend + /llm/spend/workflows/{id} scoped to the caller
+"""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.core.config import settings
+from app.db.models import LLMSpendEntry
+from app.main import app
+from app.services import llm_service, spend_ledger
+from app.services.idempotency import fingerprint_token
+from app.services.spend_ledger import (
+    LLMBudgetExceededError,
+    SpendAttribution,
+    attribute_spend,
+)
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+        echo=False,
+    )
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr("app.services.spend_ledger.get_session", lambda: Session(engine))
+    monkeypatch.setattr("app.api.routes.spend.get_session", lambda: Session(engine))
+    return engine
+
+
+@pytest.fixture
+def budgets(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_DAILY_BUDGET_USD", 1.0)
+    monkeypatch.setattr(settings, "LLM_WORKFLOW_BUDGET_USD", 0.5)
+
+
+ALICE = SpendAttribution("fp-alice", "wf-1")
+
+
+def _reserve(session, cost, attribution=ALICE):
+    entry_id = spend_ledger.reserve(
+        session, attribution=attribution, model="gpt-4o-mini", estimated_cost=cost,
+    )
+    session.commit()
+    return entry_id
+
+
+def _settle(session, entry_id, cost):
+    spend_ledger.settle(
+        session, entry_id=entry_id, prompt_tokens=100, completion_tokens=50,
+        cached_tokens=0, cost_usd=cost,
+    )
+    session.commit()
+
+
+class TestPrimitives:
+    def test_indexes_match_migration(self, engine):
+        indexes = {ix["name"]: ix["column_names"] for ix in inspect(engine).get_indexes("llm_spend_ledger")}
+        assert indexes == {
+            "ix_llm_spend_ledger_token_fingerprint_created_at": ["token_fingerprint", "created_at"],
+            "ix_llm_spend_ledger_workflow_id": ["workflow_id"],
+        }
+
+    def test_settle_replaces_reservation_with_actual_cost(self, engine, budgets):
+        with Session(engine) as session:
+            entry_id = _reserve(session, 0.4)
+            _settle(session, entry_id, 0.01)
+            entry = session.get(LLMSpendEntry, entry_id)
+            assert entry.status == "settled"
+            assert entry.cost_usd == 0.01
+            # Settled at actual cost frees the rest of the reservation.
+            _reserve(session, 0.45)
+
+    def test_live_reservations_count_toward_budget(self, engine, budgets):
+        with Session(engine) as session:
+            _reserve(session, 0.3)
+            with pytest.raises(LLMBudgetExceededError) as exc_info:
+                _reserve(session, 0.3)
+            assert exc_info.value.scope == "workflow"
+
+    def test_released_reservation_does_not_count(self, engine, budgets):
+        with Session(engine) as session:
+            entry_id = _reserve(session, 0.4)
+            assert spend_ledger.release(session, entry_id=entry_id)
+            session.commit()
+            _reserve(session, 0.4)
+
+    def test_stale_reservation_expires(self, engine, budgets):
+        with Session(engine) as session:
+            entry_id = _reserve(session, 0.4)
+            entry = session.get(LLMSpendEntry, entry_id)
+            entry.created_at = datetime.now(timezone.utc) - spend_ledger.RESERVATION_TTL * 2
+            session.commit()
+            _reserve(session, 0.4)
+
+
+class TestBudgets:
+    def test_user_budget_spans_workflows(self, engine, budgets):
+        with Session(engine) as session:
+            for i in range(3):
+                wf = SpendAttribution("fp-alice", f"wf-{i}")
+                _settle(session, _reserve(session, 0.3, wf), 0.3)
+            with pytest.raises(LLMBudgetExceededError) as exc_info:
+                _reserve(session, 0.2, SpendAttribution("fp-alice", "wf-9"))
+            assert exc_info.value.scope == "user"
+            # Another user is unaffected.
+            _reserve(session, 0.2, SpendAttribution("fp-bob", "wf-bob"))
+
+    def test_user_budget_is_rolling(self, engine, budgets):
+        with Session(engine) as session:
+            entry_id = _reserve(session, 0.45, SpendAttribution("fp-alice", "wf-old"))
+            _settle(session, entry_id, 0.95)
+            entry = session.get(LLMSpendEntry, entry_id)
+            entry.created_at = datetime.now(timezone.utc) - timedelta(hours=25)
+            session.commit()
+            _reserve(session, 0.4, SpendAttribution("fp-alice", "wf-new"))
+
+    def test_zero_disables_budget(self, engine, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_DAILY_BUDGET_USD", 0.0)
+        monkeypatch.setattr(settings, "LLM_WORKFLOW_BUDGET_USD", 0.0)
+        with Session(engine) as session:
+            for _ in range(5):
+                _reserve(session, 10.0)
+
+
+def _completion(prompt_tokens=120, completion_tokens=30):
+    usage = type("U", (), {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "prompt_tokens_details": None,
+    })()
+    return type("R", (), {
+        "choices": [type("C", (), {"message": type("M", (), {"content": "ok"})})],
+        "usage": usage,
+    })()
+
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+class _WordEncoding:
+    """Offline stand-in for a tiktoken Encoding."""
+
+    def encode_ordinary(self, text: str) -> list[int]:
+        return [0] * len(text.split())
+
+
+@pytest.mark.asyncio
+class TestLLMServiceIntegration:
+    @pytest.fixture(autouse=True)
+    def offline_tokenizer(self, monkeypatch):
+        monkeypatch.setattr(llm_service, "_get_encoding", lambda model: _WordEncoding())
+
+    async def test_acompletion_settles_actual_usage(self, engine, budgets):
+        async def fake_acompletion(**kwargs):
+            return _completion()
+
+        with patch("app.services.llm_service.acompletion", fake_acompletion), \
+                attribute_spend("fp-alice", "wf-1"):
+            await llm_service._safe_acompletion(model=settings.LLM_MODEL, messages=MESSAGES)
+
+        with Session(engine) as session:
+            (entry,) = session.exec(select(LLMSpendEntry)).all()
+        assert entry.status == "settled"
+        assert (entry.prompt_tokens, entry.completion_tokens) == (120, 30)
+        assert entry.cost_usd == pytest.approx(llm_service._estimate_cost(120, 30, settings.LLM_MODEL))
+        assert entry.reserved_cost_usd > entry.cost_usd
+
+    async def test_failed_call_releases_reservation(self, engine, budgets):
+        async def boom(**kwargs):
+            raise RuntimeError("provider down")
+
+        with patch("app.services.llm_service.acompletion", boom), \
+                attribute_spend("fp-alice", "wf-1"):
+            with pytest.raises(RuntimeError):
+                await llm_service._safe_acompletion(model=settings.LLM_MODEL, messages=MESSAGES)
+
+        with Session(engine) as session:
+            (entry,) = session.exec(select(LLMSpendEntry)).all()
+        assert entry.status == "released"
+
+    async def test_budget_exceeded_blocks_provider_call(self, engine, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_DAILY_BUDGET_USD", 1e-9)
+        called = False
+
+        async def fake_acompletion(**kwargs):
+            nonlocal called
+            called = True
+            return _completion()
+
+        with patch("app.services.llm_service.acompletion", fake_acompletion), \
+                attribute_spend("fp-alice", "wf-1"):
+            with pytest.raises(LLMBudgetExceededError):
+                await llm_service._safe_acompletion(model=settings.LLM_MODEL, messages=MESSAGES)
+        assert called is False
+
+    async def test_unattributed_calls_skip_ledger(self, engine, budgets):
+        async def fake_acompletion(**kwargs):
+            return _completion()
+
+        with patch("app.services.llm_service.acompletion", fake_acompletion):
+            await llm_service._safe_acompletion(model=settings.LLM_MODEL, messages=MESSAGES)
+
+        with Session(engine) as session:
+            assert session.exec(select(LLMSpendEntry)).all() == []
+
+    async def test_langchain_path_is_ledgered(self, engine, budgets, monkeypatch):
+        class FakeChat:
+            async def ainvoke(self, messages):
+                return type("AI", (), {
+                    "content": "# Hi",
+                    "usage_metadata": {"input_tokens": 200, "output_tokens": 80},
+                })()
+
+        monkeypatch.setattr(llm_service, "_get_chat_model", lambda model=None: FakeChat())
+        with attribute_spend("fp-alice", "wf-portfolio"):
+            result = await llm_service.generate_profile_readme(
+                [{"full_name": "alice/x", "language": "Python"}], "alice",
+            )
+
+        assert result == "# Hi"
+        with Session(engine) as session:
+            (entry,) = session.exec(select(LLMSpendEntry)).all()
+        assert entry.workflow_id == "wf-portfolio"
+        assert (entry.prompt_tokens, entry.completion_tokens) == (200, 80)
+
+
+class TestSpendRoutes:
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+
+    @pytest.fixture
+    def seeded(self, engine, budgets):
+        fp = fingerprint_token("test-token-xyz")
+        with Session(engine) as session:
+            _settle(session, _reserve(session, 0.1, SpendAttribution(fp, "wf-a")), 0.02)
+            _settle(session, _reserve(session, 0.1, SpendAttribution(fp, "wf-b")), 0.03)
+            _reserve(session, 0.1, SpendAttribution("someone-else", "wf-c"))
+        return fp
+
+    def test_summary_scoped_to_caller(self, client, seeded):
+        resp = client.get("/api/llm/spend", headers={"Authorization": "Bearer test-token-xyz"})
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["calls"] == 2
+        assert body["spent_usd"] == pytest.approx(0.05)
+        assert body["remaining_usd"] == pytest.approx(0.95)
+        assert [w["workflow_id"] for w in body["workflows"]] == ["wf-a", "wf-b"]
+
+    def test_workflow_detail(self, client, seeded):
+        resp = client.get(
+            "/api/llm/spend/workflows/wf-a", headers={"Authorization": "Bearer test-token-xyz"},
+        )
+        assert resp.status_code == 200
+        assert resp.json()["entries"][0]["cost_usd"] == pytest.approx(0.02)
+
+    def test_other_users_workflow_is_404(self, client, seeded):
+        resp = client.get(
+            "/api/llm/spend/workflows/wf-c", headers={"Authorization": "Bearer test-token-xyz"},
+        )
+        assert resp.status_code == 404